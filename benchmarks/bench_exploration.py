@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Room coverage of frontier exploration against the greedy navigation loop.
+
+Runs navigate() (greedy) and navigate_explore() in the same random rooms
+(robot.simulation.random_room, one layout per seed) for a fixed simulated
+time. After every cycle it marks the room cells the ultrasonic sweep could
+see from the robot's true pose: rays across the scan angle, up to the
+sensor's range, stopped by walls and obstacles. Coverage is the fraction of
+the room's free floor seen so far; m²/min is the floor seen per simulated
+minute. Cycles and turns are counted until a run first reaches --target
+coverage; runs that never do are left out of those averages.
+
+Usage:
+    python benchmarks/bench_exploration.py [--seeds 16] [--minutes 4] [--target 0.8]
+"""
+
+import argparse
+import logging
+import math
+
+import numpy as np
+
+from robot.autonomous_navigation import AutonomousRobot
+from robot.config import GRID_MAX_RANGE, SCAN_ANGLE
+from robot.logger import logger
+from robot.simulation import SimulatedBackend, random_room
+
+RESOLUTION = 10  # cm per cell of the ground-truth coverage grid
+RAY_STEP = 5  # degrees between coverage rays
+CHECKPOINTS = (0.5, 1, 2, 4)  # minutes
+
+
+class Coverage:
+    """Cells of a room's free floor seen from the poses passed to observe()."""
+
+    def __init__(self, room):
+        self.room = room
+        xs = (np.arange(int(room.width // RESOLUTION)) + 0.5) * RESOLUTION
+        ys = (np.arange(int(room.height // RESOLUTION)) + 0.5) * RESOLUTION
+        self.floor = np.array([[room.clearance(x, y) > 0 for y in ys] for x in xs])
+        self.seen = np.zeros_like(self.floor)
+
+    def observe(self, pose):
+        x, y, heading = pose
+        rows, cols = self.floor.shape
+        for bearing in range(-SCAN_ANGLE, SCAN_ANGLE + 1, RAY_STEP):
+            theta = math.radians(heading + bearing)
+            t = np.arange(0.0, self.room.ray_distance(x, y, theta, GRID_MAX_RANGE), RESOLUTION / 2)
+            r = np.floor((x + t * math.cos(theta)) / RESOLUTION).astype(int)
+            c = np.floor((y + t * math.sin(theta)) / RESOLUTION).astype(int)
+            inside = (r >= 0) & (r < rows) & (c >= 0) & (c < cols)
+            self.seen[r[inside], c[inside]] = True
+
+    @property
+    def fraction(self):
+        return np.count_nonzero(self.seen & self.floor) / np.count_nonzero(self.floor)
+
+    @property
+    def area(self):
+        """m² of floor seen"""
+        return np.count_nonzero(self.seen & self.floor) * RESOLUTION ** 2 / 1e4
+
+
+def run(seed, mode, minutes, target):
+    room = random_room(seed)
+    backend = SimulatedBackend(room=room, seed=seed)
+    robot = AutonomousRobot(backend=backend)
+    world = backend.world
+    coverage = Coverage(room)
+    result = {'coverage': {}, 'area': {}, 'cycles': 0, 'turns': 0, 'reached': None}
+
+    turn = robot.turn
+
+    def counted_turn(*args, **kwargs):
+        result['turns'] += 1
+        return turn(*args, **kwargs)
+
+    robot.turn = counted_turn
+
+    def until():
+        coverage.observe(world.pose)
+        now = backend.clock.now() / 60
+        for checkpoint in CHECKPOINTS:
+            if now >= checkpoint and checkpoint not in result['coverage']:
+                result['coverage'][checkpoint] = coverage.fraction
+                result['area'][checkpoint] = coverage.area
+        if result['reached'] is None and coverage.fraction >= target:
+            result['reached'] = (result['cycles'], result['turns'], now)
+        result['cycles'] += 1
+        return now >= minutes
+
+    if mode == 'explore':
+        robot.navigate_explore(until=until)
+        result['memory'] = robot.explorer.history.memory
+    else:
+        robot.navigate(until=until)
+    robot.cleanup()
+    # An exploration that finished early keeps what it saw
+    for checkpoint in CHECKPOINTS:
+        result['coverage'].setdefault(checkpoint, coverage.fraction)
+        result['area'].setdefault(checkpoint, coverage.area)
+    result['collisions'] = world.collisions
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seeds', type=int, default=16)
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--minutes', type=float, default=4.0, help='Simulated time per run')
+    parser.add_argument('--target', type=float, default=0.8, help='Coverage to count cycles and turns to')
+    args = parser.parse_args()
+    logger.setLevel(logging.ERROR)
+    checkpoints = [checkpoint for checkpoint in CHECKPOINTS if checkpoint <= args.minutes]
+    seeds = range(args.first_seed, args.first_seed + args.seeds)
+    per_minute = 1 if 1 in checkpoints else checkpoints[0]
+
+    print(f"{args.seeds} rooms, {args.minutes:g} simulated minutes each")
+    print(f"{'mode':<8} " + ' '.join(f"{f'{checkpoint:g} min':>7}" for checkpoint in checkpoints)
+          + f" {'m²/min':>7} {f'to {args.target:.0%}':>7} {'cycles':>7} {'turns':>6} {'bumps':>6}")
+    for mode in ('greedy', 'explore'):
+        results = [run(seed, mode, args.minutes, args.target) for seed in seeds]
+        fractions = [np.mean([result['coverage'][checkpoint] for result in results]) for checkpoint in checkpoints]
+        rate = np.mean([result['area'][per_minute] / per_minute for result in results])
+        reached = [result['reached'] for result in results if result['reached'] is not None]
+        cycles = f"{np.mean([r[0] for r in reached]):.0f}" if reached else '-'
+        turns = f"{np.mean([r[1] for r in reached]):.0f}" if reached else '-'
+        print(f"{mode:<8} " + ' '.join(f"{fraction:>7.0%}" for fraction in fractions)
+              + f" {rate:>7.2f} {f'{len(reached)}/{len(results)}':>7} {cycles:>7} {turns:>6}"
+              + f" {np.mean([result['collisions'] for result in results]):>6.2f}")
+        if mode == 'explore':
+            memory = max(result['memory'] for result in results)
+            print(f"scan history: at most {memory / 1024:.0f} KB")
+    print(f"m²/min over the first {per_minute:g} min; cycles and turns until {args.target:.0%} coverage, "
+          f"for the runs that got there")
+
+
+if __name__ == '__main__':
+    main()
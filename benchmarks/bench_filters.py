@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Effect of sensor filtering on simulated room crossings.
+
+Runs the same reactive navigation episodes with and without the scan
+filters (per-heading Kalman filtering of distances, see robot.filters)
+against a simulator whose ultrasonic sensor returns a spurious echo for a
+fraction of its readings. Reports how often the goal was reached, the
+simulated time and cycles it took, and how many of the decisions were turns.
+
+Usage:
+    python benchmarks/bench_filters.py [--episodes 40] [--max-cycles 150] [--outliers 0.05]
+"""
+
+import argparse
+import logging
+
+import numpy as np
+
+import robot.simulation
+from robot.autonomous_navigation import AutonomousRobot
+from robot.config import GOAL_TOLERANCE
+from robot.logger import logger
+from robot.simulation import CircleObstacle, RectObstacle, Room, SimulatedBackend
+
+
+def make_room():
+    return Room(
+        width=400,
+        height=300,
+        obstacles=[CircleObstacle(150, 120, 20), CircleObstacle(250, 200, 25), RectObstacle(200, 0, 230, 80)],
+    )
+
+
+def run(filtered, seed, max_cycles):
+    backend = SimulatedBackend(room=make_room(), seed=seed)
+    robot = AutonomousRobot(backend=backend)
+    if not filtered:
+        robot.scan_filter_specs = {}
+        robot.scorer.remove_term('uncertainty')
+    turns = []
+    turn = robot.turn
+    robot.turn = lambda angle, wait=True: turns.append(angle) or turn(angle, wait)
+    cycles = []
+    check = robot.check_battery
+    robot.check_battery = lambda: cycles.append(1) or check()
+    world = backend.world
+    robot.navigate(max_cycles=max_cycles, until=lambda: world.distance_to_goal() < GOAL_TOLERANCE)
+    reached = world.distance_to_goal() < GOAL_TOLERANCE
+    rejected = sum(getattr(f, 'rejected', 0) for f in robot.scan_filters.values())
+    return reached, robot.clock.now(), len(cycles), len(turns), world.collisions, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--episodes', type=int, default=40)
+    parser.add_argument('--max-cycles', type=int, default=150)
+    parser.add_argument('--outliers', type=float, default=0.05,
+                        help='Chance of a spurious ultrasonic echo per reading')
+    args = parser.parse_args()
+    logger.setLevel(logging.WARNING)
+    robot.simulation.SIM_OUTLIER_PROBABILITY = args.outliers
+
+    print(f"{'filters':>8} {'reached':>8} {'time (s)':>9} {'cycles':>7} {'turns':>6} "
+          f"{'turns/m':>8} {'collisions':>10} {'rejected':>9}")
+    for filtered in (False, True):
+        results = np.array([run(filtered, seed, args.max_cycles) for seed in range(args.episodes)], dtype=float)
+        reached = results[:, 0] > 0
+        done = results[reached]
+        # Straight-line distance from the start to the goal, in metres
+        metres = SimulatedBackend(room=make_room()).world.distance_to_goal() / 100
+        label = 'on' if filtered else 'off'
+        print(f"{label:>8} {int(reached.sum()):>4}/{args.episodes:<3} {done[:, 1].mean():>9.1f} "
+              f"{done[:, 2].mean():>7.1f} {done[:, 3].mean():>6.1f} {done[:, 3].mean() / metres:>8.1f} "
+              f"{int(results[:, 4].sum()):>10} {int(results[:, 5].sum()):>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Monte Carlo navigation benchmark on random rooms, in parallel.
+
+Runs navigation episodes on randomly generated rooms (robot.simulation.
+random_room, one layout per seed) across a process pool, and reports the
+success rate, time to goal, collisions, cycles per episode and decisions per
+second. The results, with every episode, can be saved as JSON and compared
+against a run of another commit; only seeds present in both are compared, so
+both sides navigate the same rooms.
+
+Usage:
+    python benchmarks/bench_montecarlo.py [--episodes 1000] [--mode reactive] [--workers N]
+                                          [--output results.json] [--compare baseline.json]
+
+    git checkout main && python benchmarks/bench_montecarlo.py --output main.json
+    git checkout my-branch && python benchmarks/bench_montecarlo.py --compare main.json
+"""
+
+import argparse
+import logging
+
+from robot.logger import logger
+from robot.montecarlo import MODES, format_comparison, format_summary, load_results, run_episodes, save_results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--episodes', type=int, default=1000)
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--mode', choices=MODES, default='reactive')
+    parser.add_argument('--max-cycles', type=int, default=300)
+    parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--compare', metavar='BASELINE', help='Compare against results saved with --output')
+    args = parser.parse_args()
+    logger.setLevel(logging.ERROR)
+
+    baseline = load_results(args.compare) if args.compare else None
+    results = run_episodes(range(args.first_seed, args.first_seed + args.episodes), args.mode,
+                           args.max_cycles, args.workers)
+    print(format_summary(results))
+    if args.output:
+        save_results(args.output, results)
+    if baseline is not None:
+        print()
+        print(format_comparison(baseline, results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Planner timing on random obstacle grids.
+
+For each grid size this reports:
+  - A* from scratch
+  - D* Lite initial plan
+  - D* Lite incremental replan after the robot advances and a small obstacle
+    appears on its path, versus A* replanning the same change from scratch
+
+Usage:
+    python benchmarks/bench_planner.py [--sizes 100 250 500 1000] [--density 0.2]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from robot.planner import DStarLite, astar
+
+
+def random_room(size, density, rng):
+    """Scattered 3x3 obstacles covering roughly `density` of the grid."""
+    blocked = np.zeros((size, size), dtype=bool)
+    count = int(size * size * density / 9)
+    rows = rng.integers(0, size - 2, count)
+    cols = rng.integers(0, size - 2, count)
+    for dr in range(3):
+        for dc in range(3):
+            blocked[rows + dr, cols + dc] = True
+    blocked[:3, :3] = False
+    blocked[-3:, -3:] = False
+    return blocked
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 250, 500, 1000])
+    parser.add_argument('--density', type=float, default=0.2, help='Fraction of blocked cells')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'grid':>11} {'A* (ms)':>10} {'D* init (ms)':>13} {'D* replan (ms)':>15} "
+          f"{'A* replan (ms)':>15} {'path':>6}")
+    for size in args.sizes:
+        blocked = random_room(size, args.density, rng)
+        start, goal = (0, 0), (size - 1, size - 1)
+
+        path, astar_time = timed(astar, blocked, start, goal)
+        if path is None:
+            print(f"{size:>5}x{size:<5} unreachable, try another --seed")
+            continue
+
+        planner = DStarLite(blocked, start, goal)
+        _, init_time = timed(planner.plan)
+
+        # The robot advances a few cells and a new obstacle blocks its path
+        new_start = path[min(5, len(path) - 1)]
+        row, col = path[len(path) // 3]
+        changed = blocked.copy()
+        changed[max(row - 1, 0):row + 2, max(col - 1, 0):col + 2] = True
+        changed[new_start] = False
+
+        def replan():
+            planner.move_start(new_start)
+            planner.update_map(changed)
+            return planner.plan()
+
+        _, replan_time = timed(replan)
+        _, astar_replan_time = timed(astar, changed, new_start, goal)
+
+        print(f"{size:>5}x{size:<5} {astar_time * 1000:>10.1f} {init_time * 1000:>13.1f} "
+              f"{replan_time * 1000:>15.1f} {astar_replan_time * 1000:>15.1f} {len(path):>6}")
+
+
+if __name__ == '__main__':
+    main()
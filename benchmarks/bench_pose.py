@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Effect of pose estimation and closed-loop motion on simulated room crossings.
+
+Runs the same episodes with the old open-loop motion (pure dead reckoning,
+turns at TURN_SPEED) and with scan-matched pose estimation and the
+calibrated, faster trapezoidal turns, against a simulator whose wheels run
+a few percent fast or slow and slip at every start. Reports how often the
+goal was reached, the simulated time it took, turns and corrective turns
+(a turn straight after another turn) per metre, and the heading error of
+the robot's own pose at the end.
+
+Both the reactive navigator and the planned one (which steers by its pose
+towards a goal) are run.
+
+Usage:
+    python benchmarks/bench_pose.py [--episodes 30] [--max-cycles 150]
+                                    [--gain-error 0.05] [--slip 0.02]
+"""
+
+import argparse
+import logging
+import math
+
+import numpy as np
+
+import robot.simulation
+from robot.autonomous_navigation import AutonomousRobot
+from robot.config import GOAL_TOLERANCE, TURN_SPEED
+from robot.logger import logger
+from robot.simulation import CircleObstacle, RectObstacle, Room, SimulatedBackend
+
+
+def make_room():
+    return Room(
+        width=400,
+        height=300,
+        obstacles=[CircleObstacle(150, 120, 20), CircleObstacle(250, 200, 25), RectObstacle(200, 0, 230, 80)],
+    )
+
+
+def run(closed_loop, mode, seed, max_cycles):
+    room = make_room()
+    backend = SimulatedBackend(room=room, seed=seed)
+    robot = AutonomousRobot(backend=backend)
+    if not closed_loop:
+        robot.pose_estimator.matching = False
+        robot.turn_max_speed = TURN_SPEED
+
+    moves = []
+    turn, move_forward = robot.turn, robot.move_forward
+    robot.turn = lambda angle, wait=True: moves.append('turn') or turn(angle, wait)
+    robot.move_forward = lambda *args, **kwargs: moves.append('forward') or move_forward(*args, **kwargs)
+
+    world = backend.world
+    if mode == 'planned':
+        # The goal in the robot's starting frame
+        start_x, start_y, _ = room.start
+        goal = (room.goal[0] - start_x, room.goal[1] - start_y)
+        robot.navigate_planned(goal=goal, max_cycles=max_cycles)
+    else:
+        robot.navigate(max_cycles=max_cycles, until=lambda: world.distance_to_goal() < GOAL_TOLERANCE)
+
+    turns = moves.count('turn')
+    corrective = sum(1 for previous, move in zip(moves, moves[1:]) if previous == move == 'turn')
+    metres = max(world.distance_travelled / 100, 0.1)
+    heading_error = abs((robot.pose[2] - (world.heading - room.start[2]) + 180) % 360 - 180)
+    return (world.distance_to_goal() < GOAL_TOLERANCE, robot.clock.now(), turns / metres, corrective / metres,
+            heading_error, world.collisions)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--episodes', type=int, default=30)
+    parser.add_argument('--max-cycles', type=int, default=150)
+    parser.add_argument('--gain-error', type=float, default=0.05,
+                        help='Standard deviation of each wheel\'s speed error')
+    parser.add_argument('--slip', type=float, default=0.02,
+                        help='Standard deviation of the extra speed error at every start')
+    args = parser.parse_args()
+    logger.setLevel(logging.ERROR)
+    robot.simulation.SIM_WHEEL_GAIN_ERROR = args.gain_error
+    robot.simulation.SIM_WHEEL_SLIP = args.slip
+
+    print(f"{'mode':>8} {'motion':>12} {'reached':>8} {'time (s)':>9} {'turns/m':>8} "
+          f"{'corr./m':>8} {'heading err':>12} {'collisions':>11}")
+    for mode in ('reactive', 'planned'):
+        for closed_loop in (False, True):
+            results = np.array([run(closed_loop, mode, seed, args.max_cycles) for seed in range(args.episodes)])
+            reached = int(results[:, 0].sum())
+            print(f"{mode:>8} {'closed-loop' if closed_loop else 'open-loop':>12} "
+                  f"{reached:>5}/{args.episodes:<2} {results[:, 1].mean():>9.1f} {results[:, 2].mean():>8.2f} "
+                  f"{results[:, 3].mean():>8.2f} {results[:, 4].mean():>11.1f}° {int(results[:, 5].sum()):>11}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Cost of the navigation loop profiler.
+
+Times an empty stage (enter and exit of LoopProfiler.stage()) and a loop
+tick with profiling disabled and enabled, then runs the same simulated
+navigation episodes with profiling off and on and reports the wall-clock
+time per cycle, and the stage table of the profiled run.
+
+Usage:
+    python benchmarks/bench_profiling.py [--iterations 200000] [--cycles 100] [--episodes 5]
+"""
+
+import argparse
+import logging
+import time
+
+from robot.autonomous_navigation import AutonomousRobot
+from robot.logger import logger
+from robot.profiling import LoopProfiler
+from robot.simulation import SimulatedBackend
+
+
+def stage_cost(enabled, iterations):
+    """Seconds per empty stage, and per tick"""
+    profiler = LoopProfiler(enabled=enabled, dump_interval=None)
+    stage = profiler.stage
+    start = time.perf_counter()
+    for _ in range(iterations):
+        with stage('scan'):
+            pass
+    stage_time = (time.perf_counter() - start) / iterations
+    start = time.perf_counter()
+    for _ in range(iterations):
+        profiler.tick()
+    return stage_time, (time.perf_counter() - start) / iterations
+
+
+def navigation_cost(enabled, episodes, cycles):
+    """Wall-clock seconds per simulated navigation cycle, and the last profiler"""
+    elapsed = 0.0
+    for seed in range(episodes):
+        robot = AutonomousRobot(backend=SimulatedBackend(seed=seed))
+        robot.profiler.path = None
+        robot.profiler.enabled = enabled
+        start = time.perf_counter()
+        robot.navigate(max_cycles=cycles)
+        elapsed += time.perf_counter() - start
+    return elapsed / (episodes * cycles), robot.profiler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200000)
+    parser.add_argument('--cycles', type=int, default=100)
+    parser.add_argument('--episodes', type=int, default=5)
+    args = parser.parse_args()
+    logger.setLevel(logging.ERROR)
+
+    print(f"{'profiling':>10} {'stage (ns)':>11} {'tick (ns)':>10} {'cycle (ms)':>11}")
+    profiled = None
+    for enabled in (False, True):
+        stage_time, tick_time = stage_cost(enabled, args.iterations)
+        cycle_time, profiler = navigation_cost(enabled, args.episodes, args.cycles)
+        if enabled:
+            profiled = profiler
+        print(f"{'on' if enabled else 'off':>10} {stage_time * 1e9:>11.0f} {tick_time * 1e9:>10.0f} "
+              f"{cycle_time * 1000:>11.3f}")
+    print()
+    print(profiled.summary())
+
+
+if __name__ == '__main__':
+    main()
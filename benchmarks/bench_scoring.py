@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: original tuple-list find_best_direction versus the
+vectorized DirectionScorer, for increasing scan resolutions.
+
+Usage:
+    python benchmarks/bench_scoring.py [--repeat 200]
+"""
+
+import argparse
+import timeit
+
+import numpy as np
+
+from robot.scoring import DirectionScorer, ScanResult
+
+
+def legacy_best_direction(distances, light_levels, safe_distance=25, target_light_level=0.5):
+    """The original implementation of AutonomousRobot.find_best_direction."""
+    combined_scores = []
+    for (angle, distance), (_, light) in zip(distances, light_levels):
+        distance_score = min(distance / safe_distance, 1.0)
+        light_score = abs(light - target_light_level)
+        combined_score = distance_score * (1 - light_score)
+        combined_scores.append((angle, combined_score))
+    return max(combined_scores, key=lambda x: x[1])
+
+
+def make_scan(bins, rng):
+    angles = np.linspace(-45, 45, bins)
+    distances = rng.uniform(5, 150, bins)
+    light_levels = rng.uniform(0, 1, bins)
+    return angles, distances, light_levels
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=200, help='Calls per measurement')
+    parser.add_argument('--bins', type=int, nargs='+', default=[7, 91, 361, 1441])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'bins':>6} {'legacy (us)':>12} {'vector (us)':>12} {'vector+footprint (us)':>22}")
+    for bins in args.bins:
+        angles, distances, light_levels = make_scan(bins, rng)
+        distance_pairs = list(zip(angles.tolist(), distances.tolist()))
+        light_pairs = list(zip(angles.tolist(), light_levels.tolist()))
+        scan = ScanResult(angles, distances, light_levels)
+
+        plain = DirectionScorer(robot_width=0, candidates=bins, heading_weight=0)
+        full = DirectionScorer(candidates=bins)
+
+        legacy = timeit.timeit(lambda: legacy_best_direction(distance_pairs, light_pairs), number=args.repeat)
+        vector = timeit.timeit(lambda: plain.score(scan), number=args.repeat)
+        footprint = timeit.timeit(lambda: full.score(scan), number=args.repeat)
+        scale = 1e6 / args.repeat
+        print(f"{bins:>6} {legacy * scale:>12.1f} {vector * scale:>12.1f} {footprint * scale:>22.1f}")
+
+
+if __name__ == '__main__':
+    main()
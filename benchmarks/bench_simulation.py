@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Simulated navigation throughput on a single core.
+
+Runs reactive navigation episodes against the simulated backend with a
+virtual clock and reports how many episodes per minute a laptop can do.
+
+Usage:
+    python benchmarks/bench_simulation.py [--episodes 50] [--max-cycles 150]
+"""
+
+import argparse
+import logging
+import time
+
+from robot.autonomous_navigation import AutonomousRobot
+from robot.config import GOAL_TOLERANCE
+from robot.logger import logger
+from robot.simulation import CircleObstacle, RectObstacle, Room, SimulatedBackend
+
+
+def make_room():
+    return Room(
+        width=400,
+        height=300,
+        obstacles=[CircleObstacle(150, 120, 20), CircleObstacle(250, 200, 25), RectObstacle(200, 0, 230, 80)],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--episodes', type=int, default=50)
+    parser.add_argument('--max-cycles', type=int, default=150)
+    args = parser.parse_args()
+    logger.setLevel(logging.WARNING)
+
+    simulated = 0.0
+    reached = 0
+    start = time.perf_counter()
+    for seed in range(args.episodes):
+        backend = SimulatedBackend(room=make_room(), seed=seed)
+        robot = AutonomousRobot(backend=backend)
+        world = backend.world
+        robot.navigate(max_cycles=args.max_cycles, until=lambda: world.distance_to_goal() < GOAL_TOLERANCE)
+        simulated += robot.clock.now()
+        reached += world.distance_to_goal() < GOAL_TOLERANCE
+    elapsed = time.perf_counter() - start
+
+    print(f"episodes:            {args.episodes}")
+    print(f"wall time:           {elapsed:.2f} s")
+    print(f"simulated time:      {simulated:.0f} s ({simulated / elapsed:.0f}x real time)")
+    print(f"episodes per minute: {args.episodes / elapsed * 60:.0f} per core")
+    print(f"reached goal:        {reached}/{args.episodes}")
+
+
+if __name__ == '__main__':
+    main()
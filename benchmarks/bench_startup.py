@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Startup cost: import time of the package and time to the first motor command.
+
+Two measurements, each in fresh interpreters:
+
+- An `python -X importtime` report of `import robot.cli`, listing the
+  slowest imports by cumulative time.
+- The time from launching `robot test --component motors`-style startup
+  (import the CLI, create the robot, drive the motors once) to the motors
+  receiving their first command, minus the time to start a bare interpreter.
+
+Runs on the simulator backend. Pass --budget to fail (exit status 1) when
+the median time to the first motor command exceeds it, so startup
+regressions are caught.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 10] [--top 15] [--budget MS]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+
+FIRST_MOTOR_COMMAND = """
+import robot.cli
+from robot import AutonomousRobot
+robot = AutonomousRobot()
+robot.move_motor(0.1, 0.1)
+print('moved', flush=True)
+robot.stop()
+"""
+
+BASELINE = "print('moved', flush=True)"
+
+
+def environment():
+    env = dict(os.environ, ROBOT_BACKEND='sim', ROBOT_LOG_FILE='')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [SRC, env.get('PYTHONPATH')]))
+    return env
+
+
+def import_times(module):
+    """(self us, cumulative us, name) for every import made by importing module."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            env=environment(), capture_output=True, text=True, check=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(own), int(cumulative), name.rstrip()))
+    return rows
+
+
+def time_to_marker(code):
+    """Seconds from launching an interpreter running code to it printing 'moved'."""
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', code], env=environment(),
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    elapsed = None
+    for line in process.stdout:
+        if line.strip() == 'moved':
+            elapsed = time.perf_counter() - start
+            break
+    process.stdout.read()
+    if process.wait() != 0 or elapsed is None:
+        raise RuntimeError("startup script failed")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=10, help='Interpreter launches per measurement')
+    parser.add_argument('--top', type=int, default=15, help='Imports to list')
+    parser.add_argument('--budget', type=float, help='Fail if the first motor command takes longer (ms)')
+    args = parser.parse_args()
+
+    rows = import_times('robot.cli')
+    total = sum(own for own, _, _ in rows)
+    print(f"import robot.cli: {total / 1000:.1f} ms in {len(rows)} modules")
+    print(f"{'self (ms)':>10} {'cumulative (ms)':>16}  module")
+    for own, cumulative, name in sorted(rows, key=lambda row: -row[1])[:args.top]:
+        print(f"{own / 1000:>10.1f} {cumulative / 1000:>16.1f}  {name}")
+    heavy = sorted({name.strip().split('.')[0] for _, _, name in rows} & {'cv2', 'paramiko', 'numpy'})
+    print(f"heavy dependencies imported: {', '.join(heavy) or 'none'}")
+    print()
+
+    baseline = np.array([time_to_marker(BASELINE) for _ in range(args.runs)]) * 1000
+    startup = np.array([time_to_marker(FIRST_MOTOR_COMMAND) for _ in range(args.runs)]) * 1000
+    print(f"{'':>22} {'p50 (ms)':>9} {'min (ms)':>9} {'max (ms)':>9}")
+    for label, result in (('bare interpreter', baseline), ('first motor command', startup)):
+        print(f"{label:>22} {np.median(result):>9.1f} {result.min():>9.1f} {result.max():>9.1f}")
+    overhead = np.median(startup) - np.median(baseline)
+    print(f"robot startup overhead: {overhead:.1f} ms")
+
+    if args.budget is not None and np.median(startup) > args.budget:
+        print(f"FAIL: first motor command after {np.median(startup):.1f} ms, budget {args.budget:.1f} ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
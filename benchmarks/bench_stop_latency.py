@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Emergency-stop latency: synchronous navigate() versus the asyncio navigator.
+
+Runs the simulator on the wall clock with loud noises at random times. For
+every noise that starts while the wheels are turning, the latency is the time
+from the noise starting to the motors stopping. The synchronous loop only
+checks the sound sensor between scan and move, so it usually finishes the
+current move first; the async watchdog cancels the move.
+
+Usage:
+    python benchmarks/bench_stop_latency.py [--seconds 20] [--events 15]
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+
+import numpy as np
+
+from robot.async_navigation import AsyncNavigator
+from robot.autonomous_navigation import AutonomousRobot
+from robot.hardware import RealClock
+from robot.simulation import SimulatedBackend
+
+
+def schedule_noises(backend, seconds, events, duration, rng):
+    """Add noise events and note whether the robot was moving when each began."""
+    world = backend.world
+    now = backend.clock.now()
+    starts = sorted(now + 1.0 + rng.random() * (seconds - 2.0) for _ in range(events))
+    moving = {}
+
+    def probe(start):
+        moving[start] = world.left_speed != 0 or world.right_speed != 0
+
+    timers = []
+    for start in starts:
+        world.room.sound_events.append((start, start + duration))
+        timer = threading.Timer(start - now, probe, args=(start,))
+        timer.start()
+        timers.append(timer)
+    return starts, moving, timers
+
+
+def latencies(world, starts, moving):
+    result = []
+    for start in starts:
+        if not moving.get(start):
+            continue
+        stops = [t for t in world.stop_times if t >= start]
+        if stops:
+            result.append(stops[0] - start)
+    return np.array(result) * 1000
+
+
+def run(mode, args):
+    backend = SimulatedBackend(clock=RealClock(), seed=args.seed)
+    robot = AutonomousRobot(backend=backend)
+    rng = random.Random(args.seed)
+    starts, moving, timers = schedule_noises(backend, args.seconds, args.events, args.noise, rng)
+    end = backend.clock.now() + args.seconds
+    if mode == 'sync':
+        robot.navigate(until=lambda: backend.clock.now() >= end)
+    else:
+        navigator = AsyncNavigator(robot)
+
+        async def until_end():
+            task = asyncio.ensure_future(navigator.run())
+            await asyncio.sleep(end - backend.clock.now())
+            navigator._done = True
+            await task
+
+        asyncio.run(until_end())
+    for timer in timers:
+        timer.cancel()
+    return latencies(backend.world, starts, moving)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=20.0, help='Wall-clock run time per mode')
+    parser.add_argument('--events', type=int, default=15, help='Noises per run')
+    parser.add_argument('--noise', type=float, default=0.3, help='Length of each noise in seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'mode':>6} {'events':>7} {'mean (ms)':>10} {'p50 (ms)':>9} {'p95 (ms)':>9} {'max (ms)':>9}")
+    for mode in ('sync', 'async'):
+        result = run(mode, args)
+        if not len(result):
+            print(f"{mode:>6} {0:>7}  no noises landed during a move, try more --events")
+            continue
+        print(f"{mode:>6} {len(result):>7} {result.mean():>10.1f} {np.percentile(result, 50):>9.1f} "
+              f"{np.percentile(result, 95):>9.1f} {result.max():>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
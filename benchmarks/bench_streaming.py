@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Cost and throughput of live telemetry streaming over loopback.
+
+Times TelemetryPublisher.publish() per call (what the control loop pays),
+then streams from several publishers at once, each at an unlimited rate
+with a full-size scan, into one GroundStation, and reports frames sent,
+dropped by the publishers, received, and missing at the station per second.
+
+Usage:
+    python benchmarks/bench_streaming.py [--iterations 20000] [--robots 4] [--seconds 2] [--bins 37]
+"""
+
+import argparse
+import logging
+import threading
+import time
+
+import numpy as np
+
+from robot.logger import logger
+from robot.scoring import DirectionScorer, ScanResult
+from robot.streaming import GroundStation, TelemetryPublisher
+
+
+def make_scan(bins):
+    angles = np.linspace(-90, 90, bins)
+    scan = ScanResult(angles, 100 + 50 * np.sin(np.radians(angles)), np.full(bins, 0.5))
+    return scan, DirectionScorer().score(scan)
+
+
+def publish_cost(address, iterations, scan, profile):
+    """Seconds per publish() call"""
+    publisher = TelemetryPublisher(address, robot_id='bench', rate=1e9, min_rate=1e9)
+    stages = {'scan': 0.05, 'score': 0.001, 'motion': 0.5}
+    start = time.perf_counter()
+    for _ in range(iterations):
+        publisher.publish((1.0, 2.0, 3.0), (0.5, 0.5), scan, profile, stages)
+    elapsed = time.perf_counter() - start
+    publisher.close()
+    return elapsed / iterations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=20000)
+    parser.add_argument('--robots', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=2.0)
+    parser.add_argument('--bins', type=int, default=37, help='Scan bins per frame')
+    args = parser.parse_args()
+    logger.setLevel(logging.ERROR)
+    scan, profile = make_scan(args.bins)
+
+    with GroundStation('127.0.0.1', 0) as station:
+        print(f"publish(): {publish_cost(station.address, args.iterations, scan, profile) * 1e6:.1f} us per call")
+        station.robots.clear()
+
+        publishers = [TelemetryPublisher(station.address, robot_id=f'robot-{index}', rate=1e9, min_rate=1e9)
+                      for index in range(args.robots)]
+        stop = threading.Event()
+
+        def drive(publisher):
+            while not stop.is_set():
+                publisher.publish((1.0, 2.0, 3.0), (0.5, 0.5), scan, profile)
+                time.sleep(0)
+
+        threads = [threading.Thread(target=drive, args=(publisher,)) for publisher in publishers]
+        for thread in threads:
+            thread.start()
+        started = time.perf_counter()
+        received = 0
+        while time.perf_counter() - started < args.seconds:
+            received += len(station.receive(0.05))
+        stop.set()
+        for thread in threads:
+            thread.join()
+        for publisher in publishers:
+            publisher.close()
+        elapsed = time.perf_counter() - started
+        received += len(station.receive(0.1))
+        lost = sum(track.lost for track in station.robots.values())
+
+    sent = sum(publisher.sent for publisher in publishers)
+    dropped = sum(publisher.dropped for publisher in publishers)
+    print(f"{args.robots} robots, {args.bins}-bin scans, {elapsed:.1f} s:")
+    print(f"  sent {sent / elapsed:,.0f} frames/s, dropped {dropped / elapsed:,.0f} frames/s, "
+          f"received {received / elapsed:,.0f} frames/s, sequence gaps {lost / elapsed:,.0f} frames/s (dropped or lost)")
+
+
+if __name__ == '__main__':
+    main()
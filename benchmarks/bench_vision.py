@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Camera frame pipeline throughput and latency.
+
+Feeds synthetic frames (a floor with box-shaped obstacles) through the
+shared-memory ring and vision worker process at the camera frame rate, and
+reports:
+  - sustained frames captured and processed per second
+  - frames the worker skipped because it fell behind
+  - end-to-end latency from capture to features being readable
+  - the per-frame cost of the features if run in-process instead
+
+Usage:
+    python benchmarks/bench_vision.py [--seconds 10] [--resolution 640 480] [--fps 30]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from robot.vision import FramePipeline, frame_features
+
+
+class SyntheticCamera:
+    """Cycles through pre-rendered frames, like a camera with a frame buffer."""
+
+    def __init__(self, width, height, count=8, seed=0):
+        rng = np.random.default_rng(seed)
+        rows = np.linspace(60, 160, height, dtype=np.float32)[:, None]
+        self.frames = []
+        for _ in range(count):
+            frame = np.broadcast_to(rows, (height, width)).astype(np.uint8)
+            frame = np.repeat(frame[:, :, None], 3, axis=2)
+            for _ in range(rng.integers(1, 4)):
+                x = rng.integers(0, width - width // 6)
+                y = rng.integers(height // 3, height - height // 6)
+                frame[y:y + height // 6, x:x + width // 6] = rng.integers(180, 255)
+            frame += rng.integers(0, 8, frame.shape, dtype=np.uint8)
+            self.frames.append(frame)
+        self.index = 0
+
+    def get_frame(self):
+        self.index = (self.index + 1) % len(self.frames)
+        return self.frames[self.index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seconds', type=float, default=10.0, help='Measured run time')
+    parser.add_argument('--warmup', type=float, default=2.0, help='Seconds to let the worker start')
+    parser.add_argument('--resolution', type=int, nargs=2, default=(640, 480), metavar=('W', 'H'))
+    parser.add_argument('--fps', type=float, default=30.0)
+    args = parser.parse_args()
+
+    width, height = args.resolution
+    camera = SyntheticCamera(width, height)
+
+    start = time.perf_counter()
+    for frame in camera.frames * 10:
+        frame_features(frame)
+    in_process = (time.perf_counter() - start) / (len(camera.frames) * 10)
+
+    pipeline = FramePipeline(camera, framerate=args.fps)
+    pipeline.start()
+    try:
+        time.sleep(args.warmup)
+        before = pipeline.stats()
+        pipeline.latencies = []
+        start = time.monotonic()
+        while time.monotonic() - start < args.seconds:
+            pipeline.latest()
+            time.sleep(0.001)
+        after = pipeline.stats()
+        elapsed = time.monotonic() - start
+    finally:
+        pipeline.stop()
+
+    latencies = np.array(pipeline.latencies) * 1000
+    print(f"resolution:          {width}x{height} @ {args.fps:g} fps")
+    print(f"captured:            {(after['captured'] - before['captured']) / elapsed:.1f} fps")
+    print(f"processed:           {(after['processed'] - before['processed']) / elapsed:.1f} fps")
+    print(f"skipped:             {after['skipped'] - before['skipped']}")
+    print(f"latency p50/p95/max: {np.percentile(latencies, 50):.1f} / "
+          f"{np.percentile(latencies, 95):.1f} / {latencies.max():.1f} ms")
+    print(f"in-process features: {in_process * 1000:.2f} ms per frame")
+
+
+if __name__ == '__main__':
+    main()
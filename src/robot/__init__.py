@@ -3,10 +3,30 @@ Autonomous Navigation Robot Package
 
 This package provides the core functionality for autonomous robot navigation
 using Pi-top 4 or standard Raspberry Pi hardware.
+
+The public names are imported on first use, so `import robot` (and the CLI)
+does not pay for numpy, OpenCV or paramiko until they are needed.
 """
 
-from .autonomous_navigation import AutonomousRobot
-from .connect_to_pi import connect_to_raspberry_pi
+import importlib
 
 __version__ = '1.0.0'
-__all__ = ['AutonomousRobot', 'connect_to_raspberry_pi'] 
\ No newline at end of file
+__all__ = ['AutonomousRobot', 'connect_to_raspberry_pi']
+
+# Public name -> module it is defined in
+_LAZY = {
+    'AutonomousRobot': '.autonomous_navigation',
+    'connect_to_raspberry_pi': '.connect_to_pi',
+}
+
+
+def __getattr__(name):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(_LAZY[name], __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
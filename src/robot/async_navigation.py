@@ -0,0 +1,206 @@
+"""
+asyncio-based navigation loop for the autonomous robot.
+
+The synchronous navigate() loop only checks the sound sensor once per
+cycle, after a blocking scan and before a blocking move, so a loud noise can
+go unnoticed for over a second. AsyncNavigator runs the control loop
+(scan -> score -> move), a battery monitor and an emergency watchdog as
+concurrent tasks. Moves are MotionScheduler futures that the watchdog can
+cancel, and the motors are stopped from the watchdog itself, so the stop latency is
+bounded by the watchdog period rather than by the length of a move.
+
+Blocking device reads run on worker threads: the scan and battery checks
+share one, and the watchdog has its own so it never queues behind a sweep.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from .config import (
+    BATTERY_CHECK_INTERVAL,
+    EMERGENCY_STOP_DURATION,
+    SAMPLER_ENABLED,
+    SOUND_THRESHOLD,
+    VISION_ENABLED,
+    WATCHDOG_CENTER_SERVO,
+    WATCHDOG_INTERVAL,
+    WATCHDOG_OBSTACLE_ANGLE,
+    WATCHDOG_OBSTACLE_DISTANCE,
+)
+from .logger import logger
+
+
+class AsyncNavigator:
+    """Concurrent control loop, battery monitor and emergency watchdog."""
+
+    def __init__(self, robot, watchdog_interval=WATCHDOG_INTERVAL,
+                 battery_interval=BATTERY_CHECK_INTERVAL):
+        """
+        Args:
+            robot (AutonomousRobot): Robot to drive; needs a real-time clock
+            watchdog_interval (float): Seconds between watchdog checks
+            battery_interval (float): Seconds between battery checks
+        """
+        if not robot.clock.realtime:
+            raise ValueError("AsyncNavigator needs a real-time clock")
+        self.robot = robot
+        self.watchdog_interval = watchdog_interval
+        self.battery_interval = battery_interval
+        self.stop_latencies = []
+        self.cycles = 0
+        self._motion = None
+        self._moving_forward = False
+        self._emergency_until = 0.0
+        self._done = False
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix='nav-io')
+        self._watch_io = ThreadPoolExecutor(max_workers=1, thread_name_prefix='nav-watchdog')
+
+    async def _run_in(self, executor, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+    def _in_emergency(self):
+        return time.monotonic() < self._emergency_until
+
+    def emergency_stop(self, reason, detected_at=None):
+        """
+        Stop the motors now and cancel whatever motion is in flight.
+
+        Args:
+            reason (str): Logged with the warning
+            detected_at (float): time.perf_counter() when the condition was seen
+        """
+        detected_at = time.perf_counter() if detected_at is None else detected_at
+        if self._motion is not None and not self._motion.done():
+            self._motion.cancel()
+        self.robot.stop()
+        self.stop_latencies.append(time.perf_counter() - detected_at)
+        if not self._in_emergency():
+            logger.warning(f"Emergency stop: {reason}")
+        self._emergency_until = time.monotonic() + EMERGENCY_STOP_DURATION
+
+    async def move_forward(self, duration=None):
+        """Cancellable version of AutonomousRobot.move_forward."""
+        robot = self.robot
+        self._moving_forward = True
+        if WATCHDOG_CENTER_SERVO:
+            # Point the ultrasonic ahead so the watchdog can see obstacles
+            robot.set_servo_angle(0)
+        try:
+            await asyncio.wrap_future(robot.move_forward(duration, wait=False))
+        finally:
+            self._moving_forward = False
+
+    async def turn(self, angle):
+        """Cancellable version of AutonomousRobot.turn."""
+        await asyncio.wrap_future(self.robot.turn(angle, wait=False))
+
+    async def _control_loop(self, max_cycles):
+        robot = self.robot
+        while not self._done and (max_cycles is None or self.cycles < max_cycles):
+            if self._in_emergency():
+                await asyncio.sleep(self.watchdog_interval)
+                continue
+            self.cycles += 1
+
+            distances, light_levels = await self._run_in(self._io, robot.scan_environment)
+            if self._done or self._in_emergency():
+                continue
+            best_angle, best_score = robot.find_best_direction(distances, light_levels)
+
+            if best_score > 0.5:
+                self._motion = asyncio.ensure_future(self.move_forward())
+            else:
+                self._motion = asyncio.ensure_future(self.turn(robot.avoidance_angle(best_angle)))
+            # wait() rather than await so a cancelled move does not cancel us
+            await asyncio.wait({self._motion})
+            self._motion = None
+            robot.publish_stream()
+
+            await asyncio.sleep(robot.scan_interval)
+
+    async def _watchdog(self):
+        robot = self.robot
+        while not self._done:
+            sound_level = await self._run_in(self._watch_io, robot.get_sound_level)
+            detected_at = time.perf_counter()
+            if sound_level > SOUND_THRESHOLD:
+                self.emergency_stop("Loud sound detected!", detected_at)
+            elif self._moving_forward and abs(robot.servo_target) <= WATCHDOG_OBSTACLE_ANGLE:
+                distance = await self._run_in(self._watch_io, robot.get_distance)
+                detected_at = time.perf_counter()
+                if self._moving_forward and distance < WATCHDOG_OBSTACLE_DISTANCE:
+                    self.emergency_stop(f"Obstacle at {distance:.0f} cm", detected_at)
+            await asyncio.sleep(self.watchdog_interval)
+
+    async def _battery_monitor(self):
+        while not self._done:
+            if not await self._run_in(self._io, self.robot.check_battery):
+                logger.error("Critical battery level detected. Stopping navigation.")
+                self._done = True
+                self.emergency_stop("Critical battery")
+                break
+            await asyncio.sleep(self.battery_interval)
+
+    async def run(self, max_cycles=None):
+        """
+        Navigate until interrupted, the battery runs out or max_cycles is reached.
+
+        Args:
+            max_cycles (int): Stop after this many control cycles
+        """
+        robot = self.robot
+        logger.info("Starting asyncio navigation...")
+        if SAMPLER_ENABLED:
+            robot.start_sampler()
+        if VISION_ENABLED:
+            robot.start_vision()
+        watchdog = asyncio.ensure_future(self._watchdog())
+        battery = asyncio.ensure_future(self._battery_monitor())
+        try:
+            await self._control_loop(max_cycles)
+        finally:
+            self._done = True
+            for task in (watchdog, battery):
+                task.cancel()
+            await asyncio.gather(watchdog, battery, return_exceptions=True)
+            robot.stop()
+            robot.stop_sampler()
+            robot.stop_vision()
+            if robot.telemetry is not None:
+                robot.telemetry.flush()
+            self._io.shutdown(wait=False)
+            self._watch_io.shutdown(wait=False)
+            if self.stop_latencies:
+                report = self.latency_report()
+                logger.info(
+                    f"Emergency stops: {report['count']}, latency p50 {report['p50_ms']:.2f} ms, "
+                    f"max {report['max_ms']:.2f} ms"
+                )
+
+    def latency_report(self):
+        """Summary of detection-to-motors-stopped latencies in milliseconds."""
+        if not self.stop_latencies:
+            return {'count': 0}
+        latencies = np.array(self.stop_latencies) * 1000
+        return {
+            'count': len(latencies),
+            'mean_ms': float(latencies.mean()),
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p95_ms': float(np.percentile(latencies, 95)),
+            'max_ms': float(latencies.max()),
+        }
+
+
+def navigate_async(robot, max_cycles=None):
+    """Run an AsyncNavigator on the robot until it finishes; returns the navigator."""
+    navigator = AsyncNavigator(robot)
+    try:
+        asyncio.run(navigator.run(max_cycles))
+    except KeyboardInterrupt:
+        logger.info("Stopping robot...")
+        robot.stop()
+        logger.info("Robot stopped successfully")
+    return navigator
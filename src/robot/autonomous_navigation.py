@@ -2,153 +2,1007 @@
 
 import time
 import math
-from pitop import Pitop, UltrasonicSensor, ServoMotor, LightSensor, SoundSensor, Camera, Battery
+from contextlib import contextmanager
+import numpy as np
 from .config import *
 from .logger import logger
+from .hardware import get_backend, lazy_device
+from .cache import ReadingCache
+from .sampler import SensorSampler
+from .sweep import ServoSweep
+from .scoring import DirectionScorer, ScanResult
+from .occupancy_grid import OccupancyGrid
+from .planner import DStarLite, inflate
+from .exploration import FrontierExplorer
+from .pose import PoseEstimator
+from .motion import MotionScheduler
+from .telemetry import TelemetryRecorder, telemetry_dir
+from .streaming import TelemetryPublisher, stream_address
+from .profiling import LoopProfiler, profiling_enabled, stats_file
+from .filters import make_filter
 
 class AutonomousRobot:
-    def __init__(self):
-        """Initialize the robot with Pi-top 4 components"""
-        self.robot = Pitop()
-        self.ultrasonic = UltrasonicSensor(ULTRASONIC_PORT)
-        self.servo = ServoMotor(SERVO_PORT)
-        self.light_sensor = LightSensor(LIGHT_SENSOR_PORT)
-        self.sound_sensor = SoundSensor(SOUND_SENSOR_PORT)
-        self.camera = Camera(resolution=CAMERA_RESOLUTION, framerate=CAMERA_FRAMERATE)
-        self.battery = Battery()
+    # Config constants a tuned profile can set, and the attributes they live in
+    PARAMETERS = {
+        'SPEED': 'speed',
+        'TURN_SPEED': 'turn_speed',
+        'TURN_MAX_SPEED': 'turn_max_speed',
+        'TURN_DURATION': 'turn_duration',
+        'MOVE_DURATION': 'move_duration',
+        'SCAN_INTERVAL': 'scan_interval',
+        'SAFE_DISTANCE': 'safe_distance',
+        'TARGET_LIGHT_LEVEL': 'target_light_level',
+    }
+    
+    def __init__(self, backend=None, telemetry=None, stream=None):
+        """
+        Initialize the robot with Pi-top 4 components
+        
+        Devices are opened on first use (see the lazy_device attributes
+        below), so a command only initializes the components it touches.
+        
+        Args:
+            backend (Backend): Hardware backend; defaults to get_backend(),
+                which is the real Pi-top unless configured otherwise
+            telemetry (str): Directory to record binary telemetry to; defaults
+                to telemetry_dir(), which is off unless configured
+            stream (str): Ground station 'host[:port]' to stream live frames
+                to; defaults to stream_address(), which is off unless configured
+        """
+        self.backend = backend if backend is not None else get_backend()
+        self.clock = self.backend.clock
+        
+        # Sensor readings and motor commands are recorded when enabled
+        telemetry = telemetry or telemetry_dir()
+        self.telemetry = TelemetryRecorder(telemetry, clock=self.clock.now) if telemetry else None
+        
+        # Live frames for a ground station, sent once per navigation cycle
+        stream = stream or stream_address()
+        self.stream = TelemetryPublisher(stream, clock=self.clock.now) if stream else None
+        self.last_motors = (0.0, 0.0)
         
         # Movement parameters
         self.speed = SPEED
         self.turn_speed = TURN_SPEED
+        self.turn_max_speed = TURN_MAX_SPEED
+        self.turn_duration = TURN_DURATION
+        self.move_duration = MOVE_DURATION
+        self.scan_interval = SCAN_INTERVAL
         self.safe_distance = SAFE_DISTANCE
         self.scan_angle = SCAN_ANGLE
         self.target_light_level = TARGET_LIGHT_LEVEL
+        self.scan_mode = SCAN_MODE
+        self.sweep = ServoSweep(self.scan_angle, SWEEP_BINS, SERVO_SWEEP_SPEED)
+        self.scorer = DirectionScorer()
+        self.last_scan = None
+        self.last_score_profile = None
+        # Which way avoidance turns are going (1 right, -1 left, 0 not turning)
+        self._avoid_side = 0
+        
+        # Pose (x cm, y cm, heading degrees), dead-reckoned and corrected by
+        # matching successive scans, and map
+        self.pose = (0.0, 0.0, 0.0)
+        self.pose_estimator = PoseEstimator(matching=POSE_MATCHING)
+        self._scan_samples = None
+        self.grid = OccupancyGrid() if GRID_ENABLED else None
+        self.planner = None
+        self._planner_frame = None
+        self.last_replan_time = None
+        # Bounded history of every scan, kept while exploring
+        self.explorer = None
+        
+        # Filters between the raw readings and the navigator; the per-heading
+        # scan filters are created on the first scan
+        self.sensor_filters = {name: make_filter(spec) for name, spec in SENSOR_FILTERS.items() if spec}
+        self.scan_filter_specs = dict(SCAN_FILTERS)
+        self.scan_filters = {}
+        self._travelled = 0.0
+        self._turned = 0.0
+        
+        # Motor control loop; move_motor is looked up per call so it can be wrapped
+        self.motion = MotionScheduler(
+            lambda left, right: self.move_motor(left, right),
+            self._stop_motors, self.clock, on_update=self._odometry
+        )
+        
+        # The servo is centred when it is created
+        self._servo_target = 0
+        self._servo_moved_at = self.clock.now()
+        
+        # Background sampler (started by navigate() or start_sampler())
+        self.sampler = SensorSampler({
+            'distance': lambda: self.ultrasonic.distance,
+            'light': lambda: self.light_sensor.reading,
+            'sound': lambda: self.sound_sensor.reading,
+        }, clock=self.clock.now)
         
-        # Initialize servo
-        self.servo.angle = 0
+        # Slow-changing readings, refreshed in the background with the sampler
+        self.cache = ReadingCache(clock=self.clock.now)
+        self.cache.register('battery', self._read_battery, CACHE_TTLS['battery'])
         
-        # Setup display
-        self.robot.display.brightness = DISPLAY_BRIGHTNESS
-        self.robot.display.timeout = DISPLAY_TIMEOUT
+        # Stage timers of the navigation loops; near-free while disabled
+        self.profiler = LoopProfiler(enabled=profiling_enabled(), path=stats_file())
         
         logger.info("Robot initialized successfully")
         
+    def apply_parameters(self, parameters):
+        """
+        Override movement parameters, e.g. from a tuned profile
+        
+        Args:
+            parameters (dict): Config constant name (see PARAMETERS) -> value
+        """
+        unknown = set(parameters) - set(self.PARAMETERS)
+        if unknown:
+            raise ValueError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+        for name, value in parameters.items():
+            setattr(self, self.PARAMETERS[name], value)
+        logger.info(f"Parameters: {parameters}")
+        
+    @lazy_device
+    def robot(self):
+        """Pi-top base with the motors and display"""
+        robot = self.backend.create_pitop()
+        robot.display.brightness = DISPLAY_BRIGHTNESS
+        robot.display.timeout = DISPLAY_TIMEOUT
+        return robot
+        
+    @lazy_device
+    def ultrasonic(self):
+        """Ultrasonic distance sensor"""
+        return self.backend.create_ultrasonic(ULTRASONIC_PORT)
+        
+    @lazy_device
+    def servo(self):
+        """Servo that pans the ultrasonic sensor, centred on creation"""
+        servo = self.backend.create_servo(SERVO_PORT)
+        servo.angle = 0
+        return servo
+        
+    @lazy_device
+    def light_sensor(self):
+        """Analog light sensor"""
+        return self.backend.create_light_sensor(LIGHT_SENSOR_PORT)
+        
+    @lazy_device
+    def sound_sensor(self):
+        """Analog sound sensor"""
+        return self.backend.create_sound_sensor(SOUND_SENSOR_PORT)
+        
+    @lazy_device
+    def battery(self):
+        """Pi-top battery"""
+        return self.backend.create_battery()
+        
+    @lazy_device
+    def camera(self):
+        """Camera, or None when it cannot be opened"""
+        try:
+            return self.backend.create_camera(CAMERA_RESOLUTION, CAMERA_FRAMERATE)
+        except Exception as e:
+            logger.warning(f"Camera not available, light seeking uses the light sensor: {str(e)}")
+            return None
+        
+    @lazy_device
+    def vision(self):
+        """
+        Camera frames processed in a separate vision process (started by
+        navigate() or start_vision()), or None without a camera
+        """
+        if self.camera is None:
+            return None
+        from .vision import FramePipeline
+        return FramePipeline(self.camera, CAMERA_FRAMERATE)
+        
+    @lazy_device
+    def light_estimator(self):
+        """Light direction from camera frames"""
+        from .light_direction import LightDirectionEstimator
+        return LightDirectionEstimator()
+        
+    def start_sampler(self):
+        """Start polling the sensors in the background"""
+        if not self.clock.realtime:
+            # Sampler threads pace themselves in wall-clock time
+            return
+        self.sampler.start()
+        self.cache.start()
+        
+    def stop_sampler(self):
+        """Stop background sensor polling"""
+        self.sampler.stop()
+        self.cache.stop()
+        
+    def start_vision(self):
+        """Start capturing camera frames for the vision worker"""
+        if self.vision is None or not self.clock.realtime:
+            # Capture is paced in wall-clock time
+            return
+        try:
+            self.vision.start()
+        except Exception as e:
+            logger.warning(f"Vision pipeline failed to start, light seeking uses the light sensor: {str(e)}")
+            self.vision = None
+        
+    def stop_vision(self):
+        """Stop the camera pipeline and its worker process"""
+        # Nothing to stop if the pipeline was never created
+        if AutonomousRobot.vision.created(self) and self.vision is not None:
+            self.vision.stop()
+        
+    def get_vision(self):
+        """Latest camera features (VisionResult) without blocking, or None"""
+        if self.vision is None:
+            return None
+        return self.vision.latest()
+        
+    def _sampled(self, name, since=None):
+        """Latest fresh background sample for a sensor, or None"""
+        if not self.sampler.running:
+            return None
+        return self.sampler.latest(name, max_age=SAMPLE_MAX_AGE, since=since)
+        
     def get_distance(self):
         """Get distance from ultrasonic sensor"""
-        return self.ultrasonic.distance
+        # Only trust samples taken after the servo last moved
+        distance = self._sampled('distance', since=self._servo_moved_at)
+        if distance is None:
+            distance = self.ultrasonic.distance
+        if self.telemetry is not None:
+            self.telemetry.sensor('distance', distance, self._servo_target)
+        return distance
             
     def get_light_level(self):
         """Get light level from sensor"""
-        return self.light_sensor.reading
+        light_level = self._sampled('light', since=self._servo_moved_at)
+        if light_level is None:
+            light_level = self.light_sensor.reading
+        if self.telemetry is not None:
+            self.telemetry.sensor('light', light_level, self._servo_target)
+        return light_level
             
+    def camera_light_levels(self, angles):
+        """
+        Light levels at the given headings (ascending) from one camera frame
+        
+        Uses the vision worker's latest result while it is current, otherwise
+        reads a frame. Returns None without a camera, so callers fall back to
+        the light sensor.
+        """
+        if LIGHT_SOURCE != 'camera' or self.camera is None:
+            return None
+        from .light_direction import resample
+        result = self.get_vision()
+        if result is not None and result.age <= LIGHT_MAX_AGE:
+            levels = resample(angles, result.bearings, result.brightness)
+        else:
+            try:
+                frame = self.camera.get_frame()
+            except Exception as e:
+                logger.debug(f"Camera read failed: {str(e)}")
+                return None
+            levels = self.light_estimator.levels(np.asarray(frame), angles)
+        if self.telemetry is not None:
+            self.telemetry.camera(angles, levels)
+        return levels
+        
     def get_sound_level(self):
         """Get sound level from sensor"""
-        return self.sound_sensor.reading
+        sound_level = self._sampled('sound')
+        if sound_level is None:
+            sound_level = self.sound_sensor.reading
+        if self.telemetry is not None:
+            self.telemetry.sensor('sound', sound_level, self._servo_target)
+        return self._filtered('sound', sound_level)
+        
+    def get_battery_level(self):
+        """Get battery percentage, read at most every CACHE_TTLS['battery'] seconds"""
+        return self.cache.get('battery')
+        
+    def _read_battery(self):
+        """Read the battery over the bus (called by the cache)"""
+        battery_level = self.battery.percentage
+        if self.telemetry is not None:
+            self.telemetry.sensor('battery', battery_level, self._servo_target)
+        return self._filtered('battery', battery_level)
+        
+    def _filtered(self, name, value):
+        """Pass a raw reading through its sensor filter, if it has one"""
+        sensor_filter = self.sensor_filters.get(name)
+        if sensor_filter is None or value is None:
+            return value
+        return float(sensor_filter.update(value)[0])
             
     def set_servo_angle(self, angle):
         """Set servo angle"""
         self.servo.angle = angle
+        self._servo_target = angle
+        self._servo_moved_at = self.clock.now()
+        if self.telemetry is not None:
+            self.telemetry.servo(angle, self._servo_moved_at)
             
+    @property
+    def servo_target(self):
+        """Angle the servo was last set to, in degrees"""
+        return self._servo_target
+        
     def move_motor(self, left_speed, right_speed):
         """Control motors"""
         self.robot.left_motor.forward(left_speed)
         self.robot.right_motor.forward(right_speed)
+        self.last_motors = (left_speed, right_speed)
+        if self.telemetry is not None:
+            self.telemetry.motors(left_speed, right_speed, self._servo_target)
                 
-    def stop(self):
-        """Stop all motors"""
+    def _stop_motors(self):
         self.robot.left_motor.stop()
         self.robot.right_motor.stop()
+        self.last_motors = (0.0, 0.0)
+        if self.telemetry is not None:
+            self.telemetry.motors(0.0, 0.0, self._servo_target)
+        
+    def stop(self):
+        """Stop all motors and cancel any scheduled motion"""
+        self.motion.cancel_all()
+        self._stop_motors()
             
     def check_battery(self):
         """Check battery level and log warnings if needed"""
-        battery_level = self.battery.percentage
+        battery_level = self.get_battery_level()
         if battery_level <= BATTERY_CRITICAL_LEVEL:
-            logger.warning(f"Critical battery level: {battery_level}%")
+            logger.warning(f"Critical battery level: {battery_level}%", extra={'rate_limit': True})
             return False
         elif battery_level <= BATTERY_WARNING_LEVEL:
-            logger.warning(f"Low battery level: {battery_level}%")
+            logger.warning(f"Low battery level: {battery_level}%", extra={'rate_limit': True})
         return True
             
     def scan_environment(self):
         """Scan the environment for obstacles and light levels"""
+        if self.scan_mode == 'sweep':
+            distances, light_levels = self.sweep_environment()
+        else:
+            distances, light_levels = self.step_scan_environment()
+        samples = self._scan_samples
+        self.correct_pose()
+        if self.filter_scan():
+            distances, light_levels = self.last_scan.distance_pairs(), self.last_scan.light_pairs()
+        self.update_map()
+        if self.explorer is not None and samples is not None:
+            # Only what was actually read, not the angles the map filled in
+            self.explorer.integrate(self.pose, *samples)
+        return distances, light_levels
+        
+    def correct_pose(self):
+        """
+        Correct the dead-reckoned pose by matching the raw readings of the
+        last scan against the previous scan
+        
+        Returns:
+            tuple: (rotation, shift) applied to the pose
+        """
+        if self._scan_samples is None:
+            # Nothing was read (the map knew everything was clear)
+            return (0.0, 0.0)
+        angles, distances = self._scan_samples
+        self._scan_samples = None
+        rotation, shift = self.pose_estimator.observe(self.pose, angles, distances)
+        if rotation or shift:
+            logger.debug(f"Pose corrected by {rotation:.1f} degrees, {shift:.1f} cm")
+            # Not motion since the scan, so the scan filters do not remap for it
+            self._move_pose(shift, rotation)
+        return rotation, shift
+        
+    def filter_scan(self):
+        """
+        Run the last scan through the per-heading scan filters
+        
+        Each heading keeps its own filter. Its estimate is carried through
+        the turns and moves made since the previous scan, so a single
+        spurious reading is checked against what the heading showed before.
+        
+        Returns:
+            bool: Whether the scan was changed
+        """
+        scan = self.last_scan
+        travelled, turned = self._travelled, self._turned
+        self._travelled = self._turned = 0.0
+        changed = False
+        for name, spec in self.scan_filter_specs.items():
+            if not spec:
+                continue
+            scan_filter = self.scan_filters.get(name)
+            if scan_filter is None or scan_filter.channels != len(scan):
+                scan_filter = self.scan_filters[name] = make_filter(spec, len(scan))
+            else:
+                if turned:
+                    # After turning clockwise by `turned`, heading a shows
+                    # what heading a + turned showed before
+                    channels = np.arange(len(scan), dtype=np.float64)
+                    scan_filter.remap(np.interp(scan.angles + turned, scan.angles, channels,
+                                                left=np.nan, right=np.nan))
+                if name == 'distance':
+                    shift = travelled * np.cos(np.radians(scan.angles))
+                else:
+                    shift = 0.0
+                scan_filter.predict(shift, FILTER_TRAVEL_VARIANCE * abs(travelled))
+            raw = scan.distances if name == 'distance' else scan.light_levels
+            if name == 'distance':
+                # Stand-ins for angles skipped as known clear are not
+                # readings, so they leave those headings' filters alone
+                estimate = scan_filter.update(np.where(scan.measured, raw, np.nan))
+            else:
+                estimate = scan_filter.update(raw)
+            # Headings with nothing to go on keep the raw reading
+            estimate = np.where(np.isfinite(estimate), estimate, raw)
+            if name == 'distance':
+                # The map vouches for skipped headings up to the safe distance,
+                # all the scorer uses; a prediction carried through the moves
+                # since their last reading would be staler than that
+                scan.distances = np.where(scan.measured, estimate, raw)
+                scan.variances = np.where(scan.measured, scan_filter.variance, 0.0)
+            else:
+                scan.light_levels = estimate
+            changed = True
+        return changed
+        
+    def update_map(self):
+        """Integrate the last scan into the occupancy grid"""
+        if self.grid is None or self.last_scan is None:
+            return
+        # Stand-in distances for skipped angles would mark a false obstacle
+        measured = self.last_scan.measured
+        if not measured.any():
+            return
+        self.grid.integrate_scan(self.pose, self.last_scan.angles[measured], self.last_scan.distances[measured])
+        
+    def known_clear_angles(self, angles):
+        """Which scan angles the map already knows are clear to the safe distance"""
+        if self.grid is None or not GRID_SKIP_CLEAR_SECTORS:
+            return [False] * len(angles)
+        return self.grid.clear_bearings(self.pose, angles, self.safe_distance).tolist()
+        
+    def step_scan_environment(self):
+        """Scan by stopping the servo at each angle before reading"""
         distances = []
         light_levels = []
+        timestamps = []
         
-        # Scan from -45 to 45 degrees
-        for angle in range(-45, 46, 15):
-            self.set_servo_angle(angle)
-            time.sleep(SCAN_INTERVAL)
-            distance = self.get_distance()
-            light_level = self.get_light_level()
+        # Scan from -45 to 45 degrees, skipping angles the map knows are clear
+        angles = list(range(-45, 46, 15))
+        known_clear = self.known_clear_angles(angles)
+        # One camera frame gives the light at every angle; without a camera
+        # the light sensor is read at each servo step
+        camera_light = self.camera_light_levels(angles)
+        for index, (angle, clear) in enumerate(zip(angles, known_clear)):
+            if clear:
+                distance = self.safe_distance
+            else:
+                self.set_servo_angle(angle)
+                self.clock.sleep(self.scan_interval)
+                distance = self.get_distance()
+            if camera_light is not None:
+                light_level = float(camera_light[index])
+            elif clear:
+                light_level = self._last_light_level(angle)
+            else:
+                light_level = self.get_light_level()
             distances.append((angle, distance))
             light_levels.append((angle, light_level))
+            timestamps.append(self.clock.now())
             
+        # Only what was actually read is matched against the next scan
+        read = [pair for pair, clear in zip(distances, known_clear) if not clear]
+        self._scan_samples = ([angle for angle, _ in read], [distance for _, distance in read])
+        self.last_scan = ScanResult(
+            [angle for angle, _ in distances],
+            [distance for _, distance in distances],
+            [light for _, light in light_levels],
+            timestamps,
+            measured=[not clear for clear in known_clear],
+        )
         return distances, light_levels
         
-    def find_best_direction(self, distances, light_levels):
-        """Find the best direction to move based on obstacle distances and light levels"""
-        combined_scores = []
-        for (angle, distance), (_, light) in zip(distances, light_levels):
-            distance_score = min(distance / self.safe_distance, 1.0)
-            light_score = abs(light - self.target_light_level)
-            combined_score = distance_score * (1 - light_score)
-            combined_scores.append((angle, combined_score))
+    def _last_light_level(self, angle):
+        """Light level at an angle from the previous scan, for skipped angles"""
+        if self.last_scan is None or len(self.last_scan) == 0:
+            return self.target_light_level
+        return float(np.interp(angle, self.last_scan.angles, self.last_scan.light_levels))
+        
+    def sweep_environment(self):
+        """Scan while the servo moves continuously across its range"""
+        bin_angles = self.sweep.bin_angles
+        camera_light = self.camera_light_levels(bin_angles)
+        if all(self.known_clear_angles(bin_angles)):
+            # Whole field of view already known clear; reuse the map
+            if camera_light is not None:
+                light_levels = camera_light
+            else:
+                light_levels = [self._last_light_level(angle) for angle in bin_angles]
+            self.last_scan = ScanResult(
+                bin_angles, np.full(len(bin_angles), float(self.safe_distance)),
+                light_levels, np.full(len(bin_angles), self.clock.now()),
+                measured=np.zeros(len(bin_angles), dtype=bool)
+            )
+            return self.last_scan.distance_pairs(), self.last_scan.light_pairs()
             
-        best_angle, best_score = max(combined_scores, key=lambda x: x[1])
-        return best_angle, best_score
+        start_angle, end_angle = self.sweep.next_sweep(self._servo_target)
+        if self._servo_target != start_angle:
+            # Servo was left elsewhere (e.g. centred while driving); move it first
+            settle = abs(self._servo_target - start_angle) / self.sweep.speed
+            self.set_servo_angle(start_angle)
+            self.clock.sleep(settle)
+        self.set_servo_angle(end_angle)
+        start_time = self._servo_moved_at
+        end_time = start_time + self.sweep.duration
         
-    def move_forward(self, duration=MOVE_DURATION):
-        """Move forward for specified duration"""
-        self.move_motor(self.speed, self.speed)
-        time.sleep(duration)
-        self.stop()
+        # Light comes from the camera frame when there is one
+        read_light = camera_light is None
+        light_times, light_values = [], []
+        if self.sampler.running:
+            # The sampler threads already read the sensors while we wait
+            self.clock.sleep(self.sweep.duration)
+            distance_times, distance_values = self.sampler.window('distance')
+            in_sweep = (distance_times >= start_time) & (distance_times <= end_time)
+            distance_times, distance_values = distance_times[in_sweep], distance_values[in_sweep]
+            if read_light:
+                light_times, light_values = self.sampler.window('light')
+                in_sweep = (light_times >= start_time) & (light_times <= end_time)
+                light_times, light_values = light_times[in_sweep], light_values[in_sweep]
+        else:
+            distance_times, distance_values = [], []
+            while self.clock.now() < end_time:
+                # Stamped when each read returns, like the sampler's readings
+                distance_values.append(self.ultrasonic.distance)
+                distance_times.append(self.clock.now())
+                if read_light:
+                    light_values.append(self.light_sensor.reading)
+                    light_times.append(self.clock.now())
+                
+        # Fall back to a single reading at the end position if nothing was sampled
+        if len(distance_values) == 0:
+            distance_times, distance_values = [end_time], [self.ultrasonic.distance]
+        if read_light and len(light_values) == 0:
+            light_times, light_values = [end_time], [self.light_sensor.reading]
+        if self.telemetry is not None:
+            self.telemetry.sensor_series('distance', distance_times, distance_values, end_angle)
+            if read_light:
+                self.telemetry.sensor_series('light', light_times, light_values, end_angle)
+            
+        distance_angles = self.sweep.interpolate_angles(distance_times, start_time, start_angle, end_angle)
+        # Readings taken after the servo stopped are left out, as the
+        # sampler's are, so a replay matches the same readings
+        in_sweep = np.asarray(distance_times) <= end_time
+        self._scan_samples = (np.asarray(distance_angles)[in_sweep], np.asarray(distance_values)[in_sweep])
+        binned_distances = self.sweep.bin_samples(distance_angles, distance_values, reduce='min')
+        if read_light:
+            light_angles = self.sweep.interpolate_angles(light_times, start_time, start_angle, end_angle)
+            binned_light = self.sweep.bin_samples(light_angles, light_values, reduce='mean')
+        else:
+            binned_light = camera_light
+        
+        bin_angles = self.sweep.bin_angles
+        bin_times = self.sweep.bin_times(start_time, start_angle, end_angle)
+        self.last_scan = ScanResult(bin_angles, binned_distances, binned_light, bin_times)
+        return self.last_scan.distance_pairs(), self.last_scan.light_pairs()
+        
+    def find_best_direction(self, distances, light_levels=None):
+        """
+        Find the best direction to move based on obstacle distances and light levels
+        
+        Accepts either (angle, value) tuple lists or a single ScanResult. The
+        full score profile is kept in self.last_score_profile.
+        """
+        if isinstance(distances, ScanResult):
+            scan = distances
+        else:
+            scan = ScanResult.from_pairs(distances, light_levels)
+            last = self.last_scan
+            if (last is not None and last.variances is not None and len(last) == len(scan)
+                    and np.array_equal(last.angles, scan.angles)
+                    and np.array_equal(last.distances, scan.distances)):
+                # Pairs from the last scan_environment(); keep the filter's variances
+                scan.variances = last.variances
+        self.scorer.safe_distance = self.safe_distance
+        self.scorer.target_light_level = self.target_light_level
+        profile = self.scorer.score(scan)
+        self.last_score_profile = profile
+        return profile.best_angle, profile.best_score
+        
+    def avoidance_angle(self, best_angle):
+        """
+        Angle to turn by when no heading is clear enough to drive
+        
+        The turn is at least MIN_AVOID_TURN and goes the way the previous one
+        went until the robot drives again: a best heading (nearly) straight
+        ahead or back where the last turn came from would have it turn in
+        place, or swing back and forth, cycle after cycle.
+        """
+        profile = self.last_score_profile
+        if profile is None:
+            return best_angle
+        angle = profile.best_turn(MIN_AVOID_TURN, self._avoid_side)
+        self._avoid_side = 1 if angle > 0 else -1
+        return angle
+        
+    def update_pose(self, distance=0.0, angle=0.0):
+        """Dead-reckon the pose after turning by angle and moving distance cm"""
+        self._travelled += distance
+        self._turned += angle
+        self._move_pose(distance, angle)
+        
+    def _move_pose(self, distance, angle):
+        x, y, heading = self.pose
+        heading = (heading + angle + 180) % 360 - 180
+        x += distance * math.cos(math.radians(heading))
+        y += distance * math.sin(math.radians(heading))
+        self.pose = (x, y, heading)
+        
+    def _odometry(self, left, right, dt):
+        """Dead-reckon the pose from the wheel speeds applied for dt seconds"""
+        distance = (left + right) / 2 * WHEEL_SPEED * dt
+        angle = (left - right) / 2 / self.turn_speed * 90 / self.turn_duration * dt
+        distance, angle = self.pose_estimator.odometry(distance, angle)
+        self.update_pose(distance=distance, angle=angle)
         
-    def turn(self, angle):
-        """Turn the robot by specified angle"""
-        duration = abs(angle) / 90 * TURN_DURATION
+    def move_forward(self, duration=None, wait=True):
+        """
+        Move forward for specified duration
+        
+        The wheel speeds are trimmed against the drift the pose estimator
+        has measured, so the robot drives straight.
+        
+        Args:
+            duration (float): Seconds at full speed (default: move_duration);
+                ramping up and down adds a little
+            wait (bool): Block until the move is done
+            
+        Returns:
+            Future: Completes when the move is done
+        """
+        if duration is None:
+            duration = self.move_duration
+        # Driving ends an avoidance manoeuvre, the next may turn either way
+        self._avoid_side = 0
+        estimator = self.pose_estimator
+        # Wheel speed difference that turns the other way as fast as the robot drifts
+        trim = -estimator.known_drift * self.speed * WHEEL_SPEED * self.turn_speed * self.turn_duration / 90
+        trim /= estimator.turn_gain
+        left, right = self.speed + trim, self.speed - trim
+        future = self.motion.submit(left, right, duration)
+        if wait:
+            self.motion.wait(future)
+        return future
+        
+    def turn(self, angle, wait=True):
+        """
+        Turn the robot by specified angle
+        
+        The wheels ramp up to turn_max_speed and brake in time to stop at
+        the angle (a trapezoidal speed profile, or a triangular one for small
+        turns), which is the quickest turn the motor acceleration allows.
+        The angle commanded is corrected by the turn gain the pose estimator
+        has measured.
+        
+        Args:
+            angle (float): Degrees, positive clockwise
+            wait (bool): Block until the turn is done
+            
+        Returns:
+            Future: Completes when the turn is done
+        """
+        speed = self.turn_max_speed
+        # turn_duration is the time for 90 degrees at turn_speed
+        duration = abs(angle) / self.pose_estimator.turn_gain / 90 * self.turn_duration * self.turn_speed / speed
         
         if angle > 0:
-            self.move_motor(self.turn_speed, -self.turn_speed)
+            future = self.motion.submit(speed, -speed, duration)
         else:
-            self.move_motor(-self.turn_speed, self.turn_speed)
+            future = self.motion.submit(-speed, speed, duration)
             
-        time.sleep(duration)
+        if wait:
+            self.motion.wait(future)
+        return future
+        
+    def cleanup(self):
+        """Stop the motors and any background activity"""
         self.stop()
+        self.motion.shutdown()
+        self.stop_sampler()
+        self.stop_vision()
+        if self.telemetry is not None:
+            self.telemetry.close()
+        if self.stream is not None:
+            self.stream.close()
+        
+    def publish_stream(self):
+        """Send this cycle's state to the ground station, if streaming"""
+        if self.stream is not None:
+            self.stream.publish(self.pose, self.last_motors, self.last_scan, self.last_score_profile,
+                                self.profiler.last_stages())
         
-    def navigate(self):
-        """Main navigation loop"""
+    @contextmanager
+    def _navigation_session(self):
+        """
+        Run the body of a navigation loop with the background sampler and
+        vision started, stopping the robot on Ctrl+C or an error and always
+        flushing telemetry and profiling stats when it ends
+        """
         try:
-            logger.info("Starting autonomous navigation...")
             logger.info("Press Ctrl+C to stop")
+            if SAMPLER_ENABLED:
+                self.start_sampler()
+            if VISION_ENABLED:
+                self.start_vision()
+            yield
+        except KeyboardInterrupt:
+            logger.info("Stopping robot...")
+            self.stop()
+            logger.info("Robot stopped successfully")
+        except Exception as e:
+            logger.error(f"Error during navigation: {str(e)}")
+            self.stop()
+        finally:
+            self.stop_sampler()
+            self.stop_vision()
+            if self.telemetry is not None:
+                self.telemetry.flush()
+            if self.profiler.enabled:
+                self.profiler.dump()
+        
+    def navigate(self, max_cycles=None, until=None):
+        """
+        Main navigation loop
+        
+        Args:
+            max_cycles (int): Stop after this many cycles (default: run forever)
+            until (callable): Stop as soon as this returns True
+        """
+        cycles = 0
+        previous = None
+        # Overlapping needs the threaded control loop of a real-time clock
+        pipeline = MOTION_PIPELINE and self.clock.realtime
+        profiler = self.profiler
+        stage = profiler.stage
+        logger.info("Starting autonomous navigation...")
+        with self._navigation_session():
+            while max_cycles is None or cycles < max_cycles:
+                if until is not None and until():
+                    break
+                cycles += 1
+                profiler.tick()
+                
+                with stage('battery'):
+                    battery_ok = self.check_battery()
+                if not battery_ok:
+                    logger.error("Critical battery level detected. Stopping navigation.")
+                    break
+                    
+                with stage('scan'):
+                    distances, light_levels = self.scan_environment()
+                with stage('score'):
+                    best_angle, best_score = self.find_best_direction(distances, light_levels)
+                
+                with stage('sound'):
+                    loud = self.get_sound_level() > SOUND_THRESHOLD
+                if loud:
+                    logger.warning("Emergency stop: Loud sound detected!")
+                    self.stop()
+                    self.clock.sleep(EMERGENCY_STOP_DURATION)
+                    continue
+                    
+                with stage('motion'):
+                    if best_score > 0.5:
+                        motion = self.move_forward(wait=False)
+                    else:
+                        motion = self.turn(self.avoidance_angle(best_angle), wait=False)
+                        
+                    if pipeline and best_score > 0.5:
+                        # Scan for the next move while this one drives; it
+                        # queues behind and runs on without stopping
+                        if previous is not None:
+                            self.motion.wait(previous)
+                        previous = motion
+                    else:
+                        # Turns finish before scanning, the sweep needs a steady heading
+                        self.motion.wait(motion)
+                        previous = None
+                self.publish_stream()
+                        
+                with stage('sleep'):
+                    self.clock.sleep(self.scan_interval)
+                
+            if previous is not None:
+                self.motion.wait(previous)
+
+    def _goal_cell(self, goal):
+        """Grid cell for a goal, clamped to the edge of the map window"""
+        cell = self.grid.world_to_cell(*goal)
+        if cell is None:
+            row = (goal[0] - self.grid.origin[0]) / self.grid.resolution
+            col = (goal[1] - self.grid.origin[1]) / self.grid.resolution
+            cell = (int(min(max(row, 0), self.grid.size - 1)),
+                    int(min(max(col, 0), self.grid.size - 1)))
+        return cell
+        
+    def plan_path(self, goal):
+        """
+        Plan a path from the current pose to goal (x, y) in cm
+        
+        The D* Lite search is kept between calls and only repaired for cells
+        that changed since the last plan. It is rebuilt when the map window
+        slides or the goal changes.
+        """
+        start_time = time.perf_counter()
+        radius = int(math.ceil(ROBOT_WIDTH / 2 / self.grid.resolution))
+        blocked = inflate(self.grid.occupied_mask(), radius)
+        start = self.grid.world_to_cell(*self.pose[:2])
+        goal_cell = self._goal_cell(goal)
+        
+        # The robot's own surroundings and the goal must stay plannable
+        blocked[max(start[0] - radius, 0):start[0] + radius + 1,
+                max(start[1] - radius, 0):start[1] + radius + 1] = False
+        blocked[goal_cell] = False
+        
+        frame = (tuple(self.grid.origin), goal_cell)
+        if self.planner is None or self._planner_frame != frame:
+            self.planner = DStarLite(blocked, start, goal_cell)
+            self._planner_frame = frame
+        else:
+            self.planner.move_start(start)
+            self.planner.update_map(blocked)
+        path = self.planner.plan()
+        
+        self.last_replan_time = time.perf_counter() - start_time
+        logger.debug(f"Replanned in {self.last_replan_time * 1000:.1f} ms")
+        return path
+        
+    def follow_path(self, path):
+        """Turn towards or drive along the start of a planned path"""
+        waypoint = path[min(PLAN_LOOKAHEAD, len(path) - 1)]
+        self.drive_towards(self.grid.cell_to_world(*waypoint))
+        
+    def drive_towards(self, target, clearance=None):
+        """
+        Turn towards target (x, y), or drive to it once roughly facing it
+        
+        Args:
+            target (tuple): World (x, y) in cm
+            clearance (float): Do not drive if the last scan shows an obstacle
+                straight ahead closer than this (default: no check)
+                
+        Returns:
+            bool: False if it stopped short of an obstacle instead of driving
+        """
+        x, y, heading = self.pose
+        target_x, target_y = target
+        bearing = math.degrees(math.atan2(target_y - y, target_x - x)) - heading
+        bearing = (bearing + 180) % 360 - 180
+        
+        if abs(bearing) > PLAN_HEADING_TOLERANCE:
+            self.turn(bearing)
+        else:
+            scan = self.last_scan
+            if clearance is not None and scan is not None and np.interp(0.0, scan.angles, scan.distances) < clearance:
+                return False
+            distance = math.hypot(target_x - x, target_y - y)
+            self.move_forward(min(self.move_duration, distance / (self.speed * WHEEL_SPEED)))
+        return True
             
-            while True:
-                if not self.check_battery():
+    def navigate_planned(self, goal=(GOAL_DISTANCE, 0), max_cycles=None):
+        """
+        Navigation loop that follows a replanned global path to a goal
+        
+        Args:
+            goal (tuple): Goal (x, y) in cm relative to the starting pose
+            max_cycles (int): Give up after this many cycles (default: never)
+        """
+        cycles = 0
+        profiler = self.profiler
+        stage = profiler.stage
+        if self.grid is None:
+            self.grid = OccupancyGrid()
+        logger.info(f"Starting planned navigation to {goal}...")
+        with self._navigation_session():
+            while max_cycles is None or cycles < max_cycles:
+                cycles += 1
+                profiler.tick()
+                
+                with stage('battery'):
+                    battery_ok = self.check_battery()
+                if not battery_ok:
                     logger.error("Critical battery level detected. Stopping navigation.")
                     break
                     
-                distances, light_levels = self.scan_environment()
-                best_angle, best_score = self.find_best_direction(distances, light_levels)
+                if math.hypot(goal[0] - self.pose[0], goal[1] - self.pose[1]) <= GOAL_TOLERANCE:
+                    logger.info("Goal reached")
+                    break
+                    
+                with stage('scan'):
+                    distances, light_levels = self.scan_environment()
                 
-                if self.get_sound_level() > SOUND_THRESHOLD:
+                with stage('sound'):
+                    loud = self.get_sound_level() > SOUND_THRESHOLD
+                if loud:
                     logger.warning("Emergency stop: Loud sound detected!")
                     self.stop()
-                    time.sleep(EMERGENCY_STOP_DURATION)
+                    self.clock.sleep(EMERGENCY_STOP_DURATION)
                     continue
                     
-                if best_score > 0.5:
-                    self.move_forward()
+                with stage('plan'):
+                    path = self.plan_path(goal)
+                if path is None or len(path) < 2:
+                    # No known route; fall back to the reactive behaviour
+                    logger.warning("No path to goal, falling back to reactive step")
+                    with stage('score'):
+                        best_angle, best_score = self.find_best_direction(distances, light_levels)
+                    with stage('motion'):
+                        if best_score > 0.5:
+                            self.move_forward()
+                        else:
+                            self.turn(best_angle)
                 else:
-                    self.turn(best_angle)
+                    with stage('motion'):
+                        self.follow_path(path)
+                self.publish_stream()
+
+    def navigate_explore(self, max_cycles=None, until=None):
+        """
+        Navigation loop that explores the room frontier by frontier
+        
+        Every scan goes into the explorer's scan history, and the robot
+        drives towards the nearest worthwhile boundary between known-free
+        and unknown space (see exploration.py) until none is left.
+        
+        Args:
+            max_cycles (int): Stop after this many cycles (default: until explored)
+            until (callable): Stop as soon as this returns True
+        """
+        cycles = 0
+        profiler = self.profiler
+        stage = profiler.stage
+        if self.explorer is None:
+            self.explorer = FrontierExplorer()
+        explorer = self.explorer
+        logger.info("Starting frontier exploration...")
+        with self._navigation_session():
+            while max_cycles is None or cycles < max_cycles:
+                if until is not None and until():
+                    break
+                cycles += 1
+                profiler.tick()
+                
+                with stage('battery'):
+                    battery_ok = self.check_battery()
+                if not battery_ok:
+                    logger.error("Critical battery level detected. Stopping navigation.")
+                    break
                     
-                time.sleep(SCAN_INTERVAL)
+                with stage('scan'):
+                    distances, light_levels = self.scan_environment()
                 
-        except KeyboardInterrupt:
-            logger.info("Stopping robot...")
-            self.stop()
-            logger.info("Robot stopped successfully")
-        except Exception as e:
-            logger.error(f"Error during navigation: {str(e)}")
-            self.stop()
+                with stage('sound'):
+                    loud = self.get_sound_level() > SOUND_THRESHOLD
+                if loud:
+                    logger.warning("Emergency stop: Loud sound detected!")
+                    self.stop()
+                    self.clock.sleep(EMERGENCY_STOP_DURATION)
+                    continue
+                    
+                with stage('plan'):
+                    path = explorer.plan(self.pose)
+                if path is None:
+                    free, occupied = explorer.history.known()
+                    logger.info(f"Exploration complete: {free} free and {occupied} occupied cells known "
+                                f"after {cycles} cycles")
+                    break
+                    
+                with stage('motion'):
+                    driven = self.drive_towards(explorer.waypoint(path), clearance=self.safe_distance)
+                if not driven:
+                    # Something the history did not know about is in the way
+                    logger.debug("Obstacle on the way to the frontier, choosing another")
+                    explorer.abandon()
+                self.publish_stream()
 
 if __name__ == "__main__":
     robot = AutonomousRobot()
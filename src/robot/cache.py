@@ -0,0 +1,191 @@
+"""
+Time-to-live cache for slow-changing readings.
+
+The battery percentage changes by a fraction of a percent per minute, but
+reading it is a bus transaction. A ReadingCache serves such readings from
+memory until they are `ttl` seconds old:
+
+    cache = ReadingCache(clock=time.monotonic)
+    cache.register('battery', lambda: battery.percentage, ttl=5.0)
+    level = cache.get('battery')
+
+An expired reading is read again by the caller of get(). With start(), a
+background thread refreshes every reading shortly before it expires, so the
+control loop never waits on the bus. If a read fails, the last value is
+served (stale) rather than raising; only a key that has never been read
+raises.
+
+Each key counts hits, misses (reads made by get()), stale values served and
+read errors; see stats().
+"""
+
+import threading
+import time
+
+from .config import CACHE_REFRESH_AHEAD
+from .logger import logger
+
+
+class _Entry:
+    def __init__(self, read, ttl):
+        self.read = read
+        self.ttl = ttl
+        self.value = None
+        self.fetched_at = None
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.errors = 0
+        self.refreshes = 0
+
+
+class ReadingCache:
+    """Per-key TTL cache of hardware readings with optional background refresh."""
+
+    def __init__(self, clock=time.monotonic, refresh_ahead=CACHE_REFRESH_AHEAD):
+        """
+        Args:
+            clock (callable): Monotonic time source for reading ages
+            refresh_ahead (float): Fraction of its TTL after which the
+                background thread refreshes a reading
+        """
+        self.clock = clock
+        self.refresh_ahead = refresh_ahead
+        self._entries = {}
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def register(self, key, read, ttl):
+        """
+        Add (or replace) a cached reading.
+
+        Args:
+            key (str): Reading name
+            read (callable): Zero-argument callable returning a fresh reading
+            ttl (float): Seconds a reading is served from the cache
+        """
+        if ttl < 0:
+            raise ValueError("ttl must not be negative")
+        self._entries[key] = _Entry(read, ttl)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _fresh(self, entry, now):
+        return entry.fetched_at is not None and now - entry.fetched_at < entry.ttl
+
+    def _read(self, key, entry):
+        """Read a new value into the entry (holding its lock); False if the read failed."""
+        try:
+            value = entry.read()
+        except Exception as e:
+            entry.errors += 1
+            logger.debug(f"Cached read failed for {key}: {str(e)}")
+            return False
+        entry.value = value
+        entry.fetched_at = self.clock()
+        return True
+
+    def get(self, key):
+        """
+        Get a reading, reading it again if it has expired.
+
+        Args:
+            key (str): Reading name
+
+        Returns:
+            The cached or fresh reading; the last value if a new read fails
+        """
+        entry = self._entries[key]
+        if self._fresh(entry, self.clock()):
+            entry.hits += 1
+            return entry.value
+        with entry.lock:
+            # The background thread may have refreshed it while we waited
+            if self._fresh(entry, self.clock()):
+                entry.hits += 1
+                return entry.value
+            entry.misses += 1
+            if not self._read(key, entry):
+                if entry.fetched_at is None:
+                    raise RuntimeError(f"No {key} reading available")
+                entry.stale += 1
+            return entry.value
+
+    def age(self, key):
+        """Seconds since the reading was taken, or None if it never was."""
+        entry = self._entries[key]
+        if entry.fetched_at is None:
+            return None
+        return self.clock() - entry.fetched_at
+
+    def invalidate(self, key=None):
+        """Expire one reading (or all), so the next get() reads it."""
+        for entry in ([self._entries[key]] if key is not None else self._entries.values()):
+            with entry.lock:
+                entry.fetched_at = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start refreshing readings in the background."""
+        if self.running or not self._entries:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="reading-cache", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=1.0):
+        """Stop the background refresh and log the counters."""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout)
+        self._thread = None
+        self.log_stats()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            now = self.clock()
+            next_due = None
+            for key, entry in list(self._entries.items()):
+                due = now if entry.fetched_at is None else entry.fetched_at + entry.ttl * self.refresh_ahead
+                if due <= now:
+                    with entry.lock:
+                        if self._read(key, entry):
+                            entry.refreshes += 1
+                    # A failed read is retried after the same interval
+                    due = max(entry.fetched_at or now, now) + max(entry.ttl * self.refresh_ahead, 0.01)
+                next_due = due if next_due is None else min(next_due, due)
+            self._stop_event.wait(max(next_due - self.clock(), 0.0) if next_due is not None else 1.0)
+
+    def stats(self):
+        """
+        Counters per reading.
+
+        Returns:
+            dict: key -> {'hits', 'misses', 'stale', 'errors', 'refreshes', 'age'}
+        """
+        return {
+            key: {
+                'hits': entry.hits,
+                'misses': entry.misses,
+                'stale': entry.stale,
+                'errors': entry.errors,
+                'refreshes': entry.refreshes,
+                'age': self.age(key),
+            }
+            for key, entry in self._entries.items()
+        }
+
+    def log_stats(self):
+        """Log the counters of every reading."""
+        for key, counters in self.stats().items():
+            logger.info(
+                f"Cache {key}: {counters['hits']} hits, {counters['misses']} misses, "
+                f"{counters['refreshes']} background refreshes, {counters['stale']} stale, "
+                f"{counters['errors']} errors"
+            )
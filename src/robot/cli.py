@@ -1,8 +1,22 @@
 #!/usr/bin/env python3
 
 import argparse
-from .autonomous_navigation import AutonomousRobot
+import json
+import os
+import signal
+import sys
+from .config import (
+    DEPLOY_DIR,
+    DEPLOY_USER,
+    DEPLOY_WORKERS,
+    GOAL_DISTANCE,
+    STREAM_PORT,
+    TUNE_CACHE_FILE,
+    TUNE_SPACE,
+    TUNED_PROFILE_FILE,
+)
 from .logger import logger
+from .profiling import format_snapshot, install_signal_handlers, load_snapshot, stats_file
 
 def main():
     """Main entry point for the robot CLI."""
@@ -14,37 +28,213 @@ def main():
     nav_parser = subparsers.add_parser('navigate', help='Start autonomous navigation')
     nav_parser.add_argument('--speed', type=float, help='Movement speed')
     nav_parser.add_argument('--safe-distance', type=float, help='Safe distance from obstacles (cm)')
+    nav_parser.add_argument('--mode', choices=['reactive', 'planned', 'async', 'explore'], default='reactive',
+                          help='Reactive obstacle avoidance, a replanned global path, '
+                               'reactive avoidance with a concurrent emergency watchdog, '
+                               'or frontier exploration of the whole room')
+    nav_parser.add_argument('--goal', type=float, nargs=2, metavar=('X', 'Y'),
+                          default=(GOAL_DISTANCE, 0),
+                          help='Goal position in cm for planned mode (x ahead, y right)')
+    nav_parser.add_argument('--telemetry', metavar='DIR',
+                          help='Record sensor readings and motor commands to binary files in DIR')
+    nav_parser.add_argument('--stream', metavar='HOST[:PORT]',
+                          help=f'Stream live frames over UDP to a ground station (default port {STREAM_PORT})')
+    nav_parser.add_argument('--tuned', metavar='PROFILE', nargs='?', const=TUNED_PROFILE_FILE,
+                          help=f'Load parameters written by `tune` (default file: {TUNED_PROFILE_FILE})')
+    nav_parser.add_argument('--profile', action='store_true',
+                          help='Time every loop stage from the start (SIGUSR1 switches it at runtime)')
     
     # Test command
     test_parser = subparsers.add_parser('test', help='Run robot tests')
     test_parser.add_argument('--component', choices=['sensors', 'motors', 'all'], 
                            default='all', help='Component to test')
+    test_parser.add_argument('--quick', action='store_true',
+                           help='Skip the checks that move the servo or the motors')
+    test_parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    test_parser.add_argument('--output', metavar='FILE', help='Also write the JSON report to FILE')
+    
+    # Replay command
+    replay_parser = subparsers.add_parser('replay', help='Replay recorded telemetry through the navigator')
+    replay_parser.add_argument('file', help='Telemetry chunk file (any chunk of the run) or run prefix')
+    replay_parser.add_argument('--max-cycles', type=int, help='Only replay this many navigation cycles')
+    replay_parser.add_argument('--scan-mode', choices=['sweep', 'step'],
+                             help='Scan mode the recording was made with (default: config)')
+    replay_parser.add_argument('--tolerance', type=float,
+                             help='Relative turn size difference still counted as a match')
+    
+    # Tune command
+    tune_parser = subparsers.add_parser('tune', help='Tune the movement parameters on simulated rooms')
+    tune_parser.add_argument('--mode', choices=['reactive', 'planned'], default='reactive',
+                           help='Navigation loop to tune')
+    tune_parser.add_argument('--parameters', nargs='+', choices=sorted(TUNE_SPACE), metavar='NAME',
+                           help=f'Parameters to search (default: all of {", ".join(TUNE_SPACE)})')
+    tune_parser.add_argument('--generations', type=int, default=6)
+    tune_parser.add_argument('--population', type=int, default=10, help='Candidates per generation')
+    tune_parser.add_argument('--episodes', type=int, default=20, help='Training rooms per candidate')
+    tune_parser.add_argument('--validation', type=int, default=40,
+                           help='Held-out rooms the result is checked on (0 to skip)')
+    tune_parser.add_argument('--max-cycles', type=int, default=300, help='Loop iterations per episode')
+    tune_parser.add_argument('--workers', type=int, help='Worker processes (default: one per CPU)')
+    tune_parser.add_argument('--seed', type=int, default=0, help='Seed of the candidate sampling')
+    tune_parser.add_argument('--cache', default=TUNE_CACHE_FILE, help='Episode result cache file')
+    tune_parser.add_argument('--no-cache', action='store_true', help='Neither read nor write the cache')
+    tune_parser.add_argument('--output', default=TUNED_PROFILE_FILE, help='Profile file to write')
+    
+    # Stats command
+    stats_parser = subparsers.add_parser('stats', help='Show navigation loop stage latencies')
+    stats_parser.add_argument('file', nargs='?',
+                            help='Snapshot written by a profiled navigate (default: ROBOT_STATS_FILE or config)')
+    stats_parser.add_argument('--run', type=int, metavar='CYCLES',
+                            help='Profile this many navigation cycles now instead of reading a snapshot')
+    stats_parser.add_argument('--mode', choices=['reactive', 'planned'], default='reactive',
+                            help='Navigation loop to profile with --run')
+    stats_parser.add_argument('--toggle', type=int, metavar='PID',
+                            help='Switch profiling on or off in a running navigate process')
+    stats_parser.add_argument('--json', action='store_true', help='Print the raw snapshot as JSON')
+    
+    # Ground station command
+    ground_parser = subparsers.add_parser('ground', help='Receive and show live frames from streaming robots')
+    ground_parser.add_argument('--bind', default='0.0.0.0', help='Address to listen on')
+    ground_parser.add_argument('--port', type=int, default=STREAM_PORT, help='UDP port to listen on')
+    ground_parser.add_argument('--interval', type=float, default=1.0, help='Seconds between status tables')
+    ground_parser.add_argument('--duration', type=float, help='Stop after this many seconds')
+    
+    # Deploy command
+    deploy_parser = subparsers.add_parser('deploy', help='Deploy the project to robots over SSH')
+    deploy_parser.add_argument('hosts', nargs='+', metavar='HOST',
+                             help='[user@]host[:port] entries, or inventory files listing one per line')
+    deploy_parser.add_argument('--user', default=DEPLOY_USER, help='Login for hosts without user@')
+    deploy_parser.add_argument('--password', action='store_true',
+                             help='Prompt once for a password used on every host (default: keys/agent)')
+    deploy_parser.add_argument('--key', help='Private key file')
+    deploy_parser.add_argument('--workers', type=int, default=DEPLOY_WORKERS,
+                             help='Hosts deployed at once')
+    deploy_parser.add_argument('--wheelhouse', metavar='DIR',
+                             help='Install dependencies from the wheels in DIR instead of the package index')
+    deploy_parser.add_argument('--build-wheelhouse', action='store_true',
+                             help='Build or update the --wheelhouse directory first')
+    deploy_parser.add_argument('--platform', help="Robots' pip platform tag for --build-wheelhouse, "
+                                                  "e.g. linux_armv7l")
+    deploy_parser.add_argument('--python-version', help="Robots' Python version for --platform, e.g. 3.9")
+    deploy_parser.add_argument('--dir', default=DEPLOY_DIR, help='Deploy directory in the login\'s home')
+    deploy_parser.add_argument('--no-install', action='store_true', help='Only sync the files')
+    deploy_parser.add_argument('--full', action='store_true',
+                             help='Send every file, ignoring what the robots already have')
     
     args = parser.parse_args()
     
     if args.command == 'navigate':
-        robot = AutonomousRobot()
+        from .autonomous_navigation import AutonomousRobot
+        robot = AutonomousRobot(telemetry=args.telemetry, stream=args.stream)
+        if args.tuned:
+            from .tuning import load_profile
+            robot.apply_parameters(load_profile(args.tuned))
         if args.speed:
             robot.speed = args.speed
         if args.safe_distance:
             robot.safe_distance = args.safe_distance
+        if args.profile:
+            robot.profiler.enable()
+        install_signal_handlers(robot.profiler)
         logger.info("Starting autonomous navigation")
-        robot.navigate()
+        if args.mode == 'planned':
+            robot.navigate_planned(tuple(args.goal))
+        elif args.mode == 'async':
+            from .async_navigation import navigate_async
+            navigate_async(robot)
+        elif args.mode == 'explore':
+            robot.navigate_explore()
+        else:
+            robot.navigate()
         
     elif args.command == 'test':
-        robot = AutonomousRobot()
-        if args.component in ['sensors', 'all']:
-            logger.info("Testing sensors...")
-            print(f"Distance: {robot.get_distance()} cm")
-            print(f"Light level: {robot.get_light_level()}")
-            print(f"Sound level: {robot.get_sound_level()}")
+        from .diagnostics import CHECKS, format_report, run_diagnostics
+        names = None
+        if args.component != 'all':
+            names = [check.name for check in CHECKS if check.actuator == (args.component == 'motors')]
+        report = run_diagnostics(quick=args.quick, names=names)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2)
+        print(json.dumps(report, indent=2) if args.json else format_report(report))
+        if not report['ok']:
+            sys.exit(1)
             
-        if args.component in ['motors', 'all']:
-            logger.info("Testing motors...")
-            robot.move_forward(1)
-            robot.turn(90)
-            robot.stop()
+    elif args.command == 'replay':
+        from .replay import replay
+        options = {'tolerance': args.tolerance} if args.tolerance is not None else {}
+        report = replay(args.file, max_cycles=args.max_cycles, scan_mode=args.scan_mode, **options)
+        print(report.summary())
+        if not report.matched:
+            sys.exit(1)
             
+    elif args.command == 'tune':
+        from .tuning import EpisodeCache, format_profile, tune
+        space = {name: TUNE_SPACE[name] for name in args.parameters} if args.parameters else None
+        profile = tune(
+            output=args.output, validation=args.validation, space=space, mode=args.mode,
+            max_cycles=args.max_cycles, episodes=args.episodes, population=args.population,
+            generations=args.generations, workers=args.workers, seed=args.seed,
+            cache=EpisodeCache(None if args.no_cache else args.cache),
+        )
+        print(format_profile(profile))
+        print(f"Wrote {args.output}; use it with: robot navigate --tuned {args.output}")
+        
+    elif args.command == 'stats':
+        if args.toggle is not None:
+            os.kill(args.toggle, signal.SIGUSR1)
+            return
+        if args.run is not None:
+            from .autonomous_navigation import AutonomousRobot
+            robot = AutonomousRobot()
+            robot.profiler.path = None
+            robot.profiler.enable()
+            if args.mode == 'planned':
+                robot.navigate_planned(max_cycles=args.run)
+            else:
+                robot.navigate(max_cycles=args.run)
+            snapshot = robot.profiler.snapshot()
+        else:
+            path = args.file or stats_file()
+            try:
+                snapshot = load_snapshot(path)
+            except (OSError, ValueError, TypeError) as e:
+                print(f"No profiling stats in {path}: {str(e)}", file=sys.stderr)
+                print("Run navigate with --profile or ROBOT_PROFILE=1, or use --run", file=sys.stderr)
+                sys.exit(1)
+        print(json.dumps(snapshot, indent=2) if args.json else format_snapshot(snapshot))
+        
+    elif args.command == 'ground':
+        from .streaming import GroundStation
+        with GroundStation(args.bind, args.port) as station:
+            print(f"Listening for telemetry on {station.address[0]}:{station.address[1]}")
+            try:
+                station.run(args.duration, args.interval, callback=lambda s: print(s.format_status() + '\n'))
+            except KeyboardInterrupt:
+                pass
+            print(station.format_status())
+        
+    elif args.command == 'deploy':
+        from getpass import getpass
+        from .fleet import build_wheelhouse, deploy, format_reports, load_inventory, parse_host
+        if args.build_wheelhouse and not args.wheelhouse:
+            parser.error('--build-wheelhouse needs --wheelhouse DIR')
+        hosts = []
+        for entry in args.hosts:
+            if os.path.isfile(entry):
+                hosts.extend(load_inventory(entry, username=args.user))
+            else:
+                hosts.append(parse_host(entry, username=args.user))
+        password = getpass('SSH password: ') if args.password else None
+        if args.build_wheelhouse:
+            build_wheelhouse(args.wheelhouse, platform=args.platform, python_version=args.python_version)
+        reports = deploy(hosts, password=password, key_filename=args.key, workers=args.workers,
+                         wheelhouse=args.wheelhouse, directory=args.dir, install=not args.no_install,
+                         full=args.full)
+        print(format_reports(reports))
+        if not all(report.ok for report in reports):
+            sys.exit(1)
+        
     else:
         parser.print_help()
 
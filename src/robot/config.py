@@ -18,6 +18,7 @@ SOUND_SENSOR_PORT = "A1"  # Port for sound sensor
 # Camera settings (Pi-top 4 specific)
 CAMERA_RESOLUTION = (640, 480)
 CAMERA_FRAMERATE = 30
+CAMERA_FOV = 62.2  # degrees horizontal, Raspberry Pi camera v2
 
 # Emergency stop parameters
 SOUND_THRESHOLD = 0.8  # Sound level threshold for emergency stop
@@ -34,4 +35,214 @@ BATTERY_CRITICAL_LEVEL = 10  # percentage
 
 # Display settings (Pi-top 4 specific)
 DISPLAY_BRIGHTNESS = 100  # percentage
-DISPLAY_TIMEOUT = 300  # seconds 
\ No newline at end of file
+DISPLAY_TIMEOUT = 300  # seconds 
+
+# Component diagnostics (robot test, see diagnostics.py)
+DIAG_TIMEOUT = 5.0  # seconds a check may take before it is reported as timed out
+DIAG_TIMEOUTS = {'camera': 10.0}  # per-check overrides; opening the camera is slow
+DIAG_READINGS = 3  # readings taken per sensor check
+DIAG_SERVO_TOLERANCE = 5  # degrees the servo may end up from its target
+DIAG_MOTOR_SPEED = 0.5  # wheel speed of the motor check
+DIAG_MOTOR_DURATION = 0.5  # seconds the motor check drives
+
+# Logging (written by a background thread)
+LOG_FILE = 'robot.log'  # overridden by ROBOT_LOG_FILE; empty for console only
+LOG_MAX_BYTES = 5 * 1024 * 1024  # rotate the log file at this size
+LOG_BACKUP_COUNT = 5  # rotated log files to keep
+LOG_ROTATE_WHEN = None  # e.g. 'midnight' to rotate by time instead of size
+LOG_RATE_LIMIT = 10.0  # seconds between repeats of a rate-limited message
+
+# Binary telemetry (sensor readings and motor commands, see telemetry.py)
+TELEMETRY_DIR = None  # directory for chunk files, None to disable; overridden by ROBOT_TELEMETRY_DIR
+TELEMETRY_CHUNK_RECORDS = 65536  # records per chunk file (37 bytes each)
+REPLAY_TOLERANCE = 0.15  # relative turn size difference still counted as the same decision
+REPLAY_DEADBAND = 0.01  # motor speeds below this count as stopped when comparing replays
+
+# Live telemetry streaming over UDP (navigate --stream, robot ground, see streaming.py)
+STREAM_ADDRESS = None  # 'host[:port]' of the ground station, None to disable; overridden by ROBOT_STREAM
+STREAM_PORT = 9870  # UDP port the ground station listens on
+STREAM_ROBOT_ID = None  # name in the frames, at most 16 bytes (default: the host name)
+STREAM_RATE = 10.0  # frames per second at most
+STREAM_MIN_RATE = 0.5  # frames per second the rate backs off to at worst under backpressure
+STREAM_QUEUE = 4  # frames waiting to be sent; the oldest is dropped when full
+STREAM_MAX_FRAME = 1400  # bytes, so a frame fits one Ethernet packet; scans are decimated to fit
+STREAM_STALE = 2.0  # seconds without a frame before the ground station shows a robot as stale
+
+# Navigation loop profiling (see profiling.py, `robot stats`)
+PROFILE_ENABLED = False  # time every loop stage; overridden by ROBOT_PROFILE, switchable with SIGUSR1
+PROFILE_DUMP_INTERVAL = 60.0  # seconds between logged and written snapshots while enabled
+PROFILE_STATS_FILE = 'robot_stats.json'  # overridden by ROBOT_STATS_FILE; empty to only log
+PROFILE_PRECISION_BITS = 5  # histogram buckets per power of two are 2**this (about 3% precision)
+
+# Background sensor sampling
+SAMPLER_ENABLED = True
+SAMPLE_RATES = {  # Hz
+    'distance': 25,
+    'light': 10,
+    'sound': 50,
+}
+SAMPLE_BUFFER_SIZE = 256  # samples kept per sensor
+SAMPLE_MAX_AGE = 0.2  # seconds before a sampled reading is considered stale
+
+# Cached slow-changing readings (see cache.py)
+CACHE_TTLS = {  # seconds a reading is served from memory
+    'battery': 5.0,
+}
+CACHE_REFRESH_AHEAD = 0.8  # fraction of the TTL after which the background thread refreshes
+
+# Servo scanning
+SCAN_MODE = 'sweep'  # 'sweep' (continuous, alternating) or 'step' (stop at each angle)
+SWEEP_BINS = 7  # heading bins per sweep
+SERVO_SWEEP_SPEED = 450  # degrees per second
+
+# Direction scoring
+SCORE_CANDIDATES = 91  # headings scored per scan (None scores only the scan angles)
+ROBOT_WIDTH = 16  # cm, obstacles are dilated by half of this
+LIGHT_WEIGHT = 1.0  # weight of the light error penalty
+HEADING_CHANGE_WEIGHT = 0.1  # weight of the heading change penalty
+MIN_AVOID_TURN = 25  # degrees, smallest turn away from headings too blocked to drive
+
+DISTANCE_UNCERTAINTY_WEIGHT = 0.03  # weight of the penalty for uncertain (filtered) distances
+
+# Sensor filtering (see filters.py); each entry is (filter, options) or None
+SCAN_FILTERS = {  # one channel per scan heading, carried through the robot's moves and turns
+    'distance': ('kalman', {
+        'measurement_variance': 4.0,  # cm^2
+        'process_variance': 1.0,  # cm^2 added per scan
+        'gate': 3.0,  # standard deviations before a reading counts as an outlier
+        'max_rejections': 1,  # a second outlier in a row is taken as real
+        'trust_below': SAFE_DISTANCE,  # cm, readings this close are taken at once, never gated
+    }),
+    'light': None,
+}
+SENSOR_FILTERS = {  # applied to every reading of a sensor by its getter
+    'battery': ('ema', {'alpha': 0.2}),
+    'sound': None,  # unfiltered so a single loud reading still stops the robot
+}
+FILTER_TRAVEL_VARIANCE = 4.0  # cm^2 of distance uncertainty per cm travelled
+
+# Dead reckoning
+WHEEL_SPEED = 30  # cm/s travelled at motor speed 1.0
+
+# Occupancy grid map
+GRID_ENABLED = True
+GRID_SIZE = 200  # cells per side of the sliding window
+GRID_RESOLUTION = 5  # cm per cell
+GRID_MAX_RANGE = 200  # cm, readings at or beyond this are treated as no echo
+GRID_LOG_ODDS_FREE = -0.4  # update for cells a beam passes through
+GRID_LOG_ODDS_OCCUPIED = 0.85  # update for the cell a beam hits
+GRID_LOG_ODDS_LIMIT = 5.0  # clamp so cells can still change their mind
+GRID_FREE_THRESHOLD = -0.8  # log-odds below which a cell is known free
+GRID_OCCUPIED_THRESHOLD = 0.8  # log-odds above which a cell is known occupied
+GRID_DECAY = 0.98  # per-scan decay towards unknown, so stale cells fade
+GRID_SKIP_CLEAR_SECTORS = True  # reuse the map instead of rescanning known-clear angles
+
+# Global path planning (navigate --mode planned)
+GOAL_DISTANCE = 400  # cm straight ahead, default goal for crossing the room
+GOAL_TOLERANCE = 15  # cm, goal counts as reached within this distance
+PLAN_LOOKAHEAD = 4  # cells along the path to steer towards
+PLAN_HEADING_TOLERANCE = 15  # degrees, turn before driving if further off
+
+# Frontier exploration (navigate --mode explore, see exploration.py)
+EXPLORE_RESOLUTION = 10  # cm per cell of the scan history
+EXPLORE_TILE = 32  # cells per side of a history tile (1 KB)
+EXPLORE_MAX_TILES = 256  # tiles kept (256 KB, 2600 m²); the least recently updated are dropped
+EXPLORE_FREE_THRESHOLD = -2  # evidence at or below which a cell is known free (-1 per beam through it)
+EXPLORE_OCCUPIED_THRESHOLD = 3  # evidence at or above which a cell is known occupied (+3 per echo)
+EXPLORE_WINDOW = 50  # cells from the robot searched for frontiers
+EXPLORE_CLEARANCE = 10  # cm kept from known obstacles beyond half the robot's width
+EXPLORE_MIN_DISTANCE = 2  # cells, nearer frontiers are already in view
+EXPLORE_GAIN_RADIUS = 10  # cells around a target whose frontier cells count as its gain
+EXPLORE_COST_EXPONENT = 0.5  # targets are ranked by gain / cost**this; lower prefers larger, further frontiers
+EXPLORE_TURN_WEIGHT = 6.0  # cells of travel a 90 degree turn is worth
+EXPLORE_LOOKAHEAD = 3  # cells along the path to steer towards
+EXPLORE_TARGET_CYCLES = 20  # cycles spent on one target before giving up on it
+EXPLORE_BLACKLIST_RADIUS = 3  # cells around a given-up target no longer explored
+
+# Camera frame pipeline
+VISION_ENABLED = True
+VISION_SLOTS = 4  # frames in the shared-memory ring
+VISION_BINS = 16  # heading bins across the camera's field of view
+VISION_DOWNSCALE = 4  # shrink frames by this factor before edge detection
+VISION_EDGE_THRESHOLDS = (50, 150)  # Canny hysteresis thresholds
+
+# Light seeking: 'camera' reads light direction from one frame per scan,
+# 'sensor' reads the analog light sensor at every servo step. The sensor is
+# also the fallback when no camera is available.
+LIGHT_SOURCE = 'camera'
+LIGHT_DOWNSCALE = 8  # shrink frames by this factor for the brightness profile
+LIGHT_MAX_AGE = 0.5  # seconds, newest vision result counts as current within this
+
+# Motion control
+MOTION_CONTROL_RATE = 50  # Hz, motor control loop
+MOTOR_ACCELERATION = 2.0  # wheel speed change per second (0 to full speed in 0.5 s)
+MOTION_PIPELINE = True  # scan for the next move while driving forward (real-time clock only)
+TURN_MAX_SPEED = 0.6  # wheel speed turns cruise at; TURN_SPEED only sets the TURN_DURATION calibration
+
+# Pose estimation (see pose.py)
+POSE_MATCHING = True  # correct dead reckoning by matching each sweep against the previous one
+POSE_MATCH_MAX_ROTATION = 15  # degrees of heading error searched either way
+POSE_MATCH_ROTATION_STEP = 0.5  # degrees
+POSE_MATCH_MAX_SHIFT = 6  # cm of forward travel error searched either way
+POSE_MATCH_SHIFT_STEP = 1.0  # cm
+POSE_MATCH_INLIER = 5.0  # cm, residual beyond which a reading does not match
+POSE_MATCH_MIN_POINTS = 6  # matching readings needed to trust a match
+POSE_MATCH_ROTATION_VARIANCE = 0.5  # deg^2 of a matched heading
+POSE_MATCH_SHIFT_VARIANCE = 4.0  # cm^2 of a matched forward travel
+POSE_TURN_ERROR = 0.03  # relative standard deviation of a calibrated dead-reckoned turn
+POSE_TRAVEL_ERROR = 0.1  # relative standard deviation of a dead-reckoned distance
+POSE_DRIFT_VARIANCE = 0.1  # deg^2 of heading uncertainty per cm driven, once calibrated (wheel slip)
+POSE_TURN_GAIN_PRIOR_VARIANCE = 0.01  # of the turn gain before any calibration
+POSE_DRIFT_PRIOR_VARIANCE = 0.1  # (deg/cm)^2 of the drift before any calibration
+POSE_CALIBRATION_NOISE = 1e-5  # variance added per update, so the calibration keeps tracking slow changes
+
+# Parameter tuning (robot tune, see tuning.py). TURN_SPEED and TURN_DURATION are
+# a measured calibration (seconds per 90 degrees), not a choice, so they are not searched.
+TUNE_SPACE = {  # config constant -> (min, max) searched
+    'SPEED': (0.2, 1.0),
+    'TURN_MAX_SPEED': (0.2, 1.0),
+    'SAFE_DISTANCE': (10, 50),  # cm
+    'SCAN_INTERVAL': (0.0, 0.3),  # seconds
+    'MOVE_DURATION': (0.2, 1.5),  # seconds
+    'TARGET_LIGHT_LEVEL': (0.2, 0.9),
+}
+TUNE_FAILURE_TIME = 300  # simulated seconds charged for an episode that collides or misses the goal
+TUNE_CACHE_FILE = '.tune_cache.json'  # episode results by parameter hash
+TUNED_PROFILE_FILE = 'tuned_profile.json'  # written by robot tune, loaded by navigate --tuned
+
+# Fleet deployment (robot deploy, see fleet.py)
+DEPLOY_DIR = 'autonomous-robot'  # on each robot, relative to the login's home directory
+DEPLOY_USER = 'pi'  # login for inventory entries without user@
+DEPLOY_FILES = ['setup.py', 'pyproject.toml', 'requirements.txt', 'README.md', 'src']  # sent, relative to the project root
+DEPLOY_EXCLUDE = ['__pycache__', '*.pyc', '*.log', '.pytest_cache', '*.egg-info']  # never sent
+DEPLOY_WORKERS = 8  # hosts deployed at once, and SSH connections kept open
+DEPLOY_CONNECT_TIMEOUT = 10  # seconds
+
+# Async navigation (navigate --mode async)
+WATCHDOG_INTERVAL = 0.01  # seconds between emergency watchdog checks
+WATCHDOG_OBSTACLE_DISTANCE = 10  # cm, watchdog stops a forward move closer than this
+WATCHDOG_OBSTACLE_ANGLE = 15  # degrees, servo must point roughly ahead for the check
+WATCHDOG_CENTER_SERVO = True  # park the servo ahead while driving forward
+BATTERY_CHECK_INTERVAL = 5.0  # seconds between battery checks
+
+# Hardware backend: 'pitop' for the real robot, 'sim' for the simulator
+# (can be overridden with the ROBOT_BACKEND environment variable)
+BACKEND = 'pitop'
+
+# Simulator
+SIM_WHEEL_BASE = 9.5  # cm between the wheels
+SIM_DISTANCE_NOISE = 1.0  # cm standard deviation of ultrasonic readings
+SIM_OUTLIER_PROBABILITY = 0.02  # chance of a spurious ultrasonic echo
+SIM_ULTRASONIC_CONE = 15  # degrees
+SIM_LIGHT_NOISE = 0.01
+SIM_SOUND_NOISE = 0.03
+SIM_BATTERY_DRAIN = 0.01  # percent per second
+SIM_WHEEL_GAIN_ERROR = 0.0  # standard deviation of each wheel's speed error, fixed per run
+SIM_WHEEL_SLIP = 0.0  # standard deviation of the extra speed error drawn at every start
+SIM_READ_LATENCY = {  # seconds of bus time per device read
+    'distance': 0.005,
+    'light': 0.001,
+    'sound': 0.001,
+    'battery': 0.002,
+    'camera': 0.010,
+}
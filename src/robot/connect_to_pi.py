@@ -1,65 +1,48 @@
 #!/usr/bin/env python3
 
-import paramiko
-import os
 import sys
 from getpass import getpass
+from .config import DEPLOY_DIR
+from .fleet import Host, deploy, format_reports
 
-def connect_to_raspberry_pi(hostname, username, password=None):
+def connect_to_raspberry_pi(hostname, username, password=None, wheelhouse=None):
     """
     Connect to Raspberry Pi using SSH and deploy the project
+
+    Sends the project files that changed since the last deploy and installs
+    them into a virtualenv on the Pi. To deploy to several robots at once,
+    use `robot deploy` (see fleet.py).
+
+    Args:
+        hostname (str): Raspberry Pi host name or address
+        username (str): Login on the Pi
+        password (str): Password; prompted for if not given
+        wheelhouse (str): Local wheel directory to install the dependencies
+            from instead of the package index
     """
-    try:
-        # Create SSH client
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        
-        # If password not provided, prompt for it
-        if password is None:
-            password = getpass(f"Enter password for {username}@{hostname}: ")
-        
-        # Connect to Raspberry Pi
-        print(f"Connecting to {username}@{hostname}...")
-        ssh.connect(hostname, username=username, password=password)
-        
-        # Create project directory
-        print("Creating project directory...")
-        stdin, stdout, stderr = ssh.exec_command('mkdir -p ~/autonomous-robot')
-        
-        # Setup virtual environment
-        print("Setting up Python virtual environment...")
-        commands = [
-            'cd ~/autonomous-robot',
-            'python3 -m venv venv',
-            'source venv/bin/activate',
-            'pip install --upgrade pip',
-            'pip install -r requirements.txt'
-        ]
-        
-        for cmd in commands:
-            stdin, stdout, stderr = ssh.exec_command(cmd)
-            print(stdout.read().decode())
-            if stderr.read():
-                print(f"Error: {stderr.read().decode()}", file=sys.stderr)
-        
-        print("\nConnection successful! Project setup complete.")
-        print("You can now run the autonomous navigation system with:")
-        print("cd ~/autonomous-robot")
-        print("source venv/bin/activate")
-        print("python autonomous_navigation.py")
-        
-        ssh.close()
-        
-    except Exception as e:
-        print(f"Error connecting to Raspberry Pi: {str(e)}", file=sys.stderr)
+    # If password not provided, prompt for it
+    if password is None:
+        password = getpass(f"Enter password for {username}@{hostname}: ")
+
+    print(f"Deploying to {username}@{hostname}...")
+    report, = deploy([Host(hostname, username, 22)], password=password, workers=1, wheelhouse=wheelhouse)
+    print(format_reports([report]))
+    if not report.ok:
+        print(f"Error deploying to Raspberry Pi: {report.error}", file=sys.stderr)
         sys.exit(1)
 
+    print("\nConnection successful! Project setup complete.")
+    print("You can now run the autonomous navigation system with:")
+    print(f"cd ~/{DEPLOY_DIR}")
+    print("source venv/bin/activate")
+    print("python -m robot.cli navigate")
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print("Usage: python connect_to_pi.py <hostname> [username]")
+        print("Usage: python -m robot.connect_to_pi <hostname> [username]")
         sys.exit(1)
-    
+
     hostname = sys.argv[1]
     username = sys.argv[2] if len(sys.argv) > 2 else "pi"
-    
-    connect_to_raspberry_pi(hostname, username) 
\ No newline at end of file
+
+    connect_to_raspberry_pi(hostname, username)
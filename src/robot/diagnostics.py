@@ -0,0 +1,313 @@
+"""
+Concurrent component diagnostics (`robot test`, test_components).
+
+Each component has one check: it opens the device, exercises it and
+returns what it measured. The checks run at the same time, each on its own
+thread, and each is limited to its own timeout (DIAG_TIMEOUT, DIAG_TIMEOUTS),
+so a full diagnostic takes about as long as its slowest check rather than
+the sum of them:
+
+    battery, ultrasonic, light, sound, display, camera    sensors, concurrent
+    servo, motors                                         actuators
+
+Checks that must not overlap name a shared resource, and a check waits until
+it holds all of its resources. The servo and motor checks both hold
+'actuators': they draw on the same motor supply, and a moving robot changes
+what the servo head points at. They run one after the other, alongside the
+sensor checks. A check that times out keeps its resources until its call
+actually returns, so a stuck motor check never overlaps the servo check.
+
+Quick mode skips every check that moves an actuator, so it is safe to run on
+a robot standing on a desk. The report is plain data, ready for json.dump():
+
+    report = run_diagnostics(quick=True)
+    print(format_report(report))
+"""
+
+import math
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from .config import (
+    BATTERY_WARNING_LEVEL,
+    CAMERA_FRAMERATE,
+    CAMERA_RESOLUTION,
+    DIAG_MOTOR_DURATION,
+    DIAG_MOTOR_SPEED,
+    DIAG_READINGS,
+    DIAG_SERVO_TOLERANCE,
+    DIAG_TIMEOUT,
+    DIAG_TIMEOUTS,
+    DISPLAY_BRIGHTNESS,
+    DISPLAY_TIMEOUT,
+    LIGHT_SENSOR_PORT,
+    SCAN_ANGLE,
+    SERVO_PORT,
+    SERVO_SWEEP_SPEED,
+    SOUND_SENSOR_PORT,
+    ULTRASONIC_PORT,
+)
+from .hardware import get_backend, lazy_device
+from .logger import logger
+
+REPORT_VERSION = 1
+ACTUATORS = 'actuators'  # resource shared by the checks that move something
+
+# A check: function(devices, clock) -> detail dict, raising on failure. A
+# 'warning' entry in the detail marks a working component that needs attention.
+Check = namedtuple('Check', ['name', 'function', 'resources', 'actuator'])
+
+
+class Devices:
+    """A backend's devices, each opened by the first check that uses it."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @lazy_device
+    def pitop(self):
+        return self.backend.create_pitop()
+
+    @lazy_device
+    def battery(self):
+        return self.backend.create_battery()
+
+    @lazy_device
+    def ultrasonic(self):
+        return self.backend.create_ultrasonic(ULTRASONIC_PORT)
+
+    @lazy_device
+    def servo(self):
+        return self.backend.create_servo(SERVO_PORT)
+
+    @lazy_device
+    def light_sensor(self):
+        return self.backend.create_light_sensor(LIGHT_SENSOR_PORT)
+
+    @lazy_device
+    def sound_sensor(self):
+        return self.backend.create_sound_sensor(SOUND_SENSOR_PORT)
+
+    @lazy_device
+    def camera(self):
+        return self.backend.create_camera(CAMERA_RESOLUTION, CAMERA_FRAMERATE)
+
+
+def _number(value, what):
+    """value as a float, raising if the device returned nothing usable"""
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{what} is {value!r}, not a number")
+    if not math.isfinite(number):
+        raise ValueError(f"{what} is {value!r}")
+    return number
+
+
+def _readings(read, what):
+    values = sorted(round(_number(read(), what), 3) for _ in range(DIAG_READINGS))
+    return {what: values[len(values) // 2], 'min': values[0], 'max': values[-1]}
+
+
+def check_battery(devices, clock):
+    level = _number(devices.battery.percentage, 'percentage')
+    if not 0 <= level <= 100:
+        raise ValueError(f"percentage {level} out of range")
+    detail = {'percentage': level}
+    if level < BATTERY_WARNING_LEVEL:
+        detail['warning'] = f"battery at {level:.0f}%"
+    return detail
+
+
+def check_ultrasonic(devices, clock):
+    detail = _readings(lambda: devices.ultrasonic.distance, 'distance')
+    if detail['min'] < 0:
+        raise ValueError(f"negative distance {detail['min']}")
+    return detail
+
+
+def check_light(devices, clock):
+    return _readings(lambda: devices.light_sensor.reading, 'reading')
+
+
+def check_sound(devices, clock):
+    return _readings(lambda: devices.sound_sensor.reading, 'reading')
+
+
+def check_display(devices, clock):
+    display = devices.pitop.display
+    display.brightness = DISPLAY_BRIGHTNESS
+    display.timeout = DISPLAY_TIMEOUT
+    return {'brightness': DISPLAY_BRIGHTNESS, 'timeout': DISPLAY_TIMEOUT}
+
+
+def check_camera(devices, clock):
+    frame = devices.camera.get_frame()
+    shape = getattr(frame, 'shape', None)
+    if shape is None or len(shape) != 3 or not frame.size:
+        raise ValueError(f"no usable frame (shape {shape})")
+    return {'shape': list(shape), 'mean': round(float(frame.mean()), 1)}
+
+
+def check_servo(devices, clock):
+    """Swing the scan servo to both ends of the navigator's sweep and back to the centre."""
+    servo = devices.servo
+    angle = 0.0
+    # SCAN_ANGLE is the full sweep width, centred on straight ahead
+    half = SCAN_ANGLE / 2
+    for target in (half, -half, 0):
+        servo.angle = target
+        clock.sleep(abs(target - angle) / SERVO_SWEEP_SPEED + 0.05)
+        angle = target
+    final = _number(servo.angle, 'angle')
+    detail = {'angle': final}
+    if abs(final) > DIAG_SERVO_TOLERANCE:
+        detail['warning'] = f"servo at {final:.0f} degrees, not centred"
+    return detail
+
+
+def check_motors(devices, clock):
+    """Drive both wheels forward briefly."""
+    pitop = devices.pitop
+    try:
+        pitop.left_motor.forward(DIAG_MOTOR_SPEED)
+        pitop.right_motor.forward(DIAG_MOTOR_SPEED)
+        clock.sleep(DIAG_MOTOR_DURATION)
+    finally:
+        pitop.left_motor.stop()
+        pitop.right_motor.stop()
+    return {'speed': DIAG_MOTOR_SPEED, 'duration': DIAG_MOTOR_DURATION}
+
+
+CHECKS = [
+    Check('battery', check_battery, (), False),
+    Check('ultrasonic', check_ultrasonic, (), False),
+    Check('light', check_light, (), False),
+    Check('sound', check_sound, (), False),
+    Check('display', check_display, (), False),
+    Check('camera', check_camera, (), False),
+    Check('servo', check_servo, (ACTUATORS,), True),
+    Check('motors', check_motors, (ACTUATORS,), True),
+]
+
+
+def _attempt(check, devices, clock, locks, timeout, wait_limit, result):
+    """Run one check into result, waiting for its resources first."""
+    held = []
+    waited = time.perf_counter()
+    for resource in sorted(check.resources):
+        if not locks[resource].acquire(timeout=wait_limit):
+            for lock in held:
+                lock.release()
+            result.update(status='timeout', error=f"still waiting for {resource}")
+            return
+        held.append(locks[resource])
+    started = time.perf_counter()
+    result['waited'] = started - waited
+    finished = threading.Event()
+    guard = threading.Lock()
+
+    def call():
+        try:
+            detail = check.function(devices, clock)
+            outcome = {'status': 'warn' if 'warning' in detail else 'pass', 'detail': detail}
+        except Exception as e:
+            outcome = {'status': 'fail', 'error': f"{type(e).__name__}: {str(e)}"}
+        with guard:
+            # A late result does not overwrite the reported timeout
+            if not finished.is_set():
+                result.update(outcome, latency=time.perf_counter() - started)
+                finished.set()
+        # Held until the call really returns, even after a timeout
+        for lock in held:
+            lock.release()
+
+    threading.Thread(target=call, name=f"diagnose-{check.name}", daemon=True).start()
+    finished.wait(timeout)
+    with guard:
+        if not finished.is_set():
+            finished.set()
+            result.update(status='timeout', latency=time.perf_counter() - started,
+                          error=f"no result after {timeout:g} s")
+
+
+def run_diagnostics(backend=None, quick=False, names=None, checks=None, timeouts=None):
+    """
+    Run component checks concurrently and report on each.
+
+    Args:
+        backend (Backend): Hardware to check (default: get_backend())
+        quick (bool): Skip the checks that move an actuator
+        names (list): Only run these checks (default: all)
+        checks (list): Check definitions (default: CHECKS)
+        timeouts (dict): Check name -> seconds, over DIAG_TIMEOUTS and DIAG_TIMEOUT
+
+    Returns:
+        dict: {'version', 'backend', 'quick', 'started', 'elapsed', 'ok',
+            'checks': [{'name', 'status', 'latency', 'waited', 'detail',
+            'error'}]}, status being 'pass', 'warn', 'fail', 'timeout' or
+            'skipped', and the times in seconds
+    """
+    backend = backend if backend is not None else get_backend()
+    checks = CHECKS if checks is None else checks
+    timeouts = {**DIAG_TIMEOUTS, **(timeouts or {})}
+    devices = Devices(backend)
+    started_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+    started = time.perf_counter()
+
+    results, selected = [], []
+    for check in checks:
+        result = {'name': check.name, 'status': None, 'latency': None, 'waited': 0.0,
+                  'detail': {}, 'error': None}
+        results.append(result)
+        if names is not None and check.name not in names:
+            result['status'] = 'skipped'
+        elif quick and check.actuator:
+            result.update(status='skipped', error='moves an actuator (quick mode)')
+        else:
+            selected.append((check, result, timeouts.get(check.name, DIAG_TIMEOUT)))
+
+    locks = {resource: threading.Lock() for check, _, _ in selected for resource in check.resources}
+    # Long enough for every other check to time out first
+    wait_limit = sum(timeout for _, _, timeout in selected)
+    threads = [
+        threading.Thread(target=_attempt, args=(check, devices, backend.clock, locks, timeout, wait_limit, result),
+                         name=f"diagnose-{check.name}-wait", daemon=True)
+        for check, result, timeout in selected
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    report = {
+        'version': REPORT_VERSION,
+        'backend': type(backend).__name__,
+        'quick': quick,
+        'started': started_at,
+        'elapsed': time.perf_counter() - started,
+        'ok': all(result['status'] in ('pass', 'warn', 'skipped') for result in results),
+        'checks': results,
+    }
+    for result in results:
+        if result['status'] in ('fail', 'timeout'):
+            logger.error(f"Diagnostic {result['name']} {result['status']}: {result['error']}")
+        elif result['status'] == 'warn':
+            logger.warning(f"Diagnostic {result['name']}: {result['detail']['warning']}")
+    return report
+
+
+def format_report(report):
+    """Per-check table of a run_diagnostics() report."""
+    lines = [f"{'check':<12} {'status':<8} {'ms':>8}  detail"]
+    for result in report['checks']:
+        latency = '-' if result['latency'] is None else f"{result['latency'] * 1000:.0f}"
+        detail = ', '.join(f"{key}={value}" for key, value in result['detail'].items() if key != 'warning')
+        note = result['error'] or result['detail'].get('warning') or ''
+        lines.append(f"{result['name']:<12} {result['status']:<8} {latency:>8}  "
+                     + '; '.join(part for part in (detail, note) if part))
+    mode = ' (quick)' if report['quick'] else ''
+    lines.append(f"{'ok' if report['ok'] else 'FAILED'}{mode} in {report['elapsed']:.2f} s on {report['backend']}")
+    return '\n'.join(lines)
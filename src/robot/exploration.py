@@ -0,0 +1,413 @@
+"""
+Frontier exploration over a bounded history of past scans (navigate --mode explore).
+
+The occupancy grid (occupancy_grid.py) is a short-term map: it decays every
+scan and slides with the robot, so it forgets where the robot has been. To
+explore, the robot also keeps a ScanHistory, a sparse map of everything it has
+scanned:
+
+- The plane is cut into square tiles of EXPLORE_TILE cells. Only tiles that a
+  beam has touched exist, so empty space costs nothing.
+- Each cell holds an int8 evidence count, lowered by every beam that passes
+  through it and raised by every echo from it. Nothing decays, so a room
+  scanned once stays known.
+- At most EXPLORE_MAX_TILES tiles are kept (a few hundred KB). Beyond that the
+  least recently updated tile is dropped and becomes unknown again, which is
+  the area the robot is least likely to come back to.
+
+A frontier is a known-free cell next to an unknown one: driving there and
+scanning shows something new. FrontierExplorer finds the frontiers in a window
+around the robot and measures the travel to each one over known-free cells,
+kept clear of known obstacles. It picks the frontier with the most gain for
+its cost:
+
+    gain = reachable frontier cells within EXPLORE_GAIN_RADIUS
+    cost = travel + turn weight * |bearing| / 90 + 1
+    best = max(gain / cost ** EXPLORE_COST_EXPONENT)
+
+Counting frontier cells rather than unknown ones prefers wide openings over
+slivers along a wall, behind which everything stays unknown anyway.
+
+It keeps a target until the target is no longer a frontier. A target that
+takes EXPLORE_TARGET_CYCLES cycles, or whose way turns out to be blocked, is
+given up on together with the frontier around it, such as a gap between
+echoes that no scan can close. Frontiers that cannot be reached through
+known-free space, such as free cells seen through a gap in a wall, do not
+count; exploration is complete when no reachable frontier is left.
+
+Coordinates are those of OccupancyGrid: cm, x along the robot's initial
+heading, y to its right, angles in degrees and positive clockwise. Cells are
+(row, col) with row along x, indexed from the world origin, so they are the
+same for every window.
+"""
+
+import math
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from .config import (
+    EXPLORE_BLACKLIST_RADIUS,
+    EXPLORE_CLEARANCE,
+    EXPLORE_COST_EXPONENT,
+    EXPLORE_FREE_THRESHOLD,
+    EXPLORE_GAIN_RADIUS,
+    EXPLORE_LOOKAHEAD,
+    EXPLORE_MAX_TILES,
+    EXPLORE_MIN_DISTANCE,
+    EXPLORE_OCCUPIED_THRESHOLD,
+    EXPLORE_RESOLUTION,
+    EXPLORE_TARGET_CYCLES,
+    EXPLORE_TILE,
+    EXPLORE_TURN_WEIGHT,
+    EXPLORE_WINDOW,
+    GRID_MAX_RANGE,
+    ROBOT_WIDTH,
+)
+from .planner import inflate
+
+FREE_STEP = -1  # evidence per beam passing through a cell
+HIT_STEP = 3  # evidence per echo from a cell
+EVIDENCE_LIMIT = 12  # clamp so cells can still change their mind
+
+
+class ScanHistory:
+    """Sparse, tiled evidence grid of every scan, bounded to max_tiles tiles."""
+
+    def __init__(self, resolution=EXPLORE_RESOLUTION, tile=EXPLORE_TILE, max_tiles=EXPLORE_MAX_TILES,
+                 max_range=GRID_MAX_RANGE):
+        """
+        Args:
+            resolution (float): Cell size in cm
+            tile (int): Cells along each side of a tile
+            max_tiles (int): Tiles kept; the least recently updated go first
+            max_range (float): Readings at or beyond this distance count as no echo
+        """
+        self.resolution = resolution
+        self.tile = tile
+        self.max_tiles = max_tiles
+        self.max_range = max_range
+        # (tile row, tile col) -> int8 evidence, least recently updated first
+        self.tiles = OrderedDict()
+        self.evicted = 0
+
+    @property
+    def memory(self):
+        """Bytes held by the tiles."""
+        return len(self.tiles) * self.tile * self.tile
+
+    def cell(self, x, y):
+        """(row, col) of the cell containing world point (x, y)."""
+        return int(math.floor(x / self.resolution)), int(math.floor(y / self.resolution))
+
+    def cell_to_world(self, row, col):
+        """World coordinates of the centre of a cell."""
+        return (row + 0.5) * self.resolution, (col + 0.5) * self.resolution
+
+    def _tile(self, key):
+        tile = self.tiles.get(key)
+        if tile is None:
+            tile = self.tiles[key] = np.zeros((self.tile, self.tile), dtype=np.int8)
+            while len(self.tiles) > self.max_tiles:
+                self.tiles.popitem(last=False)
+                self.evicted += 1
+        else:
+            self.tiles.move_to_end(key)
+        return tile
+
+    def _apply(self, rows, cols, values, combine):
+        """Set the evidence of each distinct cell to combine(evidence, value)."""
+        if len(rows) == 0:
+            return
+        keys = np.stack([rows // self.tile, cols // self.tile], axis=1)
+        tiles, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        for index, key in enumerate(map(tuple, tiles)):
+            members = inverse == index
+            tile = self._tile(key)
+            r, c = rows[members] % self.tile, cols[members] % self.tile
+            tile[r, c] = combine(tile[r, c].astype(np.int16), values[members])
+
+    def integrate(self, pose, bearings, distances):
+        """
+        Add a set of ultrasonic readings taken from one pose.
+
+        Args:
+            pose (tuple): Robot (x, y, heading) when the readings were taken
+            bearings (array): Beam angle of each reading relative to the heading
+            distances (array): Measured distance of each reading
+        """
+        x, y, heading = pose
+        bearings = np.asarray(bearings, dtype=np.float64)
+        distances = np.asarray(distances, dtype=np.float64)
+        valid = np.isfinite(distances) & (distances >= 0)
+        bearings, distances = bearings[valid], distances[valid]
+        if len(distances) == 0:
+            return
+
+        theta = np.radians(heading + bearings)
+        hit = distances < self.max_range
+        reach = np.minimum(distances, self.max_range)
+        step = self.resolution / 2
+        t = np.arange(int(math.ceil(reach.max() / step)) + 1) * step
+        free = t[None, :] < reach[:, None] - self.resolution / 2
+
+        # Cells relative to a block around the robot, keyed per beam so that
+        # each beam counts once per cell, as in OccupancyGrid
+        span = int(math.ceil(self.max_range / self.resolution)) + 1
+        width = 2 * span + 1
+        row0, col0 = self.cell(x, y)
+        row0, col0 = row0 - span, col0 - span
+
+        def keys(beams, along):
+            rows = np.floor((x + along * np.cos(theta[beams])) / self.resolution).astype(np.int64) - row0
+            cols = np.floor((y + along * np.sin(theta[beams])) / self.resolution).astype(np.int64) - col0
+            return (beams * width + rows) * width + cols
+
+        beams = np.broadcast_to(np.arange(len(theta))[:, None], free.shape)
+        free_keys = np.unique(keys(beams[free], np.broadcast_to(t, free.shape)[free]))
+        hit_keys = keys(np.flatnonzero(hit), distances[hit])
+        # A beam never clears the cell it hit
+        free_keys = np.setdiff1d(free_keys, hit_keys)
+
+        cells = np.concatenate([free_keys, hit_keys]) % (width * width)
+        steps = np.concatenate([np.full(len(free_keys), FREE_STEP), np.full(len(hit_keys), HIT_STEP)])
+        cells, inverse = np.unique(cells, return_inverse=True)
+        totals = np.zeros(len(cells), dtype=np.int16)
+        np.add.at(totals, inverse.reshape(-1), steps)
+        self._apply(cells // width + row0, cells % width + col0, totals,
+                    lambda evidence, total: np.clip(evidence + total, -EVIDENCE_LIMIT, EVIDENCE_LIMIT))
+
+    def mark_free(self, x, y, radius):
+        """Mark the cells within radius cm of (x, y) free, such as where the robot stands."""
+        row, col = self.cell(x, y)
+        span = int(math.ceil(radius / self.resolution))
+        dr, dc = np.mgrid[-span:span + 1, -span:span + 1]
+        inside = (dr * dr + dc * dc) * self.resolution ** 2 <= radius * radius
+        self._apply((row + dr[inside]).astype(np.int64), (col + dc[inside]).astype(np.int64),
+                    np.full(np.count_nonzero(inside), EXPLORE_FREE_THRESHOLD), np.minimum)
+
+    def window(self, row, col, size):
+        """
+        Evidence of a square block of cells, unknown (0) where nothing is kept.
+
+        Args:
+            row, col (int): Cell of the block's corner
+            size (int): Cells along each side
+
+        Returns:
+            numpy.ndarray: int8 evidence, shape (size, size)
+        """
+        block = np.zeros((size, size), dtype=np.int8)
+        for tile_row in range(row // self.tile, (row + size - 1) // self.tile + 1):
+            for tile_col in range(col // self.tile, (col + size - 1) // self.tile + 1):
+                tile = self.tiles.get((tile_row, tile_col))
+                if tile is None:
+                    continue
+                r0, c0 = tile_row * self.tile, tile_col * self.tile
+                top, left = max(row, r0), max(col, c0)
+                bottom, right = min(row + size, r0 + self.tile), min(col + size, c0 + self.tile)
+                block[top - row:bottom - row, left - col:right - col] = tile[top - r0:bottom - r0, left - c0:right - c0]
+        return block
+
+    def known(self):
+        """(free, occupied) cell counts over the whole history."""
+        free = occupied = 0
+        for tile in self.tiles.values():
+            free += int(np.count_nonzero(tile <= EXPLORE_FREE_THRESHOLD))
+            occupied += int(np.count_nonzero(tile >= EXPLORE_OCCUPIED_THRESHOLD))
+        return free, occupied
+
+
+def _grow(mask):
+    """mask grown by one cell in all eight directions"""
+    grown = mask.copy()
+    grown[1:] |= mask[:-1]
+    grown[:-1] |= mask[1:]
+    rows = grown.copy()
+    grown[:, 1:] |= rows[:, :-1]
+    grown[:, :-1] |= rows[:, 1:]
+    return grown
+
+
+def _touches(mask):
+    """Cells with a set neighbour above, below, left or right"""
+    touching = np.zeros_like(mask)
+    touching[1:] |= mask[:-1]
+    touching[:-1] |= mask[1:]
+    touching[:, 1:] |= mask[:, :-1]
+    touching[:, :-1] |= mask[:, 1:]
+    return touching
+
+
+def wavefront(passable, start, spill=None, margin=0):
+    """
+    Steps from start to every cell, moving 8-connected over passable cells.
+
+    Args:
+        passable (numpy.ndarray): Cells the robot can drive through
+        start (tuple): Cell the steps are counted from
+        spill (numpy.ndarray): Cells reached at most margin steps past the
+            passable ones, such as free cells too close to an obstacle to
+            drive through but close enough to drive up to
+        margin (int): Steps into spill cells
+
+    Returns:
+        numpy.ndarray: int32 steps per cell, -1 where start cannot reach
+    """
+    steps = np.full(passable.shape, -1, dtype=np.int32)
+    front = np.zeros(passable.shape, dtype=bool)
+    front[start] = True
+    steps[start] = 0
+    reached = front.copy()
+    distance = 0
+    while front.any():
+        distance += 1
+        front = _grow(front) & passable & ~reached
+        steps[front] = distance
+        reached |= front
+
+    unreached = np.iinfo(np.int32).max
+    for _ in range(margin):
+        padded = np.pad(np.where(reached, steps, unreached), 1, constant_values=unreached)
+        rows, cols = steps.shape
+        nearest = np.min([padded[r:r + rows, c:c + cols] for r in range(3) for c in range(3)], axis=0)
+        front = spill & ~reached & (nearest < unreached)
+        if not front.any():
+            break
+        steps[front] = nearest[front] + 1
+        reached |= front
+    return steps
+
+
+def descend(steps, cell):
+    """Path from the wavefront's start to cell, following decreasing steps."""
+    rows, cols = steps.shape
+    path = [cell]
+    while steps[cell] > 0:
+        row, col = cell
+        for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)):
+            r, c = row + dr, col + dc
+            if 0 <= r < rows and 0 <= c < cols and steps[r, c] == steps[cell] - 1:
+                cell = (r, c)
+                break
+        path.append(cell)
+    return path[::-1]
+
+
+def _box_sum(mask, radius):
+    """Number of set cells within the (2 * radius + 1)-cell square around each cell."""
+    size = 2 * radius + 1
+    padded = np.pad(mask.astype(np.int32), ((radius + 1, radius), (radius + 1, radius)))
+    total = padded.cumsum(axis=0).cumsum(axis=1)
+    return total[size:, size:] - total[:-size, size:] - total[size:, :-size] + total[:-size, :-size]
+
+
+class FrontierExplorer:
+    """Chooses frontier targets from a ScanHistory and plans paths to them."""
+
+    def __init__(self, history=None, window=EXPLORE_WINDOW):
+        """
+        Args:
+            history (ScanHistory): Scans to explore from (default: a new one)
+            window (int): Cells from the robot searched for frontiers
+        """
+        self.history = history if history is not None else ScanHistory()
+        self.window = window
+        self.target = None
+        self.target_cycles = 0
+        self.abandoned = []
+        self.frontiers = 0
+        self.last_plan_time = None
+
+    def integrate(self, pose, bearings, distances):
+        """Add raw readings taken from pose, see ScanHistory.integrate()."""
+        self.history.integrate(pose, bearings, distances)
+
+    def abandon(self):
+        """Give up on the current target and the frontier around it."""
+        if self.target is not None:
+            self.abandoned.append(self.target)
+        self.target = None
+        self.target_cycles = 0
+
+    def plan(self, pose):
+        """
+        Path from pose to the chosen frontier.
+
+        Only frontiers the robot can reach through known-free space count, so
+        free cells seen through a gap in a wall do not keep it exploring. The
+        number left is kept in self.frontiers.
+
+        Returns:
+            list: World (x, y) points from the robot to the target, or None
+                once exploration is complete
+        """
+        start_time = time.perf_counter()
+        history = self.history
+        x, y, heading = pose
+        history.mark_free(x, y, ROBOT_WIDTH / 2)
+        row, col = history.cell(x, y)
+        size = 2 * self.window + 1
+        corner = (row - self.window, col - self.window)
+        start = (self.window, self.window)
+        if self.target_cycles >= EXPLORE_TARGET_CYCLES:
+            self.abandon()
+
+        evidence = history.window(corner[0], corner[1], size)
+        free = evidence <= EXPLORE_FREE_THRESHOLD
+        unknown = ~free & (evidence < EXPLORE_OCCUPIED_THRESHOLD)
+        frontier = free & _touches(unknown)
+        span = EXPLORE_BLACKLIST_RADIUS
+        for cell in self.abandoned:
+            r, c = cell[0] - corner[0], cell[1] - corner[1]
+            frontier[max(r - span, 0):max(r + span + 1, 0), max(c - span, 0):max(c + span + 1, 0)] = False
+
+        radius = int(math.ceil((ROBOT_WIDTH / 2 + EXPLORE_CLEARANCE) / history.resolution))
+        occupied = evidence >= EXPLORE_OCCUPIED_THRESHOLD
+        passable = free & ~inflate(occupied, radius)
+        # The robot can always leave the spot it stands on, if not through an obstacle
+        around = (slice(start[0] - radius, start[0] + radius + 1), slice(start[1] - radius, start[1] + radius + 1))
+        passable[around] = free[around]
+        steps = wavefront(passable, start, free, radius)
+        candidates = frontier & (steps >= EXPLORE_MIN_DISTANCE)
+        self.frontiers = int(np.count_nonzero(candidates))
+        target = self._choose(candidates, steps, corner, heading)
+        path = None
+        if target is not None:
+            cells = descend(steps, (target[0] - corner[0], target[1] - corner[1]))
+            # Drive no further than the last cell clear of obstacles, then face the target
+            drivable = 1
+            while drivable < len(cells) - 1 and passable[cells[drivable]]:
+                drivable += 1
+            cells = cells[:drivable] + cells[-1:]
+            path = [(x, y)] + [history.cell_to_world(r + corner[0], c + corner[1]) for r, c in cells[1:]]
+        self.last_plan_time = time.perf_counter() - start_time
+        return path
+
+    def _choose(self, candidates, steps, corner, heading):
+        """Global cell of the target to pursue, keeping the current one while it lasts."""
+        if self.target is not None:
+            r, c = self.target[0] - corner[0], self.target[1] - corner[1]
+            inside = 0 <= r < candidates.shape[0] and 0 <= c < candidates.shape[1]
+            if inside and candidates[r, c]:
+                self.target_cycles += 1
+                return self.target
+
+        rows, cols = np.nonzero(candidates)
+        if len(rows) == 0:
+            return None
+        centre = candidates.shape[0] // 2
+        bearings = np.degrees(np.arctan2(cols - centre, rows - centre)) - heading
+        bearings = (bearings + 180) % 360 - 180
+        gain = _box_sum(candidates, EXPLORE_GAIN_RADIUS)[rows, cols]
+        cost = steps[rows, cols] + EXPLORE_TURN_WEIGHT * np.abs(bearings) / 90 + 1
+        best = int(np.argmax(gain / cost ** EXPLORE_COST_EXPONENT))
+        self.target = (int(rows[best]) + corner[0], int(cols[best]) + corner[1])
+        self.target_cycles = 1
+        return self.target
+
+    def waypoint(self, path):
+        """Point along a planned path to steer towards."""
+        return path[min(EXPLORE_LOOKAHEAD, len(path) - 1)]
@@ -0,0 +1,250 @@
+"""
+Streaming filters for sensor readings.
+
+A single spurious ultrasonic echo used to go straight to the scorer and
+make navigate() turn away from an obstacle that is not there. These filters
+sit between the raw readings and the navigator:
+
+    RollingMedian          median of the last `window` readings
+    ExponentialMovingAverage
+    KalmanFilter           1D constant-position Kalman filter with an
+                           innovation gate that rejects outliers
+
+Every filter runs over a fixed number of independent channels (one per scan
+heading, or a single channel for a plain sensor stream) with state
+preallocated as NumPy arrays, so an update costs the same no matter how
+long the robot has been running. All filters share one interface:
+
+    update(values)      add a reading per channel, returns the estimates
+    predict(shift, variance)
+                        the robot moved: every estimate changes by -shift
+                        and becomes `variance` less certain
+    remap(positions)    the robot turned: channel i now continues old
+                        channel positions[i] (fractional, NaN to restart)
+    value, variance     current estimate and its variance per channel
+    reset()
+
+Channels with no reading yet have a NaN value and an infinite variance.
+"""
+
+import numpy as np
+
+# Ratio of the variance of the median of n normal samples to that of their mean
+_MEDIAN_EFFICIENCY = np.pi / 2
+
+
+def _remap(values, positions):
+    """Linearly interpolate per-channel values at fractional channel positions."""
+    positions = np.asarray(positions, dtype=np.float64)
+    result = np.full(values.shape[:-1] + positions.shape, np.nan)
+    inside = np.isfinite(positions) & (positions >= 0) & (positions <= values.shape[-1] - 1)
+    lower = np.floor(positions[inside]).astype(np.intp)
+    upper = np.minimum(lower + 1, values.shape[-1] - 1)
+    fraction = positions[inside] - lower
+    result[..., inside] = values[..., lower] * (1 - fraction) + values[..., upper] * fraction
+    return result
+
+
+class RollingMedian:
+    """Median of the last `window` readings of each channel."""
+
+    def __init__(self, window=5, channels=1):
+        """
+        Args:
+            window (int): Readings the median is taken over
+            channels (int): Independent channels
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self.window = window
+        self.channels = channels
+        self.reset()
+
+    def reset(self):
+        self._buffer = np.full((self.window, self.channels), np.nan)
+        self._next = np.zeros(self.channels, dtype=np.intp)
+        self.value = np.full(self.channels, np.nan)
+        self.variance = np.full(self.channels, np.inf)
+
+    def update(self, values):
+        values = np.broadcast_to(np.asarray(values, dtype=np.float64), (self.channels,))
+        valid = np.flatnonzero(np.isfinite(values))
+        self._buffer[self._next[valid], valid] = values[valid]
+        self._next[valid] = (self._next[valid] + 1) % self.window
+        self._estimate()
+        return self.value.copy()
+
+    def _estimate(self):
+        counts = np.sum(np.isfinite(self._buffer), axis=0)
+        seen = counts > 0
+        self.value[:] = np.nan
+        self.variance[:] = np.inf
+        if seen.any():
+            buffer = self._buffer[:, seen]
+            self.value[seen] = np.nanmedian(buffer, axis=0)
+            spread = np.nanvar(buffer, axis=0)
+            self.variance[seen] = _MEDIAN_EFFICIENCY * spread / counts[seen]
+
+    def predict(self, shift=0.0, variance=0.0):
+        # The buffered readings move with the robot; their spread already
+        # covers the uncertainty
+        self._buffer -= shift
+        self._estimate()
+
+    def remap(self, positions):
+        self._buffer = _remap(self._buffer, positions)
+        self.channels = len(positions)
+        self._next = np.zeros(self.channels, dtype=np.intp)
+        self.value = np.full(self.channels, np.nan)
+        self.variance = np.full(self.channels, np.inf)
+        self._estimate()
+
+
+class ExponentialMovingAverage:
+    """Exponentially weighted mean of each channel."""
+
+    def __init__(self, alpha=0.3, channels=1):
+        """
+        Args:
+            alpha (float): Weight of each new reading, 0 to 1
+            channels (int): Independent channels
+        """
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be in (0, 1]")
+        self.alpha = alpha
+        self.channels = channels
+        self.reset()
+
+    def reset(self):
+        self.value = np.full(self.channels, np.nan)
+        self._spread = np.zeros(self.channels)
+
+    @property
+    def variance(self):
+        # Variance of the weighted mean of readings with the tracked spread
+        variance = self._spread * self.alpha / (2 - self.alpha)
+        return np.where(np.isnan(self.value), np.inf, variance)
+
+    def update(self, values):
+        values = np.broadcast_to(np.asarray(values, dtype=np.float64), (self.channels,))
+        valid = np.isfinite(values)
+        first = valid & np.isnan(self.value)
+        self.value[first] = values[first]
+        later = valid & ~first
+        delta = values[later] - self.value[later]
+        self.value[later] += self.alpha * delta
+        self._spread[later] = (1 - self.alpha) * (self._spread[later] + self.alpha * delta * delta)
+        return self.value.copy()
+
+    def predict(self, shift=0.0, variance=0.0):
+        self.value -= shift
+        self._spread += variance
+
+    def remap(self, positions):
+        self.value = _remap(self.value, positions)
+        self._spread = np.nan_to_num(_remap(self._spread, positions))
+        self.channels = len(positions)
+
+
+class KalmanFilter:
+    """
+    1D Kalman filter per channel with outlier rejection.
+
+    A reading whose innovation is more than `gate` standard deviations from
+    the prediction is treated as an outlier and ignored. If the channel has
+    already rejected `max_rejections` readings in a row, the world really
+    changed (an obstacle came into view) and the channel restarts from the
+    reading. Readings below `trust_below` are never gated: one that fails
+    the gate restarts the channel straight away, so a close obstacle reaches
+    the estimate in the same update.
+    """
+
+    def __init__(self, measurement_variance=4.0, process_variance=1.0, gate=3.0, max_rejections=1,
+                 trust_below=0.0, channels=1):
+        """
+        Args:
+            measurement_variance (float): Variance of a single reading
+            process_variance (float): Variance added by every predict()
+            gate (float): Outlier threshold in standard deviations; None disables
+            max_rejections (int): Consecutive outliers ignored per channel
+            trust_below (float): Readings below this are always taken, at
+                once when they fail the gate
+            channels (int): Independent channels
+        """
+        self.measurement_variance = measurement_variance
+        self.process_variance = process_variance
+        self.gate = gate
+        self.max_rejections = max_rejections
+        self.trust_below = trust_below
+        self.channels = channels
+        self.rejected = 0
+        self.reset()
+
+    def reset(self):
+        self.value = np.full(self.channels, np.nan)
+        self.variance = np.full(self.channels, np.inf)
+        self._rejections = np.zeros(self.channels, dtype=np.intp)
+
+    def update(self, values):
+        values = np.broadcast_to(np.asarray(values, dtype=np.float64), (self.channels,))
+        valid = np.isfinite(values)
+        first = valid & np.isnan(self.value)
+        self.value[first] = values[first]
+        self.variance[first] = self.measurement_variance
+        self._rejections[first] = 0
+
+        later = valid & ~first
+        innovation = values - self.value
+        total = self.variance + self.measurement_variance
+        if self.gate is not None:
+            outliers = later & (innovation * innovation > self.gate * self.gate * total)
+            restart = outliers & ((self._rejections >= self.max_rejections) | (values < self.trust_below))
+            self.value[restart] = values[restart]
+            self.variance[restart] = self.measurement_variance
+            self._rejections[restart] = 0
+            outliers &= ~restart
+            self._rejections[outliers] += 1
+            self.rejected += int(np.count_nonzero(outliers))
+            later &= ~(outliers | restart)
+        gain = self.variance[later] / total[later]
+        self.value[later] += gain * innovation[later]
+        self.variance[later] *= 1 - gain
+        self._rejections[later] = 0
+        return self.value.copy()
+
+    def predict(self, shift=0.0, variance=0.0):
+        self.value -= shift
+        self.variance += self.process_variance + variance
+
+    def remap(self, positions):
+        self.value = _remap(self.value, positions)
+        self.variance = _remap(self.variance, positions)
+        self.variance[np.isnan(self.value)] = np.inf
+        self._rejections = np.zeros(len(positions), dtype=np.intp)
+        self.channels = len(positions)
+
+
+FILTERS = {
+    'median': RollingMedian,
+    'ema': ExponentialMovingAverage,
+    'kalman': KalmanFilter,
+}
+
+
+def make_filter(spec, channels=1):
+    """
+    Create a filter from a config entry.
+
+    Args:
+        spec (tuple): (name, options) with name a key of FILTERS, or None
+        channels (int): Independent channels
+
+    Returns:
+        The filter, or None if spec is None
+    """
+    if not spec:
+        return None
+    name, options = spec
+    if name not in FILTERS:
+        raise ValueError(f"Unknown filter: {name}")
+    return FILTERS[name](channels=channels, **options)
@@ -0,0 +1,463 @@
+"""
+Deploy the project to a fleet of robots over SSH (`robot deploy`).
+
+Every host in an inventory is deployed concurrently, at most `workers` at a
+time, each over one SSH connection and one SFTP session that all of its
+steps share. Connections come from an SSHPool, which keeps them open for
+reuse and closes the least recently used idle one when it is full.
+
+Only changed files are sent. The project files (DEPLOY_FILES) and an
+optional wheelhouse are hashed into a manifest of relative path -> sha256,
+and the manifest of the last deploy is kept on the robot as
+.deploy-manifest.json. Files whose hash differs are uploaded and files that
+are gone locally are removed. The new manifest is written last, so an
+interrupted deploy resends what it had not finished.
+
+The wheelhouse is a directory of dependency wheels for the robot's platform,
+built once on the workstation (build_wheelhouse()). Dependencies are
+installed from it with `pip --no-index`, so robots never download from PyPI,
+and after the first deploy only new or rebuilt wheels are transferred. The
+project itself is always installed from the synced source, so a deploy
+installs the code it just sent even when the wheelhouse is older. Without a wheelhouse
+the robot installs from its package index as before. All setup commands run
+as one shell script, so `cd` and the virtualenv carry over between them; they
+are skipped when nothing changed.
+
+Inventory files list one host per line as [user@]host[:port]; blank lines
+and # comments are ignored:
+
+    pi@robot-1.local
+    robot-2.local:2222
+"""
+
+import fnmatch
+import hashlib
+import json
+import os
+import posixpath
+import shlex
+import stat
+import subprocess
+import sys
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import paramiko
+
+from .config import (
+    DEPLOY_CONNECT_TIMEOUT,
+    DEPLOY_DIR,
+    DEPLOY_EXCLUDE,
+    DEPLOY_FILES,
+    DEPLOY_USER,
+    DEPLOY_WORKERS,
+)
+from .logger import logger
+
+MANIFEST_FILE = '.deploy-manifest.json'
+WHEELHOUSE_DIR = 'wheelhouse'
+# Installed with the requirements, so the project builds offline without isolation
+BUILD_REQUIREMENTS = ('setuptools', 'wheel')
+
+Host = namedtuple('Host', ['hostname', 'username', 'port'])
+
+
+def parse_host(entry, username=DEPLOY_USER, port=22):
+    """Host from '[user@]host[:port]', with defaults for the missing parts."""
+    if '@' in entry:
+        username, entry = entry.split('@', 1)
+    if entry.count(':') == 1:
+        entry, port = entry.split(':')
+    return Host(entry, username, int(port))
+
+
+def load_inventory(path, username=DEPLOY_USER, port=22):
+    """Hosts listed in an inventory file, see the module docstring."""
+    hosts = []
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                hosts.append(parse_host(line, username, port))
+    return hosts
+
+
+def project_root():
+    """Checkout the package was imported from (the directory with setup.py), else the cwd."""
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    return root if os.path.exists(os.path.join(root, 'setup.py')) else os.getcwd()
+
+
+def _excluded(path, exclude):
+    return any(fnmatch.fnmatch(part, pattern) for part in path.split('/') for pattern in exclude)
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def build_manifest(root, files=DEPLOY_FILES, exclude=DEPLOY_EXCLUDE, wheelhouse=None):
+    """
+    Content hashes of everything a deploy sends.
+
+    Args:
+        root (str): Project directory
+        files (list): Files and directories under root to send
+        exclude (list): fnmatch patterns; a path is skipped if any of its
+            components matches
+        wheelhouse (str): Local wheel directory, sent as wheelhouse/
+
+    Returns:
+        dict: Remote relative path (with /) -> (local path, sha256)
+    """
+    manifest = {}
+
+    def add(local, remote):
+        if not _excluded(remote, exclude):
+            manifest[remote] = (local, file_hash(local))
+
+    sources = [(os.path.join(root, name), name) for name in files]
+    if wheelhouse:
+        sources.append((wheelhouse, WHEELHOUSE_DIR))
+    for local, remote in sources:
+        if os.path.isfile(local):
+            add(local, remote)
+            continue
+        for directory, subdirectories, names in os.walk(local):
+            relative = os.path.relpath(directory, local)
+            prefix = remote if relative == '.' else posixpath.join(remote, *relative.split(os.sep))
+            subdirectories[:] = sorted(d for d in subdirectories if not _excluded(d, exclude))
+            for name in sorted(names):
+                add(os.path.join(directory, name), posixpath.join(prefix, name))
+    return manifest
+
+
+def build_wheelhouse(destination, root=None, platform=None, python_version=None):
+    """
+    Collect the wheels of the project's dependencies and build tools.
+
+    Args:
+        destination (str): Wheel directory to create or update
+        root (str): Project directory (default: project_root())
+        platform (str): pip platform tag of the robots, e.g.
+            'linux_armv7l'; binary wheels for it are downloaded instead of
+            building for this machine
+        python_version (str): Robots' Python version for platform, e.g. '3.9'
+    """
+    root = root or project_root()
+    os.makedirs(destination, exist_ok=True)
+    pip = [sys.executable, '-m', 'pip']
+    requirements = ['-r', os.path.join(root, 'requirements.txt'), *BUILD_REQUIREMENTS]
+    if platform:
+        command = pip + ['download', *requirements, '-d', destination,
+                         '--only-binary=:all:', '--platform', platform]
+        if python_version:
+            command += ['--python-version', python_version]
+    else:
+        command = pip + ['wheel', *requirements, '-w', destination]
+    subprocess.run(command, check=True)
+
+
+class SSHPool:
+    """Bounded pool of open SSH connections, one per host, reused between uses."""
+
+    def __init__(self, size=DEPLOY_WORKERS, password=None, key_filename=None,
+                 timeout=DEPLOY_CONNECT_TIMEOUT):
+        """
+        Args:
+            size (int): Connections kept open at most
+            password (str): Password for every host; None for keys or the agent
+            key_filename (str): Private key file
+            timeout (float): Seconds to wait for a connection
+        """
+        self.size = size
+        self.password = password
+        self.key_filename = key_filename
+        self.timeout = timeout
+        self._idle = OrderedDict()  # host -> client, least recently used first
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self.connects = 0
+
+    def _connect(self, host):
+        client = paramiko.SSHClient()
+        client.load_system_host_keys()
+        client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        client.connect(host.hostname, port=host.port, username=host.username, password=self.password,
+                       key_filename=self.key_filename, timeout=self.timeout,
+                       allow_agent=self.password is None, look_for_keys=self.password is None)
+        with self._lock:
+            self.connects += 1
+        return client
+
+    def acquire(self, host):
+        """An open connection to host, for the caller's exclusive use until release()."""
+        self._slots.acquire()
+        try:
+            with self._lock:
+                client = self._idle.pop(host, None)
+                self._in_use += 1
+                if client is None:
+                    # Make room: the pool holds at most `size` connections
+                    while self._idle and len(self._idle) + self._in_use > self.size:
+                        self._idle.popitem(last=False)[1].close()
+            transport = client.get_transport() if client is not None else None
+            if transport is None or not transport.is_active():
+                client = self._connect(host)
+            return client
+        except BaseException:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+            raise
+
+    def release(self, host, client, reuse=True):
+        """Return a connection; it is closed instead if it failed or reuse is False."""
+        try:
+            with self._lock:
+                self._in_use -= 1
+                if reuse:
+                    self._idle[host] = client
+            if not reuse:
+                client.close()
+        finally:
+            self._slots.release()
+
+    def close(self):
+        with self._lock:
+            for client in self._idle.values():
+                client.close()
+            self._idle.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class HostReport:
+    """Outcome and timings of deploying to one host."""
+
+    def __init__(self, host):
+        self.host = host
+        self.timings = {}  # step -> seconds
+        self.uploaded = 0
+        self.removed = 0
+        self.bytes = 0
+        self.installed = False
+        self.output = ''
+        self.error = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def total(self):
+        return sum(self.timings.values())
+
+
+def _remote_manifest(sftp, directory):
+    try:
+        with sftp.open(posixpath.join(directory, MANIFEST_FILE)) as f:
+            return json.loads(f.read().decode())
+    except (IOError, ValueError):
+        return {}
+
+
+def _makedirs(sftp, directory, known):
+    """mkdir -p over SFTP, remembering directories already made"""
+    missing = []
+    while directory not in known and directory not in ('', '.', '/'):
+        try:
+            if stat.S_ISDIR(sftp.stat(directory).st_mode):
+                break
+        except IOError:
+            missing.append(directory)
+        directory = posixpath.dirname(directory)
+    known.add(directory)
+    for path in reversed(missing):
+        sftp.mkdir(path)
+        known.add(path)
+
+
+def install_script(directory, requirements_changed, wheelhouse):
+    """
+    One shell script that sets up the virtualenv and installs the project.
+
+    Args:
+        directory (str): Deploy directory on the robot
+        requirements_changed (bool): Reinstall the dependencies too
+        wheelhouse (bool): Install the dependencies from the deployed
+            wheelhouse instead of the package index
+    """
+    pip = 'venv/bin/python -m pip install --disable-pip-version-check'
+    lines = [
+        'set -e',
+        f'cd {shlex.quote(directory)}',
+        # System packages, so the venv sees the pitop SDK installed with the OS
+        '[ -x venv/bin/python ] || python3 -m venv --system-site-packages venv',
+    ]
+    if wheelhouse:
+        pip += f' --no-index --find-links {WHEELHOUSE_DIR}'
+        if requirements_changed:
+            lines.append(f"{pip} -r requirements.txt {' '.join(BUILD_REQUIREMENTS)}")
+        # The synced tree, not a wheel, so new code is never shadowed by an old build
+        lines.append(f'{pip} --no-build-isolation --no-deps .')
+    else:
+        if requirements_changed:
+            lines.append(f'{pip} -r requirements.txt')
+        lines.append(f'{pip} --no-deps .')
+    return '\n'.join(lines)
+
+
+def run_script(client, script, timeout=None):
+    """
+    Run a shell script on the robot in one session.
+
+    Returns:
+        tuple: (exit status, combined stdout and stderr)
+    """
+    stdin, stdout, stderr = client.exec_command('sh -s', timeout=timeout)
+    stdin.write(script + '\n')
+    stdin.channel.shutdown_write()
+    output = stdout.read().decode(errors='replace') + stderr.read().decode(errors='replace')
+    return stdout.channel.recv_exit_status(), output
+
+
+def deploy_host(pool, host, manifest, directory=DEPLOY_DIR, install=True, full=False):
+    """
+    Sync changed files to one host and install them.
+
+    Args:
+        pool (SSHPool): Connections to deploy over
+        host (Host): Robot to deploy to
+        manifest (dict): build_manifest() of what to send
+        directory (str): Deploy directory, relative to the login's home
+        install (bool): Set up the virtualenv and install when files changed
+        full (bool): Ignore the robot's manifest and send everything
+
+    Returns:
+        HostReport: Never raises; failures are recorded in the report
+    """
+    report = HostReport(host)
+    started = time.perf_counter()
+    client = None
+    step = 'connect'
+    try:
+        client = pool.acquire(host)
+        report.timings['connect'] = time.perf_counter() - started
+
+        step, started = 'sync', time.perf_counter()
+        sftp = client.open_sftp()
+        try:
+            _makedirs(sftp, directory, set())
+            old = {} if full else _remote_manifest(sftp, directory)
+            changed = [path for path, (_, digest) in manifest.items() if old.get(path) != digest]
+            stale = [path for path in old if path not in manifest]
+            known = {directory}
+            for path in changed:
+                local, _ = manifest[path]
+                remote = posixpath.join(directory, path)
+                _makedirs(sftp, posixpath.dirname(remote), known)
+                sftp.put(local, remote)
+                report.bytes += os.path.getsize(local)
+            for path in stale:
+                try:
+                    sftp.remove(posixpath.join(directory, path))
+                except IOError:
+                    pass
+            report.uploaded, report.removed = len(changed), len(stale)
+            report.timings['sync'] = time.perf_counter() - started
+
+            if install and (changed or stale):
+                step, started = 'install', time.perf_counter()
+                requirements_changed = full or not old or any(
+                    path == 'requirements.txt' or path.startswith(WHEELHOUSE_DIR + '/') for path in changed
+                )
+                wheelhouse = any(path.startswith(WHEELHOUSE_DIR + '/') for path in manifest)
+                script = install_script(directory, requirements_changed, wheelhouse)
+                status, report.output = run_script(client, script)
+                report.timings['install'] = time.perf_counter() - started
+                if status != 0:
+                    raise RuntimeError(f"install exited with status {status}")
+                report.installed = True
+
+            # Written last, so a deploy that failed part way is redone in full
+            step = 'sync'
+            new = {path: digest for path, (_, digest) in manifest.items()}
+            with sftp.open(posixpath.join(directory, MANIFEST_FILE), 'w') as f:
+                f.write(json.dumps(new, indent=0, sort_keys=True).encode())
+        finally:
+            sftp.close()
+    except Exception as e:
+        report.timings.setdefault(step, time.perf_counter() - started)
+        report.error = f"{step}: {str(e) or type(e).__name__}"
+        logger.error(f"Deploy to {host.hostname} failed at {report.error}")
+    finally:
+        if client is not None:
+            pool.release(host, client, reuse=report.ok)
+    return report
+
+
+def deploy(hosts, password=None, key_filename=None, workers=DEPLOY_WORKERS, root=None, wheelhouse=None,
+           directory=DEPLOY_DIR, install=True, full=False, pool=None):
+    """
+    Deploy to many hosts concurrently.
+
+    Args:
+        hosts (list): Host entries (see load_inventory())
+        password (str): Password for every host; None for keys or the agent
+        key_filename (str): Private key file
+        workers (int): Hosts deployed at once, and connections kept open
+        root (str): Project directory (default: project_root())
+        wheelhouse (str): Local wheel directory to install from (see
+            build_wheelhouse()); None installs from the package index
+        directory (str): Deploy directory on the robots
+        install (bool): Install after syncing changed files
+        full (bool): Send every file, whatever the robots have
+        pool (SSHPool): Connections to reuse (default: a new pool, closed afterwards)
+
+    Returns:
+        list: HostReport per host, in inventory order
+    """
+    manifest = build_manifest(root or project_root(), wheelhouse=wheelhouse)
+    owned = pool is None
+    pool = pool or SSHPool(workers, password=password, key_filename=key_filename)
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='deploy') as executor:
+            return list(executor.map(lambda host: deploy_host(pool, host, manifest, directory, install, full),
+                                     hosts))
+    finally:
+        if owned:
+            pool.close()
+
+
+def format_reports(reports):
+    """Per-host table of the outcome, files sent and step timings."""
+    lines = [f"{'host':<28} {'status':<8} {'sent':>6} {'KiB':>8} {'removed':>8} "
+             f"{'connect':>8} {'sync':>7} {'install':>8} {'total':>7}"]
+    for report in reports:
+        host = report.host
+        name = f"{host.username}@{host.hostname}" + (f":{host.port}" if host.port != 22 else "")
+        timing = lambda step: f"{report.timings[step]:.2f}" if step in report.timings else '-'
+        lines.append(
+            f"{name:<28} {'ok' if report.ok else 'FAILED':<8} {report.uploaded:>6} {report.bytes / 1024:>8.1f} "
+            f"{report.removed:>8} {timing('connect'):>8} {timing('sync'):>7} {timing('install'):>8} "
+            f"{report.total:>7.2f}"
+        )
+    for report in reports:
+        if not report.ok:
+            lines.append(f"{report.host.hostname}: {report.error}")
+            if report.output:
+                lines.extend('    ' + line for line in report.output.strip().splitlines()[-10:])
+    return '\n'.join(lines)
@@ -0,0 +1,153 @@
+"""
+Hardware abstraction layer for the autonomous robot.
+
+AutonomousRobot never talks to pitop directly; it asks a backend for its
+devices and for a clock. PitopBackend wraps the real Pi-top 4 hardware and
+wall-clock time, while robot.simulation.SimulatedBackend provides a 2D room
+and a virtual clock so navigation can run off-device and faster than real
+time.
+
+A backend's devices expose the same attributes the robot uses from pitop:
+
+    pitop:        left_motor/right_motor (.forward(speed), .stop()), display
+    ultrasonic:   .distance (cm)
+    servo:        .angle (degrees, settable)
+    light/sound:  .reading (0 to 1)
+    camera:       .get_frame() (HxWx3 uint8 BGR array)
+    battery:      .percentage
+"""
+
+import os
+import threading
+import time
+
+from .config import BACKEND
+
+
+class RealClock:
+    """Wall-clock time."""
+
+    realtime = True
+
+    def now(self):
+        """Monotonic time in seconds."""
+        return time.monotonic()
+
+    def sleep(self, seconds):
+        """Block for the given number of seconds."""
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class lazy_device:
+    """
+    Attribute that creates a device the first time it is used.
+
+    Opening a device can be slow (the camera in particular), so
+    AutonomousRobot only creates what a command actually touches. The
+    factory runs once per instance, under a lock because sampler threads
+    may reach for a device at the same time as the control loop.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self.name = factory.__name__
+        self.__doc__ = factory.__doc__
+        self._lock = threading.Lock()
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        with self._lock:
+            if self.name not in instance.__dict__:
+                instance.__dict__[self.name] = self.factory(instance)
+        return instance.__dict__[self.name]
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.name] = value
+
+    def created(self, instance):
+        """Whether the device has been created on this instance."""
+        return self.name in instance.__dict__
+
+
+class Backend:
+    """Interface every hardware backend implements."""
+
+    clock = None
+
+    def create_pitop(self):
+        raise NotImplementedError
+
+    def create_ultrasonic(self, port):
+        raise NotImplementedError
+
+    def create_servo(self, port):
+        raise NotImplementedError
+
+    def create_light_sensor(self, port):
+        raise NotImplementedError
+
+    def create_sound_sensor(self, port):
+        raise NotImplementedError
+
+    def create_camera(self, resolution, framerate):
+        raise NotImplementedError
+
+    def create_battery(self):
+        raise NotImplementedError
+
+
+class PitopBackend(Backend):
+    """Real Pi-top 4 hardware through the pitop SDK."""
+
+    def __init__(self):
+        # Imported here so the package can be used without the pitop SDK
+        import pitop
+        self._pitop = pitop
+        self.clock = RealClock()
+
+    def create_pitop(self):
+        return self._pitop.Pitop()
+
+    def create_ultrasonic(self, port):
+        return self._pitop.UltrasonicSensor(port)
+
+    def create_servo(self, port):
+        return self._pitop.ServoMotor(port)
+
+    def create_light_sensor(self, port):
+        return self._pitop.LightSensor(port)
+
+    def create_sound_sensor(self, port):
+        return self._pitop.SoundSensor(port)
+
+    def create_camera(self, resolution, framerate):
+        # OpenCV format: get_frame() returns a BGR NumPy array for the vision pipeline
+        return self._pitop.Camera(resolution=resolution, framerate=framerate, format='OpenCV')
+
+    def create_battery(self):
+        return self._pitop.Battery()
+
+
+def get_backend(name=None):
+    """
+    Create a backend by name.
+
+    Args:
+        name (str): 'pitop' or 'sim'; defaults to the ROBOT_BACKEND
+            environment variable, then config.BACKEND
+
+    Returns:
+        Backend: The requested backend
+    """
+    name = name or os.environ.get('ROBOT_BACKEND') or BACKEND
+    if name == 'pitop':
+        return PitopBackend()
+    if name == 'sim':
+        from .simulation import SimulatedBackend
+        return SimulatedBackend()
+    raise ValueError(f"Unknown backend: {name}")
@@ -0,0 +1,95 @@
+"""
+Light direction from a single camera frame.
+
+Reading the analog light sensor at every servo step makes light seeking
+cost as many servo moves as ranging. A camera frame already holds the
+brightness for every heading in its field of view, so the light level for
+each scan heading can be read off the column brightness of one downscaled
+grayscale frame instead.
+
+Headings outside the camera's field of view take the brightness of the
+nearest edge column.
+"""
+
+import cv2
+import numpy as np
+
+from .config import CAMERA_FOV, LIGHT_DOWNSCALE
+
+
+def column_brightness(gray):
+    """Mean brightness (0 to 1) of each column of a grayscale image."""
+    return gray.mean(axis=0, dtype=np.float64) / 255.0
+
+
+def resample(angles, bearings, brightness):
+    """
+    Average a brightness profile onto heading bins.
+
+    Each heading gets the mean of the profile samples between the midpoints
+    to its neighbours; headings with no samples in their bin are
+    interpolated.
+
+    Args:
+        angles (array-like): Bin centre headings in degrees, ascending
+        bearings (np.ndarray): Heading of each profile sample, ascending
+        brightness (np.ndarray): Brightness of each profile sample
+
+    Returns:
+        np.ndarray: Brightness per heading
+    """
+    angles = np.asarray(angles, dtype=np.float64)
+    if len(angles) == 1:
+        return np.interp(angles, bearings, brightness)
+    middles = (angles[1:] + angles[:-1]) / 2
+    bins = np.searchsorted(middles, bearings)
+    levels = np.interp(angles, bearings, brightness)
+    # The outer bins only take samples within half a bin of their centre
+    spacing = np.diff(angles)
+    inside = (bearings >= angles[0] - spacing[0] / 2) & (bearings <= angles[-1] + spacing[-1] / 2)
+    counts = np.bincount(bins[inside], minlength=len(angles))
+    sums = np.bincount(bins[inside], weights=brightness[inside], minlength=len(angles))
+    covered = counts > 0
+    levels[covered] = sums[covered] / counts[covered]
+    return levels
+
+
+class LightDirectionEstimator:
+    """Light level by heading from the column brightness of one frame."""
+
+    def __init__(self, fov=CAMERA_FOV, downscale=LIGHT_DOWNSCALE, heading_offset=0.0):
+        """
+        Args:
+            fov (float): Horizontal field of view of the camera in degrees
+            downscale (int): Factor to shrink frames by before averaging
+            heading_offset (float): Camera heading relative to the robot, degrees
+        """
+        self.fov = fov
+        self.downscale = downscale
+        self.heading_offset = heading_offset
+
+    def bearings(self, columns):
+        """Heading of the centre of each image column."""
+        return ((np.arange(columns) + 0.5) / columns - 0.5) * self.fov + self.heading_offset
+
+    def profile(self, frame):
+        """
+        Brightness profile of a frame.
+
+        Args:
+            frame (np.ndarray): HxWx3 BGR (or HxW grayscale) uint8 image
+
+        Returns:
+            tuple: (bearings, brightness) per column of the downscaled image
+        """
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape
+        small = cv2.resize(gray, (max(width // self.downscale, 2), max(height // self.downscale, 1)),
+                           interpolation=cv2.INTER_AREA)
+        brightness = column_brightness(small)
+        return self.bearings(len(brightness)), brightness
+
+    def levels(self, frame, angles):
+        """Light level at each heading in angles (ascending), from one frame."""
+        bearings, brightness = self.profile(frame)
+        return resample(angles, bearings, brightness)
@@ -1,41 +1,178 @@
 """
 Logging module for the autonomous robot.
+
+Records are handed to a queue by the calling thread and written to the
+console and a rotating log file by a background listener thread, so a
+slow SD card or terminal never stalls the control loop. Nothing is opened
+or started until the first record is logged, and setup_logger() can be
+called any number of times without adding handlers.
+
+Repetitive messages (such as a low-battery warning every cycle) can be
+rate limited per call site by passing extra={'rate_limit': True} (or a
+number of seconds):
+
+    logger.warning(f"Low battery level: {level}%", extra={'rate_limit': True})
 """
 
+import atexit
 import logging
+import logging.handlers
+import os
+import queue
 import sys
-from datetime import datetime
+import threading
+import time
+
+from .config import (
+    LOG_BACKUP_COUNT,
+    LOG_FILE,
+    LOG_MAX_BYTES,
+    LOG_RATE_LIMIT,
+    LOG_ROTATE_WHEN,
+)
+
+FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_setup_lock = threading.RLock()
+
 
-def setup_logger(name='robot', level=logging.INFO):
+class RateLimitFilter(logging.Filter):
+    """
+    Drop repeats of rate-limited records from the same call site.
+
+    Only records logged with a `rate_limit` extra are limited. The first
+    record let through after a quiet period notes how many were dropped.
+    """
+
+    def __init__(self, interval=LOG_RATE_LIMIT):
+        """
+        Args:
+            interval (float): Default seconds between records from one call site
+        """
+        super().__init__()
+        self.interval = interval
+        self._last = {}
+        self._suppressed = {}
+
+    def filter(self, record):
+        limit = getattr(record, 'rate_limit', None)
+        if not limit:
+            return True
+        interval = self.interval if limit is True else limit
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        last = self._last.get(key)
+        if last is not None and now - last < interval:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return False
+        self._last[key] = now
+        suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        return True
+
+
+class BackgroundHandler(logging.handlers.QueueHandler):
+    """Queue handler whose listener thread and output handlers start on first use."""
+
+    def __init__(self, log_file=LOG_FILE, max_bytes=LOG_MAX_BYTES, backup_count=LOG_BACKUP_COUNT,
+                 rotate_when=LOG_ROTATE_WHEN, console=True):
+        """
+        Args:
+            log_file (str): Log file path, or None/'' for console only
+            max_bytes (int): Rotate the file at this size (size-based rotation)
+            backup_count (int): Rotated files to keep
+            rotate_when (str): TimedRotatingFileHandler interval (e.g. 'midnight');
+                rotates by time instead of size when set
+            console (bool): Also write to stdout
+        """
+        super().__init__(queue.SimpleQueue())
+        self.log_file = log_file
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.rotate_when = rotate_when
+        self.console = console
+        self.listener = None
+
+    def _output_handlers(self):
+        formatter = logging.Formatter(FORMAT)
+        handlers = []
+        if self.console:
+            handlers.append(logging.StreamHandler(sys.stdout))
+        if self.log_file:
+            # delay: the file is opened by the listener thread on first write
+            if self.rotate_when:
+                handlers.append(logging.handlers.TimedRotatingFileHandler(
+                    self.log_file, when=self.rotate_when, backupCount=self.backup_count, delay=True))
+            else:
+                handlers.append(logging.handlers.RotatingFileHandler(
+                    self.log_file, maxBytes=self.max_bytes, backupCount=self.backup_count, delay=True))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        return handlers
+
+    def start(self):
+        """Start the background writer (done automatically on the first record)."""
+        with _setup_lock:
+            if self.listener is not None:
+                return
+            self.listener = logging.handlers.QueueListener(
+                self.queue, *self._output_handlers(), respect_handler_level=True
+            )
+            self.listener.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        """Write out everything queued so far and stop the background writer."""
+        with _setup_lock:
+            listener, self.listener = self.listener, None
+        if listener is None:
+            return
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+
+    def emit(self, record):
+        if self.listener is None:
+            self.start()
+        super().emit(record)
+
+
+def setup_logger(name='robot', level=logging.INFO, **handler_options):
     """
     Set up a logger for the robot.
-    
+
+    Safe to call repeatedly: the logger gets one BackgroundHandler, and later
+    calls only update the level.
+
     Args:
         name (str): Name of the logger
         level (int): Logging level
-        
+        **handler_options: Passed to BackgroundHandler on first setup; the log
+            file defaults to the ROBOT_LOG_FILE environment variable, then
+            config.LOG_FILE
+
     Returns:
         logging.Logger: Configured logger instance
     """
     logger = logging.getLogger(name)
-    logger.setLevel(level)
-    
-    # Create handlers
-    console_handler = logging.StreamHandler(sys.stdout)
-    file_handler = logging.FileHandler(f'robot_{datetime.now().strftime("%Y%m%d_%H%M%S")}.log')
-    
-    # Create formatters
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    console_handler.setFormatter(formatter)
-    file_handler.setFormatter(formatter)
-    
-    # Add handlers to logger
-    logger.addHandler(console_handler)
-    logger.addHandler(file_handler)
-    
+    with _setup_lock:
+        logger.setLevel(level)
+        if any(isinstance(handler, BackgroundHandler) for handler in logger.handlers):
+            return logger
+        handler_options.setdefault('log_file', os.environ.get('ROBOT_LOG_FILE', LOG_FILE))
+        handler = BackgroundHandler(**handler_options)
+        handler.addFilter(RateLimitFilter())
+        logger.addHandler(handler)
     return logger
 
-# Create default logger instance
-logger = setup_logger() 
\ No newline at end of file
+
+def shutdown_logging(name='robot'):
+    """Flush and stop the background writer of a logger set up by setup_logger()."""
+    for handler in logging.getLogger(name).handlers:
+        if isinstance(handler, BackgroundHandler):
+            handler.stop()
+
+
+# Create default logger instance (no files or threads until first use)
+logger = setup_logger()
@@ -0,0 +1,305 @@
+"""
+Monte Carlo navigation episodes on random simulated rooms.
+
+Each episode builds a random_room() from its seed, runs the unchanged
+navigate() (or navigate_planned()) loop against the simulated backend with a
+virtual clock, and reports the ground truth from the simulator:
+
+    reached         whether the robot ended within GOAL_TOLERANCE of the goal
+    time_to_goal    simulated seconds until then (None if not reached)
+    collisions      bumps into walls or obstacles
+    cycles          navigation loop iterations
+    decisions       moves and turns commanded
+    wall_time       seconds the episode took
+    cpu_time        CPU seconds of the episode's process (unaffected by
+                    other workers sharing the core)
+
+Episodes only depend on their seed, so they run in any order on a
+ProcessPoolExecutor and the same seeds give the same rooms on every commit:
+
+    results = run_episodes(range(1000), mode='reactive')
+    save_results('baseline.json', results)
+    ...
+    print(format_comparison(load_results('baseline.json'), results))
+"""
+
+import json
+import logging
+import math
+import os
+import platform
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import numpy as np
+
+from .autonomous_navigation import AutonomousRobot
+from .config import GOAL_TOLERANCE
+from .logger import logger
+from .pose import relative_pose
+from .simulation import SimulatedBackend, random_room
+
+MODES = ('reactive', 'planned')
+RESULTS_VERSION = 1
+
+
+def run_episode(seed, mode='reactive', max_cycles=300, parameters=None):
+    """
+    Navigate one random room.
+
+    Args:
+        seed (int): Seed of the room layout and the sensor noise
+        mode (str): 'reactive' (navigate) or 'planned' (navigate_planned)
+        max_cycles (int): Give up after this many loop iterations
+        parameters (dict): Overrides for AutonomousRobot.apply_parameters()
+
+    Returns:
+        dict: Episode result, see the module docstring
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}, expected one of {MODES}")
+    room = random_room(seed)
+    backend = SimulatedBackend(room=room, seed=seed)
+    robot = AutonomousRobot(backend=backend)
+    if parameters:
+        robot.apply_parameters(parameters)
+    world = backend.world
+
+    # Both loops check the battery once per cycle and decide through
+    # move_forward() or turn()
+    counts = {'cycles': 0, 'decisions': 0}
+
+    def counted(method, key):
+        def wrapper(*args, **kwargs):
+            counts[key] += 1
+            return method(*args, **kwargs)
+        return wrapper
+
+    robot.check_battery = counted(robot.check_battery, 'cycles')
+    robot.move_forward = counted(robot.move_forward, 'decisions')
+    robot.turn = counted(robot.turn, 'decisions')
+
+    started, cpu_started = time.perf_counter(), time.process_time()
+    if mode == 'planned':
+        goal = relative_pose(room.start, (*room.goal, 0.0))[:2]
+        robot.navigate_planned(goal, max_cycles=max_cycles)
+    else:
+        robot.navigate(max_cycles=max_cycles, until=lambda: world.distance_to_goal() < GOAL_TOLERANCE)
+    wall_time = time.perf_counter() - started
+    cpu_time = time.process_time() - cpu_started
+    robot.cleanup()
+
+    reached = world.distance_to_goal() < GOAL_TOLERANCE
+    return {
+        'seed': seed,
+        'reached': reached,
+        'time_to_goal': robot.clock.now() if reached else None,
+        'sim_time': robot.clock.now(),
+        'collisions': world.collisions,
+        'cycles': counts['cycles'],
+        'decisions': counts['decisions'],
+        'distance_travelled': world.distance_travelled,
+        'wall_time': wall_time,
+        'cpu_time': cpu_time,
+    }
+
+
+def _quiet_worker():
+    logger.setLevel(logging.ERROR)
+
+
+def _run(arguments):
+    return run_episode(*arguments)
+
+
+def map_episodes(jobs, workers=None):
+    """
+    Run episodes in parallel worker processes.
+
+    Args:
+        jobs (list): run_episode() argument tuples
+        workers (int): Worker processes (default: one per CPU); 1 runs in
+            this process
+
+    Returns:
+        list: Episode results in job order
+    """
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        level = logger.level
+        _quiet_worker()
+        try:
+            return [_run(job) for job in jobs]
+        finally:
+            logger.setLevel(level)
+    # Small chunks keep the workers busy to the end, large ones save pickling
+    chunksize = max(1, len(jobs) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_quiet_worker) as executor:
+        return list(executor.map(_run, jobs, chunksize=chunksize))
+
+
+def run_episodes(seeds, mode='reactive', max_cycles=300, workers=None, parameters=None):
+    """
+    Run one episode per seed in parallel and summarize them.
+
+    Args:
+        seeds (iterable): One episode per seed
+        mode (str): 'reactive' or 'planned'
+        max_cycles (int): Loop iterations per episode
+        workers (int): Worker processes (default: one per CPU)
+        parameters (dict): Overrides for AutonomousRobot.apply_parameters()
+
+    Returns:
+        dict: {'settings', 'summary', 'episodes'} with the episodes in seed order
+    """
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    episodes = map_episodes([(seed, mode, max_cycles, parameters) for seed in seeds], workers)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'version': RESULTS_VERSION,
+        'settings': {
+            'mode': mode,
+            'max_cycles': max_cycles,
+            'parameters': parameters,
+            'workers': workers,
+            'commit': git_commit(),
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'elapsed': elapsed,
+        },
+        'summary': summarize(episodes),
+        'episodes': episodes,
+    }
+
+
+def git_commit():
+    """Commit of the checked-out source, or None outside a git checkout."""
+    try:
+        output = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(__file__),
+                                capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.stdout.strip() or None
+
+
+def _percentiles(values):
+    if not values:
+        return {'mean': None, 'p50': None, 'p95': None}
+    return {
+        'mean': float(np.mean(values)),
+        'p50': float(np.percentile(values, 50)),
+        'p95': float(np.percentile(values, 95)),
+    }
+
+
+def summarize(episodes):
+    """
+    Aggregate episode results.
+
+    Returns:
+        dict: Success rate (with its standard error), time to goal over the
+            successful episodes, and collisions, cycles and decision rates
+            over all of them
+    """
+    count = len(episodes)
+    reached = sum(episode['reached'] for episode in episodes)
+    rate = reached / count if count else 0.0
+    sim_time = sum(episode['sim_time'] for episode in episodes)
+    cpu_time = sum(episode['cpu_time'] for episode in episodes)
+    decisions = sum(episode['decisions'] for episode in episodes)
+    return {
+        'episodes': count,
+        'reached': reached,
+        'success_rate': rate,
+        'success_stderr': math.sqrt(rate * (1 - rate) / count) if count else None,
+        'time_to_goal': _percentiles([e['time_to_goal'] for e in episodes if e['reached']]),
+        'collisions': _percentiles([e['collisions'] for e in episodes]),
+        'collision_free_rate': sum(e['collisions'] == 0 for e in episodes) / count if count else None,
+        'cycles': _percentiles([e['cycles'] for e in episodes]),
+        'decisions_per_sim_second': decisions / sim_time if sim_time else None,
+        'decisions_per_cpu_second': decisions / cpu_time if cpu_time else None,
+    }
+
+
+def save_results(path, results):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=1)
+
+
+def load_results(path):
+    with open(path) as f:
+        results = json.load(f)
+    if results.get('version') != RESULTS_VERSION:
+        raise ValueError(f"{path} is not a version {RESULTS_VERSION} results file")
+    return results
+
+
+def _fmt(value, digits=2):
+    return '-' if value is None else f"{value:.{digits}f}"
+
+
+def format_summary(results):
+    """Human-readable summary of run_episodes() results."""
+    settings, summary = results['settings'], results['summary']
+    ttg, cycles, collisions = summary['time_to_goal'], summary['cycles'], summary['collisions']
+    return '\n'.join([
+        f"{summary['episodes']} {settings['mode']} episodes (commit {settings['commit'] or 'unknown'}, "
+        f"{settings['workers']} workers, {settings['elapsed']:.1f} s)",
+        f"  success rate:       {summary['success_rate']:.1%} +/- {summary['success_stderr'] or 0:.1%}",
+        f"  time to goal:       mean {_fmt(ttg['mean'], 1)} s, p50 {_fmt(ttg['p50'], 1)} s, p95 {_fmt(ttg['p95'], 1)} s",
+        f"  collisions:         mean {_fmt(collisions['mean'])}, "
+        f"collision-free {summary['collision_free_rate'] or 0:.1%}",
+        f"  cycles:             mean {_fmt(cycles['mean'], 1)}, p95 {_fmt(cycles['p95'], 1)}",
+        f"  decisions:          {_fmt(summary['decisions_per_sim_second'])} per simulated s, "
+        f"{_fmt(summary['decisions_per_cpu_second'], 0)} per CPU s",
+    ])
+
+
+def _difference(baseline, current):
+    """Mean difference and its standard error (Welch) of two samples."""
+    if len(baseline) < 2 or len(current) < 2:
+        return None, None
+    delta = float(np.mean(current) - np.mean(baseline))
+    stderr = math.sqrt(np.var(baseline, ddof=1) / len(baseline) + np.var(current, ddof=1) / len(current))
+    return delta, stderr
+
+
+def format_comparison(baseline, current):
+    """
+    Metric by metric change from a baseline run, with the change in standard
+    errors; |z| above 2 is unlikely to be noise.
+
+    Only seeds present in both runs are compared, so both sides navigate the
+    same rooms.
+    """
+    seeds = {e['seed'] for e in baseline['episodes']} & {e['seed'] for e in current['episodes']}
+    before = [e for e in baseline['episodes'] if e['seed'] in seeds]
+    after = [e for e in current['episodes'] if e['seed'] in seeds]
+    lines = [
+        f"{len(seeds)} common episodes: {baseline['settings']['commit'] or 'baseline'} -> "
+        f"{current['settings']['commit'] or 'current'}",
+        f"{'metric':<22} {'baseline':>10} {'current':>10} {'change':>10} {'z':>6}",
+    ]
+    metrics = (
+        ('success rate', lambda e: float(e['reached']), before, after),
+        ('time to goal (s)', lambda e: e['time_to_goal'],
+         [e for e in before if e['reached']], [e for e in after if e['reached']]),
+        ('collisions', lambda e: e['collisions'], before, after),
+        ('cycles', lambda e: e['cycles'], before, after),
+        ('CPU ms per decision', lambda e: e['cpu_time'] * 1000 / max(e['decisions'], 1), before, after),
+    )
+    for name, value, old, new in metrics:
+        old_values = [value(e) for e in old]
+        new_values = [value(e) for e in new]
+        delta, stderr = _difference(old_values, new_values)
+        z = delta / stderr if delta is not None and stderr else None
+        lines.append(
+            f"{name:<22} {_fmt(np.mean(old_values) if old_values else None):>10} "
+            f"{_fmt(np.mean(new_values) if new_values else None):>10} "
+            f"{'-' if delta is None else f'{delta:+.2f}':>10} {_fmt(z, 1):>6}"
+        )
+    return '\n'.join(lines)
@@ -0,0 +1,283 @@
+"""
+Motion scheduling for the autonomous robot.
+
+move_forward() and turn() used to set the motors, sleep for the whole move
+and stop, which blocked the caller and jerked the wheels from standstill to
+full speed. MotionScheduler drives the motors from a fixed-rate control loop
+instead: motion commands are queued (or preempt whatever is running), wheel
+speeds are ramped at a bounded acceleration, and every command returns a
+concurrent.futures.Future, so the caller can scan and plan the next move
+while the wheels are turning.
+
+A command asks for wheel speeds held for a duration. With ramping the wheels
+spend part of the move accelerating and braking, so the scheduler tracks
+progress as the integral of the achieved speed and keeps driving until it
+matches what an instant start and stop would have covered. Near the end
+each tick drives at the fastest speed the wheels can still brake from to
+stop exactly where the move ends, which gives a trapezoidal (or, for short
+moves, triangular) speed profile. Back-to-back commands with the same wheel
+speeds run through without stopping.
+
+On a real-time clock the loop runs on its own thread. On a virtual clock
+(the simulator) there is no thread: wait() steps the loop and advances the
+clock itself, which keeps simulated runs deterministic.
+"""
+
+import collections
+import math
+import threading
+from concurrent.futures import CancelledError, Future, InvalidStateError
+
+from .config import MOTION_CONTROL_RATE, MOTOR_ACCELERATION
+from .logger import logger
+
+
+def _approach(value, target, step):
+    """Move value towards target by at most step."""
+    if abs(target - value) <= step:
+        return target
+    return value + step if value < target else value - step
+
+
+class MotionCommand:
+    """A request to hold a pair of wheel speeds for a duration."""
+
+    def __init__(self, left, right, duration, deadline=None):
+        self.left = left
+        self.right = right
+        self.duration = duration
+        self.deadline = deadline
+        self.progress = 0.0
+        self.braking = False
+        self.future = Future()
+
+    @property
+    def peak(self):
+        return max(abs(self.left), abs(self.right))
+
+    def fraction(self, left, right):
+        """How much of this command's full speed the given wheel speeds amount to."""
+        norm = self.left * self.left + self.right * self.right
+        if norm == 0:
+            return 0.0
+        return max((left * self.left + right * self.right) / norm, 0.0)
+
+    def continues_with(self, other):
+        return other is not None and (self.left, self.right) == (other.left, other.right)
+
+
+class MotionScheduler:
+    """Fixed-rate motor control loop with queued, ramped, cancellable moves."""
+
+    def __init__(self, set_speeds, stop_motors, clock, rate=MOTION_CONTROL_RATE,
+                 acceleration=MOTOR_ACCELERATION, on_update=None):
+        """
+        Args:
+            set_speeds (callable): set_speeds(left, right) drives the wheels
+            stop_motors (callable): Stops both wheels
+            clock: Backend clock (now(), sleep(), realtime)
+            rate (float): Control loop rate in Hz
+            acceleration (float): Maximum change in wheel speed per second
+            on_update (callable): on_update(left, right, dt) after every step,
+                with the speeds that were applied over the last dt seconds
+        """
+        self.set_speeds = set_speeds
+        self.stop_motors = stop_motors
+        self.clock = clock
+        self.period = 1.0 / rate
+        self.acceleration = acceleration
+        self.on_update = on_update
+        self.left = 0.0
+        self.right = 0.0
+        self.ticks = 0
+        self.overruns = 0
+        self._queue = collections.deque()
+        self._current = None
+        self._applied = (0.0, 0.0)
+        self._last_tick = None
+        self._lock = threading.RLock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def running(self):
+        """True while the control thread is running."""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def idle(self):
+        """True when nothing is queued and the wheels are at rest."""
+        with self._lock:
+            return self._current is None and not self._queue and self._applied == (0.0, 0.0)
+
+    def start(self):
+        """Start the control thread."""
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='motion-control', daemon=True)
+        self._thread.start()
+
+    def shutdown(self, timeout=1.0):
+        """Cancel all motion and stop the control thread."""
+        self.cancel_all()
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, left, right, duration, deadline=None, preempt=False):
+        """
+        Queue a move.
+
+        Args:
+            left (float): Left wheel speed
+            right (float): Right wheel speed
+            duration (float): Seconds the move would take with an instant
+                start and stop
+            deadline (float): Clock time by which the move must be done; it is
+                dropped if it has not started and cut short if it has
+            preempt (bool): Cancel the running and queued moves first; the
+                wheels ramp straight from their current speeds to the new move
+
+        Returns:
+            Future: Resolves to the progress made, in seconds at full speed
+        """
+        command = MotionCommand(left, right, duration, deadline)
+        with self._lock:
+            if preempt:
+                self._cancel_commands()
+            self._queue.append(command)
+        if self.clock.realtime:
+            self.start()
+        return command.future
+
+    def cancel_all(self):
+        """
+        Cancel every move and forget the current wheel speeds.
+
+        For emergency stops: the caller stops the motors directly, and the
+        next move ramps up from standstill.
+        """
+        with self._lock:
+            self._cancel_commands()
+            self.left = self.right = 0.0
+            self._applied = (0.0, 0.0)
+
+    def _cancel_commands(self):
+        if self._current is not None:
+            self._current.future.cancel()
+            self._current = None
+        while self._queue:
+            self._queue.popleft().future.cancel()
+
+    def _next_command(self, now):
+        while self._queue:
+            command = self._queue.popleft()
+            if command.future.cancelled():
+                continue
+            if command.deadline is not None and now >= command.deadline:
+                command.future.cancel()
+                continue
+            return command
+        return None
+
+    def tick(self):
+        """Run one control step."""
+        finished = []
+        with self._lock:
+            now = self.clock.now()
+            dt = 0.0 if self._last_tick is None else now - self._last_tick
+            self._last_tick = now
+            self.ticks += 1
+            if self.on_update is not None and dt > 0:
+                self.on_update(self.left, self.right, dt)
+
+            command = self._current
+            if command is not None:
+                command.progress += dt * command.fraction(self.left, self.right)
+                expired = command.deadline is not None and now >= command.deadline
+                stopped = command.braking and self.left == 0 and self.right == 0
+                if (command.future.cancelled() or expired or stopped
+                        or command.progress >= command.duration - 1e-9):
+                    finished.append(command)
+                    command = None
+            if command is None:
+                command = self._next_command(now)
+                while command is not None and (command.peak == 0 or command.duration <= 0):
+                    # Nothing to drive, so no progress would ever be made
+                    finished.append(command)
+                    command = self._next_command(now)
+            self._current = command
+
+            if command is None:
+                target = (0.0, 0.0)
+            else:
+                target = (command.left, command.right)
+                upcoming = self._queue[0] if self._queue else None
+                if not command.continues_with(upcoming) and command.peak > 0:
+                    # Fastest speed the wheels can still brake from, one step per
+                    # tick, to stop exactly where the move ends
+                    step = self.acceleration * self.period
+                    remaining = max(command.duration - command.progress, 0.0) * command.peak
+                    limit = (math.sqrt(step * step + 8 * self.acceleration * remaining) - step) / 2
+                    if limit < command.peak:
+                        command.braking = True
+                        scale = limit / command.peak
+                        target = (command.left * scale, command.right * scale)
+
+            step = self.acceleration * self.period
+            self.left = _approach(self.left, target[0], step)
+            self.right = _approach(self.right, target[1], step)
+            if (self.left, self.right) != self._applied:
+                if self.left == 0 and self.right == 0:
+                    self.stop_motors()
+                else:
+                    self.set_speeds(self.left, self.right)
+                self._applied = (self.left, self.right)
+
+        for command in finished:
+            try:
+                command.future.set_result(command.progress)
+            except InvalidStateError:
+                # Cancelled by the caller
+                pass
+
+    def wait(self, future, timeout=None):
+        """
+        Block until a move is done.
+
+        Without a control thread (virtual clock) this steps the loop itself,
+        and also lets the wheels come to rest if nothing else is queued.
+
+        Returns:
+            float: The move's progress, or None if it was cancelled
+        """
+        if not self.running:
+            while not future.done() or (self._current is None and not self._queue
+                                        and self._applied != (0.0, 0.0)):
+                self.tick()
+                self.clock.sleep(self.period)
+        try:
+            return future.result(timeout)
+        except CancelledError:
+            return None
+
+    def _run(self):
+        next_time = self.clock.now()
+        while not self._stop_event.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Motion control step failed: {str(e)}")
+                self.cancel_all()
+                self.stop_motors()
+
+            next_time += self.period
+            delay = next_time - self.clock.now()
+            if delay < 0:
+                # Fell behind; resynchronise rather than bursting to catch up
+                self.overruns += 1
+                next_time = self.clock.now()
+            else:
+                self._stop_event.wait(delay)
@@ -0,0 +1,208 @@
+"""
+Occupancy grid map for the autonomous robot.
+
+Ultrasonic readings are integrated into a log-odds grid by casting each beam
+from the robot's pose: cells along the beam become more likely to be free and
+the cell at the measured distance more likely to be occupied. The grid is a
+fixed-size window that slides with the robot, so memory stays constant over
+long runs.
+
+Angles are in degrees and positive clockwise, the same convention as
+AutonomousRobot.turn(). World x points along the robot's initial heading and
+y to its right; distances are in centimetres.
+"""
+
+import math
+
+import numpy as np
+
+from .config import (
+    GRID_DECAY,
+    GRID_FREE_THRESHOLD,
+    GRID_LOG_ODDS_FREE,
+    GRID_LOG_ODDS_LIMIT,
+    GRID_LOG_ODDS_OCCUPIED,
+    GRID_MAX_RANGE,
+    GRID_OCCUPIED_THRESHOLD,
+    GRID_RESOLUTION,
+    GRID_SIZE,
+)
+
+
+class OccupancyGrid:
+    """Sliding-window log-odds occupancy grid."""
+
+    def __init__(self, size=GRID_SIZE, resolution=GRID_RESOLUTION, max_range=GRID_MAX_RANGE):
+        """
+        Args:
+            size (int): Number of cells along each side of the window
+            resolution (float): Cell size in cm
+            max_range (float): Readings at or beyond this distance count as no echo
+        """
+        self.size = size
+        self.resolution = resolution
+        self.max_range = max_range
+        self.log_odds = np.zeros((size, size), dtype=np.float32)
+        # World coordinates of the corner of cell (0, 0); centre the robot
+        self.origin = np.array([-size * resolution / 2, -size * resolution / 2])
+
+    @property
+    def center(self):
+        """World coordinates of the middle of the window."""
+        return self.origin + self.size * self.resolution / 2
+
+    def world_to_cell(self, x, y):
+        """
+        Convert world coordinates to a cell index.
+
+        Returns:
+            tuple: (row, col), or None if the point is outside the window
+        """
+        row = int(math.floor((x - self.origin[0]) / self.resolution))
+        col = int(math.floor((y - self.origin[1]) / self.resolution))
+        if 0 <= row < self.size and 0 <= col < self.size:
+            return row, col
+        return None
+
+    def cell_to_world(self, row, col):
+        """World coordinates of the centre of a cell."""
+        return (self.origin[0] + (row + 0.5) * self.resolution,
+                self.origin[1] + (col + 0.5) * self.resolution)
+
+    def _cells(self, xs, ys):
+        """Vectorized world_to_cell: (rows, cols, inside) arrays."""
+        rows = np.floor((xs - self.origin[0]) / self.resolution).astype(np.intp)
+        cols = np.floor((ys - self.origin[1]) / self.resolution).astype(np.intp)
+        inside = (rows >= 0) & (rows < self.size) & (cols >= 0) & (cols < self.size)
+        return rows, cols, inside
+
+    def recenter(self, x, y):
+        """
+        Slide the window so that (x, y) stays near its middle.
+
+        The window only moves once the robot is more than a quarter of the
+        window away from the centre, and always by whole cells. Cells that
+        scroll out are forgotten; cells that scroll in are unknown.
+        """
+        offset = (np.array([x, y]) - self.center) / self.resolution
+        if np.all(np.abs(offset) <= self.size / 4):
+            return
+        shift = np.rint(offset).astype(int)
+        self.origin = self.origin + shift * self.resolution
+        if np.any(np.abs(shift) >= self.size):
+            self.log_odds.fill(0)
+            return
+        shifted = np.zeros_like(self.log_odds)
+        src_rows = slice(max(shift[0], 0), self.size + min(shift[0], 0))
+        dst_rows = slice(max(-shift[0], 0), self.size + min(-shift[0], 0))
+        src_cols = slice(max(shift[1], 0), self.size + min(shift[1], 0))
+        dst_cols = slice(max(-shift[1], 0), self.size + min(-shift[1], 0))
+        shifted[dst_rows, dst_cols] = self.log_odds[src_rows, src_cols]
+        self.log_odds = shifted
+
+    def integrate_scan(self, pose, bearings, distances):
+        """
+        Integrate a set of ultrasonic readings taken from one pose.
+
+        Args:
+            pose (tuple): Robot (x, y, heading) when the scan was taken
+            bearings (array): Beam angle of each reading relative to the heading
+            distances (array): Measured distance of each reading
+        """
+        x, y, heading = pose
+        self.recenter(x, y)
+        if GRID_DECAY < 1.0:
+            self.log_odds *= GRID_DECAY
+
+        bearings = np.asarray(bearings, dtype=np.float64)
+        distances = np.asarray(distances, dtype=np.float64)
+        valid = np.isfinite(distances) & (distances >= 0)
+        bearings, distances = bearings[valid], distances[valid]
+        if len(distances) == 0:
+            return
+
+        theta = np.radians(heading + bearings)
+        hit = distances < self.max_range
+        reach = np.minimum(distances, self.max_range)
+
+        # Sample every beam at half-cell spacing; points short of the echo are free
+        step = self.resolution / 2
+        t = np.arange(int(math.ceil(reach.max() / step)) + 1) * step
+        xs = x + t[None, :] * np.cos(theta)[:, None]
+        ys = y + t[None, :] * np.sin(theta)[:, None]
+        rows, cols, inside = self._cells(xs, ys)
+        free = inside & (t[None, :] < reach[:, None] - self.resolution / 2)
+
+        cells = self.size * self.size
+        beam_ids = np.broadcast_to(np.arange(len(theta))[:, None], free.shape)
+        free_keys = np.unique(beam_ids[free] * cells + rows[free] * self.size + cols[free])
+
+        hit_rows, hit_cols, hit_inside = self._cells(
+            x + distances * np.cos(theta), y + distances * np.sin(theta)
+        )
+        hit &= hit_inside
+        hit_cells = hit_rows[hit] * self.size + hit_cols[hit]
+        # A beam never clears the cell it hit
+        free_keys = np.setdiff1d(free_keys, np.flatnonzero(hit) * cells + hit_cells, assume_unique=True)
+
+        flat = self.log_odds.reshape(-1)
+        np.add.at(flat, free_keys % cells, GRID_LOG_ODDS_FREE)
+        np.add.at(flat, hit_cells, GRID_LOG_ODDS_OCCUPIED)
+        np.clip(self.log_odds, -GRID_LOG_ODDS_LIMIT, GRID_LOG_ODDS_LIMIT, out=self.log_odds)
+
+    def probabilities(self):
+        """Occupancy probability of every cell."""
+        return 1.0 / (1.0 + np.exp(-self.log_odds))
+
+    def free_mask(self):
+        """Boolean array of cells known to be free."""
+        return self.log_odds < GRID_FREE_THRESHOLD
+
+    def occupied_mask(self):
+        """Boolean array of cells known to be occupied."""
+        return self.log_odds > GRID_OCCUPIED_THRESHOLD
+
+    def unknown_mask(self):
+        """Boolean array of cells that are neither known free nor occupied."""
+        return ~(self.free_mask() | self.occupied_mask())
+
+    def is_free(self, x, y):
+        """Whether the cell containing (x, y) is known to be free."""
+        cell = self.world_to_cell(x, y)
+        return cell is not None and self.log_odds[cell] < GRID_FREE_THRESHOLD
+
+    def is_occupied(self, x, y):
+        """Whether the cell containing (x, y) is known to be occupied."""
+        cell = self.world_to_cell(x, y)
+        return cell is not None and self.log_odds[cell] > GRID_OCCUPIED_THRESHOLD
+
+    def ray_distances(self, pose, bearings, max_range=None):
+        """
+        Distance along each bearing that is known to be free.
+
+        Args:
+            pose (tuple): Robot (x, y, heading)
+            bearings (array): Beam angles relative to the heading
+            max_range (float): Stop looking beyond this distance
+
+        Returns:
+            numpy.ndarray: Free distance per bearing, capped at max_range
+        """
+        max_range = self.max_range if max_range is None else max_range
+        x, y, heading = pose
+        theta = np.radians(heading + np.asarray(bearings, dtype=np.float64))
+        t = np.arange(1, int(math.ceil(max_range / (self.resolution / 2))) + 1) * (self.resolution / 2)
+        rows, cols, inside = self._cells(
+            x + t[None, :] * np.cos(theta)[:, None], y + t[None, :] * np.sin(theta)[:, None]
+        )
+        free = np.zeros(rows.shape, dtype=bool)
+        free[inside] = self.log_odds[rows[inside], cols[inside]] < GRID_FREE_THRESHOLD
+
+        blocked = ~free
+        first_blocked = np.where(blocked.any(axis=1), blocked.argmax(axis=1), len(t))
+        known = np.concatenate([[0.0], t])[first_blocked]
+        return np.minimum(known, max_range)
+
+    def clear_bearings(self, pose, bearings, clearance):
+        """Boolean array: which bearings are known free for at least `clearance` cm."""
+        return self.ray_distances(pose, bearings, clearance) >= clearance
@@ -0,0 +1,287 @@
+"""
+Global path planning over an occupancy grid.
+
+Two planners share the same 8-connected grid graph:
+
+- ``astar`` plans from scratch and is the simple reference.
+- ``DStarLite`` plans backwards from the goal and keeps its search state, so
+  when a few cells change (new obstacles from a scan) or the robot moves,
+  only the affected part of the search is repaired instead of replanning
+  the whole grid.
+
+Cells are addressed as (row, col) tuples; blocked cells are given as a 2D
+boolean array. Diagonal moves may not cut the corner of a blocked cell.
+Move costs are the integers 10 (orthogonal) and 14 (diagonal) so that key
+comparisons are exact; floating-point ties would otherwise stop D* Lite early.
+"""
+
+import heapq
+
+import numpy as np
+
+STRAIGHT = 10
+DIAGONAL = 14
+INF = float('inf')
+
+
+class GridGraph:
+    """8-connected grid with integer orthogonal and diagonal move costs."""
+
+    def __init__(self, blocked):
+        blocked = np.asarray(blocked, dtype=bool)
+        self.rows, self.cols = blocked.shape
+        # Plain Python containers: scalar access is much faster than NumPy's
+        self.blocked = bytearray(blocked.reshape(-1).tobytes())
+
+    def index(self, cell):
+        return cell[0] * self.cols + cell[1]
+
+    def cell(self, index):
+        return divmod(index, self.cols)
+
+    def set_blocked(self, index, value):
+        self.blocked[index] = 1 if value else 0
+
+    def neighbors(self, u):
+        """Yield (v, cost) for every traversable move out of u."""
+        blocked = self.blocked
+        if blocked[u]:
+            return
+        cols = self.cols
+        row, col = divmod(u, cols)
+        up = row > 0 and not blocked[u - cols]
+        down = row < self.rows - 1 and not blocked[u + cols]
+        left = col > 0 and not blocked[u - 1]
+        right = col < cols - 1 and not blocked[u + 1]
+        if up:
+            yield u - cols, STRAIGHT
+            if left and not blocked[u - cols - 1]:
+                yield u - cols - 1, DIAGONAL
+            if right and not blocked[u - cols + 1]:
+                yield u - cols + 1, DIAGONAL
+        if down:
+            yield u + cols, STRAIGHT
+            if left and not blocked[u + cols - 1]:
+                yield u + cols - 1, DIAGONAL
+            if right and not blocked[u + cols + 1]:
+                yield u + cols + 1, DIAGONAL
+        if left:
+            yield u - 1, STRAIGHT
+        if right:
+            yield u + 1, STRAIGHT
+
+    def adjacent(self, u):
+        """All in-bounds cells around u, regardless of whether they are blocked."""
+        cols = self.cols
+        row, col = divmod(u, cols)
+        for dr in (-1, 0, 1):
+            r = row + dr
+            if not 0 <= r < self.rows:
+                continue
+            for dc in (-1, 0, 1):
+                c = col + dc
+                if (dr or dc) and 0 <= c < cols:
+                    yield r * cols + c
+
+    def heuristic(self, a, b):
+        """Octile distance between two cell indices."""
+        ar, ac = divmod(a, self.cols)
+        br, bc = divmod(b, self.cols)
+        dr, dc = abs(ar - br), abs(ac - bc)
+        return STRAIGHT * max(dr, dc) + (DIAGONAL - STRAIGHT) * min(dr, dc)
+
+
+def astar(blocked, start, goal):
+    """
+    Plan a shortest path with A*.
+
+    Args:
+        blocked (array): 2D boolean array, True where the robot cannot go
+        start (tuple): (row, col) start cell
+        goal (tuple): (row, col) goal cell
+
+    Returns:
+        list: (row, col) cells from start to goal, or None if unreachable
+    """
+    graph = blocked if isinstance(blocked, GridGraph) else GridGraph(blocked)
+    start, goal = graph.index(start), graph.index(goal)
+    if graph.blocked[start] or graph.blocked[goal]:
+        return None
+
+    g = {start: 0}
+    parent = {start: None}
+    open_heap = [(graph.heuristic(start, goal), start)]
+    closed = set()
+    while open_heap:
+        _, u = heapq.heappop(open_heap)
+        if u == goal:
+            break
+        if u in closed:
+            continue
+        closed.add(u)
+        gu = g[u]
+        for v, cost in graph.neighbors(u):
+            new_g = gu + cost
+            if new_g < g.get(v, INF):
+                g[v] = new_g
+                parent[v] = u
+                heapq.heappush(open_heap, (new_g + graph.heuristic(v, goal), v))
+    else:
+        return None
+
+    path = []
+    u = goal
+    while u is not None:
+        path.append(graph.cell(u))
+        u = parent[u]
+    path.reverse()
+    return path
+
+
+class DStarLite:
+    """
+    Incremental shortest-path planner (Koenig & Likhachev's D* Lite).
+
+    The search runs from the goal towards the robot, so after the robot moves
+    (move_start) or cells change (update_cells) the previous g-values are
+    reused and only inconsistent cells are re-expanded.
+    """
+
+    def __init__(self, blocked, start, goal):
+        self.graph = GridGraph(blocked)
+        size = self.graph.rows * self.graph.cols
+        self.g = [INF] * size
+        self.rhs = [INF] * size
+        self.start = self.graph.index(start)
+        self.goal = self.graph.index(goal)
+        self._last_start = self.start
+        self.km = 0
+        self.open_heap = []
+        self.expansions = 0
+        self.rhs[self.goal] = 0
+        heapq.heappush(self.open_heap, (self._key(self.goal), self.goal))
+
+    def _key(self, u):
+        best = min(self.g[u], self.rhs[u])
+        return (best + self.graph.heuristic(self.start, u) + self.km, best)
+
+    def _update_vertex(self, u):
+        if u != self.goal:
+            best = INF
+            g = self.g
+            for v, cost in self.graph.neighbors(u):
+                candidate = cost + g[v]
+                if candidate < best:
+                    best = candidate
+            self.rhs[u] = best
+        if self.g[u] != self.rhs[u]:
+            heapq.heappush(self.open_heap, (self._key(u), u))
+
+    def compute_shortest_path(self):
+        """Expand inconsistent cells until the start cell is consistent."""
+        g, rhs, heap = self.g, self.rhs, self.open_heap
+        graph = self.graph
+        start = self.start
+        while heap:
+            key_old, u = heap[0]
+            start_key = self._key(start)
+            if key_old >= start_key and rhs[start] == g[start]:
+                break
+            heapq.heappop(heap)
+            if g[u] == rhs[u]:
+                continue  # stale duplicate entry
+            key_new = self._key(u)
+            if key_old < key_new:
+                heapq.heappush(heap, (key_new, u))
+                continue
+            self.expansions += 1
+            goal = self.goal
+            if g[u] > rhs[u]:
+                # Overconsistent: settle u and offer it to its neighbours
+                g_u = g[u] = rhs[u]
+                for v, cost in graph.neighbors(u):
+                    if v != goal and cost + g_u < rhs[v]:
+                        rhs[v] = cost + g_u
+                        heapq.heappush(heap, (self._key(v), v))
+            else:
+                # Underconsistent: neighbours that relied on u must look again
+                g_old = g[u]
+                g[u] = INF
+                self._update_vertex(u)
+                for v, cost in graph.neighbors(u):
+                    if v != goal and rhs[v] == cost + g_old:
+                        self._update_vertex(v)
+
+    def move_start(self, start):
+        """Tell the planner the robot is now at `start`."""
+        start = self.graph.index(start)
+        if start == self.start:
+            return
+        self.km += self.graph.heuristic(self._last_start, start)
+        self._last_start = start
+        self.start = start
+
+    def update_cells(self, cells, blocked):
+        """
+        Change the blocked state of some cells.
+
+        Args:
+            cells (iterable): (row, col) cells that changed
+            blocked (iterable): New blocked state for each cell
+        """
+        touched = set()
+        for cell, value in zip(cells, blocked):
+            u = self.graph.index(cell)
+            self.graph.set_blocked(u, value)
+            touched.add(u)
+            touched.update(self.graph.adjacent(u))
+        for u in touched:
+            self._update_vertex(u)
+
+    def update_map(self, blocked):
+        """Diff a full blocked array against the current one and apply the changes."""
+        blocked = np.asarray(blocked, dtype=bool).reshape(-1)
+        current = np.frombuffer(bytes(self.graph.blocked), dtype=np.uint8).astype(bool)
+        changed = np.flatnonzero(blocked != current)
+        self.update_cells([self.graph.cell(int(u)) for u in changed], blocked[changed])
+        return len(changed)
+
+    def plan(self):
+        """
+        Bring the search up to date and extract the current best path.
+
+        Returns:
+            list: (row, col) cells from start to goal, or None if unreachable
+        """
+        self.compute_shortest_path()
+        if self.g[self.start] == INF:
+            return None
+        path = [self.graph.cell(self.start)]
+        u = self.start
+        limit = len(self.g)
+        while u != self.goal and len(path) <= limit:
+            best, best_cost = None, INF
+            for v, cost in self.graph.neighbors(u):
+                if cost + self.g[v] < best_cost:
+                    best, best_cost = v, cost + self.g[v]
+            if best is None:
+                return None
+            u = best
+            path.append(self.graph.cell(u))
+        return path
+
+
+def inflate(blocked, radius):
+    """Grow blocked cells by `radius` cells so the planner keeps the robot's body clear."""
+    blocked = np.asarray(blocked, dtype=bool)
+    if radius <= 0:
+        return blocked.copy()
+    inflated = blocked.copy()
+    rows, cols = blocked.shape
+    for dr in range(-radius, radius + 1):
+        for dc in range(-radius, radius + 1):
+            if dr * dr + dc * dc > radius * radius:
+                continue
+            src = blocked[max(-dr, 0):rows - max(dr, 0), max(-dc, 0):cols - max(dc, 0)]
+            inflated[max(dr, 0):rows - max(-dr, 0), max(dc, 0):cols - max(-dc, 0)] |= src
+    return inflated
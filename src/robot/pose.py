@@ -0,0 +1,301 @@
+"""
+Pose estimation from dead reckoning and scan matching.
+
+Dead reckoning integrates the commanded wheel speeds, so every wheel that
+runs a little fast, every slip and every uneven start ends up in the pose.
+PoseEstimator corrects it with the ultrasonic: each sweep is matched
+against the previous one, searching for the rotation and forward travel
+error that best line up the two sets of readings. The correction is
+weighted by how uncertain the dead-reckoned motion was compared with the
+match, so a long turn trusts the match and a short creep trusts the wheels.
+
+The heading corrections also calibrate the motion model:
+
+    turn_gain    actual rotation per commanded rotation
+    drift        unintended rotation (degrees) per cm driven forward
+
+Each is a scalar Kalman estimate: the first matches move it quickly, and
+as evidence accumulates single noisy matches move it less and less, so a
+robot whose wheels are fine does not talk itself into a drift. A little
+process noise keeps it tracking slow changes such as a draining battery.
+The drift is only applied once it is clearly not zero (known_drift): a
+drift learned from a couple of noisy matches would bend the path of a
+robot that drives straight.
+Dead reckoning applies the calibration, and turn() and move_forward() use it
+to command what the robot will actually do (see AutonomousRobot), which
+closes the loop around the motors through the scans. The distance driven is
+not calibrated: the ultrasonic cone reads the nearest surface it covers,
+which makes matched forward travel slightly short, and learning from that
+bias would keep stretching the moves.
+
+Angles are in degrees, positive clockwise; distances in cm. Poses are
+(x, y, heading) with x along the starting heading and y to its right.
+"""
+
+import math
+
+import numpy as np
+
+from .config import (
+    GRID_MAX_RANGE,
+    POSE_CALIBRATION_NOISE,
+    POSE_DRIFT_PRIOR_VARIANCE,
+    POSE_DRIFT_VARIANCE,
+    POSE_MATCH_INLIER,
+    POSE_MATCH_MAX_ROTATION,
+    POSE_MATCH_MAX_SHIFT,
+    POSE_MATCH_MIN_POINTS,
+    POSE_MATCH_ROTATION_STEP,
+    POSE_MATCH_ROTATION_VARIANCE,
+    POSE_MATCH_SHIFT_STEP,
+    POSE_MATCH_SHIFT_VARIANCE,
+    POSE_TRAVEL_ERROR,
+    POSE_TURN_ERROR,
+    POSE_TURN_GAIN_PRIOR_VARIANCE,
+)
+
+# Corrections only calibrate the motion model from clean moves
+_MIN_CALIBRATION_TURN = 10.0  # degrees
+_MIN_CALIBRATION_TRAVEL = 3.0  # cm
+_GAIN_LIMITS = (0.5, 1.5)
+_DRIFT_LIMIT = 2.0  # degrees per cm
+# Standard deviations from zero before the drift is applied
+_DRIFT_SIGNIFICANCE = 3.0
+# Matched heading corrections further off than this many standard deviations are ignored
+_GATE = 3.0
+# Readings this close to the edge of the reference's field of view are not compared
+_VIEW_MARGIN = 3.0  # degrees
+
+
+def relative_pose(reference, pose):
+    """Pose in the frame of a reference pose."""
+    x0, y0, heading0 = reference
+    x, y, heading = pose
+    theta = math.radians(heading0)
+    dx, dy = x - x0, y - y0
+    return (dx * math.cos(theta) + dy * math.sin(theta),
+            -dx * math.sin(theta) + dy * math.cos(theta),
+            (heading - heading0 + 180) % 360 - 180)
+
+
+def match_scans(reference, current, motion, rotations, shifts, inlier=POSE_MATCH_INLIER,
+                min_points=POSE_MATCH_MIN_POINTS, max_range=GRID_MAX_RANGE):
+    """
+    Find the correction to a dead-reckoned motion that best aligns two scans.
+
+    Every candidate (rotation, shift) moves the current readings into the
+    reference frame, where each is compared with the reference reading at
+    the same bearing. Residuals are truncated at `inlier`. The readings
+    compared are chosen once, as those inside the reference's field of view
+    at the dead-reckoned motion; choosing them per candidate would favour
+    candidates that rotate less (they keep more readings in view), and turns
+    would look smaller than they were.
+
+    Args:
+        reference (tuple): (angles, distances) read at the reference pose
+        current (tuple): (angles, distances) read at the current pose
+        motion (tuple): Dead-reckoned current pose (x, y, heading) in the
+            reference frame
+        rotations (np.ndarray): Candidate heading corrections (degrees)
+        shifts (np.ndarray): Candidate corrections of the forward travel (cm)
+        inlier (float): Residual (cm) beyond which a reading is an outlier
+        min_points (int): Inliers the best candidate needs
+        max_range (float): Readings at or beyond this are no echo
+
+    Returns:
+        tuple: (rotation, shift, inliers) of the best candidate, refined
+        between grid steps, or None if
+        the scans do not overlap enough or the best candidate lies on the
+        edge of the search
+    """
+    ref_angles, ref_distances = (np.asarray(values, dtype=np.float64) for values in reference)
+    angles, distances = (np.asarray(values, dtype=np.float64) for values in current)
+    keep = np.isfinite(ref_distances) & (ref_distances < max_range)
+    order = np.argsort(ref_angles[keep])
+    ref_angles, ref_distances = ref_angles[keep][order], ref_distances[keep][order]
+    keep = np.isfinite(distances) & (distances < max_range)
+    angles, distances = angles[keep], distances[keep]
+    if len(ref_angles) < 2 or len(angles) < min_points:
+        return None
+
+    dx, dy, dtheta = motion
+    rotations = np.asarray(rotations, dtype=np.float64)
+    nominal = np.degrees(np.arctan2(dy + distances * np.sin(np.radians(dtheta + angles)),
+                                    dx + distances * np.cos(np.radians(dtheta + angles))))
+    keep = (nominal >= ref_angles[0] + _VIEW_MARGIN) & (nominal <= ref_angles[-1] - _VIEW_MARGIN)
+    angles, distances = angles[keep], distances[keep]
+    if len(angles) < min_points:
+        return None
+
+    heading = np.radians(dtheta + rotations)[:, None, None]
+    shift = np.asarray(shifts, dtype=np.float64)[None, :, None]
+    # Shift along the direction the robot was travelling
+    travel = math.radians(dtheta)
+    x = dx + shift * math.cos(travel)
+    y = dy + shift * math.sin(travel)
+    beam = heading + np.radians(angles)
+    px = x + distances * np.cos(beam)
+    py = y + distances * np.sin(beam)
+    bearings = np.degrees(np.arctan2(py, px))
+    ranges = np.hypot(px, py)
+
+    expected = np.interp(bearings, ref_angles, ref_distances)
+    overlap = (bearings >= ref_angles[0]) & (bearings <= ref_angles[-1])
+    squared = np.where(overlap, np.minimum((ranges - expected) ** 2, inlier * inlier), inlier * inlier)
+    cost = squared.sum(axis=-1)
+
+    best_rotation, best_shift = np.unravel_index(np.argmin(cost), cost.shape)
+    if best_rotation in (0, len(rotations) - 1):
+        return None
+    if len(shifts) > 1 and best_shift in (0, len(shifts) - 1):
+        return None
+    inliers = int(np.count_nonzero(squared[best_rotation, best_shift] < inlier * inlier))
+    if inliers < min_points:
+        return None
+    rotation = _refine(rotations, cost[:, best_shift], best_rotation)
+    shift = _refine(shifts, cost[best_rotation], best_shift) if len(shifts) > 1 else float(shifts[best_shift])
+    return rotation, shift, inliers
+
+
+def _refine(values, cost, best):
+    """
+    Place the minimum between grid steps with a parabola through the best
+    cost and its neighbours, so errors smaller than a step are not lost to
+    rounding (repeated over many short moves they add up).
+    """
+    below, at, above = cost[best - 1], cost[best], cost[best + 1]
+    curvature = below - 2 * at + above
+    if curvature <= 0:
+        return float(values[best])
+    offset = min(max(0.5 * (below - above) / curvature, -0.5), 0.5)
+    step = (values[best + 1] - values[best - 1]) / 2
+    return float(values[best] + offset * step)
+
+
+class PoseEstimator:
+    """Fuses dead-reckoned motion with scan matching and calibrates the motion model."""
+
+    def __init__(self, matching=True, max_rotation=POSE_MATCH_MAX_ROTATION,
+                 rotation_step=POSE_MATCH_ROTATION_STEP, max_shift=POSE_MATCH_MAX_SHIFT,
+                 shift_step=POSE_MATCH_SHIFT_STEP, calibrate=True):
+        """
+        Args:
+            matching (bool): Correct with scan matching; False leaves pure dead reckoning
+            max_rotation (float): Heading error searched either way (degrees)
+            rotation_step (float): Heading search resolution (degrees)
+            max_shift (float): Forward travel error searched either way (cm)
+            shift_step (float): Travel search resolution (cm)
+            calibrate (bool): Learn the turn gain and drift from the matches
+        """
+        self.matching = matching
+        self.rotations = np.arange(-max_rotation, max_rotation + rotation_step / 2, rotation_step)
+        self.shifts = np.arange(-max_shift, max_shift + shift_step / 2, shift_step)
+        self.calibrate = calibrate
+        self.turn_gain = 1.0
+        self.turn_gain_variance = POSE_TURN_GAIN_PRIOR_VARIANCE
+        self.drift = 0.0
+        self.drift_variance = POSE_DRIFT_PRIOR_VARIANCE
+        self.matches = 0
+        self.failures = 0
+        self.reset()
+
+    def reset(self):
+        """Forget the reference scan and the motion since it."""
+        self._reference = None
+        self._reference_pose = None
+        self._commanded_turn = 0.0
+        self._commanded_travel = 0.0
+
+    def odometry(self, distance, angle):
+        """
+        Calibrate one dead-reckoning step.
+
+        Args:
+            distance (float): Commanded forward travel (cm)
+            angle (float): Commanded rotation (degrees)
+
+        Returns:
+            tuple: (distance, angle) the robot is expected to have moved
+        """
+        self._commanded_turn += angle
+        self._commanded_travel += distance
+        return distance, angle * self.turn_gain + distance * self.known_drift
+
+    @property
+    def known_drift(self):
+        """The drift once it is clearly not zero, else 0."""
+        if self.drift * self.drift > _DRIFT_SIGNIFICANCE * _DRIFT_SIGNIFICANCE * self.drift_variance:
+            return self.drift
+        return 0.0
+
+    def observe(self, pose, angles, distances):
+        """
+        Match a scan against the previous one.
+
+        Args:
+            pose (tuple): Dead-reckoned pose at the scan
+            angles (array): Reading angles relative to the heading (degrees)
+            distances (array): Readings (cm)
+
+        Returns:
+            tuple: (rotation, shift) correction to apply to the pose, (0, 0) if none
+        """
+        correction = (0.0, 0.0)
+        if self.matching and self._reference is not None:
+            motion = relative_pose(self._reference_pose, pose)
+            match = match_scans(self._reference, (angles, distances), motion, self.rotations, self.shifts)
+            correction = None if match is None else self._fuse(match[0], match[1])
+            if correction is None:
+                self.failures += 1
+                correction = (0.0, 0.0)
+            else:
+                self.matches += 1
+                if self.calibrate:
+                    self._calibrate(match[0])
+        x, y, heading = pose
+        rotation, shift = correction
+        heading += rotation
+        x += shift * math.cos(math.radians(heading))
+        y += shift * math.sin(math.radians(heading))
+        self._reference = (np.array(angles, dtype=np.float64), np.array(distances, dtype=np.float64))
+        self._reference_pose = (x, y, (heading + 180) % 360 - 180)
+        self._commanded_turn = self._commanded_travel = 0.0
+        return correction
+
+    def _fuse(self, rotation, shift):
+        """
+        Weight a matched correction against the uncertainty of the dead
+        reckoning; None if the match is too far off to be believed.
+        """
+        turn, travel = abs(self._commanded_turn), abs(self._commanded_travel)
+        # What the calibration does not know yet, plus what it cannot know (slip)
+        turn_variance = (self.turn_gain_variance * turn ** 2 + self.drift_variance * travel ** 2
+                         + (POSE_TURN_ERROR * turn) ** 2 + POSE_DRIFT_VARIANCE * travel)
+        travel_variance = (POSE_TRAVEL_ERROR * travel) ** 2
+        if rotation * rotation > _GATE * _GATE * (turn_variance + POSE_MATCH_ROTATION_VARIANCE):
+            return None
+        turn_weight = turn_variance / (turn_variance + POSE_MATCH_ROTATION_VARIANCE)
+        travel_weight = travel_variance / (travel_variance + POSE_MATCH_SHIFT_VARIANCE)
+        return rotation * turn_weight, shift * travel_weight
+
+    def _calibrate(self, rotation):
+        """Learn the motion model from a matched heading error after a clean turn or forward move."""
+        turn, travel = self._commanded_turn, self._commanded_travel
+        if abs(turn) >= _MIN_CALIBRATION_TURN and abs(travel) < _MIN_CALIBRATION_TRAVEL:
+            # The turn went rotation / turn further per commanded degree than predicted
+            noise = POSE_MATCH_ROTATION_VARIANCE + (POSE_TURN_ERROR * turn) ** 2
+            gain, self.turn_gain_variance = _kalman_step(self.turn_gain_variance, rotation / turn, noise / turn ** 2)
+            self.turn_gain = min(max(self.turn_gain + gain, _GAIN_LIMITS[0]), _GAIN_LIMITS[1])
+        elif abs(travel) >= _MIN_CALIBRATION_TRAVEL and abs(turn * self.turn_gain + travel * self.known_drift) < 2.0:
+            # The match measures the drift against the one dead reckoning applied
+            measured = self.known_drift + rotation / travel
+            noise = POSE_MATCH_ROTATION_VARIANCE + POSE_DRIFT_VARIANCE * abs(travel)
+            step, self.drift_variance = _kalman_step(self.drift_variance, measured - self.drift, noise / travel ** 2)
+            self.drift = min(max(self.drift + step, -_DRIFT_LIMIT), _DRIFT_LIMIT)
+
+
+def _kalman_step(variance, innovation, measurement_variance):
+    """Scalar Kalman update: (correction, new variance) for one calibration parameter."""
+    variance += POSE_CALIBRATION_NOISE
+    gain = variance / (variance + measurement_variance)
+    return gain * innovation, (1 - gain) * variance
@@ -0,0 +1,439 @@
+"""
+Deterministic replay of recorded telemetry through the navigator.
+
+A ReplayRobot is an AutonomousRobot whose sensor readings come from a
+telemetry recording (see robot.telemetry) instead of hardware. Every
+reading the navigator asks for is served from the recording in the order
+it was taken, each reading and servo command moves the replay clock to the
+time it was recorded, and sleeps take no wall-clock time, so a run
+replays through the unchanged scan_environment/find_best_direction/
+navigate() logic as fast as the CPU allows.
+
+The motor commands the replayed navigator issues are collapsed into
+maneuvers (forward, backward, left or right, with how far each went) and
+diffed against the maneuvers in the recording. Any decision change, such
+as a different turn direction or a much larger turn, shows up as a
+mismatch.
+
+Recordings are streamed chunk by chunk, one generator per record kind, so
+memory use does not grow with the length of the run.
+
+Only the reactive navigate() loop is replayed, and the replay has to use
+the scan mode the recording was made with; other settings (and the code)
+can differ, which is what a replay is for.
+"""
+
+import math
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from .autonomous_navigation import AutonomousRobot
+from .config import REPLAY_DEADBAND, REPLAY_TOLERANCE
+from .hardware import Backend
+from .logger import logger
+from .telemetry import KINDS, load, run_chunks
+
+# The field each kind of record keeps its value in
+_VALUE_FIELDS = {
+    'distance': ('distance',),
+    'light': ('light',),
+    'sound': ('sound',),
+    'battery': ('battery',),
+    'servo': ('servo',),
+    'camera': ('light',),
+    'motors': ('left', 'right'),
+}
+
+Maneuver = namedtuple('Maneuver', ['kind', 'start', 'magnitude'])
+Mismatch = namedtuple('Mismatch', ['index', 'recorded', 'replayed'])
+
+
+class ReplayFinished(BaseException):
+    """
+    The recording has no more readings of a kind the navigator asked for.
+
+    A BaseException so the navigator's own error handling does not treat
+    the end of a recording as a failure.
+    """
+
+
+class RecordStream:
+    """The records of one kind from a run, in order, read a chunk at a time."""
+
+    def __init__(self, chunks, kind):
+        """
+        Args:
+            chunks (list): Chunk file paths of the run, in order
+            kind (str): Record kind (a key of telemetry.KINDS)
+        """
+        self.kind = kind
+        self._rows = self._generate(chunks, KINDS[kind], _VALUE_FIELDS[kind])
+        self._pending = None
+        self.consumed = 0
+
+    @staticmethod
+    def _generate(chunks, code, fields):
+        for path in chunks:
+            records = load(path)
+            selected = records[records['kind'] == code]
+            columns = [selected['time'].tolist()] + [selected[field].tolist() for field in fields]
+            yield from zip(*columns)
+
+    def peek(self):
+        """The next (time, value...) row without consuming it, or None at the end."""
+        if self._pending is None:
+            self._pending = next(self._rows, None)
+        return self._pending
+
+    def next(self):
+        """Consume the next (time, value...) row; raises ReplayFinished at the end."""
+        row = self.peek()
+        if row is None:
+            raise ReplayFinished(self.kind)
+        self._pending = None
+        self.consumed += 1
+        return row
+
+    def until(self, timestamp):
+        """Consume every row recorded at or before timestamp."""
+        rows = []
+        while True:
+            row = self.peek()
+            if row is None or row[0] > timestamp:
+                return rows
+            rows.append(self.next())
+
+    def __iter__(self):
+        while self.peek() is not None:
+            yield self.next()
+
+
+def _reading(value):
+    # Readings recorded as None come back as NaN
+    return None if math.isnan(value) else value
+
+
+class ReplayClock:
+    """Virtual clock that sleeps instantly and follows the recorded inputs."""
+
+    realtime = False
+
+    def __init__(self, start=0.0):
+        self._now = start
+
+    def now(self):
+        return self._now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self._now += seconds
+
+    def set(self, timestamp):
+        """Move to a recorded time (possibly backwards)."""
+        self._now = timestamp
+
+
+class _ReplayMotor:
+    def forward(self, speed):
+        pass
+
+    def stop(self):
+        pass
+
+
+class _ReplayDisplay:
+    brightness = 0
+    timeout = 0
+
+
+class _ReplayPitop:
+    def __init__(self):
+        self.left_motor = _ReplayMotor()
+        self.right_motor = _ReplayMotor()
+        self.display = _ReplayDisplay()
+
+
+class _ReplayServo:
+    angle = 0
+
+
+class _ReplaySensor:
+    """Device whose reading is the next recorded one."""
+
+    def __init__(self, backend, kind):
+        self._backend = backend
+        self._kind = kind
+
+    def _next(self):
+        return self._backend.read(self._kind)
+
+    distance = reading = percentage = property(_next)
+
+
+class ReplayBackend(Backend):
+    """Devices and clock backed by a telemetry recording."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Any chunk file of the run, or the run prefix
+        """
+        self.chunks = run_chunks(path)
+        if not self.chunks:
+            raise FileNotFoundError(f"No telemetry chunks found for {path}")
+        self.clock = ReplayClock()
+        self.streams = {}
+        first = self.stream('servo').peek() or self.stream('distance').peek()
+        if first is not None:
+            self.clock.set(first[0])
+
+    def stream(self, kind):
+        """The input stream for a kind of record, created on first use."""
+        if kind not in self.streams:
+            self.streams[kind] = RecordStream(self.chunks, kind)
+        return self.streams[kind]
+
+    def read(self, kind):
+        """Next recorded value of a sensor; the clock moves to when it was read."""
+        timestamp, value = self.stream(kind).next()
+        self.clock.set(timestamp)
+        return _reading(value)
+
+    def create_pitop(self):
+        return _ReplayPitop()
+
+    def create_ultrasonic(self, port):
+        return _ReplaySensor(self, 'distance')
+
+    def create_servo(self, port):
+        return _ReplayServo()
+
+    def create_light_sensor(self, port):
+        return _ReplaySensor(self, 'light')
+
+    def create_sound_sensor(self, port):
+        return _ReplaySensor(self, 'sound')
+
+    def create_camera(self, resolution, framerate):
+        raise RuntimeError("Recorded camera light levels are replayed instead")
+
+    def create_battery(self):
+        return _ReplaySensor(self, 'battery')
+
+
+class ReplaySampler:
+    """Stands in for SensorSampler, serving recorded readings in order."""
+
+    running = True
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def latest(self, name, max_age=None, since=None):
+        return self.backend.read(name)
+
+    def window(self, name, size=None):
+        # Everything recorded up to now, i.e. the readings of the sweep that
+        # just finished
+        rows = self.backend.stream(name).until(self.backend.clock.now())
+        times = np.array([row[0] for row in rows], dtype=np.float64)
+        values = np.array([row[1] for row in rows], dtype=np.float64)
+        return times, values
+
+
+def classify(left, right, deadband=REPLAY_DEADBAND):
+    """
+    Kind of maneuver a motor command makes and its rate.
+
+    Returns:
+        tuple: ('forward' | 'backward' | 'left' | 'right' | 'stop', rate)
+    """
+    translation = (left + right) / 2
+    rotation = (left - right) / 2
+    if abs(translation) < deadband and abs(rotation) < deadband:
+        return 'stop', 0.0
+    if abs(translation) >= abs(rotation):
+        return ('forward' if translation > 0 else 'backward'), abs(translation)
+    return ('right' if rotation > 0 else 'left'), abs(rotation)
+
+
+class ManeuverLog:
+    """
+    Collapses a stream of motor commands into maneuvers.
+
+    Consecutive commands of the same kind (e.g. the steps of a speed ramp,
+    or two forward moves with or without a stop between them) form one
+    maneuver, whose magnitude is its speed integrated over time.
+    """
+
+    def __init__(self, deadband=REPLAY_DEADBAND):
+        self.deadband = deadband
+        self.maneuvers = []
+        self.commands = 0
+        self._command = None
+
+    def add(self, timestamp, left, right):
+        """Add a motor command issued at timestamp."""
+        self.commands += 1
+        if self._command is not None:
+            start, kind, rate = self._command
+            if kind != 'stop' and timestamp > start:
+                last = self.maneuvers[-1]
+                self.maneuvers[-1] = last._replace(magnitude=last.magnitude + rate * (timestamp - start))
+        kind, rate = classify(left, right, self.deadband)
+        if kind != 'stop' and (not self.maneuvers or self.maneuvers[-1].kind != kind):
+            self.maneuvers.append(Maneuver(kind, timestamp, 0.0))
+        self._command = (timestamp, kind, rate)
+
+
+def compare_maneuvers(recorded, replayed, tolerance=REPLAY_TOLERANCE):
+    """
+    Diff two maneuver sequences.
+
+    Maneuvers match when they are of the same kind and, for turns, their
+    sizes differ by at most `tolerance` of the larger one. Forward moves
+    are compared by kind only, since a recording made with pipelined moves
+    drives further than the same moves made one at a time.
+
+    Returns:
+        list: Mismatch(index, recorded, replayed) tuples; a missing
+            maneuver is None
+    """
+    mismatches = []
+    for index in range(max(len(recorded), len(replayed))):
+        old = recorded[index] if index < len(recorded) else None
+        new = replayed[index] if index < len(replayed) else None
+        if old is None or new is None or old.kind != new.kind:
+            mismatches.append(Mismatch(index, old, new))
+        elif old.kind in ('left', 'right'):
+            if abs(old.magnitude - new.magnitude) > tolerance * max(old.magnitude, new.magnitude):
+                mismatches.append(Mismatch(index, old, new))
+    return mismatches
+
+
+class ReplayRobot(AutonomousRobot):
+    """AutonomousRobot driven by a telemetry recording."""
+
+    # Light levels come from the recorded camera readings instead
+    camera = None
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Any chunk file of the run, or the run prefix
+        """
+        backend = ReplayBackend(path)
+        super().__init__(backend=backend)
+        self.telemetry = None
+        self.sampler = ReplaySampler(backend)
+        self.maneuvers = ManeuverLog()
+        self._camera = backend.stream('camera')
+        # Runs recorded without a camera read the light sensor instead
+        self._replay_camera = self._camera.peek() is not None
+
+    def set_servo_angle(self, angle):
+        """Set servo angle, at the time it was set in the recording"""
+        timestamp, _ = self.backend.stream('servo').next()
+        self.clock.set(timestamp)
+        super().set_servo_angle(angle)
+
+    def camera_light_levels(self, angles):
+        """Recorded light levels per heading from the camera, or None"""
+        if not self._replay_camera:
+            return None
+        rows = [self._camera.next() for _ in angles]
+        self.clock.set(rows[-1][0])
+        return np.array([level for _, level in rows])
+
+    def move_motor(self, left_speed, right_speed):
+        """Collect a motor command"""
+        self.maneuvers.add(self.clock.now(), left_speed, right_speed)
+
+    def _stop_motors(self):
+        self.maneuvers.add(self.clock.now(), 0.0, 0.0)
+
+
+class ReplayReport:
+    """Outcome of replaying a recording."""
+
+    def __init__(self, path, records, recorded, replayed, mismatches, elapsed):
+        self.path = path
+        self.records = records
+        self.recorded = recorded
+        self.replayed = replayed
+        self.mismatches = mismatches
+        self.elapsed = elapsed
+
+    @property
+    def matched(self):
+        return not self.mismatches
+
+    def summary(self):
+        """Human-readable report, listing the first few mismatches."""
+        rate = self.records / self.elapsed if self.elapsed > 0 else float('inf')
+        lines = [
+            f"Replayed {self.path}: {self.records} records in {self.elapsed:.2f} s ({rate:.0f} records/s)",
+            f"Maneuvers: {len(self.recorded)} recorded, {len(self.replayed)} replayed, "
+            f"{len(self.mismatches)} mismatched",
+        ]
+        for mismatch in self.mismatches[:10]:
+            lines.append(f"  #{mismatch.index}: recorded {_describe(mismatch.recorded)}, "
+                         f"replayed {_describe(mismatch.replayed)}")
+        if len(self.mismatches) > 10:
+            lines.append(f"  ... and {len(self.mismatches) - 10} more")
+        return '\n'.join(lines)
+
+
+def _describe(maneuver):
+    if maneuver is None:
+        return 'nothing'
+    return f"{maneuver.kind} {maneuver.magnitude:.3f} at t={maneuver.start:.2f}"
+
+
+def replay(path, max_cycles=None, tolerance=REPLAY_TOLERANCE, scan_mode=None):
+    """
+    Replay a recording through navigate() and diff the decisions.
+
+    Args:
+        path (str): Any chunk file of the run, or the run prefix
+        max_cycles (int): Only replay this many navigation cycles, and only
+            compare as many maneuvers as they made
+        tolerance (float): Relative difference allowed between turn sizes
+        scan_mode (str): Scan mode of the recording (default: config.SCAN_MODE)
+
+    Returns:
+        ReplayReport: Recorded and replayed maneuvers and their differences
+    """
+    start = time.perf_counter()
+    robot = ReplayRobot(path)
+    if scan_mode is not None:
+        robot.scan_mode = scan_mode
+    try:
+        robot.navigate(max_cycles=max_cycles)
+    except ReplayFinished:
+        pass
+    finally:
+        robot.cleanup()
+    replayed = robot.maneuvers.maneuvers
+
+    recorded = ManeuverLog(robot.maneuvers.deadband)
+    for timestamp, left, right in RecordStream(robot.backend.chunks, 'motors'):
+        recorded.add(timestamp, left, right)
+    recorded = recorded.maneuvers
+    if max_cycles is not None:
+        recorded = recorded[:len(replayed)]
+
+    mismatches = compare_maneuvers(recorded, replayed, tolerance)
+    records = sum(len(load(chunk)) for chunk in robot.backend.chunks)
+    report = ReplayReport(path, records, recorded, replayed, mismatches, time.perf_counter() - start)
+    if mismatches:
+        logger.warning(f"Replay of {path} diverged at maneuver {mismatches[0].index}")
+    return report
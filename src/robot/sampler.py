@@ -0,0 +1,206 @@
+"""
+Background sensor sampling for the autonomous robot.
+
+Each sensor is polled on its own thread at a configurable rate and the
+timestamped readings are written into fixed-size NumPy ring buffers, so the
+control loop can read the latest value without waiting on the I2C/GPIO bus.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from .config import SAMPLE_BUFFER_SIZE, SAMPLE_RATES
+from .logger import logger
+
+
+class RingBuffer:
+    """
+    Fixed-size ring buffer of timestamped samples backed by NumPy arrays.
+
+    The buffer has a single writer (the sampling thread). The write counter is
+    only advanced after a slot has been filled, so readers never take a lock
+    and never see a half-written sample.
+    """
+
+    def __init__(self, capacity=SAMPLE_BUFFER_SIZE):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._times = np.zeros(capacity, dtype=np.float64)
+        self._values = np.zeros(capacity, dtype=np.float64)
+        self._count = 0
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def total(self):
+        """Total number of samples ever written."""
+        return self._count
+
+    def append(self, timestamp, value):
+        """Store a sample, overwriting the oldest one when full."""
+        index = self._count % self.capacity
+        self._times[index] = timestamp
+        self._values[index] = value
+        self._count += 1
+
+    def latest(self):
+        """
+        Get the most recent sample.
+
+        Returns:
+            tuple: (timestamp, value), or None if the buffer is empty
+        """
+        count = self._count
+        if count == 0:
+            return None
+        index = (count - 1) % self.capacity
+        return float(self._times[index]), float(self._values[index])
+
+    def window(self, size=None):
+        """
+        Get the most recent samples in chronological order.
+
+        Args:
+            size (int): Maximum number of samples to return (default: all)
+
+        Returns:
+            tuple: (timestamps, values) as NumPy arrays
+        """
+        count = self._count
+        available = min(count, self.capacity)
+        size = available if size is None else min(size, available)
+        indices = np.arange(count - size, count) % self.capacity
+        times = self._times[indices]
+        values = self._values[indices]
+
+        # Drop any slots the writer overwrote while we were copying
+        overwritten = self._count - count
+        if overwritten:
+            times = times[overwritten:]
+            values = values[overwritten:]
+        return times, values
+
+
+class SensorSampler:
+    """Poll a set of sensors on dedicated threads at per-sensor rates."""
+
+    def __init__(self, sources, rates=None, capacity=SAMPLE_BUFFER_SIZE, clock=time.monotonic):
+        """
+        Args:
+            sources (dict): Sensor name -> zero-argument callable returning a reading
+            rates (dict): Sensor name -> sample rate in Hz (defaults to SAMPLE_RATES)
+            capacity (int): Ring buffer size per sensor
+            clock (callable): Monotonic time source used for timestamps
+        """
+        rates = dict(SAMPLE_RATES if rates is None else rates)
+        self.sources = dict(sources)
+        self.rates = {name: rates.get(name, 10.0) for name in self.sources}
+        self.buffers = {name: RingBuffer(capacity) for name in self.sources}
+        self.errors = {name: 0 for name in self.sources}
+        self.clock = clock
+        self._stop_event = threading.Event()
+        self._threads = []
+        self._started_at = None
+        self._stopped_at = None
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def start(self):
+        """Start one sampling thread per sensor."""
+        if self.running:
+            return
+        self._stop_event.clear()
+        self._started_at = self.clock()
+        self._stopped_at = None
+        self._threads = []
+        for name in self.sources:
+            thread = threading.Thread(
+                target=self._run, args=(name,), name=f"sampler-{name}", daemon=True
+            )
+            self._threads.append(thread)
+            thread.start()
+        logger.info(f"Sensor sampler started ({', '.join(self.sources)})")
+
+    def stop(self, timeout=1.0):
+        """Stop all sampling threads and log the achieved rates."""
+        if not self._threads:
+            return
+        self._stop_event.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._stopped_at = self.clock()
+        self.log_rates()
+
+    def _run(self, name):
+        read = self.sources[name]
+        buffer = self.buffers[name]
+        period = 1.0 / self.rates[name]
+        next_time = self.clock()
+
+        while not self._stop_event.is_set():
+            try:
+                value = read()
+            except Exception as e:
+                self.errors[name] += 1
+                logger.debug(f"Sampler read failed for {name}: {str(e)}")
+            else:
+                buffer.append(self.clock(), value)
+
+            next_time += period
+            delay = next_time - self.clock()
+            if delay < 0:
+                # Fell behind; resynchronise rather than bursting to catch up
+                next_time = self.clock()
+                delay = 0
+            self._stop_event.wait(delay)
+
+    def latest(self, name, max_age=None, since=None):
+        """
+        Get the latest reading for a sensor without blocking.
+
+        Args:
+            name (str): Sensor name
+            max_age (float): Ignore samples older than this many seconds
+            since (float): Ignore samples taken before this clock time
+
+        Returns:
+            float: Latest value, or None if there is no (fresh) sample
+        """
+        sample = self.buffers[name].latest()
+        if sample is None:
+            return None
+        timestamp, value = sample
+        if max_age is not None and self.clock() - timestamp > max_age:
+            return None
+        if since is not None and timestamp < since:
+            return None
+        return value
+
+    def window(self, name, size=None):
+        """Get the most recent (timestamps, values) arrays for a sensor."""
+        return self.buffers[name].window(size)
+
+    def achieved_rate(self, name):
+        """Average sample rate in Hz since the sampler was started."""
+        if self._started_at is None:
+            return 0.0
+        end = self._stopped_at if self._stopped_at is not None else self.clock()
+        elapsed = end - self._started_at
+        if elapsed <= 0:
+            return 0.0
+        return self.buffers[name].total / elapsed
+
+    def log_rates(self):
+        """Log the achieved versus configured rate for every sensor."""
+        for name in self.sources:
+            logger.info(
+                f"Sampler {name}: {self.achieved_rate(name):.1f} Hz "
+                f"(target {self.rates[name]:.1f} Hz, {self.errors[name]} errors)"
+            )
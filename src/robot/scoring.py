@@ -0,0 +1,246 @@
+"""
+Vectorized direction scoring for the autonomous robot.
+
+Scan results are held in contiguous NumPy arrays and every candidate heading
+is scored in a single pass. The score of a heading is its clearance (the
+distance to the nearest obstacle within the robot's footprint, relative to
+the safe distance) reduced by a weighted sum of penalty terms:
+
+    score = clearance * (1 - sum(weight * penalty))
+
+With the default light term only and no footprint dilation this is exactly
+the original ``distance_score * (1 - light_score)`` formula.
+"""
+
+import numpy as np
+
+from .config import (
+    DISTANCE_UNCERTAINTY_WEIGHT,
+    HEADING_CHANGE_WEIGHT,
+    LIGHT_WEIGHT,
+    ROBOT_WIDTH,
+    SAFE_DISTANCE,
+    SCORE_CANDIDATES,
+    TARGET_LIGHT_LEVEL,
+)
+
+
+class ScanResult:
+    """
+    Array-backed scan: one entry per servo angle.
+
+    `variances` optionally holds the variance of each distance, as
+    estimated by the distance filter. `measured` marks the distances that
+    were actually read; the others (angles the map already knew were clear)
+    are stand-ins for scoring only and must not be fed to the map or filters.
+    """
+
+    def __init__(self, angles, distances, light_levels, timestamps=None, variances=None, measured=None):
+        self.angles = np.ascontiguousarray(angles, dtype=np.float64)
+        self.distances = np.ascontiguousarray(distances, dtype=np.float64)
+        self.light_levels = np.ascontiguousarray(light_levels, dtype=np.float64)
+        if timestamps is None:
+            timestamps = np.zeros(len(self.angles))
+        self.timestamps = np.ascontiguousarray(timestamps, dtype=np.float64)
+        if variances is not None:
+            variances = np.ascontiguousarray(variances, dtype=np.float64)
+            if len(variances) != len(self.angles):
+                raise ValueError("scan arrays must all have the same length")
+        self.variances = variances
+        if measured is None:
+            measured = np.ones(len(self.angles), dtype=bool)
+        self.measured = np.asarray(measured, dtype=bool)
+        if not (len(self.angles) == len(self.distances) == len(self.light_levels) == len(self.timestamps)
+                == len(self.measured)):
+            raise ValueError("scan arrays must all have the same length")
+        if np.any(np.diff(self.angles) < 0):
+            order = np.argsort(self.angles, kind='stable')
+            self.angles = self.angles[order]
+            self.distances = self.distances[order]
+            self.light_levels = self.light_levels[order]
+            self.timestamps = self.timestamps[order]
+            self.measured = self.measured[order]
+            if self.variances is not None:
+                self.variances = self.variances[order]
+
+    def __len__(self):
+        return len(self.angles)
+
+    @classmethod
+    def from_pairs(cls, distances, light_levels):
+        """Build a scan from lists of (angle, value) tuples."""
+        angles = [angle for angle, _ in distances]
+        return cls(angles, [d for _, d in distances], [light for _, light in light_levels])
+
+    def distance_pairs(self):
+        """Distances as a list of (angle, distance) tuples."""
+        return list(zip(self.angles.tolist(), self.distances.tolist()))
+
+    def light_pairs(self):
+        """Light levels as a list of (angle, light) tuples."""
+        return list(zip(self.angles.tolist(), self.light_levels.tolist()))
+
+
+class ScoreProfile:
+    """Scores for every candidate heading, plus the per-term breakdown."""
+
+    def __init__(self, headings, scores, clearance, penalties):
+        self.headings = headings
+        self.scores = scores
+        self.clearance = clearance
+        self.penalties = penalties
+        self.best_index = int(np.argmax(scores))
+
+    @property
+    def best_angle(self):
+        return float(self.headings[self.best_index])
+
+    @property
+    def best_score(self):
+        return float(self.scores[self.best_index])
+
+    def best_turn(self, min_angle, side=0):
+        """
+        The best heading at least min_angle degrees off straight ahead: to the
+        right for side 1, the left for -1, either for 0.
+        """
+        offsets = self.headings * side if side else np.abs(self.headings)
+        turning = offsets >= min_angle
+        if not turning.any():
+            return self.best_angle
+        return float(self.headings[turning][np.argmax(self.scores[turning])])
+
+
+def light_error(headings, scan, scorer):
+    """Penalty for deviating from the target light level."""
+    light = np.interp(headings, scan.angles, scan.light_levels)
+    return np.abs(light - scorer.target_light_level)
+
+
+def heading_change(headings, scan, scorer):
+    """Penalty for turning away from the current heading, 0 to 1."""
+    half_range = max(np.max(np.abs(scan.angles)), 1e-9)
+    return np.abs(headings) / half_range
+
+
+def distance_uncertainty(headings, scan, scorer):
+    """Penalty for headings whose distance is uncertain, 0 to 1 (0 without variances)."""
+    if scan.variances is None:
+        return np.zeros_like(headings)
+    # Unknown (infinite) variances get the full penalty
+    limit = scorer.safe_distance ** 2
+    variances = np.where(np.isfinite(scan.variances), np.minimum(scan.variances, limit), limit)
+    deviation = np.sqrt(np.interp(headings, scan.angles, variances))
+    return deviation / scorer.safe_distance
+
+
+def interval_min(lo, hi, values, size):
+    """
+    For each index in range(size), the minimum value whose [lo, hi) covers it.
+
+    Each interval is split into two overlapping power-of-two blocks recorded
+    in a sparse table, which is then pushed down level by level. This takes
+    O((size + len(values)) * log(size)) vectorized work instead of comparing
+    every index against every interval.
+    """
+    result = np.full(size, np.inf)
+    valid = hi > lo
+    if size == 0 or not valid.any():
+        return result
+    lo, hi, values = lo[valid], hi[valid], values[valid]
+
+    lengths = hi - lo
+    levels = np.floor(np.log2(lengths)).astype(np.intp)
+    table = np.full((int(levels.max()) + 1, size), np.inf)
+    np.minimum.at(table, (levels, lo), values)
+    np.minimum.at(table, (levels, hi - (1 << levels)), values)
+
+    for level in range(len(table) - 1, 0, -1):
+        half = 1 << (level - 1)
+        np.minimum(table[level - 1], table[level], out=table[level - 1])
+        np.minimum(table[level - 1][half:], table[level][:-half], out=table[level - 1][half:])
+    return table[0]
+
+
+class DirectionScorer:
+    """Score candidate headings from a scan in one vectorized pass."""
+
+    def __init__(self, safe_distance=SAFE_DISTANCE, target_light_level=TARGET_LIGHT_LEVEL,
+                 robot_width=ROBOT_WIDTH, candidates=SCORE_CANDIDATES,
+                 light_weight=LIGHT_WEIGHT, heading_weight=HEADING_CHANGE_WEIGHT,
+                 uncertainty_weight=DISTANCE_UNCERTAINTY_WEIGHT):
+        """
+        Args:
+            safe_distance (float): Distance (cm) at which clearance saturates
+            target_light_level (float): Light level the robot steers towards
+            robot_width (float): Robot width (cm) used to dilate obstacles; 0 disables
+            candidates (int): Number of headings to score; None scores the scan angles
+            light_weight (float): Weight of the light error penalty
+            heading_weight (float): Weight of the heading change penalty
+            uncertainty_weight (float): Weight of the distance uncertainty penalty
+        """
+        self.safe_distance = safe_distance
+        self.target_light_level = target_light_level
+        self.robot_width = robot_width
+        self.candidates = candidates
+        self.terms = {}
+        self.add_term('light', light_error, light_weight)
+        self.add_term('heading', heading_change, heading_weight)
+        self.add_term('uncertainty', distance_uncertainty, uncertainty_weight)
+
+    def add_term(self, name, penalty, weight=1.0):
+        """
+        Register (or replace) a penalty term.
+
+        Args:
+            name (str): Term name, used as the key in ScoreProfile.penalties
+            penalty (callable): f(headings, scan, scorer) -> array of penalties
+            weight (float): Multiplier applied to the penalty
+        """
+        self.terms[name] = (penalty, weight)
+
+    def remove_term(self, name):
+        """Remove a penalty term if present."""
+        self.terms.pop(name, None)
+
+    def headings(self, scan):
+        """Candidate headings spanning the scanned range."""
+        if not self.candidates:
+            return scan.angles.copy()
+        return np.linspace(scan.angles.min(), scan.angles.max(), self.candidates)
+
+    def clearance(self, headings, scan):
+        """Clearance of each heading, with obstacles dilated by the robot footprint."""
+        effective = np.interp(headings, scan.angles, scan.distances)
+        if self.robot_width > 0:
+            # Angular half-width an obstacle at distance d covers for our body
+            distances = np.maximum(scan.distances, 1e-6)
+            half_width = np.degrees(np.arctan2(self.robot_width / 2, distances))
+            lo = np.searchsorted(headings, scan.angles - half_width, side='left')
+            hi = np.searchsorted(headings, scan.angles + half_width, side='right')
+            footprint = interval_min(lo, hi, scan.distances, len(headings))
+            effective = np.minimum(effective, footprint)
+        return np.minimum(effective / self.safe_distance, 1.0)
+
+    def score(self, scan):
+        """
+        Score every candidate heading.
+
+        Args:
+            scan (ScanResult): Scan to score
+
+        Returns:
+            ScoreProfile: Full score profile
+        """
+        headings = self.headings(scan)
+        clearance = self.clearance(headings, scan)
+        penalties = {}
+        total_penalty = np.zeros_like(headings)
+        for name, (penalty, weight) in self.terms.items():
+            if weight == 0:
+                continue
+            values = penalty(headings, scan, self)
+            penalties[name] = values
+            total_penalty += weight * values
+        scores = clearance * (1 - total_penalty)
+        return ScoreProfile(headings, scores, clearance, penalties)
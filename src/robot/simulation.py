@@ -0,0 +1,521 @@
+"""
+Simulated hardware backend for the autonomous robot.
+
+A SimulatedWorld holds a 2D room with obstacles and a light source, the
+robot's true pose, and the state of its motors and servo. Every device read
+or command first brings the world up to the current clock time, integrating
+the differential-drive motion in small steps and stopping the robot when it
+would hit something.
+
+With a VirtualClock, sleeping only advances a counter, so navigation runs as
+fast as the CPU allows. Device reads also advance the clock by a small bus
+latency, which keeps busy-wait loops (such as the servo sweep) finite.
+
+Room coordinates are in cm with x to the right and y downwards; headings are
+in degrees, positive clockwise, matching the robot's turn() convention.
+"""
+
+import math
+import random
+import threading
+
+import numpy as np
+
+from .config import (
+    CAMERA_FOV,
+    GRID_MAX_RANGE,
+    ROBOT_WIDTH,
+    SERVO_SWEEP_SPEED,
+    SIM_BATTERY_DRAIN,
+    SIM_DISTANCE_NOISE,
+    SIM_LIGHT_NOISE,
+    SIM_OUTLIER_PROBABILITY,
+    SIM_READ_LATENCY,
+    SIM_SOUND_NOISE,
+    SIM_ULTRASONIC_CONE,
+    SIM_WHEEL_BASE,
+    SIM_WHEEL_GAIN_ERROR,
+    SIM_WHEEL_SLIP,
+    WHEEL_SPEED,
+)
+from .hardware import Backend
+
+PHYSICS_STEP = 0.02  # seconds
+
+
+class VirtualClock:
+    """Simulated time that only advances when someone sleeps."""
+
+    realtime = False
+
+    def __init__(self, start=0.0):
+        self._now = start
+
+    def now(self):
+        return self._now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self._now += seconds
+
+    advance = sleep
+
+
+class CircleObstacle:
+    """Round obstacle such as a chair or table leg."""
+
+    def __init__(self, x, y, radius):
+        self.x, self.y, self.radius = x, y, radius
+
+    def ray_distance(self, ox, oy, dx, dy):
+        # Solve |o + t*d - c| = r for the nearest t >= 0
+        fx, fy = ox - self.x, oy - self.y
+        b = fx * dx + fy * dy
+        c = fx * fx + fy * fy - self.radius * self.radius
+        disc = b * b - c
+        if disc < 0:
+            return math.inf
+        root = math.sqrt(disc)
+        t = -b - root
+        if t < 0:
+            t = -b + root
+        return t if t >= 0 else math.inf
+
+    def distance_to(self, x, y):
+        return math.hypot(x - self.x, y - self.y) - self.radius
+
+
+class RectObstacle:
+    """Axis-aligned box such as a sofa or a cupboard."""
+
+    def __init__(self, x0, y0, x1, y1):
+        self.x0, self.y0 = min(x0, x1), min(y0, y1)
+        self.x1, self.y1 = max(x0, x1), max(y0, y1)
+
+    def ray_distance(self, ox, oy, dx, dy):
+        # Slab intersection
+        t_near, t_far = -math.inf, math.inf
+        for origin, direction, low, high in ((ox, dx, self.x0, self.x1), (oy, dy, self.y0, self.y1)):
+            if abs(direction) < 1e-12:
+                if origin < low or origin > high:
+                    return math.inf
+                continue
+            t1 = (low - origin) / direction
+            t2 = (high - origin) / direction
+            if t1 > t2:
+                t1, t2 = t2, t1
+            t_near = max(t_near, t1)
+            t_far = min(t_far, t2)
+            if t_near > t_far:
+                return math.inf
+        if t_far < 0:
+            return math.inf
+        return max(t_near, 0.0)
+
+    def distance_to(self, x, y):
+        dx = max(self.x0 - x, 0.0, x - self.x1)
+        dy = max(self.y0 - y, 0.0, y - self.y1)
+        return math.hypot(dx, dy)
+
+
+class Room:
+    """Rectangular room with obstacles, a light source and a start/goal."""
+
+    def __init__(self, width=400, height=300, obstacles=(), light=None, light_intensity=1.0,
+                 start=None, goal=None, sound_events=()):
+        """
+        Args:
+            width (float): Room size along x in cm
+            height (float): Room size along y in cm
+            obstacles (iterable): CircleObstacle / RectObstacle instances
+            light (tuple): (x, y) of the light source; defaults to the far wall
+            light_intensity (float): Light reading at 1 m from the source
+            start (tuple): Robot start pose (x, y, heading)
+            goal (tuple): (x, y) the robot should reach
+            sound_events (iterable): (start_time, end_time) of loud noises
+        """
+        self.width = width
+        self.height = height
+        self.obstacles = list(obstacles)
+        self.light = light if light is not None else (width, height / 2)
+        self.light_intensity = light_intensity
+        self.start = start if start is not None else (30.0, height / 2, 0.0)
+        self.goal = goal if goal is not None else (width - 30.0, height / 2)
+        self.sound_events = list(sound_events)
+
+    def ray_distance(self, x, y, theta, max_range=math.inf):
+        """Distance from (x, y) along heading theta (radians) to the first surface."""
+        dx, dy = math.cos(theta), math.sin(theta)
+        # Walls
+        best = math.inf
+        if dx > 1e-12:
+            best = min(best, (self.width - x) / dx)
+        elif dx < -1e-12:
+            best = min(best, -x / dx)
+        if dy > 1e-12:
+            best = min(best, (self.height - y) / dy)
+        elif dy < -1e-12:
+            best = min(best, -y / dy)
+        for obstacle in self.obstacles:
+            distance = obstacle.ray_distance(x, y, dx, dy)
+            if distance < best:
+                best = distance
+        return min(max(best, 0.0), max_range)
+
+    def clearance(self, x, y):
+        """Distance from (x, y) to the nearest wall or obstacle."""
+        best = min(x, y, self.width - x, self.height - y)
+        for obstacle in self.obstacles:
+            best = min(best, obstacle.distance_to(x, y))
+        return best
+
+    def light_level(self, x, y, theta):
+        """
+        Reading of a forward-facing light sensor at (x, y) pointing along theta.
+
+        theta may be an array of headings (radians), giving an array of readings.
+        """
+        lx, ly = self.light
+        distance = max(math.hypot(lx - x, ly - y), 1.0)
+        if np.ndim(theta):
+            facing = np.maximum(np.cos(math.atan2(ly - y, lx - x) - np.asarray(theta)), 0.0)
+            return np.minimum(self.light_intensity * facing / (1.0 + (distance / 100.0) ** 2) * 2.0, 1.0)
+        facing = max(math.cos(math.atan2(ly - y, lx - x) - theta), 0.0)
+        return min(self.light_intensity * facing / (1.0 + (distance / 100.0) ** 2) * 2.0, 1.0)
+
+
+def _connected(room, start, goal, margin, resolution=10.0):
+    """Whether a disc of radius margin can move from start to goal on a coarse grid."""
+    columns, rows = int(room.width // resolution), int(room.height // resolution)
+
+    def cell(point):
+        return (min(int(point[0] // resolution), columns - 1), min(int(point[1] // resolution), rows - 1))
+
+    def free(i, j):
+        return room.clearance((i + 0.5) * resolution, (j + 0.5) * resolution) >= margin
+
+    start, goal = cell(start), cell(goal)
+    seen = {start}
+    frontier = [start]
+    while frontier:
+        i, j = frontier.pop()
+        if (i, j) == goal:
+            return True
+        for neighbour in ((i + 1, j), (i - 1, j), (i, j + 1), (i, j - 1)):
+            if (neighbour not in seen and 0 <= neighbour[0] < columns and 0 <= neighbour[1] < rows
+                    and free(*neighbour)):
+                seen.add(neighbour)
+                frontier.append(neighbour)
+    return False
+
+
+def random_room(seed, width=(300, 600), height=(200, 400), obstacles=(3, 8), clear=40.0, attempts=100):
+    """
+    Random room with obstacles between the start and the goal, such that the
+    goal can be reached.
+
+    Start, goal and light are where Room puts them by default: the robot
+    starts at the middle of the left wall facing the goal, which lies in front
+    of the light on the right wall.
+
+    The room depends only on the seed, so the same seeds give the same rooms
+    across runs, processes and code changes.
+
+    Args:
+        seed (int): Layout seed
+        width (tuple): (min, max) room size along x in cm
+        height (tuple): (min, max) room size along y in cm
+        obstacles (tuple): (min, max) number of obstacles
+        clear (float): cm kept free of obstacles around the start and goal
+        attempts (int): Layouts to try before settling for an empty room
+
+    Returns:
+        Room: Random room
+    """
+    rng = random.Random(seed)
+    room_width = rng.uniform(*width)
+    room_height = rng.uniform(*height)
+    room = Room(room_width, room_height)
+    margin = ROBOT_WIDTH / 2 + 2.0
+
+    for _ in range(attempts):
+        placed = []
+        for _ in range(rng.randint(*obstacles)):
+            if rng.random() < 0.5:
+                candidate = CircleObstacle(rng.uniform(0, room_width), rng.uniform(0, room_height), rng.uniform(10, 30))
+            else:
+                x, y = rng.uniform(0, room_width), rng.uniform(0, room_height)
+                candidate = RectObstacle(x, y, x + rng.uniform(15, 80), y + rng.uniform(15, 80))
+            if min(candidate.distance_to(*room.start[:2]), candidate.distance_to(*room.goal)) > clear:
+                placed.append(candidate)
+        room.obstacles = placed
+        if _connected(room, room.start[:2], room.goal, margin):
+            return room
+    room.obstacles = []
+    return room
+
+
+class SimulatedWorld:
+    """Ground truth for one simulated robot in a room."""
+
+    def __init__(self, room=None, clock=None, seed=0, wheel_base=SIM_WHEEL_BASE,
+                 wheel_speed=WHEEL_SPEED, robot_radius=ROBOT_WIDTH / 2):
+        self.room = room or Room()
+        self.clock = clock or VirtualClock()
+        self.rng = random.Random(seed)
+        self.wheel_base = wheel_base
+        self.wheel_speed = wheel_speed
+        self.robot_radius = robot_radius
+
+        self.x, self.y, self.heading = self.room.start
+        self.left_speed = 0.0
+        self.right_speed = 0.0
+        self.servo_angle = 0.0
+        self.servo_target = 0.0
+        self.battery = 100.0
+        self.collisions = 0
+        self.distance_travelled = 0.0
+        self.stop_times = []
+        self._last_update = self.clock.now()
+        self._colliding = False
+        # Motors never quite match: each wheel runs a little fast or slow for
+        # the whole run, and slips by a random amount at every start
+        self.wheel_gains = [1.0, 1.0]
+        if SIM_WHEEL_GAIN_ERROR:
+            self.wheel_gains = [1.0 + self.rng.gauss(0, SIM_WHEEL_GAIN_ERROR) for _ in range(2)]
+        self._slip = [1.0, 1.0]
+        # Devices may be read from sampler or watchdog threads
+        self.lock = threading.RLock()
+
+    @property
+    def pose(self):
+        return self.x, self.y, self.heading
+
+    def distance_to_goal(self):
+        gx, gy = self.room.goal
+        return math.hypot(gx - self.x, gy - self.y)
+
+    def update(self):
+        """Integrate motion, servo and battery up to the current clock time."""
+        with self.lock:
+            self._update()
+
+    def set_motor(self, side, speed):
+        """Set one wheel's speed, recording when the robot comes to a stop."""
+        with self.lock:
+            self._update()
+            moving = self.left_speed != 0 or self.right_speed != 0
+            if not moving and speed != 0 and SIM_WHEEL_SLIP:
+                self._slip = [1.0 + self.rng.gauss(0, SIM_WHEEL_SLIP) for _ in range(2)]
+            if side == 'left':
+                self.left_speed = speed
+            else:
+                self.right_speed = speed
+            if moving and self.left_speed == 0 and self.right_speed == 0:
+                self.stop_times.append(self.clock.now())
+
+    def _update(self):
+        now = self.clock.now()
+        elapsed = now - self._last_update
+        if elapsed <= 0:
+            return
+        self._last_update = now
+
+        # Servo slews towards its target at a fixed speed
+        step = SERVO_SWEEP_SPEED * elapsed
+        delta = self.servo_target - self.servo_angle
+        self.servo_angle = self.servo_target if abs(delta) <= step else self.servo_angle + math.copysign(step, delta)
+
+        self.battery = max(self.battery - SIM_BATTERY_DRAIN * elapsed, 0.0)
+
+        if self.left_speed == 0 and self.right_speed == 0:
+            return
+        left = self.left_speed * self.wheel_gains[0] * self._slip[0]
+        right = self.right_speed * self.wheel_gains[1] * self._slip[1]
+        velocity = self.wheel_speed * (left + right) / 2
+        omega = math.degrees(self.wheel_speed * (left - right) / self.wheel_base)
+        while elapsed > 0:
+            dt = min(elapsed, PHYSICS_STEP)
+            elapsed -= dt
+            heading = self.heading + omega * dt
+            theta = math.radians((self.heading + heading) / 2)
+            x = self.x + velocity * dt * math.cos(theta)
+            y = self.y + velocity * dt * math.sin(theta)
+            clearance = self.room.clearance(x, y)
+            if velocity and clearance < self.robot_radius and clearance < self.room.clearance(self.x, self.y):
+                # Bumped into something: the wheels spin but the robot stays put
+                if not self._colliding:
+                    self.collisions += 1
+                    self._colliding = True
+                self.heading = (heading + 180) % 360 - 180
+                continue
+            if clearance > self.robot_radius + 1.0:
+                # Only count a new bump once the robot has pulled clear
+                self._colliding = False
+            self.distance_travelled += math.hypot(x - self.x, y - self.y)
+            self.x, self.y = x, y
+            self.heading = (heading + 180) % 360 - 180
+
+    def read(self, latency_key):
+        """Account for the bus latency of a device read, then update the world."""
+        self.clock.sleep(SIM_READ_LATENCY.get(latency_key, 0.0))
+        self.update()
+
+    def sound_level(self):
+        now = self.clock.now()
+        for start, end in self.room.sound_events:
+            if start <= now < end:
+                return 1.0
+        return min(max(self.rng.gauss(0.1, SIM_SOUND_NOISE), 0.0), 1.0)
+
+
+class SimMotor:
+    def __init__(self, world, side):
+        self.world = world
+        self.side = side
+
+    def forward(self, speed):
+        self.world.set_motor(self.side, max(min(speed, 1.0), -1.0))
+
+    def stop(self):
+        self.forward(0.0)
+
+
+class SimDisplay:
+    brightness = 100
+    timeout = 300
+
+
+class SimPitop:
+    def __init__(self, world):
+        self.left_motor = SimMotor(world, 'left')
+        self.right_motor = SimMotor(world, 'right')
+        self.display = SimDisplay()
+
+
+class SimUltrasonic:
+    def __init__(self, world, max_range=GRID_MAX_RANGE * 1.5):
+        self.world = world
+        self.max_range = max_range
+
+    @property
+    def distance(self):
+        world = self.world
+        world.read('distance')
+        if world.rng.random() < SIM_OUTLIER_PROBABILITY:
+            return world.rng.uniform(0, self.max_range)
+        # The echo comes back from the nearest surface within the beam cone
+        direction = world.heading + world.servo_angle
+        half_cone = SIM_ULTRASONIC_CONE / 2
+        true = min(
+            world.room.ray_distance(world.x, world.y, math.radians(direction + offset), self.max_range)
+            for offset in (-half_cone, 0.0, half_cone)
+        )
+        return min(max(true + world.rng.gauss(0, SIM_DISTANCE_NOISE), 0.0), self.max_range)
+
+
+class SimServo:
+    def __init__(self, world):
+        self.world = world
+
+    @property
+    def angle(self):
+        self.world.update()
+        return self.world.servo_angle
+
+    @angle.setter
+    def angle(self, value):
+        self.world.update()
+        self.world.servo_target = max(min(value, 90.0), -90.0)
+
+
+class SimLightSensor:
+    def __init__(self, world):
+        self.world = world
+
+    @property
+    def reading(self):
+        world = self.world
+        world.read('light')
+        theta = math.radians(world.heading + world.servo_angle)
+        level = world.room.light_level(world.x, world.y, theta)
+        return min(max(level + world.rng.gauss(0, SIM_LIGHT_NOISE), 0.0), 1.0)
+
+
+class SimSoundSensor:
+    def __init__(self, world):
+        self.world = world
+
+    @property
+    def reading(self):
+        self.world.read('sound')
+        return self.world.sound_level()
+
+
+class SimBattery:
+    def __init__(self, world):
+        self.world = world
+
+    @property
+    def percentage(self):
+        self.world.read('battery')
+        return int(self.world.battery)
+
+
+class SimCamera:
+    """Grayscale-ish frames whose columns follow the light seen along each bearing."""
+
+    horizontal_fov = CAMERA_FOV
+
+    def __init__(self, world, resolution=(160, 120), framerate=30):
+        self.world = world
+        self.resolution = resolution
+        self.framerate = framerate
+        self._noise = np.random.default_rng(world.rng.randrange(2 ** 32))
+
+    def get_frame(self):
+        world = self.world
+        world.read('camera')
+        width, height = self.resolution
+        offsets = (np.arange(width) + 0.5) / width * self.horizontal_fov - self.horizontal_fov / 2
+        columns = world.room.light_level(world.x, world.y, np.radians(world.heading + offsets))
+        noise = self._noise.normal(0, SIM_LIGHT_NOISE, width)
+        row = np.clip((columns + noise) * 255, 0, 255).astype(np.uint8)
+        frame = np.empty((height, width, 3), dtype=np.uint8)
+        frame[:] = np.repeat(row, 3).reshape(width, 3)
+        return frame
+
+
+class SimulatedBackend(Backend):
+    """Backend whose devices live in a SimulatedWorld."""
+
+    def __init__(self, room=None, clock=None, seed=0):
+        """
+        Args:
+            room (Room): Room to drive in (default: empty 4 m x 3 m room)
+            clock: VirtualClock (default) or RealClock for real-time runs
+            seed (int): Seed for sensor noise
+        """
+        self.world = SimulatedWorld(room, clock, seed)
+        self.clock = self.world.clock
+
+    def create_pitop(self):
+        return SimPitop(self.world)
+
+    def create_ultrasonic(self, port):
+        return SimUltrasonic(self.world)
+
+    def create_servo(self, port):
+        return SimServo(self.world)
+
+    def create_light_sensor(self, port):
+        return SimLightSensor(self.world)
+
+    def create_sound_sensor(self, port):
+        return SimSoundSensor(self.world)
+
+    def create_camera(self, resolution, framerate):
+        return SimCamera(self.world, resolution, framerate)
+
+    def create_battery(self):
+        return SimBattery(self.world)
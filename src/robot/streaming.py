@@ -0,0 +1,469 @@
+"""
+Live telemetry streaming to a ground station over UDP.
+
+A TelemetryPublisher on the robot sends one compact binary frame per
+navigation cycle: the pose, the last motor command, the latest scan arrays,
+the find_best_direction() score profile and the loop timings. A
+GroundStation receives the frames of any number of robots on one UDP port
+and keeps the latest frame and link statistics of each:
+
+    robot:   python -m robot.cli navigate --stream ground.local
+    ground:  python -m robot.cli ground
+
+The control loop never waits on the network. publish() only packs the frame
+(a few microseconds) and appends it to a short queue; a sender thread sends
+it from there on a non-blocking socket. When the queue is full the oldest
+frame is dropped, since the newest state is what the ground station wants,
+and a send the socket cannot take right away is dropped too. Either halves
+the publishing rate (down to STREAM_MIN_RATE) and every frame delivered
+raises it by 10% again (up to STREAM_RATE), so a slow link is sent fewer
+frames rather than stale ones. Cycles faster than the current rate are
+skipped, not queued.
+
+A frame is at most STREAM_MAX_FRAME bytes, one Ethernet packet, so it is
+never fragmented. Scans with more bins than fit are decimated (every k-th
+bin, flagged in the frame); the best heading and score are always sent in
+the header.
+
+Frame layout, little-endian:
+
+    header   magic 'RS', version, flags, robot id (16 bytes), sequence,
+             robot time (f64), frames dropped so far, pose x, y, heading,
+             motors left, right, loop period, best angle, best score,
+             scan bins n, score headings m, stages s
+    scan     angles, distances, light levels: n float32 each
+    scores   headings, scores: m float32 each
+    stages   s x (stage code, seconds float32), see STAGES
+"""
+
+import os
+import select
+import socket
+import struct
+import threading
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+from .config import (
+    STREAM_ADDRESS,
+    STREAM_MAX_FRAME,
+    STREAM_MIN_RATE,
+    STREAM_PORT,
+    STREAM_QUEUE,
+    STREAM_RATE,
+    STREAM_ROBOT_ID,
+    STREAM_STALE,
+)
+from .logger import logger
+
+MAGIC = b'RS'
+VERSION = 1
+DECIMATED = 0x01  # flags bit: scan and scores were decimated to fit the frame
+REORDER_WINDOW = 64  # a sequence number further back than this is a restarted robot
+# Loop stage names by code; stages not listed here are not sent
+STAGES = ('battery', 'scan', 'score', 'sound', 'motion', 'sleep', 'plan')
+_STAGE_CODES = {name: code for code, name in enumerate(STAGES)}
+
+_HEADER = struct.Struct('<2sBB16sIdI8fHHB')
+_STAGE = struct.Struct('<Bf')
+
+Frame = namedtuple('Frame', [
+    'robot', 'seq', 'time', 'dropped', 'pose', 'motors', 'period', 'best_angle', 'best_score',
+    'angles', 'distances', 'light_levels', 'headings', 'scores', 'stages', 'decimated',
+])
+
+
+def stream_address():
+    """Ground station address from ROBOT_STREAM or config; None if disabled."""
+    return os.environ.get('ROBOT_STREAM', STREAM_ADDRESS) or None
+
+
+def parse_address(address, port=STREAM_PORT):
+    """(host, port) from 'host[:port]' or a (host, port) tuple."""
+    if isinstance(address, tuple):
+        return address
+    if address.count(':') == 1:
+        address, port = address.split(':')
+    return address, int(port)
+
+
+def _array(values):
+    if values is None:
+        return np.zeros(0, dtype='<f4')
+    return np.asarray(values, dtype='<f4')
+
+
+def encode_frame(frame, max_size=STREAM_MAX_FRAME):
+    """
+    Pack a Frame, decimating its arrays until it fits max_size bytes.
+
+    The arrays may be None; `decimated` is set by this function.
+
+    Returns:
+        bytes: The datagram
+    """
+    scan = [_array(frame.angles), _array(frame.distances), _array(frame.light_levels)]
+    scores = [_array(frame.headings), _array(frame.scores)]
+    stages = [(_STAGE_CODES[name], seconds) for name, seconds in frame.stages.items()
+              if name in _STAGE_CODES and seconds is not None]
+    room = max_size - _HEADER.size - _STAGE.size * len(stages)
+    n, m = len(scan[0]), len(scores[0])
+    step = 1
+    while 12 * -(-n // step) + 8 * -(-m // step) > room:
+        step += 1
+        if step > max(n, m, 1):
+            raise ValueError(f"a frame does not fit in {max_size} bytes")
+    if step > 1:
+        scan = [values[::step] for values in scan]
+        scores = [values[::step] for values in scores]
+    header = _HEADER.pack(
+        MAGIC, VERSION, DECIMATED if step > 1 else 0, frame.robot.encode()[:16], frame.seq, frame.time,
+        frame.dropped, *frame.pose, *frame.motors, frame.period, frame.best_angle, frame.best_score,
+        len(scan[0]), len(scores[0]), len(stages),
+    )
+    parts = [header] + [values.tobytes() for values in scan + scores]
+    parts += [_STAGE.pack(code, seconds) for code, seconds in stages]
+    return b''.join(parts)
+
+
+def decode_frame(data):
+    """
+    Unpack a datagram written by encode_frame().
+
+    Raises:
+        ValueError: If it is not a complete frame of this version
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError(f"frame too short ({len(data)} bytes)")
+    (magic, version, flags, robot, seq, timestamp, dropped, x, y, heading, left, right, period,
+     best_angle, best_score, n, m, s) = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a version {VERSION} telemetry frame")
+    if len(data) != _HEADER.size + 12 * n + 8 * m + _STAGE.size * s:
+        raise ValueError(f"frame of {len(data)} bytes does not match its counts")
+    arrays = []
+    offset = _HEADER.size
+    for count in (n, n, n, m, m):
+        arrays.append(np.frombuffer(data, dtype='<f4', count=count, offset=offset))
+        offset += 4 * count
+    stages = {}
+    for _ in range(s):
+        code, seconds = _STAGE.unpack_from(data, offset)
+        offset += _STAGE.size
+        if code < len(STAGES):
+            stages[STAGES[code]] = seconds
+    return Frame(robot.rstrip(b'\0').decode(errors='replace'), seq, timestamp, dropped, (x, y, heading),
+                 (left, right), period, best_angle, best_score, *arrays, stages, bool(flags & DECIMATED))
+
+
+class TelemetryPublisher:
+    """Sends navigation frames to a ground station without ever blocking the caller."""
+
+    def __init__(self, address, robot_id=None, rate=STREAM_RATE, min_rate=STREAM_MIN_RATE,
+                 queue_size=STREAM_QUEUE, max_frame=STREAM_MAX_FRAME, clock=time.monotonic, start=True):
+        """
+        Args:
+            address: Ground station 'host[:port]' or (host, port)
+            robot_id (str): Name in the frames (default: STREAM_ROBOT_ID or the host name)
+            rate (float): Frames per second at most
+            min_rate (float): Frames per second the rate backs off to at worst
+            queue_size (int): Frames waiting to be sent before the oldest is dropped
+            max_frame (int): Datagram size limit in bytes
+            clock (callable): Robot clock for the frame times and the rate
+            start (bool): Start the sender thread now (see start())
+        """
+        host, port = parse_address(address)
+        # Resolved once here, so the sender never waits on DNS
+        self.address = socket.getaddrinfo(host, port, socket.AF_INET, socket.SOCK_DGRAM)[0][4]
+        self.robot_id = robot_id or STREAM_ROBOT_ID or socket.gethostname()
+        self.min_interval = 1.0 / rate
+        self.max_interval = 1.0 / min_rate
+        self.interval = self.min_interval
+        self.max_frame = max_frame
+        self.clock = clock
+        self.seq = 0
+        self.sent = 0
+        self.bytes = 0
+        self.dropped = 0  # queue overflows and sends the socket refused
+        self.skipped = 0  # cycles not published because of the rate
+        self._queue = deque(maxlen=queue_size)
+        self._ready = threading.Condition()
+        self._stopping = False
+        self._thread = None
+        self._last_cycle = None
+        self._last_publish = None
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setblocking(False)
+        if start:
+            self.start()
+
+    def start(self):
+        """Start the sender thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='telemetry-stream', daemon=True)
+        self._thread.start()
+        logger.info(f"Streaming telemetry to {self.address[0]}:{self.address[1]} as {self.robot_id}")
+
+    def _back_off(self):
+        self.interval = min(self.interval * 2, self.max_interval)
+
+    def publish(self, pose, motors, scan=None, profile=None, stages=None):
+        """
+        Queue a frame for this cycle, unless the current rate skips it.
+
+        Call once per loop iteration; the loop period is measured between calls.
+
+        Args:
+            pose (tuple): (x cm, y cm, heading degrees)
+            motors (tuple): Last (left, right) motor command
+            scan (ScanResult): Latest scan
+            profile (ScoreProfile): Latest find_best_direction() scores
+            stages (dict): Stage name -> seconds of this cycle (LoopProfiler.last_stages())
+
+        Returns:
+            bool: Whether a frame was queued
+        """
+        now = self.clock()
+        period = 0.0 if self._last_cycle is None else now - self._last_cycle
+        self._last_cycle = now
+        if self._last_publish is not None and now - self._last_publish < self.interval:
+            self.skipped += 1
+            return False
+        self._last_publish = now
+        frame = Frame(
+            self.robot_id, self.seq, now, self.dropped, pose, motors, period,
+            profile.best_angle if profile is not None else 0.0,
+            profile.best_score if profile is not None else 0.0,
+            scan.angles if scan is not None else None,
+            scan.distances if scan is not None else None,
+            scan.light_levels if scan is not None else None,
+            profile.headings if profile is not None else None,
+            profile.scores if profile is not None else None,
+            stages or {}, False,
+        )
+        data = encode_frame(frame, self.max_frame)
+        self.seq += 1
+        with self._ready:
+            if len(self._queue) == self._queue.maxlen:
+                # The deque drops the oldest frame on append
+                self.dropped += 1
+                self._back_off()
+            self._queue.append(data)
+            self._ready.notify()
+        return True
+
+    def _run(self):
+        while True:
+            with self._ready:
+                while not self._queue and not self._stopping:
+                    self._ready.wait()
+                if not self._queue:
+                    return
+                data = self._queue.popleft()
+                backlog = len(self._queue)
+            try:
+                self._socket.sendto(data, self.address)
+            except OSError as e:
+                # EAGAIN/ENOBUFS on a full socket buffer, or an unreachable network
+                self.dropped += 1
+                self._back_off()
+                logger.debug(f"Telemetry frame dropped: {str(e)}")
+                continue
+            self.sent += 1
+            self.bytes += len(data)
+            if not backlog:
+                self.interval = max(self.interval / 1.1, self.min_interval)
+
+    def close(self, timeout=1.0):
+        """Send what is queued, then stop the sender thread and close the socket."""
+        with self._ready:
+            self._stopping = True
+            self._ready.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._socket.close()
+        logger.info(f"Streamed {self.sent} telemetry frames ({self.bytes / 1024:.1f} KiB), "
+                    f"{self.dropped} dropped, {self.skipped} cycles skipped")
+
+
+class RobotTrack:
+    """Latest frame and link statistics of one robot seen by the ground station."""
+
+    def __init__(self, robot, address, now):
+        self.robot = robot
+        self.reset(address, now)
+
+    def reset(self, address, now):
+        self.address = address
+        self.frame = None
+        self.frames = 0
+        self.lost = 0  # sequence numbers never received
+        self.late = 0  # frames older than one already received, ignored
+        self.bytes = 0
+        self.first_seen = now
+        self.last_seen = now
+
+    @property
+    def rate(self):
+        """Frames per second received, None before two frames."""
+        elapsed = self.last_seen - self.first_seen
+        return (self.frames - 1) / elapsed if self.frames > 1 and elapsed > 0 else None
+
+    def update(self, frame, address, size, now):
+        """Take a frame; returns False if it is older than the current one."""
+        last = self.frame
+        if last is not None and frame.seq <= last.seq:
+            if frame.seq == 0 or last.seq - frame.seq > REORDER_WINDOW:
+                logger.info(f"Robot {self.robot} restarted")
+                self.reset(address, now)
+                last = None
+            else:
+                self.late += 1
+                return False
+        if last is not None:
+            self.lost += frame.seq - last.seq - 1
+        self.frame = frame
+        self.address = address
+        self.frames += 1
+        self.bytes += size
+        self.last_seen = now
+        return True
+
+
+class GroundStation:
+    """Receives telemetry frames from several robots on one UDP port."""
+
+    def __init__(self, host='0.0.0.0', port=STREAM_PORT, clock=time.monotonic, stale=STREAM_STALE):
+        """
+        Args:
+            host (str): Address to listen on
+            port (int): UDP port; 0 picks a free one (see `address`)
+            clock (callable): Time source for the link statistics
+            stale (float): Seconds without a frame before a robot is shown as stale
+        """
+        self.clock = clock
+        self.stale = stale
+        self.robots = {}  # robot id -> RobotTrack, in order of first frame
+        self.invalid = 0
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.bind((host, port))
+        self._socket.setblocking(False)
+        self.address = self._socket.getsockname()
+
+    def handle(self, data, address):
+        """
+        Take one datagram.
+
+        Returns:
+            Frame: The decoded frame, or None if it was invalid or late
+        """
+        try:
+            frame = decode_frame(data)
+        except (ValueError, struct.error) as e:
+            self.invalid += 1
+            logger.debug(f"Ignoring datagram from {address[0]}:{address[1]}: {str(e)}")
+            return None
+        now = self.clock()
+        track = self.robots.get(frame.robot)
+        if track is None:
+            track = self.robots[frame.robot] = RobotTrack(frame.robot, address, now)
+            logger.info(f"Receiving telemetry from {frame.robot} at {address[0]}:{address[1]}")
+        return frame if track.update(frame, address, len(data), now) else None
+
+    def receive(self, timeout=None):
+        """
+        Wait up to timeout seconds for frames, then take every waiting datagram.
+
+        Returns:
+            list: The new frames, oldest first
+        """
+        frames = []
+        ready, _, _ = select.select([self._socket], [], [], timeout)
+        while ready:
+            try:
+                data, address = self._socket.recvfrom(65536)
+            except BlockingIOError:
+                break
+            frame = self.handle(data, address)
+            if frame is not None:
+                frames.append(frame)
+        return frames
+
+    def run(self, duration=None, interval=1.0, callback=None):
+        """
+        Receive until duration seconds have passed (default: forever).
+
+        Args:
+            duration (float): Seconds to run
+            interval (float): Seconds between callback calls
+            callback (callable): Called with the station every interval
+        """
+        started = self.clock()
+        next_report = started + interval
+        while duration is None or self.clock() - started < duration:
+            wait = next_report - self.clock()
+            if duration is not None:
+                wait = min(wait, started + duration - self.clock())
+            self.receive(max(wait, 0.0))
+            if self.clock() >= next_report:
+                next_report += interval
+                if callback is not None:
+                    callback(self)
+
+    def status(self):
+        """
+        One row per robot.
+
+        Returns:
+            list: dicts with robot, address, frames, rate, lost, late, dropped
+                (by the robot), age, stale and the latest frame
+        """
+        now = self.clock()
+        rows = []
+        for track in self.robots.values():
+            age = now - track.last_seen
+            rows.append({
+                'robot': track.robot,
+                'address': f"{track.address[0]}:{track.address[1]}",
+                'frames': track.frames,
+                'rate': track.rate,
+                'lost': track.lost,
+                'late': track.late,
+                'dropped': track.frame.dropped,
+                'age': age,
+                'stale': age > self.stale,
+                'frame': track.frame,
+            })
+        return rows
+
+    def format_status(self):
+        """Table of the robots' latest state and link statistics."""
+        lines = [f"{'robot':<16} {'frames':>7} {'Hz':>5} {'lost':>5} {'dropped':>7} {'age s':>6} "
+                 f"{'x cm':>7} {'y cm':>7} {'hdg':>5} {'motors':>11} {'best':>11} {'loop ms':>8}"]
+        for row in self.status():
+            frame = row['frame']
+            rate = '-' if row['rate'] is None else f"{row['rate']:.1f}"
+            lines.append(
+                f"{row['robot']:<16} {row['frames']:>7} {rate:>5} {row['lost']:>5} {row['dropped']:>7} "
+                f"{row['age']:>6.1f} {frame.pose[0]:>7.1f} {frame.pose[1]:>7.1f} {frame.pose[2]:>5.0f} "
+                f"{frame.motors[0]:>5.2f}/{frame.motors[1]:<5.2f} "
+                f"{frame.best_angle:>4.0f}@{frame.best_score:<6.2f} {frame.period * 1000:>8.1f}"
+                + ('  STALE' if row['stale'] else '')
+            )
+        if self.invalid:
+            lines.append(f"{self.invalid} invalid datagrams ignored")
+        return '\n'.join(lines)
+
+    def close(self):
+        self._socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
@@ -0,0 +1,123 @@
+"""
+Continuous servo sweep for the autonomous robot.
+
+Instead of stopping the servo at each scan angle, the servo is commanded once
+to the far end of its range and the sensors are sampled while it moves. Each
+sample is tagged with the servo angle interpolated from its timestamp, and the
+samples are then reduced onto a fixed set of heading bins. Consecutive sweeps
+alternate direction so the servo never has to snap back to its start angle.
+"""
+
+import numpy as np
+
+from .config import SCAN_ANGLE, SERVO_SWEEP_SPEED, SWEEP_BINS
+
+
+class ServoSweep:
+    """Plan alternating servo sweeps and bin the samples taken during them."""
+
+    def __init__(self, scan_angle=SCAN_ANGLE, bins=SWEEP_BINS, speed=SERVO_SWEEP_SPEED):
+        """
+        Args:
+            scan_angle (float): Total sweep width in degrees, centred on 0
+            bins (int): Number of heading bins to reduce samples onto
+            speed (float): Servo angular speed in degrees per second
+        """
+        if bins < 1:
+            raise ValueError("bins must be at least 1")
+        self.scan_angle = scan_angle
+        self.bins = bins
+        self.speed = speed
+        self._direction = 1
+
+    @property
+    def bin_angles(self):
+        """Heading of each bin centre in degrees, left to right."""
+        half = self.scan_angle / 2
+        if self.bins == 1:
+            return np.zeros(1)
+        return np.linspace(-half, half, self.bins)
+
+    @property
+    def duration(self):
+        """Time the servo needs to cover the full sweep, in seconds."""
+        return self.scan_angle / self.speed
+
+    def next_sweep(self, from_angle=None):
+        """
+        Get the endpoints of the next sweep and flip the direction.
+
+        Args:
+            from_angle (float): Current servo angle. When given, the sweep
+                starts from whichever end is nearer, so the servo does not
+                have to travel across its whole range first.
+
+        Returns:
+            tuple: (start_angle, end_angle) in degrees
+        """
+        half = self.scan_angle / 2
+        if from_angle is not None and from_angle != 0:
+            self._direction = -1 if from_angle > 0 else 1
+        start, end = -half * self._direction, half * self._direction
+        self._direction = -self._direction
+        return start, end
+
+    def interpolate_angles(self, timestamps, start_time, start_angle, end_angle):
+        """
+        Estimate the servo angle at each sample time.
+
+        The servo is assumed to move at constant speed from start_angle to
+        end_angle and then hold, which matches the single-command sweep.
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        progress = np.clip((timestamps - start_time) / self.duration, 0.0, 1.0)
+        return start_angle + (end_angle - start_angle) * progress
+
+    def bin_times(self, start_time, start_angle, end_angle):
+        """Time at which the servo passed each bin centre during a sweep."""
+        progress = (self.bin_angles - start_angle) / (end_angle - start_angle)
+        return start_time + np.clip(progress, 0.0, 1.0) * self.duration
+
+    def bin_samples(self, angles, values, reduce='mean'):
+        """
+        Reduce angle-tagged samples onto the heading bins.
+
+        Args:
+            angles (array): Servo angle of each sample
+            values (array): Reading of each sample
+            reduce (str): 'mean' or 'min' (conservative, used for distances)
+
+        Returns:
+            numpy.ndarray: One value per bin. Bins that received no sample are
+            linearly interpolated from their neighbours.
+        """
+        bin_angles = self.bin_angles
+        angles = np.asarray(angles, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return np.full(self.bins, np.nan)
+
+        # Nearest bin centre for each sample
+        if self.bins == 1:
+            indices = np.zeros(len(angles), dtype=np.intp)
+        else:
+            width = bin_angles[1] - bin_angles[0]
+            indices = np.rint((angles - bin_angles[0]) / width).astype(np.intp)
+            indices = np.clip(indices, 0, self.bins - 1)
+
+        counts = np.bincount(indices, minlength=self.bins)
+        if reduce == 'min':
+            result = np.full(self.bins, np.inf)
+            np.minimum.at(result, indices, values)
+        elif reduce == 'mean':
+            result = np.bincount(indices, weights=values, minlength=self.bins)
+            result = np.divide(result, counts, out=np.full(self.bins, np.nan), where=counts > 0)
+        else:
+            raise ValueError(f"Unknown reduction: {reduce}")
+
+        filled = counts > 0
+        if not filled.all():
+            result[~filled] = np.interp(
+                bin_angles[~filled], bin_angles[filled], result[filled]
+            )
+        return result
@@ -0,0 +1,215 @@
+"""
+Binary telemetry recorder for sensor readings and motor commands.
+
+Every sensor reading, servo command and motor command is appended as one
+fixed-width record (TELEMETRY_DTYPE) to a preallocated, memory-mapped .npy
+chunk file.
+A record holds the robot's full recorded state at that moment: the field
+named by `kind` is the value that was just read or commanded, the other
+fields keep their last recorded values (NaN until first recorded). The
+recorded inputs are enough to replay a run, see robot.replay.
+
+Appending is a tuple assignment into the mapped file, so recording costs a
+few microseconds and nothing is written by the calling thread; the kernel
+writes the pages back, which also keeps everything recorded before a crash.
+When a chunk is full the next one is created, so a run is a numbered series
+of files:
+
+    telemetry/run-20240501-120000-1234-0000.npy
+    telemetry/run-20240501-120000-1234-0001.npy
+
+Chunks load without copying:
+
+    records = telemetry.load('telemetry/run-...-0000.npy')
+    distances = records['distance'][records['kind'] == telemetry.KINDS['distance']]
+"""
+
+import glob
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+from .config import TELEMETRY_CHUNK_RECORDS, TELEMETRY_DIR
+from .logger import logger
+
+TELEMETRY_DTYPE = np.dtype([
+    ('time', '<f8'),     # robot clock, seconds
+    ('kind', 'u1'),      # what this record is, see KINDS
+    ('servo', '<f4'),    # commanded servo angle, degrees
+    ('distance', '<f4'), # cm
+    ('light', '<f4'),
+    ('sound', '<f4'),
+    ('battery', '<f4'),  # percent
+    ('left', '<f4'),     # motor commands
+    ('right', '<f4'),
+])
+
+# Record kinds; 0 marks the unused tail of a chunk. 'servo' records a servo
+# command, 'camera' the light level for one heading (in `servo`) read from a
+# camera frame.
+KINDS = {'distance': 1, 'light': 2, 'sound': 3, 'battery': 4, 'motors': 5, 'servo': 6, 'camera': 7}
+EMPTY = 0
+
+_FIELDS = TELEMETRY_DTYPE.names
+_TIME, _KIND, _SERVO = 0, 1, 2
+_LIGHT, _LEFT, _RIGHT = _FIELDS.index('light'), _FIELDS.index('left'), _FIELDS.index('right')
+# Which state slot each sensor kind writes
+_SLOTS = {kind: _FIELDS.index(kind) for kind in ('distance', 'light', 'sound', 'battery')}
+
+
+def telemetry_dir():
+    """Telemetry directory from ROBOT_TELEMETRY_DIR or config; None if disabled."""
+    return os.environ.get('ROBOT_TELEMETRY_DIR', TELEMETRY_DIR) or None
+
+
+def load(path):
+    """
+    Memory-map one chunk, without its unused tail.
+
+    Args:
+        path (str): Chunk file written by TelemetryRecorder
+
+    Returns:
+        np.ndarray: Read-only TELEMETRY_DTYPE records backed by the file
+    """
+    records = np.load(path, mmap_mode='r')
+    if records.dtype != TELEMETRY_DTYPE:
+        raise ValueError(f"{path} is not a telemetry chunk (dtype {records.dtype})")
+    empty = records['kind'] == EMPTY
+    return records[:int(np.argmax(empty))] if empty.any() else records
+
+
+def run_chunks(path):
+    """
+    Chunk files of a run in order.
+
+    Args:
+        path (str): A chunk file (any chunk of the run) or the run prefix
+            (the file name without '-NNNN.npy')
+
+    Returns:
+        list: Chunk file paths
+    """
+    if path.endswith('.npy'):
+        path = path[:-len('-0000.npy')]
+    return sorted(glob.glob(glob.escape(path) + '-[0-9][0-9][0-9][0-9].npy'))
+
+
+class TelemetryRecorder:
+    """Appends telemetry records to memory-mapped chunk files."""
+
+    def __init__(self, directory=None, chunk_records=TELEMETRY_CHUNK_RECORDS, clock=time.monotonic,
+                 name=None):
+        """
+        Args:
+            directory (str): Where to write the chunk files (default: telemetry_dir())
+            chunk_records (int): Records per chunk file
+            clock (callable): Returns the timestamp for each record
+            name (str): Run name (default: run-<date>-<time>-<pid>)
+        """
+        if chunk_records < 1:
+            raise ValueError("chunk_records must be at least 1")
+        self.directory = directory or telemetry_dir() or 'telemetry'
+        self.chunk_records = chunk_records
+        self.clock = clock
+        self.name = name or f"run-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+        self.prefix = os.path.join(self.directory, self.name)
+        self.records = 0
+        self.chunks = []
+        self._chunk = None
+        self._index = 0
+        self._state = [0.0, EMPTY] + [math.nan] * (len(_FIELDS) - 2)
+        self._lock = threading.Lock()
+
+    def _next_chunk(self):
+        """Flush the current chunk and map a new one (the file is created here)."""
+        if self._chunk is not None:
+            self._chunk.flush()
+        os.makedirs(self.directory, exist_ok=True)
+        path = f"{self.prefix}-{len(self.chunks):04d}.npy"
+        # New files are sparse zeros, i.e. all records EMPTY
+        self._chunk = np.lib.format.open_memmap(path, mode='w+', dtype=TELEMETRY_DTYPE,
+                                                shape=(self.chunk_records,))
+        self._index = 0
+        self.chunks.append(path)
+        if len(self.chunks) == 1:
+            logger.info(f"Recording telemetry to {self.prefix}-*.npy")
+
+    def _append(self):
+        if self._chunk is None or self._index == self.chunk_records:
+            self._next_chunk()
+        self._chunk[self._index] = tuple(self._state)
+        self._index += 1
+        self.records += 1
+
+    def sensor(self, kind, value, servo, timestamp=None):
+        """
+        Record a sensor reading.
+
+        Args:
+            kind (str): 'distance', 'light', 'sound' or 'battery'
+            value (float): The reading (None is recorded as NaN)
+            servo (float): Commanded servo angle when it was taken
+            timestamp (float): When it was taken (default: now)
+        """
+        slot = _SLOTS[kind]
+        with self._lock:
+            state = self._state
+            state[_TIME] = self.clock() if timestamp is None else timestamp
+            state[_KIND] = KINDS[kind]
+            state[_SERVO] = servo
+            state[slot] = math.nan if value is None else value
+            self._append()
+
+    def sensor_series(self, kind, timestamps, values, servo):
+        """Record a series of readings of one sensor (e.g. from a servo sweep)."""
+        for timestamp, value in zip(timestamps, values):
+            self.sensor(kind, value, servo, timestamp)
+
+    def motors(self, left, right, servo):
+        """Record a motor command."""
+        with self._lock:
+            state = self._state
+            state[_TIME] = self.clock()
+            state[_KIND] = KINDS['motors']
+            state[_SERVO] = servo
+            state[_LEFT] = left
+            state[_RIGHT] = right
+            self._append()
+
+    def servo(self, angle, timestamp=None):
+        """Record a servo command."""
+        with self._lock:
+            state = self._state
+            state[_TIME] = self.clock() if timestamp is None else timestamp
+            state[_KIND] = KINDS['servo']
+            state[_SERVO] = angle
+            self._append()
+
+    def camera(self, angles, levels):
+        """Record the light level per heading read from one camera frame."""
+        with self._lock:
+            state = self._state
+            state[_TIME] = self.clock()
+            state[_KIND] = KINDS['camera']
+            for angle, level in zip(angles, levels):
+                state[_SERVO] = angle
+                state[_LIGHT] = level
+                self._append()
+
+    def flush(self):
+        """Write the current chunk back to disk."""
+        with self._lock:
+            if self._chunk is not None:
+                self._chunk.flush()
+
+    def close(self):
+        """Flush and unmap the current chunk; recording again starts a new chunk."""
+        with self._lock:
+            chunk, self._chunk = self._chunk, None
+        if chunk is not None:
+            chunk.flush()
+            logger.info(f"Recorded {self.records} telemetry records in {len(self.chunks)} chunk(s)")
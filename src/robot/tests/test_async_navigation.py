@@ -0,0 +1,55 @@
+import asyncio
+import time
+import unittest
+from ..async_navigation import AsyncNavigator
+from ..autonomous_navigation import AutonomousRobot
+from ..hardware import RealClock
+from ..simulation import SimulatedBackend
+
+class TestAsyncNavigator(unittest.TestCase):
+    def setUp(self):
+        self.backend = SimulatedBackend(clock=RealClock(), seed=2)
+        self.world = self.backend.world
+        self.robot = AutonomousRobot(backend=self.backend)
+
+    def tearDown(self):
+        self.robot.cleanup()
+
+    def test_requires_realtime_clock(self):
+        """The event loop cannot run on a virtual clock."""
+        with self.assertRaises(ValueError):
+            AsyncNavigator(AutonomousRobot(backend=SimulatedBackend()))
+
+    def test_emergency_cancels_motion(self):
+        """A loud noise mid-move stops the motors within a few watchdog periods."""
+        navigator = AsyncNavigator(self.robot)
+
+        async def scenario():
+            watchdog = asyncio.ensure_future(navigator._watchdog())
+            navigator._motion = asyncio.ensure_future(navigator.move_forward(duration=2.0))
+            await asyncio.sleep(0.1)
+            noise_at = self.backend.clock.now()
+            self.world.room.sound_events.append((noise_at, noise_at + 0.5))
+            await asyncio.wait({navigator._motion}, timeout=1.0)
+            navigator._done = True
+            await watchdog
+            return noise_at
+
+        start = time.monotonic()
+        noise_at = asyncio.run(scenario())
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertTrue(navigator._motion.cancelled())
+        stops = [t for t in self.world.stop_times if t >= noise_at]
+        self.assertTrue(stops)
+        self.assertLess(stops[0] - noise_at, 0.1)
+        self.assertEqual(navigator.latency_report()['count'], 1)
+
+    def test_run_cycles(self):
+        """The control loop runs the requested cycles and leaves the robot stopped."""
+        navigator = AsyncNavigator(self.robot)
+        asyncio.run(navigator.run(max_cycles=2))
+        self.assertEqual(navigator.cycles, 2)
+        self.assertEqual((self.world.left_speed, self.world.right_speed), (0, 0))
+
+if __name__ == '__main__':
+    unittest.main()
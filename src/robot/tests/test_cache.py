@@ -0,0 +1,98 @@
+import threading
+import time
+import unittest
+from ..autonomous_navigation import AutonomousRobot
+from ..cache import ReadingCache
+from ..simulation import SimulatedBackend
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class FlakySensor:
+    def __init__(self):
+        self.reads = 0
+        self.fail = False
+
+    def read(self):
+        if self.fail:
+            raise IOError("bus error")
+        self.reads += 1
+        return self.reads
+
+class TestReadingCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.sensor = FlakySensor()
+        self.cache = ReadingCache(clock=self.clock)
+        self.cache.register('battery', self.sensor.read, ttl=5.0)
+
+    def test_ttl(self):
+        """Readings are served from memory until they expire."""
+        self.assertEqual(self.cache.get('battery'), 1)
+        self.clock.now = 4.9
+        self.assertEqual(self.cache.get('battery'), 1)
+        self.clock.now = 5.0
+        self.assertEqual(self.cache.get('battery'), 2)
+        stats = self.cache.stats()['battery']
+        self.assertEqual((stats['hits'], stats['misses']), (1, 2))
+        self.assertEqual(stats['age'], 0.0)
+
+    def test_stale_fallback(self):
+        """A failed read serves the last value; with none it raises."""
+        self.cache.get('battery')
+        self.sensor.fail = True
+        self.clock.now = 10.0
+        self.assertEqual(self.cache.get('battery'), 1)
+        stats = self.cache.stats()['battery']
+        self.assertEqual((stats['stale'], stats['errors']), (1, 1))
+        self.cache.register('display', self.sensor.read, ttl=1.0)
+        with self.assertRaises(RuntimeError):
+            self.cache.get('display')
+
+    def test_invalidate(self):
+        self.cache.get('battery')
+        self.cache.invalidate('battery')
+        self.assertEqual(self.cache.get('battery'), 2)
+
+    def test_background_refresh(self):
+        """The refresh thread keeps readings fresh, so get() never reads."""
+        read = threading.Event()
+
+        def slow_read():
+            read.set()
+            time.sleep(0.01)
+            return 42
+
+        cache = ReadingCache(clock=time.monotonic, refresh_ahead=0.5)
+        cache.register('battery', slow_read, ttl=0.1)
+        cache.start()
+        try:
+            self.assertTrue(read.wait(1.0))
+            time.sleep(0.3)
+            for _ in range(10):
+                self.assertEqual(cache.get('battery'), 42)
+        finally:
+            cache.stop()
+        stats = cache.stats()['battery']
+        self.assertGreaterEqual(stats['refreshes'], 3)
+        self.assertEqual(stats['misses'], 0)
+        self.assertFalse(cache.running)
+
+class TestRobotCache(unittest.TestCase):
+    def test_battery_read_once_per_ttl(self):
+        """check_battery() every cycle reads the bus once per TTL."""
+        backend = SimulatedBackend()
+        robot = AutonomousRobot(backend=backend)
+        for _ in range(20):
+            self.assertTrue(robot.check_battery())
+            robot.clock.sleep(0.5)
+        stats = robot.cache.stats()['battery']
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['hits'], 18)
+
+if __name__ == '__main__':
+    unittest.main()
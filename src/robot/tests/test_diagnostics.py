@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+import unittest
+from ..config import SCAN_ANGLE
+from ..diagnostics import ACTUATORS, CHECKS, Check, check_servo, format_report, run_diagnostics
+from ..simulation import SimulatedBackend
+
+def timed(intervals, name, seconds=0.2, error=None):
+    """Check that sleeps for real, recording when it ran"""
+    def check(devices, clock):
+        started = time.perf_counter()
+        time.sleep(seconds)
+        intervals[name] = (started, time.perf_counter())
+        if error:
+            raise error
+        return {}
+    return check
+
+class TestDiagnostics(unittest.TestCase):
+    def test_simulated_robot_passes(self):
+        backend = SimulatedBackend()
+        report = run_diagnostics(backend)
+        statuses = {check['name']: check['status'] for check in report['checks']}
+        self.assertEqual(statuses, {check.name: 'pass' for check in CHECKS})
+        self.assertTrue(report['ok'])
+        self.assertGreater(backend.world.distance_travelled, 0)
+        json.dumps(report)
+        self.assertIn('motors', format_report(report))
+
+    def test_quick_mode_does_not_move(self):
+        backend = SimulatedBackend()
+        report = run_diagnostics(backend, quick=True)
+        statuses = {check['name']: check['status'] for check in report['checks']}
+        self.assertEqual((statuses['servo'], statuses['motors']), ('skipped', 'skipped'))
+        self.assertEqual(statuses['ultrasonic'], 'pass')
+        self.assertEqual(backend.world.distance_travelled, 0)
+        self.assertTrue(report['ok'])
+
+    def test_servo_stays_in_scan_range(self):
+        """The servo check only swings as far as navigation scans."""
+        backend = SimulatedBackend()
+        targets = []
+
+        class Servo:
+            @property
+            def angle(self):
+                return targets[-1]
+
+            @angle.setter
+            def angle(self, value):
+                targets.append(value)
+
+        class Devices:
+            servo = Servo()
+
+        check_servo(Devices(), backend.clock)
+        self.assertEqual(max(map(abs, targets)), SCAN_ANGLE / 2)
+        self.assertEqual(targets[-1], 0)
+
+    def test_only_conflicting_checks_are_serialized(self):
+        intervals = {}
+        checks = [
+            Check('a', timed(intervals, 'a'), (), False),
+            Check('b', timed(intervals, 'b'), (), False),
+            Check('servo', timed(intervals, 'servo'), (ACTUATORS,), True),
+            Check('motors', timed(intervals, 'motors'), (ACTUATORS,), True),
+        ]
+        report = run_diagnostics(SimulatedBackend(), checks=checks)
+        self.assertTrue(report['ok'])
+        # Two actuator checks one after the other, the rest alongside them
+        self.assertLess(report['elapsed'], 0.6)
+        first, second = sorted([intervals['servo'], intervals['motors']])
+        self.assertGreaterEqual(second[0], first[1])
+        self.assertLess(intervals['a'][0], first[1])
+        waited = {check['name']: check['waited'] for check in report['checks']}
+        self.assertGreater(max(waited['servo'], waited['motors']), 0.15)
+
+    def test_timeouts_and_failures_are_reported(self):
+        intervals = {}
+        release = threading.Event()
+        def stuck(devices, clock):
+            release.wait(5)
+            intervals['stuck'] = (None, time.perf_counter())
+            return {}
+        checks = [
+            Check('stuck', stuck, (ACTUATORS,), True),
+            Check('broken', timed(intervals, 'broken', 0.0, OSError('no device on D0')), (), False),
+            Check('after', timed(intervals, 'after', 0.0), (ACTUATORS,), True),
+        ]
+        threading.Timer(0.5, release.set).start()
+        report = run_diagnostics(SimulatedBackend(), checks=checks, timeouts={'stuck': 0.1})
+        results = {check['name']: check for check in report['checks']}
+        self.assertEqual(results['stuck']['status'], 'timeout')
+        self.assertLess(results['stuck']['latency'], 0.4)
+        self.assertEqual(results['broken']['status'], 'fail')
+        self.assertIn('no device on D0', results['broken']['error'])
+        self.assertFalse(report['ok'])
+        # The conflicting check only started once the stuck one had returned
+        self.assertEqual(results['after']['status'], 'pass')
+        self.assertGreaterEqual(intervals['after'][0], intervals['stuck'][1])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+import numpy as np
+from ..autonomous_navigation import AutonomousRobot
+from ..exploration import FrontierExplorer, ScanHistory
+from ..simulation import Room, SimulatedBackend
+
+def enclosure(history, open_side=False):
+    """Scan a 1 m square box around the origin, optionally without its far wall"""
+    bearings = np.arange(-180, 180, 2.0)
+    radians = np.radians(bearings)
+    distances = 50 / np.maximum(np.abs(np.cos(radians)), np.abs(np.sin(radians)))
+    if open_side:
+        distances[np.abs(bearings) < 45] = 500
+    for _ in range(3):
+        history.integrate((0, 0, 0), bearings, distances)
+
+class TestScanHistory(unittest.TestCase):
+    def test_integrate_single_beam(self):
+        """Cells before the echo become free, the echo cell occupied, the rest unknown."""
+        history = ScanHistory(resolution=10, tile=8)
+        for _ in range(2):
+            history.integrate((0, 0, 0), [0], [100])
+        evidence = history.window(0, 0, 16)
+        self.assertTrue((evidence[:10, 0] <= -2).all())
+        self.assertGreaterEqual(evidence[10, 0], 3)
+        self.assertEqual(evidence[12, 0], 0)
+        self.assertEqual(history.known(), (10, 1))
+
+    def test_window_spans_tiles(self):
+        """Windows read across tile boundaries, negative coordinates included."""
+        history = ScanHistory(resolution=10, tile=4)
+        for _ in range(2):
+            history.integrate((-30, -30, 90), [0], [60])
+        evidence = history.window(-8, -8, 16)
+        # Facing +y, the echo is in cell (-3, 3)
+        self.assertGreaterEqual(evidence[-3 + 8, 3 + 8], 3)
+        self.assertTrue((evidence[-3 + 8, -3 + 8:3 + 8] <= -2).all())
+        self.assertGreater(len(history.tiles), 1)
+
+    def test_memory_is_bounded(self):
+        """Beyond max_tiles the least recently updated tiles are forgotten."""
+        history = ScanHistory(resolution=10, tile=8, max_tiles=6)
+        for step in range(20):
+            history.integrate((step * 500, 0, 0), [0, 90], [50, 50])
+            self.assertLessEqual(len(history.tiles), 6)
+        self.assertEqual(history.memory, 6 * 64)
+        self.assertGreater(history.evicted, 0)
+        # The first scans are gone, the last ones kept
+        self.assertFalse(history.window(0, 0, 8).any())
+        self.assertTrue(history.window(19 * 50, 0, 8).any())
+
+class TestFrontierExplorer(unittest.TestCase):
+    def test_heads_for_the_opening(self):
+        """The only frontier is through the open side of the box."""
+        explorer = FrontierExplorer(ScanHistory(resolution=10), window=30)
+        enclosure(explorer.history, open_side=True)
+        path = explorer.plan((0, 0, 90))
+        self.assertIsNotNone(path)
+        self.assertEqual(path[0], (0, 0))
+        self.assertGreater(path[-1][0], 40)
+        self.assertGreater(explorer.frontiers, 0)
+        self.assertEqual(explorer.waypoint(path), path[3])
+
+    def test_closed_room_is_complete(self):
+        """With every wall seen there is nothing left to explore."""
+        explorer = FrontierExplorer(ScanHistory(resolution=10), window=30)
+        enclosure(explorer.history)
+        self.assertIsNone(explorer.plan((0, 0, 0)))
+        self.assertEqual(explorer.frontiers, 0)
+
+    def test_gives_up_on_blocked_targets(self):
+        """An abandoned target's frontier is no longer chosen."""
+        explorer = FrontierExplorer(ScanHistory(resolution=10), window=30)
+        enclosure(explorer.history, open_side=True)
+        explorer.plan((0, 0, 0))
+        first = explorer.target
+        explorer.abandon()
+        explorer.plan((0, 0, 0))
+        self.assertNotEqual(explorer.target, first)
+        self.assertIn(first, explorer.abandoned)
+
+class TestNavigateExplore(unittest.TestCase):
+    def test_explores_small_room(self):
+        """The robot sees the whole room, then stops by itself."""
+        room = Room(width=250, height=200, start=(40, 100, 0))
+        backend = SimulatedBackend(room=room, seed=1)
+        robot = AutonomousRobot(backend=backend)
+        cycles = []
+        robot.navigate_explore(max_cycles=200, until=lambda: cycles.append(1) and False)
+        robot.cleanup()
+        self.assertLess(len(cycles), 200)
+        self.assertEqual(robot.explorer.frontiers, 0)
+        free, occupied = robot.explorer.history.known()
+        # 10 cm cells; most of the 5 m² floor is known free
+        self.assertGreater(free, 0.6 * 250 * 200 / 100)
+        self.assertEqual(backend.world.collisions, 0)
+
+if __name__ == '__main__':
+    unittest.main()
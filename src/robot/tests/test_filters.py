@@ -0,0 +1,102 @@
+import unittest
+import numpy as np
+from ..autonomous_navigation import AutonomousRobot
+from ..filters import ExponentialMovingAverage, KalmanFilter, RollingMedian, make_filter
+from ..scoring import ScanResult
+from ..simulation import Room, SimulatedBackend
+
+class TestFilters(unittest.TestCase):
+    def test_median_rejects_spike(self):
+        """A single spike does not move the median."""
+        median = RollingMedian(window=5)
+        for value in (50, 51, 5, 49, 50):
+            estimate = median.update(value)
+        self.assertEqual(estimate[0], 50)
+        self.assertTrue(np.isfinite(median.variance[0]))
+
+    def test_ema_converges(self):
+        """The EMA converges to a constant input and tracks its spread."""
+        ema = ExponentialMovingAverage(alpha=0.5, channels=2)
+        for _ in range(30):
+            estimate = ema.update([10.0, np.nan])
+        self.assertAlmostEqual(estimate[0], 10.0)
+        self.assertTrue(np.isnan(estimate[1]))
+        self.assertEqual(ema.variance[1], np.inf)
+
+    def test_kalman_gates_outlier(self):
+        """One outlier is ignored, a second in a row restarts the channel."""
+        kalman = KalmanFilter(measurement_variance=4.0, process_variance=0.0, gate=3.0, max_rejections=1)
+        for value in (100, 101, 99, 100):
+            kalman.update(value)
+        self.assertAlmostEqual(kalman.update(20)[0], 100, delta=1)
+        self.assertEqual(kalman.rejected, 1)
+        self.assertEqual(kalman.update(20)[0], 20)
+        self.assertEqual(kalman.variance[0], 4.0)
+
+    def test_kalman_trusts_short_readings(self):
+        """Readings below trust_below are never gated out."""
+        kalman = KalmanFilter(trust_below=16)
+        kalman.update(100)
+        self.assertLess(kalman.update(10)[0], 60)
+        self.assertEqual(kalman.rejected, 0)
+
+    def test_predict_and_remap(self):
+        """Moving shifts the estimates; turning moves them between channels."""
+        kalman = KalmanFilter(channels=3)
+        kalman.update([10.0, 20.0, 30.0])
+        kalman.predict(shift=5.0, variance=1.0)
+        np.testing.assert_allclose(kalman.value, [5.0, 15.0, 25.0])
+        kalman.remap([1.0, 2.0, np.nan])
+        np.testing.assert_allclose(kalman.value[:2], [15.0, 25.0])
+        self.assertEqual(kalman.variance[2], np.inf)
+
+    def test_make_filter(self):
+        self.assertIsNone(make_filter(None))
+        self.assertEqual(make_filter(('median', {'window': 3}), channels=4).channels, 4)
+        with self.assertRaises(ValueError):
+            make_filter(('butterworth', {}))
+
+class TestScanFilter(unittest.TestCase):
+    def test_spurious_echo_suppressed(self):
+        """A single short echo at one heading does not reach the scorer."""
+        robot = AutonomousRobot(backend=SimulatedBackend())
+        angles = [-30, -15, 0, 15, 30]
+        for _ in range(3):
+            robot.last_scan = ScanResult(angles, [80.0] * 5, [0.5] * 5)
+            robot.filter_scan()
+        robot.last_scan = ScanResult(angles, [80.0, 80.0, 30.0, 80.0, 80.0], [0.5] * 5)
+        robot.filter_scan()
+        self.assertGreater(robot.last_scan.distances[2], 70)
+        self.assertEqual(len(robot.last_scan.variances), 5)
+
+    def test_close_obstacle_reaches_scorer(self):
+        """An obstacle that appears inside the safe distance is avoided in the same cycle."""
+        robot = AutonomousRobot(backend=SimulatedBackend())
+        angles = [-30, -15, 0, 15, 30]
+        for _ in range(3):
+            robot.last_scan = ScanResult(angles, [80.0] * 5, [0.5] * 5)
+            robot.filter_scan()
+        robot.last_scan = ScanResult(angles, [80.0, 80.0, 15.0, 80.0, 80.0], [0.5] * 5)
+        robot.filter_scan()
+        self.assertEqual(robot.last_scan.distances[2], 15.0)
+        best_angle, _ = robot.find_best_direction(robot.last_scan)
+        self.assertNotEqual(best_angle, 0)
+
+    def test_skipped_angles_are_not_readings(self):
+        """Headings skipped as known clear are scored as clear without touching their filters."""
+        room = Room(width=800, height=800, start=(400, 400, 0))
+        robot = AutonomousRobot(backend=SimulatedBackend(room=room, seed=0))
+        robot.scan_mode = 'step'
+        skipped = 0
+        for _ in range(8):
+            robot.scan_environment()
+            skipped += np.count_nonzero(~robot.last_scan.measured)
+        self.assertGreater(skipped, 0)
+        self.assertGreater(robot.scan_filters['distance'].value.min(), 250)
+        scan = robot.last_scan
+        self.assertTrue((scan.distances[scan.measured] > 250).all())
+        self.assertTrue((scan.distances[~scan.measured] >= robot.safe_distance).all())
+        self.assertTrue((scan.variances[~scan.measured] == 0).all())
+
+if __name__ == '__main__':
+    unittest.main()
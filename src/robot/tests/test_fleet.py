@@ -0,0 +1,298 @@
+import os
+import runpy
+import socket
+import subprocess
+import tempfile
+import threading
+import unittest
+
+import paramiko
+
+from ..fleet import (
+    MANIFEST_FILE,
+    Host,
+    SSHPool,
+    build_manifest,
+    deploy,
+    format_reports,
+    install_script,
+    load_inventory,
+    parse_host,
+    run_script,
+)
+
+PASSWORD = 'raspberry'
+
+# A PEP 517 backend, kept in src/ so it is deployed, that packs src/robot into
+# a wheel without build tools, so installs in the tests run offline
+BACKEND = '''
+import base64, hashlib, os, zipfile
+
+DIST_INFO = 'autonomous_robot-1.0.dist-info'
+FILES = {
+    DIST_INFO + '/METADATA': 'Metadata-Version: 2.1\\nName: autonomous-robot\\nVersion: 1.0\\n',
+    DIST_INFO + '/WHEEL': 'Wheel-Version: 1.0\\nGenerator: test\\nRoot-Is-Purelib: true\\nTag: py3-none-any\\n',
+}
+
+def build_wheel(wheel_directory, config_settings=None, metadata_directory=None):
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    files = dict(FILES)
+    for name in os.listdir(os.path.join(root, 'src', 'robot')):
+        with open(os.path.join(root, 'src', 'robot', name)) as f:
+            files['robot/' + name] = f.read()
+    record = []
+    name = 'autonomous_robot-1.0-py3-none-any.whl'
+    with zipfile.ZipFile(os.path.join(wheel_directory, name), 'w') as wheel:
+        for path, text in files.items():
+            wheel.writestr(path, text)
+            digest = base64.urlsafe_b64encode(hashlib.sha256(text.encode()).digest()).rstrip(b'=')
+            record.append(f'{path},sha256={digest.decode()},{len(text.encode())}')
+        wheel.writestr(DIST_INFO + '/RECORD', '\\n'.join(record + [DIST_INFO + '/RECORD,,']) + '\\n')
+    return name
+'''
+
+PYPROJECT = '''
+[build-system]
+requires = []
+build-backend = "backend"
+backend-path = ["src"]
+'''
+
+
+class StubHandle(paramiko.SFTPHandle):
+    def stat(self):
+        return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+
+
+class StubSFTP(paramiko.SFTPServerInterface):
+    """SFTP server on the local filesystem under the server's home directory"""
+
+    def __init__(self, server, *args, **kwargs):
+        super().__init__(server, *args, **kwargs)
+        self.home = server.home
+
+    def _path(self, path):
+        return os.path.join(self.home, path.lstrip('/'))
+
+    def open(self, path, flags, attr):
+        try:
+            fd = os.open(self._path(path), flags, 0o644)
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        mode = 'wb' if flags & os.O_WRONLY else 'r+b' if flags & os.O_RDWR else 'rb'
+        handle = StubHandle(flags)
+        handle.readfile = handle.writefile = os.fdopen(fd, mode)
+        return handle
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(self._path(path)))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    lstat = stat
+
+    def mkdir(self, path, attr):
+        try:
+            os.mkdir(self._path(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+    def remove(self, path):
+        try:
+            os.remove(self._path(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        return paramiko.SFTP_OK
+
+
+class StubServer(paramiko.ServerInterface):
+    """SSH server that accepts one password and runs exec requests with sh in its home directory"""
+
+    def __init__(self, home):
+        self.home = home
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        return paramiko.AUTH_SUCCESSFUL if password == PASSWORD else paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        return paramiko.OPEN_SUCCEEDED if kind == 'session' else paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(target=self._run, args=(channel, command.decode()), daemon=True).start()
+        return True
+
+    def _run(self, channel, command):
+        script = b''
+        for data in iter(lambda: channel.recv(4096), b''):
+            script += data
+        process = subprocess.run(command, shell=True, cwd=self.home, input=script,
+                                 stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        channel.sendall(process.stdout)
+        channel.send_exit_status(process.returncode)
+        channel.close()
+
+
+class LocalSSH:
+    """Listens on a loopback port and serves every connection with StubServer"""
+
+    def __init__(self, home, key):
+        self.home = home
+        self.key = key
+        self.listener = socket.socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(8)
+        self.port = self.listener.getsockname()[1]
+        self.transports = []
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                connection, _ = self.listener.accept()
+            except OSError:
+                return
+            transport = paramiko.Transport(connection)
+            transport.add_server_key(self.key)
+            transport.set_subsystem_handler('sftp', paramiko.SFTPServer, StubSFTP)
+            transport.start_server(server=StubServer(self.home))
+            self.transports.append(transport)
+
+    def close(self):
+        self.listener.close()
+        for transport in self.transports:
+            transport.close()
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(text)
+
+
+class TestInventory(unittest.TestCase):
+    def test_parse_host(self):
+        self.assertEqual(parse_host('robot-1.local'), Host('robot-1.local', 'pi', 22))
+        self.assertEqual(parse_host('ada@10.0.0.5:2222', username='pi'), Host('10.0.0.5', 'ada', 2222))
+
+    def test_load_inventory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'robots.txt')
+            write(path, "# lab robots\npi@robot-1.local\n\nrobot-2.local:2222  # spare\n")
+            hosts = load_inventory(path, username='lab')
+        self.assertEqual(hosts, [Host('robot-1.local', 'pi', 22), Host('robot-2.local', 'lab', 2222)])
+
+    def test_manifest_skips_excluded(self):
+        with tempfile.TemporaryDirectory() as root:
+            write(os.path.join(root, 'setup.py'), 'setup()\n')
+            write(os.path.join(root, 'src', 'robot', 'a.py'), 'A = 1\n')
+            write(os.path.join(root, 'src', 'robot', '__pycache__', 'a.pyc'), 'x')
+            write(os.path.join(root, 'src', 'robot', 'robot.log'), 'x')
+            manifest = build_manifest(root, files=['setup.py', 'src', 'missing.txt'])
+        self.assertEqual(sorted(manifest), ['setup.py', 'src/robot/a.py'])
+
+    def test_install_script(self):
+        script = install_script('autonomous-robot', requirements_changed=False, wheelhouse=True)
+        self.assertIn('--no-index --find-links wheelhouse', script)
+        self.assertTrue(script.endswith('--no-build-isolation --no-deps .'))
+        self.assertNotIn('-r requirements.txt', script)
+        self.assertIn('-r requirements.txt', install_script('autonomous-robot', True, False))
+
+
+class TestDeploy(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.key = paramiko.RSAKey.generate(2048)
+
+    def setUp(self):
+        self.home = tempfile.TemporaryDirectory()
+        self.project = tempfile.TemporaryDirectory()
+        self.server = LocalSSH(self.home.name, self.key)
+        self.host = Host('127.0.0.1', 'pi', self.server.port)
+        write(os.path.join(self.project.name, 'setup.py'), 'setup()\n')
+        write(os.path.join(self.project.name, 'requirements.txt'), 'numpy\n')
+        write(os.path.join(self.project.name, 'src', 'robot', 'a.py'), 'A = 1\n')
+        write(os.path.join(self.project.name, 'src', 'robot', 'b.py'), 'B = 1\n')
+
+    def tearDown(self):
+        self.server.close()
+        self.home.cleanup()
+        self.project.cleanup()
+
+    def deploy(self, **options):
+        report, = deploy([self.host], password=PASSWORD, root=self.project.name, install=False, **options)
+        self.assertTrue(report.ok, report.error)
+        return report
+
+    def remote(self, *path):
+        return os.path.join(self.home.name, 'autonomous-robot', *path)
+
+    def test_sends_only_changes(self):
+        report = self.deploy()
+        self.assertEqual(report.uploaded, 4)
+        with open(self.remote('src', 'robot', 'a.py')) as f:
+            self.assertEqual(f.read(), 'A = 1\n')
+        self.assertTrue(os.path.exists(self.remote(MANIFEST_FILE)))
+        self.assertEqual(self.deploy().uploaded, 0)
+
+        write(os.path.join(self.project.name, 'src', 'robot', 'a.py'), 'A = 2\n')
+        os.remove(os.path.join(self.project.name, 'src', 'robot', 'b.py'))
+        report = self.deploy()
+        self.assertEqual((report.uploaded, report.removed), (1, 1))
+        with open(self.remote('src', 'robot', 'a.py')) as f:
+            self.assertEqual(f.read(), 'A = 2\n')
+        self.assertFalse(os.path.exists(self.remote('src', 'robot', 'b.py')))
+        self.assertEqual(self.deploy(full=True).uploaded, 3)
+
+    def test_pool_reuses_connection(self):
+        with SSHPool(2, password=PASSWORD) as pool:
+            self.deploy(pool=pool)
+            self.deploy(pool=pool)
+            self.assertEqual(pool.connects, 1)
+
+    def test_run_script(self):
+        with SSHPool(1, password=PASSWORD) as pool:
+            client = pool.acquire(self.host)
+            status, output = run_script(client, 'cd /\necho "in $(pwd)"\nexit 3')
+            pool.release(self.host, client)
+        self.assertEqual((status, output), (3, 'in /\n'))
+
+    def test_wheelhouse_installs_synced_source(self):
+        """A wheelhouse built before a code change does not shadow the new code."""
+        write(os.path.join(self.project.name, 'requirements.txt'), '# none\n')
+        write(os.path.join(self.project.name, 'pyproject.toml'), PYPROJECT)
+        write(os.path.join(self.project.name, 'src', 'backend.py'), BACKEND)
+        write(os.path.join(self.project.name, 'src', 'robot', '__init__.py'), '')
+        wheelhouse = os.path.join(self.project.name, 'wheels')
+        os.mkdir(wheelhouse)
+        backend = runpy.run_path(os.path.join(self.project.name, 'src', 'backend.py'))
+        backend['build_wheel'](wheelhouse)
+        self.deploy(wheelhouse=wheelhouse)
+
+        write(os.path.join(self.project.name, 'src', 'robot', 'a.py'), 'A = 2\n')
+        report, = deploy([self.host], password=PASSWORD, root=self.project.name, wheelhouse=wheelhouse)
+        self.assertTrue(report.ok, report.output or report.error)
+        self.assertTrue(report.installed)
+        python = self.remote('venv', 'bin', 'python')
+        installed = subprocess.run([python, '-c', 'from robot.a import A; print(A)'], cwd=self.home.name,
+                                   stdout=subprocess.PIPE, check=True)
+        self.assertEqual(installed.stdout, b'2\n')
+
+    def test_failures_are_reported(self):
+        closed = socket.socket()
+        closed.bind(('127.0.0.1', 0))
+        port = closed.getsockname()[1]
+        closed.close()
+        hosts = [self.host, Host('127.0.0.1', 'pi', port)]
+        reports = deploy(hosts, password='wrong', root=self.project.name, install=False, workers=2)
+        self.assertEqual([report.ok for report in reports], [False, False])
+        self.assertTrue(all(report.error.startswith('connect:') for report in reports))
+        self.assertIn('FAILED', format_reports(reports))
+
+
+if __name__ == '__main__':
+    unittest.main()
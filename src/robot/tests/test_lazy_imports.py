@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest.mock import patch
+from ..autonomous_navigation import AutonomousRobot
+from ..simulation import SimulatedBackend
+
+SRC = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def loaded_after(code):
+    """Modules imported by running code in a fresh interpreter."""
+    script = code + "\nimport sys\nprint(' '.join(sys.modules))"
+    env = dict(os.environ, PYTHONPATH=SRC, ROBOT_BACKEND='sim', ROBOT_LOG_FILE='')
+    output = subprocess.run([sys.executable, '-c', script], env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return set(output.split())
+
+class TestLazyImports(unittest.TestCase):
+    def test_package_import(self):
+        """Importing the package loads neither the robot nor SSH support."""
+        modules = loaded_after("import robot")
+        self.assertNotIn('robot.autonomous_navigation', modules)
+        self.assertNotIn('paramiko', modules)
+        self.assertNotIn('cv2', modules)
+
+    def test_cli_import(self):
+        """Commands other than navigate never load the navigator or NumPy."""
+        modules = loaded_after("import robot.cli")
+        self.assertNotIn('robot.autonomous_navigation', modules)
+        self.assertNotIn('numpy', modules)
+        self.assertNotIn('paramiko', modules)
+
+    def test_motor_command(self):
+        """Driving the motors does not load OpenCV or the vision pipeline."""
+        modules = loaded_after(
+            "from robot import AutonomousRobot\n"
+            "AutonomousRobot().move_motor(0.1, 0.1)"
+        )
+        self.assertIn('robot.autonomous_navigation', modules)
+        self.assertNotIn('cv2', modules)
+        self.assertNotIn('robot.vision', modules)
+        self.assertNotIn('paramiko', modules)
+
+class TestLazyDevices(unittest.TestCase):
+    def test_devices_created_on_first_use(self):
+        """Only the devices a command touches are created, and only once."""
+        backend = SimulatedBackend()
+        with patch.object(backend, 'create_camera') as create_camera, \
+             patch.object(backend, 'create_pitop', wraps=backend.create_pitop) as create_pitop:
+            robot = AutonomousRobot(backend=backend)
+            create_pitop.assert_not_called()
+            robot.move_motor(0.2, 0.2)
+            robot.move_motor(0.0, 0.0)
+            robot.cleanup()
+        create_pitop.assert_called_once()
+        create_camera.assert_not_called()
+        self.assertFalse(AutonomousRobot.vision.created(robot))
+
+if __name__ == '__main__':
+    unittest.main()
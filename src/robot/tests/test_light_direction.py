@@ -0,0 +1,71 @@
+import unittest
+from unittest.mock import Mock, patch
+import numpy as np
+from ..autonomous_navigation import AutonomousRobot
+from ..light_direction import LightDirectionEstimator, resample
+from ..simulation import Room, SimulatedBackend
+
+class TestLightDirection(unittest.TestCase):
+    def test_resample_averages_bins(self):
+        """Each heading gets the mean of the samples in its bin."""
+        bearings = np.array([-20.0, -10.0, -5.0, 5.0, 10.0, 20.0])
+        brightness = np.array([0.0, 0.2, 0.4, 0.6, 0.8, 1.0])
+        levels = resample([-15, 0, 15], bearings, brightness)
+        np.testing.assert_allclose(levels, [0.1, 0.5, 0.9])
+
+    def test_resample_outside_view(self):
+        """Headings beyond the field of view take the edge brightness."""
+        levels = resample([-45, 0, 45], np.array([-30.0, 30.0]), np.array([0.2, 0.8]))
+        np.testing.assert_allclose(levels, [0.2, 0.5, 0.8])
+
+    def test_bright_side(self):
+        """A frame that is brighter on the right puts the light on the right."""
+        frame = np.zeros((120, 160, 3), dtype=np.uint8)
+        frame[:, 120:] = 255
+        levels = LightDirectionEstimator(fov=60).levels(frame, [-30, -15, 0, 15, 30])
+        self.assertEqual(int(np.argmax(levels)), 4)
+        self.assertAlmostEqual(levels[0], 0.0)
+
+class TestCameraLightSeeking(unittest.TestCase):
+    def setUp(self):
+        # Light ahead and to the right of the robot's start
+        self.room = Room(light=(200, 300))
+
+    def test_scan_uses_one_frame(self):
+        """With a camera the scan reads no light sensor values."""
+        robot = AutonomousRobot(backend=SimulatedBackend(room=self.room))
+        robot.scan_mode = 'step'
+        with patch.object(robot, 'get_light_level') as get_light_level:
+            _, light_levels = robot.scan_environment()
+        get_light_level.assert_not_called()
+        levels = [light for _, light in light_levels]
+        self.assertGreater(levels[-1], levels[0])
+
+    def test_sensor_fallback(self):
+        """Without a camera the light sensor is read at every step."""
+        backend = SimulatedBackend(room=self.room)
+        robot = AutonomousRobot(backend=backend)
+        with patch.object(backend, 'create_camera', side_effect=RuntimeError("no camera")):
+            self.assertIsNone(robot.camera)
+        self.assertIsNone(robot.camera_light_levels([0]))
+        robot.scan_mode = 'step'
+        with patch.object(robot, 'get_light_level', return_value=0.5) as get_light_level:
+            robot.scan_environment()
+        self.assertEqual(get_light_level.call_count, 7)
+
+    def test_vision_start_failure(self):
+        """A camera that fails on its first frame leaves the light sensor in charge."""
+        robot = AutonomousRobot(backend=SimulatedBackend(room=self.room))
+        robot.camera = Mock(get_frame=Mock(side_effect=RuntimeError("camera busy")))
+        with patch.object(robot.clock, 'realtime', True):
+            robot.start_vision()
+        self.assertIsNone(robot.vision)
+        self.assertIsNone(robot.get_vision())
+        robot.scan_mode = 'step'
+        with patch.object(robot, 'get_light_level', return_value=0.5) as get_light_level:
+            robot.scan_environment()
+        self.assertEqual(get_light_level.call_count, 7)
+        robot.stop_vision()
+
+if __name__ == '__main__':
+    unittest.main()
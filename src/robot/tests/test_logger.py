@@ -0,0 +1,96 @@
+import logging
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from ..logger import BackgroundHandler, RateLimitFilter, setup_logger
+
+class SlowHandler(logging.Handler):
+    """Stands in for a slow SD card."""
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        time.sleep(0.05)
+        self.messages.append(record.getMessage())
+
+class TestLogger(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.log_file = os.path.join(self.directory, 'test.log')
+        self.name = f'robot-test-{self.id()}'
+
+    def tearDown(self):
+        logger = logging.getLogger(self.name)
+        for handler in list(logger.handlers):
+            if isinstance(handler, BackgroundHandler):
+                handler.stop()
+            logger.removeHandler(handler)
+        shutil.rmtree(self.directory)
+
+    def test_setup_is_idempotent(self):
+        """Setting up twice does not add a second handler."""
+        logger = setup_logger(self.name, log_file=self.log_file, console=False)
+        setup_logger(self.name, level=logging.DEBUG)
+        self.assertEqual(len(logger.handlers), 1)
+        self.assertEqual(logger.level, logging.DEBUG)
+
+    def test_lazy_file(self):
+        """The log file is only created once something is logged."""
+        logger = setup_logger(self.name, log_file=self.log_file, console=False)
+        self.assertFalse(os.path.exists(self.log_file))
+        self.assertIsNone(logger.handlers[0].listener)
+        logger.info("hello")
+        logger.handlers[0].stop()
+        with open(self.log_file) as f:
+            self.assertIn("INFO - hello", f.read())
+
+    def test_rotation(self):
+        """The log file rotates by size."""
+        logger = setup_logger(self.name, log_file=self.log_file, console=False,
+                              max_bytes=1000, backup_count=2)
+        for i in range(100):
+            logger.info(f"message {i}")
+        logger.handlers[0].stop()
+        self.assertTrue(os.path.exists(self.log_file + '.1'))
+        self.assertTrue(os.path.exists(self.log_file + '.2'))
+        self.assertFalse(os.path.exists(self.log_file + '.3'))
+
+    def test_logging_does_not_block(self):
+        """Slow output handlers are written from the background thread."""
+        logger = setup_logger(self.name, log_file=None, console=False)
+        handler = logger.handlers[0]
+        slow = SlowHandler()
+        handler._output_handlers = lambda: [slow]
+        start = time.perf_counter()
+        for i in range(10):
+            logger.info(f"message {i}")
+        self.assertLess(time.perf_counter() - start, 0.1)
+        handler.stop()
+        self.assertEqual(len(slow.messages), 10)
+
+    def test_rate_limit(self):
+        """Repeats from one call site are dropped and counted."""
+        records = []
+        rate_limit = RateLimitFilter(interval=60)
+
+        def log(message, limit=True):
+            record = logging.LogRecord(self.name, logging.WARNING, __file__, 1, message, None, None)
+            if limit:
+                record.rate_limit = limit
+            if rate_limit.filter(record):
+                records.append(record.getMessage())
+
+        for level in (19, 18, 17):
+            log(f"Low battery level: {level}%")
+        log("Unlimited", limit=None)
+        log("Unlimited", limit=None)
+        self.assertEqual(records, ["Low battery level: 19%", "Unlimited", "Unlimited"])
+        rate_limit._last.clear()
+        log("Low battery level: 16%")
+        self.assertEqual(records[-1], "Low battery level: 16% (2 similar messages suppressed)")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+from ..config import ROBOT_WIDTH
+from ..montecarlo import format_comparison, run_episode, run_episodes, summarize
+from ..simulation import _connected, random_room
+
+def episode(seed, reached, time_to_goal=None, collisions=0, cycles=50):
+    return {'seed': seed, 'reached': reached, 'time_to_goal': time_to_goal, 'sim_time': time_to_goal or 100.0,
+            'collisions': collisions, 'cycles': cycles, 'decisions': cycles, 'distance_travelled': 0.0,
+            'wall_time': 0.1, 'cpu_time': 0.1}
+
+class TestRandomRoom(unittest.TestCase):
+    def test_same_seed_same_room(self):
+        first, second = random_room(3), random_room(3)
+        self.assertEqual((first.width, first.height), (second.width, second.height))
+        self.assertEqual([vars(o) for o in first.obstacles], [vars(o) for o in second.obstacles])
+        self.assertNotEqual(first.width, random_room(4).width)
+
+    def test_goal_reachable(self):
+        for seed in range(20):
+            room = random_room(seed)
+            self.assertTrue(_connected(room, room.start[:2], room.goal, ROBOT_WIDTH / 2))
+            self.assertGreater(room.clearance(*room.start[:2]), ROBOT_WIDTH)
+            self.assertGreater(room.clearance(*room.goal), ROBOT_WIDTH)
+
+class TestEpisodes(unittest.TestCase):
+    def test_episode_result(self):
+        result = run_episode(0, max_cycles=5)
+        self.assertEqual(result['seed'], 0)
+        self.assertEqual(result['cycles'], 5)
+        self.assertEqual(result['decisions'], 5)
+        self.assertGreater(result['sim_time'], 0)
+        with self.assertRaises(ValueError):
+            run_episode(0, mode='teleport')
+
+    def test_parallel_matches_serial(self):
+        """Episodes only depend on their seed, wherever they run."""
+        serial = run_episodes([1, 2], max_cycles=5, workers=1)
+        parallel = run_episodes([1, 2], max_cycles=5, workers=2)
+        timing = ('wall_time', 'cpu_time')
+        strip = lambda results: [{k: v for k, v in e.items() if k not in timing} for e in results['episodes']]
+        self.assertEqual(strip(serial), strip(parallel))
+        self.assertEqual(parallel['summary']['episodes'], 2)
+
+    def test_summary_and_comparison(self):
+        baseline = {'settings': {'commit': 'aaa'},
+                    'episodes': [episode(seed, seed % 2 == 0, 60.0 + seed) for seed in range(10)]}
+        current = {'settings': {'commit': 'bbb'},
+                   'episodes': [episode(seed, True, 50.0 + seed) for seed in range(5, 15)]}
+        summary = summarize(baseline['episodes'])
+        self.assertEqual(summary['success_rate'], 0.5)
+        self.assertAlmostEqual(summary['success_stderr'], 0.5 / 10 ** 0.5)
+        self.assertEqual(summary['time_to_goal']['mean'], 64.0)
+        comparison = format_comparison(baseline, current)
+        self.assertIn('5 common episodes: aaa -> bbb', comparison)
+        self.assertIn('success rate', comparison)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import time
+import unittest
+from ..hardware import RealClock
+from ..motion import MotionScheduler
+from ..simulation import VirtualClock
+
+class TestMotionScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = VirtualClock()
+        self.applied = []
+        self.travelled = 0.0
+        self.motion = self.make_scheduler(self.clock)
+
+    def make_scheduler(self, clock):
+        def on_update(left, right, dt):
+            self.travelled += (left + right) / 2 * dt
+        return MotionScheduler(
+            lambda left, right: self.applied.append((left, right)),
+            lambda: self.applied.append((0.0, 0.0)),
+            clock, rate=50, acceleration=2.0, on_update=on_update,
+        )
+
+    def test_ramped_speeds(self):
+        """Wheel speeds change by at most acceleration / rate per step."""
+        self.motion.wait(self.motion.submit(0.4, 0.4, 1.0))
+        speeds = [0.0] + [left for left, _ in self.applied]
+        steps = [abs(b - a) for a, b in zip(speeds, speeds[1:])]
+        self.assertLessEqual(max(steps), 2.0 / 50 + 1e-9)
+        self.assertEqual(max(speeds), 0.4)
+        self.assertEqual(self.applied[-1], (0.0, 0.0))
+
+    def test_distance_matches_instant_move(self):
+        """Ramping keeps the distance of an instant start and stop."""
+        for duration in (1.0, 0.1):
+            self.travelled = 0.0
+            progress = self.motion.wait(self.motion.submit(0.4, 0.4, duration))
+            self.assertAlmostEqual(self.travelled, 0.4 * duration, delta=0.4 * 0.03)
+            self.assertAlmostEqual(progress, duration, delta=0.03)
+
+    def test_queued_moves_run_through(self):
+        """Identical back-to-back moves do not stop in between."""
+        first = self.motion.submit(0.4, 0.4, 0.5)
+        second = self.motion.submit(0.4, 0.4, 0.5)
+        self.motion.wait(second)
+        self.assertTrue(first.done())
+        self.assertNotIn((0.0, 0.0), self.applied[:-1])
+
+    def test_preempt(self):
+        """A preempting move cancels what is running and queued."""
+        first = self.motion.submit(0.4, 0.4, 1.0)
+        queued = self.motion.submit(0.4, 0.4, 1.0)
+        for _ in range(5):
+            self.motion.tick()
+            self.clock.sleep(self.motion.period)
+        turn = self.motion.submit(0.25, -0.25, 0.5, preempt=True)
+        self.assertTrue(first.cancelled())
+        self.assertTrue(queued.cancelled())
+        self.assertIsNone(self.motion.wait(first))
+        self.assertIsNotNone(self.motion.wait(turn))
+
+    def test_deadline(self):
+        """Moves that cannot start before their deadline are dropped."""
+        late = self.motion.submit(0.4, 0.4, 1.0, deadline=self.clock.now() - 1)
+        self.assertIsNone(self.motion.wait(late))
+        short = self.motion.submit(0.4, 0.4, 10.0, deadline=self.clock.now() + 1.0)
+        self.assertLess(self.motion.wait(short), 1.0)
+
+    def test_empty_moves_finish(self):
+        """Moves with zero speed or zero duration complete at once."""
+        for left, right, duration in ((0.0, 0.0, 1.0), (0.4, 0.4, 0.0)):
+            started = self.clock.now()
+            self.assertEqual(self.motion.wait(self.motion.submit(left, right, duration)), 0.0)
+            self.assertLess(self.clock.now() - started, 0.1)
+        self.assertEqual(self.applied, [])
+
+    def test_control_thread(self):
+        """On a real-time clock moves run in the background and return futures."""
+        motion = self.make_scheduler(RealClock())
+        try:
+            start = time.monotonic()
+            future = motion.submit(0.4, 0.4, 0.2)
+            self.assertLess(time.monotonic() - start, 0.05)
+            self.assertFalse(future.done())
+            self.assertAlmostEqual(future.result(timeout=2.0), 0.2, delta=0.05)
+            self.assertTrue(motion.running)
+        finally:
+            motion.shutdown()
+        self.assertFalse(motion.running)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+import numpy as np
+from ..autonomous_navigation import AutonomousRobot
+from ..occupancy_grid import OccupancyGrid
+from ..simulation import Room, SimulatedBackend
+
+class TestOccupancyGrid(unittest.TestCase):
+    def setUp(self):
+        self.grid = OccupancyGrid(size=100, resolution=5, max_range=200)
+
+    def test_starts_unknown(self):
+        """A new grid knows nothing."""
+        self.assertTrue(self.grid.unknown_mask().all())
+        self.assertFalse(self.grid.is_free(0, 0))
+
+    def test_integrate_single_beam(self):
+        """Cells before the echo become free and the echo cell occupied."""
+        for _ in range(3):
+            self.grid.integrate_scan((0, 0, 0), [0], [100])
+        self.assertTrue(self.grid.is_free(50, 0))
+        self.assertTrue(self.grid.is_occupied(100, 0))
+        self.assertFalse(self.grid.is_free(150, 0))
+
+    def test_no_echo_clears_to_max_range(self):
+        """A reading at max range marks free space but no obstacle."""
+        for _ in range(3):
+            self.grid.integrate_scan((0, 0, 0), [0], [250])
+        self.assertTrue(self.grid.is_free(180, 0))
+        self.assertFalse(self.grid.occupied_mask().any())
+
+    def test_heading_and_bearing(self):
+        """Beams are cast along heading + bearing, clockwise positive."""
+        for _ in range(3):
+            self.grid.integrate_scan((0, 0, 45), [45], [100])
+        self.assertTrue(self.grid.is_occupied(0, 100))
+
+    def test_ray_distances(self):
+        """Known-free distance stops at the first non-free cell."""
+        for _ in range(3):
+            self.grid.integrate_scan((0, 0, 0), [-15, 0, 15], [60, 100, 200])
+        distances = self.grid.ray_distances((0, 0, 0), [0, 90], max_range=150)
+        self.assertGreater(distances[0], 80)
+        self.assertLess(distances[0], 100)
+        self.assertLess(distances[1], 10)
+        self.assertEqual(self.grid.clear_bearings((0, 0, 0), [0, 15, 90], 50).tolist(),
+                         [True, True, False])
+
+    def test_sliding_window(self):
+        """The window follows the robot and keeps its memory size."""
+        for _ in range(3):
+            self.grid.integrate_scan((0, 0, 0), [0], [100])
+        size = self.grid.log_odds.nbytes
+        self.grid.integrate_scan((150, 0, 0), [0], [20])
+        self.assertEqual(self.grid.log_odds.nbytes, size)
+        self.assertIsNotNone(self.grid.world_to_cell(150, 0))
+        # The old obstacle is still where it was in world coordinates
+        self.assertTrue(self.grid.is_occupied(100, 0))
+
+    def test_far_jump_resets(self):
+        """Jumping further than the window forgets everything."""
+        self.grid.integrate_scan((0, 0, 0), [0], [100])
+        self.grid.recenter(10000, 10000)
+        self.assertTrue(np.all(self.grid.log_odds == 0))
+        self.assertIsNotNone(self.grid.world_to_cell(10000, 10000))
+
+class TestSkippedAngles(unittest.TestCase):
+    def test_skipped_angles_keep_clear_space(self):
+        """Angles skipped as known clear add no obstacle at the safe distance."""
+        room = Room(width=800, height=800, start=(400, 400, 0))
+        robot = AutonomousRobot(backend=SimulatedBackend(room=room, seed=0))
+        robot.scan_mode = 'step'
+        skipped = 0
+        for _ in range(8):
+            robot.scan_environment()
+            skipped += np.count_nonzero(~robot.last_scan.measured)
+        x, y, _ = robot.pose
+        self.assertGreater(skipped, 0)
+        self.assertTrue(robot.grid.is_free(x + robot.safe_distance, y))
+        self.assertEqual(robot.known_clear_angles([0]), [True])
+
+if __name__ == '__main__':
+    unittest.main()
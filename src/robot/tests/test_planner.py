@@ -0,0 +1,82 @@
+import unittest
+import numpy as np
+from ..planner import DIAGONAL, STRAIGHT, DStarLite, astar, inflate
+
+def path_cost(path):
+    cost = 0
+    for (r1, c1), (r2, c2) in zip(path, path[1:]):
+        cost += DIAGONAL if r1 != r2 and c1 != c2 else STRAIGHT
+    return cost
+
+class TestAStar(unittest.TestCase):
+    def test_open_grid(self):
+        """On an empty grid the path is a straight diagonal."""
+        path = astar(np.zeros((5, 5), dtype=bool), (0, 0), (4, 4))
+        self.assertEqual(path, [(0, 0), (1, 1), (2, 2), (3, 3), (4, 4)])
+
+    def test_wall(self):
+        """The path goes around a wall without cutting its corner."""
+        blocked = np.zeros((5, 5), dtype=bool)
+        blocked[2, :4] = True
+        path = astar(blocked, (0, 0), (4, 0))
+        self.assertIsNotNone(path)
+        self.assertNotIn((2, 0), path)
+        self.assertIn((2, 4), path)
+
+    def test_unreachable(self):
+        blocked = np.zeros((5, 5), dtype=bool)
+        blocked[2, :] = True
+        self.assertIsNone(astar(blocked, (0, 0), (4, 4)))
+
+class TestDStarLite(unittest.TestCase):
+    def test_matches_astar(self):
+        """Initial plans and incremental replans are as short as A* from scratch."""
+        rng = np.random.default_rng(1)
+        for _ in range(20):
+            blocked = rng.random((20, 20)) < 0.25
+            blocked[0, 0] = blocked[-1, -1] = False
+            planner = DStarLite(blocked, (0, 0), (19, 19))
+            start = (0, 0)
+            for _ in range(3):
+                expected = astar(blocked, start, (19, 19))
+                path = planner.plan()
+                self.assertEqual(path is None, expected is None)
+                if expected is None:
+                    break
+                self.assertEqual(path_cost(path), path_cost(expected))
+                if len(path) > 2:
+                    start = path[1]
+                    planner.move_start(start)
+                blocked = blocked ^ (rng.random(blocked.shape) < 0.03)
+                blocked[start] = blocked[-1, -1] = False
+                planner.update_map(blocked)
+
+    def test_incremental_update_is_cheap(self):
+        """Blocking one cell on the path re-expands far fewer cells than a fresh plan."""
+        rng = np.random.default_rng(3)
+        blocked = rng.random((80, 80)) < 0.2
+        blocked[0, 0] = blocked[-1, -1] = False
+        planner = DStarLite(blocked, (0, 0), (79, 79))
+        path = planner.plan()
+        before = planner.expansions
+
+        blocked = blocked.copy()
+        blocked[path[len(path) // 2]] = True
+        self.assertEqual(planner.update_map(blocked), 1)
+        planner.plan()
+
+        fresh = DStarLite(blocked, (0, 0), (79, 79))
+        fresh.plan()
+        self.assertLess(planner.expansions - before, fresh.expansions / 2)
+
+class TestInflate(unittest.TestCase):
+    def test_inflate(self):
+        blocked = np.zeros((5, 5), dtype=bool)
+        blocked[2, 2] = True
+        inflated = inflate(blocked, 1)
+        self.assertEqual(inflated.sum(), 5)
+        self.assertTrue(inflated[1, 2] and inflated[2, 1] and inflated[3, 2] and inflated[2, 3])
+        self.assertEqual(inflate(blocked, 0).sum(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
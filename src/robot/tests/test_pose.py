@@ -0,0 +1,114 @@
+import math
+import unittest
+import numpy as np
+from .. import simulation
+from ..autonomous_navigation import AutonomousRobot
+from ..config import GRID_MAX_RANGE
+from ..pose import PoseEstimator, match_scans, relative_pose
+from ..simulation import CircleObstacle, RectObstacle, Room, SimulatedBackend
+
+ANGLES = np.arange(-90, 91, 4.5)
+
+def make_room():
+    return Room(obstacles=[CircleObstacle(150, 120, 20), CircleObstacle(250, 200, 25), RectObstacle(200, 0, 230, 80)])
+
+def scan(room, x, y, heading):
+    """Ideal ultrasonic readings at a pose (room coordinates)."""
+    return ANGLES, np.array([room.ray_distance(x, y, math.radians(heading + angle), GRID_MAX_RANGE) for angle in ANGLES])
+
+class TestPose(unittest.TestCase):
+    def test_relative_pose(self):
+        x, y, heading = relative_pose((10, 10, 90), (10, 20, 80))
+        self.assertAlmostEqual(x, 10)
+        self.assertAlmostEqual(y, 0)
+        self.assertAlmostEqual(heading, -10)
+
+    def test_match_recovers_heading_error(self):
+        """The robot turned 2 degrees more than dead reckoning thinks."""
+        room = make_room()
+        estimator = PoseEstimator()
+        reference = scan(room, 300, 150, 0)
+        current = scan(room, 306, 150, 2)
+        rotation, shift, inliers = match_scans(reference, current, (6, 0, 0), estimator.rotations, estimator.shifts)
+        self.assertAlmostEqual(rotation, 2, delta=0.3)
+        self.assertAlmostEqual(shift, 0, delta=1)
+        self.assertGreater(inliers, len(ANGLES) // 2)
+
+    def test_match_without_overlap(self):
+        """Scans with nothing in common give no correction."""
+        estimator = PoseEstimator()
+        far = (ANGLES, np.full(len(ANGLES), 300.0))
+        self.assertIsNone(match_scans(far, far, (6, 0, 0), estimator.rotations, estimator.shifts))
+
+    def test_turn_gain_calibration(self):
+        """Turns that overshoot by 10% teach the estimator a turn gain of 1.1."""
+        room = make_room()
+        estimator = PoseEstimator()
+        true_heading, pose = 0.0, (0.0, 0.0, 0.0)
+        estimator.observe(pose, *scan(room, 200, 150, true_heading))
+        for turn in (30, -30) * 5:
+            _, angle = estimator.odometry(0.0, turn / estimator.turn_gain)
+            true_heading += turn / estimator.turn_gain * 1.1
+            pose = (0.0, 0.0, pose[2] + angle)
+            rotation, _ = estimator.observe(pose, *scan(room, 200, 150, true_heading))
+            pose = (0.0, 0.0, pose[2] + rotation)
+        self.assertAlmostEqual(estimator.turn_gain, 1.1, delta=0.03)
+        self.assertAlmostEqual(pose[2], true_heading, delta=3)
+
+    def test_drift_applied_once_known(self):
+        """A consistent drift is learned and applied; none is applied before."""
+        room = make_room()
+        estimator = PoseEstimator()
+        self.assertEqual(estimator.known_drift, 0.0)
+        x, true_heading, pose = 60.0, 0.0, (0.0, 0.0, 0.0)
+        estimator.observe(pose, *scan(room, x, 150, true_heading))
+        for _ in range(8):
+            distance, angle = estimator.odometry(6.0, 0.0)
+            x += 6.0
+            true_heading += 6.0 * 0.3
+            pose = (pose[0] + distance, 0.0, pose[2] + angle)
+            rotation, _ = estimator.observe(pose, *scan(room, x, 150, true_heading))
+            pose = (pose[0], 0.0, pose[2] + rotation)
+        self.assertAlmostEqual(estimator.known_drift, 0.3, delta=0.1)
+
+    def test_no_matching(self):
+        estimator = PoseEstimator(matching=False)
+        estimator.observe((0, 0, 0), *scan(make_room(), 100, 150, 0))
+        self.assertEqual(estimator.observe((6, 0, 0), *scan(make_room(), 106, 150, 5)), (0.0, 0.0))
+        self.assertEqual(estimator.matches, 0)
+
+class TestClosedLoop(unittest.TestCase):
+    def setUp(self):
+        self.gain_error, self.slip = simulation.SIM_WHEEL_GAIN_ERROR, simulation.SIM_WHEEL_SLIP
+        simulation.SIM_WHEEL_GAIN_ERROR, simulation.SIM_WHEEL_SLIP = 0.05, 0.0
+
+    def tearDown(self):
+        simulation.SIM_WHEEL_GAIN_ERROR, simulation.SIM_WHEEL_SLIP = self.gain_error, self.slip
+
+    def heading_error(self, matching):
+        backend = SimulatedBackend(room=make_room(), seed=0)
+        robot = AutonomousRobot(backend=backend)
+        robot.pose_estimator.matching = matching
+        robot.navigate(max_cycles=30)
+        return abs((robot.pose[2] - backend.world.heading + 180) % 360 - 180)
+
+    def test_scan_matching_tracks_heading(self):
+        """With uneven wheels the matched pose stays close to the real heading."""
+        self.assertLess(self.heading_error(True), 5)
+        self.assertGreater(self.heading_error(False), 30)
+
+    def test_correction_is_not_motion(self):
+        """Pose corrections do not count as turns for the scan filters."""
+        robot = AutonomousRobot(backend=SimulatedBackend(room=make_room()))
+        robot.pose_estimator.observe(robot.pose, *scan(make_room(), 300, 150, 0))
+        # Dead reckoning says 30 degrees, the robot turned 33
+        robot.pose_estimator.odometry(0.0, 30.0)
+        robot.pose = (0.0, 0.0, 30.0)
+        robot._scan_samples = scan(make_room(), 300, 150, 33)
+        rotation, _ = robot.correct_pose()
+        self.assertAlmostEqual(rotation, 3, delta=0.5)
+        self.assertEqual(robot._turned, 0.0)
+        self.assertAlmostEqual(robot.pose[2], 30 + rotation)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+import os
+import random
+import tempfile
+import unittest
+from ..autonomous_navigation import AutonomousRobot
+from ..profiling import LatencyHistogram, LoopProfiler, format_snapshot, load_snapshot
+from ..simulation import SimulatedBackend
+
+class FakeClock:
+    def __init__(self):
+        self.time = 0.0
+
+    def __call__(self):
+        return self.time
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_within_precision(self):
+        rng = random.Random(0)
+        values = sorted(rng.lognormvariate(-5, 1) for _ in range(5000))
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+        for percent in (50, 95, 99):
+            exact = values[int(percent / 100 * len(values)) - 1]
+            self.assertAlmostEqual(histogram.percentile(percent), exact, delta=exact * 0.05 + 2e-6)
+        self.assertEqual(histogram.percentile(100), values[-1])
+        self.assertEqual(histogram.count, len(values))
+        self.assertAlmostEqual(histogram.mean, sum(values) / len(values))
+
+    def test_bounded_memory(self):
+        """A microsecond to an hour fits in under a thousand buckets."""
+        histogram = LatencyHistogram()
+        histogram.record(1e-6)
+        histogram.record(3600.0)
+        self.assertLess(len(histogram.counts), 1000)
+        self.assertAlmostEqual(histogram.percentile(99), 3600.0, delta=3600 * 0.04)
+
+    def test_empty_and_merge(self):
+        first, second = LatencyHistogram(), LatencyHistogram()
+        self.assertIsNone(first.percentile(50))
+        first.record(0.001)
+        second.record(0.1)
+        second.record(0.1)
+        first.merge(second)
+        self.assertEqual(first.count, 3)
+        self.assertEqual(first.min, 0.001)
+        self.assertEqual(first.max, 0.1)
+        self.assertAlmostEqual(first.percentile(50), 0.1, delta=0.004)
+
+class TestLoopProfiler(unittest.TestCase):
+    def test_disabled_records_nothing(self):
+        profiler = LoopProfiler(enabled=False)
+        profiler.tick()
+        with profiler.stage('scan'):
+            pass
+        self.assertEqual(profiler.stages, {})
+        self.assertEqual(profiler.cycles, 0)
+        self.assertIs(profiler.stage('scan'), profiler.stage('score'))
+
+    def test_stages_and_frequency(self):
+        clock = FakeClock()
+        profiler = LoopProfiler(enabled=True, clock=clock, dump_interval=None)
+        for _ in range(10):
+            profiler.tick()
+            with profiler.stage('scan'):
+                clock.time += 0.03
+            with profiler.stage('sleep'):
+                clock.time += 0.07
+        profiler.tick()
+        self.assertEqual(list(profiler.stages), ['scan', 'sleep'])
+        self.assertAlmostEqual(profiler.stages['scan'].percentile(50), 0.03, delta=0.001)
+        self.assertEqual(profiler.cycles, 10)
+        self.assertAlmostEqual(profiler.frequency, 10.0)
+        self.assertIn('10.00 Hz', profiler.summary())
+
+    def test_disabled_time_is_not_a_period(self):
+        clock = FakeClock()
+        profiler = LoopProfiler(enabled=True, clock=clock, dump_interval=None)
+        profiler.tick()
+        clock.time += 0.1
+        profiler.tick()
+        profiler.disable()
+        clock.time += 60
+        profiler.tick()
+        profiler.enable()
+        profiler.tick()
+        clock.time += 0.1
+        profiler.tick()
+        self.assertEqual(profiler.cycles, 2)
+        self.assertAlmostEqual(profiler.loop.max, 0.1)
+
+    def test_periodic_dump(self):
+        clock = FakeClock()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'stats.json')
+            profiler = LoopProfiler(enabled=True, clock=clock, dump_interval=1.0, path=path)
+            for _ in range(5):
+                profiler.tick()
+                with profiler.stage('scan'):
+                    clock.time += 0.1
+            self.assertFalse(os.path.exists(path))
+            clock.time += 0.6
+            profiler.tick()
+            snapshot = load_snapshot(path)
+        self.assertEqual(snapshot['stages']['scan']['count'], 5)
+        self.assertIn('scan', format_snapshot(snapshot))
+
+class TestNavigationProfiling(unittest.TestCase):
+    def test_navigate_stages(self):
+        robot = AutonomousRobot(backend=SimulatedBackend())
+        robot.profiler.path = None
+        robot.profiler.enable()
+        robot.navigate(max_cycles=5)
+        self.assertEqual(set(robot.profiler.stages), {'battery', 'scan', 'score', 'sound', 'motion', 'sleep'})
+        self.assertEqual(robot.profiler.stages['scan'].count, 5)
+        self.assertEqual(robot.profiler.cycles, 4)
+
+    def test_disabled_by_default(self):
+        robot = AutonomousRobot(backend=SimulatedBackend())
+        robot.navigate(max_cycles=2)
+        self.assertEqual(robot.profiler.stages, {})
+
+if __name__ == '__main__':
+    unittest.main()
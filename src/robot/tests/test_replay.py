@@ -0,0 +1,71 @@
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+from ..autonomous_navigation import AutonomousRobot
+from ..replay import ManeuverLog, ReplayRobot, compare_maneuvers, replay
+from ..simulation import CircleObstacle, Room, SimulatedBackend
+from ..telemetry import TelemetryRecorder
+
+class TestManeuverLog(unittest.TestCase):
+    def test_ramps_collapse(self):
+        """Ramp steps and stops between moves of one kind form one maneuver."""
+        log = ManeuverLog()
+        commands = [(0.0, 0.2, 0.2), (0.1, 0.4, 0.4), (0.5, 0.0, 0.0),
+                    (0.6, 0.4, 0.4), (1.0, 0.3, -0.3), (1.5, 0.0, 0.0)]
+        for command in commands:
+            log.add(*command)
+        kinds = [maneuver.kind for maneuver in log.maneuvers]
+        self.assertEqual(kinds, ['forward', 'right'])
+        self.assertAlmostEqual(log.maneuvers[0].magnitude, 0.2 * 0.1 + 0.4 * 0.4 + 0.4 * 0.4)
+        self.assertAlmostEqual(log.maneuvers[1].magnitude, 0.3 * 0.5)
+
+    def test_compare(self):
+        """Turns must agree in direction and size, forward moves in kind."""
+        recorded, replayed = ManeuverLog(), ManeuverLog()
+        for t, left, right in [(0, 0.4, 0.4), (1, 0.25, -0.25), (2, 0, 0)]:
+            recorded.add(t, left, right)
+        for t, left, right in [(0, 0.4, 0.4), (1.5, 0.25, -0.25), (2, 0, 0)]:
+            replayed.add(t, left, right)
+        mismatches = compare_maneuvers(recorded.maneuvers, replayed.maneuvers, tolerance=0.2)
+        self.assertEqual([mismatch.index for mismatch in mismatches], [1])
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def record(self, scan_mode, cycles=40):
+        room = Room(obstacles=[CircleObstacle(200, 150, 25)], light=(300, 250))
+        robot = AutonomousRobot(backend=SimulatedBackend(room=room, seed=1))
+        # Small chunks so the replay streams across several files
+        robot.telemetry = TelemetryRecorder(self.directory, chunk_records=500, clock=robot.clock.now)
+        robot.scan_mode = scan_mode
+        robot.navigate(max_cycles=cycles)
+        robot.cleanup()
+        self.assertGreater(len(robot.telemetry.chunks), 1)
+        return robot.telemetry.chunks[0]
+
+    def test_replay_matches_recording(self):
+        """Replaying a run with the same logic reproduces every decision."""
+        for scan_mode in ('sweep', 'step'):
+            with self.subTest(scan_mode=scan_mode):
+                path = self.record(scan_mode)
+                report = replay(path, scan_mode=scan_mode)
+                self.assertTrue(report.matched, report.summary())
+                self.assertGreater(len(report.replayed), 1)
+                shutil.rmtree(self.directory)
+                self.directory = tempfile.mkdtemp()
+
+    def test_changed_decisions_are_reported(self):
+        """A change to the decision logic shows up as mismatched maneuvers."""
+        path = self.record('sweep')
+        with patch.object(ReplayRobot, 'find_best_direction', return_value=(-45, 0.0)):
+            report = replay(path, scan_mode='sweep')
+        self.assertFalse(report.matched)
+        self.assertEqual(report.replayed[0].kind, 'left')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,11 +1,14 @@
 import unittest
 from unittest.mock import MagicMock, patch
+import numpy as np
 from ..autonomous_navigation import AutonomousRobot
+from ..scoring import ScoreProfile
+from ..simulation import SimulatedBackend
 
 class TestAutonomousRobot(unittest.TestCase):
     def setUp(self):
         """Set up test fixtures before each test method."""
-        self.robot = AutonomousRobot()
+        self.robot = AutonomousRobot(backend=SimulatedBackend())
         
     def test_initialization(self):
         """Test robot initialization."""
@@ -35,6 +38,36 @@ class TestAutonomousRobot(unittest.TestCase):
         sound_level = self.robot.get_sound_level()
         self.assertEqual(sound_level, 0.3)
         
+    def test_navigation_loops_tear_down(self):
+        """Every navigation loop stops the robot and its services after an error."""
+        loops = (self.robot.navigate, self.robot.navigate_planned, self.robot.navigate_explore)
+        for loop in loops:
+            with patch.object(self.robot, 'scan_environment', side_effect=RuntimeError("sensor")), \
+                 patch.object(self.robot, 'stop') as stop, \
+                 patch.object(self.robot, 'stop_sampler') as stop_sampler, \
+                 patch.object(self.robot, 'stop_vision') as stop_vision:
+                loop(max_cycles=1)
+            stop.assert_called()
+            stop_sampler.assert_called_once()
+            stop_vision.assert_called_once()
+        
+    def test_avoidance_turns_commit(self):
+        """Blocked straight ahead the robot turns properly, and keeps turning one way until it drives."""
+        headings = np.array([-40.0, -30.0, 0.0, 30.0, 40.0])
+        self.robot.last_score_profile = ScoreProfile(headings, np.array([0.3, 0.2, 0.4, 0.1, 0.2]), None, {})
+        self.assertEqual(self.robot.avoidance_angle(0.0), -40.0)
+        # Now the right looks better, but swinging back would face the same obstacle
+        self.robot.last_score_profile = ScoreProfile(headings, np.array([0.1, 0.2, 0.4, 0.1, 0.3]), None, {})
+        self.assertEqual(self.robot.avoidance_angle(0.0), -30.0)
+        self.robot.move_forward(0.1)
+        self.assertEqual(self.robot.avoidance_angle(0.0), 40.0)
+        
+    def test_servo_target(self):
+        """Test the servo target follows set_servo_angle."""
+        self.assertEqual(self.robot.servo_target, 0)
+        self.robot.set_servo_angle(30)
+        self.assertEqual(self.robot.servo_target, 30)
+        
     @patch('robot.autonomous_navigation.AutonomousRobot.set_servo_angle')
     def test_set_servo_angle(self, mock_set_servo_angle):
         """Test servo angle setting."""
@@ -45,13 +78,14 @@ class TestAutonomousRobot(unittest.TestCase):
     def test_move_forward(self, mock_move_motor):
         """Test forward movement."""
         self.robot.move_forward(1.0)
-        mock_move_motor.assert_called_once_with(self.robot.speed, self.robot.speed)
+        # Speeds ramp up to the commanded speed
+        mock_move_motor.assert_any_call(self.robot.speed, self.robot.speed)
         
     @patch('robot.autonomous_navigation.AutonomousRobot.move_motor')
     def test_turn(self, mock_move_motor):
         """Test turning."""
         self.robot.turn(90)
-        mock_move_motor.assert_called_once_with(self.robot.turn_speed, -self.robot.turn_speed)
+        mock_move_motor.assert_any_call(self.robot.turn_max_speed, -self.robot.turn_max_speed)
         
     @patch('robot.autonomous_navigation.AutonomousRobot.stop')
     def test_stop(self, mock_stop):
@@ -0,0 +1,70 @@
+import time
+import unittest
+from ..sampler import RingBuffer, SensorSampler
+
+class TestRingBuffer(unittest.TestCase):
+    def test_empty(self):
+        """An empty buffer has no latest sample."""
+        buffer = RingBuffer(4)
+        self.assertIsNone(buffer.latest())
+        times, values = buffer.window()
+        self.assertEqual(len(times), 0)
+        self.assertEqual(len(values), 0)
+
+    def test_wraparound(self):
+        """Old samples are overwritten once the buffer is full."""
+        buffer = RingBuffer(4)
+        for i in range(6):
+            buffer.append(float(i), i * 10.0)
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(buffer.total, 6)
+        self.assertEqual(buffer.latest(), (5.0, 50.0))
+        times, values = buffer.window()
+        self.assertEqual(times.tolist(), [2.0, 3.0, 4.0, 5.0])
+        self.assertEqual(values.tolist(), [20.0, 30.0, 40.0, 50.0])
+
+    def test_window_size(self):
+        """A window returns the most recent samples in order."""
+        buffer = RingBuffer(8)
+        for i in range(5):
+            buffer.append(float(i), float(i))
+        _, values = buffer.window(2)
+        self.assertEqual(values.tolist(), [3.0, 4.0])
+
+class TestSensorSampler(unittest.TestCase):
+    def test_sampling(self):
+        """Sampler threads fill the buffers in the background."""
+        sampler = SensorSampler({'distance': lambda: 42.0}, rates={'distance': 200})
+        sampler.start()
+        try:
+            deadline = time.monotonic() + 1.0
+            while sampler.latest('distance') is None and time.monotonic() < deadline:
+                time.sleep(0.005)
+        finally:
+            sampler.stop()
+        self.assertEqual(sampler.latest('distance'), 42.0)
+        self.assertFalse(sampler.running)
+        self.assertGreater(sampler.achieved_rate('distance'), 0)
+
+    def test_stale_samples(self):
+        """Samples older than max_age or before `since` are ignored."""
+        now = [100.0]
+        sampler = SensorSampler({'light': lambda: 0.5}, clock=lambda: now[0])
+        sampler.buffers['light'].append(99.0, 0.5)
+        self.assertEqual(sampler.latest('light'), 0.5)
+        self.assertIsNone(sampler.latest('light', max_age=0.5))
+        self.assertIsNone(sampler.latest('light', since=99.5))
+
+    def test_read_errors(self):
+        """Failing reads are counted and do not stop the thread."""
+        def broken():
+            raise IOError("bus error")
+        sampler = SensorSampler({'sound': broken}, rates={'sound': 500})
+        sampler.start()
+        time.sleep(0.05)
+        sampler.stop()
+        self.assertGreater(sampler.errors['sound'], 0)
+        self.assertIsNone(sampler.latest('sound'))
+
+if __name__ == '__main__':
+    unittest.main()
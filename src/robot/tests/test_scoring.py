@@ -0,0 +1,95 @@
+import unittest
+import numpy as np
+from ..scoring import DirectionScorer, ScanResult
+
+def legacy_best_direction(distances, light_levels, safe_distance, target_light_level):
+    """The original tuple-list implementation of find_best_direction."""
+    combined_scores = []
+    for (angle, distance), (_, light) in zip(distances, light_levels):
+        distance_score = min(distance / safe_distance, 1.0)
+        light_score = abs(light - target_light_level)
+        combined_scores.append((angle, distance_score * (1 - light_score)))
+    return max(combined_scores, key=lambda x: x[1])
+
+class TestScanResult(unittest.TestCase):
+    def test_from_pairs(self):
+        """Tuple lists convert to contiguous arrays and back."""
+        scan = ScanResult.from_pairs([(-15, 10.0), (0, 20.0), (15, 30.0)],
+                                     [(-15, 0.1), (0, 0.2), (15, 0.3)])
+        self.assertTrue(scan.angles.flags['C_CONTIGUOUS'])
+        self.assertEqual(scan.distance_pairs(), [(-15.0, 10.0), (0.0, 20.0), (15.0, 30.0)])
+        self.assertEqual(scan.light_pairs()[2], (15.0, 0.3))
+
+    def test_sorted_by_angle(self):
+        """Scans recorded right to left are stored left to right."""
+        scan = ScanResult([45, 0, -45], [1, 2, 3], [0.1, 0.2, 0.3])
+        self.assertEqual(scan.angles.tolist(), [-45, 0, 45])
+        self.assertEqual(scan.distances.tolist(), [3, 2, 1])
+
+    def test_length_mismatch(self):
+        with self.assertRaises(ValueError):
+            ScanResult([0, 15], [1.0], [0.5, 0.5])
+
+class TestDirectionScorer(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.angles = list(range(-45, 46, 15))
+        self.distances = [(a, d) for a, d in zip(self.angles, rng.uniform(5, 60, 7))]
+        self.light_levels = [(a, l) for a, l in zip(self.angles, rng.uniform(0, 1, 7))]
+
+    def test_matches_legacy(self):
+        """Without dilation or heading cost the scores match the original loop."""
+        scorer = DirectionScorer(safe_distance=25, target_light_level=0.5, robot_width=0,
+                                 candidates=None, heading_weight=0)
+        profile = scorer.score(ScanResult.from_pairs(self.distances, self.light_levels))
+        expected = legacy_best_direction(self.distances, self.light_levels, 25, 0.5)
+        self.assertEqual(profile.best_angle, expected[0])
+        self.assertAlmostEqual(profile.best_score, expected[1])
+
+    def test_full_profile(self):
+        """Every candidate heading gets a score."""
+        scorer = DirectionScorer(candidates=361)
+        profile = scorer.score(ScanResult.from_pairs(self.distances, self.light_levels))
+        self.assertEqual(len(profile.scores), 361)
+        self.assertEqual(len(profile.headings), 361)
+        self.assertIn('light', profile.penalties)
+        self.assertEqual(profile.best_score, profile.scores.max())
+
+    def test_footprint_dilation(self):
+        """A close obstacle blocks neighbouring headings as well."""
+        scan = ScanResult([-15, 0, 15], [100, 100, 5], [0.5, 0.5, 0.5])
+        scorer = DirectionScorer(safe_distance=25, robot_width=16, candidates=None, heading_weight=0)
+        profile = scorer.score(scan)
+        self.assertEqual(profile.clearance[1], 0.2)
+        scorer.robot_width = 0
+        self.assertEqual(scorer.score(scan).clearance[1], 1.0)
+
+    def test_heading_change_cost(self):
+        """With equal clearance the scorer prefers going straight."""
+        scan = ScanResult([-45, 0, 45], [100, 100, 100], [0.5, 0.5, 0.5])
+        profile = DirectionScorer(heading_weight=0.1).score(scan)
+        self.assertEqual(profile.best_angle, 0.0)
+
+    def test_best_turn(self):
+        """best_turn skips headings too close to straight ahead, and the other side if asked."""
+        scan = ScanResult([-30, -15, 0, 15, 30], [20, 15, 25, 20, 5], [0.5] * 5)
+        scorer = DirectionScorer(safe_distance=25, robot_width=0, candidates=None, heading_weight=0.1)
+        profile = scorer.score(scan)
+        self.assertEqual(profile.best_angle, 0.0)
+        self.assertEqual(profile.best_turn(10), 15.0)
+        self.assertEqual(profile.best_turn(20), -30.0)
+        self.assertEqual(profile.best_turn(10, side=-1), -30.0)
+        self.assertEqual(profile.best_turn(90), profile.best_angle)
+
+    def test_custom_term(self):
+        """Pluggable terms are applied with their weight."""
+        scan = ScanResult([-45, 0, 45], [100, 100, 100], [0.5, 0.5, 0.5])
+        scorer = DirectionScorer(candidates=None, heading_weight=0)
+        scorer.add_term('avoid_left', lambda headings, scan, scorer: (headings > 0) * 1.0, 0.5)
+        profile = scorer.score(scan)
+        self.assertEqual(profile.scores.tolist(), [1.0, 1.0, 0.5])
+        scorer.remove_term('avoid_left')
+        self.assertNotIn('avoid_left', scorer.terms)
+
+if __name__ == '__main__':
+    unittest.main()
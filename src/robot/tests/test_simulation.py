@@ -0,0 +1,83 @@
+import math
+import time
+import unittest
+from ..autonomous_navigation import AutonomousRobot
+from ..simulation import CircleObstacle, RectObstacle, Room, SimulatedBackend, VirtualClock
+
+class TestRoom(unittest.TestCase):
+    def test_wall_distance(self):
+        """Rays stop at the room walls."""
+        room = Room(width=400, height=300)
+        self.assertAlmostEqual(room.ray_distance(100, 150, 0), 300)
+        self.assertAlmostEqual(room.ray_distance(100, 150, math.pi), 100)
+        self.assertAlmostEqual(room.ray_distance(100, 150, math.pi / 2), 150)
+
+    def test_obstacle_distance(self):
+        """Rays stop at circles and boxes in their way."""
+        room = Room(obstacles=[CircleObstacle(200, 150, 20), RectObstacle(50, 0, 60, 300)])
+        self.assertAlmostEqual(room.ray_distance(100, 150, 0), 80)
+        self.assertAlmostEqual(room.ray_distance(100, 150, math.pi), 40)
+        self.assertAlmostEqual(room.clearance(100, 150), 40)
+
+    def test_light_falls_off(self):
+        """The light sensor reads more when closer to and facing the light."""
+        room = Room(light=(400, 150))
+        self.assertGreater(room.light_level(300, 150, 0), room.light_level(100, 150, 0))
+        self.assertGreater(room.light_level(300, 150, 0), room.light_level(300, 150, math.pi))
+
+class TestSimulatedBackend(unittest.TestCase):
+    def setUp(self):
+        self.backend = SimulatedBackend(seed=1)
+        self.robot = AutonomousRobot(backend=self.backend)
+        self.world = self.backend.world
+
+    def test_virtual_clock(self):
+        """Sleeping on the virtual clock costs no wall-clock time."""
+        clock = VirtualClock()
+        start = time.monotonic()
+        clock.sleep(3600)
+        self.assertEqual(clock.now(), 3600)
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_move_forward(self):
+        """Driving forward moves the simulated robot along its heading."""
+        x, y, _ = self.world.pose
+        self.robot.move_forward(1.0)
+        self.assertAlmostEqual(self.world.x - x, self.robot.speed * self.world.wheel_speed, delta=1.0)
+        self.assertAlmostEqual(self.world.y, y)
+
+    def test_turn(self):
+        """A commanded turn rotates the robot by roughly that angle."""
+        self.robot.turn(90)
+        self.assertAlmostEqual(self.world.heading, 90, delta=10)
+        self.robot.turn(-90)
+        self.assertAlmostEqual(self.world.heading, 0, delta=10)
+
+    def test_sensors(self):
+        """Simulated sensors return plausible readings."""
+        self.robot.set_servo_angle(0)
+        self.robot.clock.sleep(0.5)
+        self.world.room.obstacles.append(RectObstacle(200, 0, 210, 300))
+        self.assertAlmostEqual(self.robot.get_distance(), 200 - self.world.x, delta=10)
+        self.assertTrue(0 <= self.robot.get_light_level() <= 1)
+        self.assertTrue(0 <= self.robot.get_sound_level() <= 1)
+        self.assertTrue(self.robot.check_battery())
+
+    def test_collision(self):
+        """Driving into a wall is counted as a collision and stops the robot."""
+        backend = SimulatedBackend(room=Room(width=100, height=100, start=(50, 50, 0)))
+        robot = AutonomousRobot(backend=backend)
+        robot.move_forward(10)
+        self.assertEqual(backend.world.collisions, 1)
+        self.assertLess(backend.world.x, 100 - backend.world.robot_radius + 1)
+
+    def test_navigation_faster_than_real_time(self):
+        """A navigation run covers far more simulated than wall-clock time."""
+        start = time.monotonic()
+        self.robot.navigate(max_cycles=20)
+        elapsed = time.monotonic() - start
+        self.assertGreater(self.robot.clock.now(), 10 * elapsed)
+        self.assertGreater(self.world.distance_travelled, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import time
+import unittest
+import numpy as np
+from ..autonomous_navigation import AutonomousRobot
+from ..simulation import SimulatedBackend
+from ..streaming import Frame, GroundStation, TelemetryPublisher, decode_frame, encode_frame
+
+def frame(seq=0, robot='robot-1', bins=5, stages=None):
+    angles = np.linspace(-90, 90, bins)
+    return Frame(robot, seq, 12.5, 0, (10.0, -5.0, 30.0), (0.5, 0.25), 0.1, 15.0, 0.75,
+                 angles, angles + 100, np.full(bins, 0.5), angles, np.linspace(0, 1, bins),
+                 stages or {}, False)
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+class TestFrames(unittest.TestCase):
+    def test_round_trip(self):
+        data = encode_frame(frame(seq=7, stages={'scan': 0.02, 'motion': 0.5, 'custom': 1.0}))
+        decoded = decode_frame(data)
+        self.assertEqual((decoded.robot, decoded.seq, decoded.time), ('robot-1', 7, 12.5))
+        self.assertEqual((decoded.pose, decoded.motors), ((10.0, -5.0, 30.0), (0.5, 0.25)))
+        np.testing.assert_array_equal(decoded.distances, np.linspace(-90, 90, 5) + 100)
+        self.assertEqual(sorted(decoded.stages), ['motion', 'scan'])
+        self.assertAlmostEqual(decoded.stages['scan'], 0.02, places=6)
+        self.assertFalse(decoded.decimated)
+        with self.assertRaises(ValueError):
+            decode_frame(data[:-1])
+
+    def test_large_scan_decimated_to_fit(self):
+        data = encode_frame(frame(bins=181), max_size=1400)
+        self.assertLessEqual(len(data), 1400)
+        decoded = decode_frame(data)
+        self.assertTrue(decoded.decimated)
+        self.assertEqual(decoded.angles[0], -90)
+        self.assertEqual(len(decoded.angles), len(decoded.light_levels))
+
+class TestPublisher(unittest.TestCase):
+    def test_drops_oldest_and_backs_off(self):
+        clock = FakeClock()
+        publisher = TelemetryPublisher(('127.0.0.1', 9), rate=10, min_rate=1, queue_size=2,
+                                       clock=clock, start=False)
+        for _ in range(4):
+            clock.now += 10
+            self.assertTrue(publisher.publish((0, 0, 0), (0, 0)))
+        self.assertEqual(publisher.dropped, 2)
+        self.assertEqual([decode_frame(data).seq for data in publisher._queue], [2, 3])
+        self.assertAlmostEqual(publisher.interval, 0.4)
+        # Cycles within the current interval are skipped
+        clock.now += 0.2
+        self.assertFalse(publisher.publish((0, 0, 0), (0, 0)))
+        self.assertEqual(publisher.skipped, 1)
+        publisher.close()
+
+    def test_publish_does_not_wait_for_the_network(self):
+        clock = FakeClock()
+        with GroundStation('127.0.0.1', 0) as station:
+            publisher = TelemetryPublisher(station.address, rate=1000, clock=clock)
+            started = time.perf_counter()
+            for _ in range(200):
+                clock.now += 1
+                publisher.publish((0, 0, 0), (0, 0), stages={'scan': 0.01})
+            self.assertLess(time.perf_counter() - started, 1.0)
+            publisher.close()
+        self.assertEqual(publisher.sent + publisher.dropped + publisher.skipped, 200)
+        self.assertGreater(publisher.sent, 0)
+
+class TestGroundStation(unittest.TestCase):
+    def test_sequence_accounting(self):
+        with GroundStation('127.0.0.1', 0) as station:
+            address = ('127.0.0.1', 5000)
+            for seq in (0, 1, 3, 2):
+                station.handle(encode_frame(frame(seq)), address)
+            station.handle(b'not a frame', address)
+            track = station.robots['robot-1']
+            self.assertEqual((track.frames, track.lost, track.late), (3, 1, 1))
+            self.assertEqual(station.invalid, 1)
+            # A restarted robot counts from 0 again
+            station.handle(encode_frame(frame(0)), address)
+            self.assertEqual((track.frames, track.lost), (1, 0))
+
+    def test_several_robots_over_loopback(self):
+        with GroundStation('127.0.0.1', 0) as station:
+            robots = []
+            for index in range(2):
+                robot = AutonomousRobot(backend=SimulatedBackend(seed=index), stream=station.address)
+                robot.stream.robot_id = f'robot-{index}'
+                robot.profiler.path = None
+                robot.profiler.enable()
+                robot.navigate(max_cycles=5)
+                robot.cleanup()
+                robots.append(robot)
+            deadline = time.monotonic() + 5
+            while len(station.robots) < 2 and time.monotonic() < deadline:
+                station.receive(0.1)
+            station.receive(0.1)
+            for index, robot in enumerate(robots):
+                track = station.robots[f'robot-{index}']
+                self.assertEqual(track.frames, robot.stream.sent)
+                self.assertEqual(track.lost, 0)
+                np.testing.assert_allclose(track.frame.pose, robot.pose, rtol=1e-5, atol=1e-3)
+                self.assertIn('scan', track.frame.stages)
+                self.assertGreater(len(track.frame.distances), 0)
+            self.assertIn('robot-1', station.format_status())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+from ..sweep import ServoSweep
+
+class TestServoSweep(unittest.TestCase):
+    def test_alternating_direction(self):
+        """Consecutive sweeps reverse direction instead of snapping back."""
+        sweep = ServoSweep(scan_angle=90, bins=7, speed=450)
+        self.assertEqual(sweep.next_sweep(), (-45, 45))
+        self.assertEqual(sweep.next_sweep(), (45, -45))
+        self.assertEqual(sweep.next_sweep(), (-45, 45))
+
+    def test_start_from_nearest_end(self):
+        """A sweep starts from the end nearest the current servo angle."""
+        sweep = ServoSweep(scan_angle=90, bins=7, speed=450)
+        self.assertEqual(sweep.next_sweep(from_angle=45), (45, -45))
+        self.assertEqual(sweep.next_sweep(from_angle=-45), (-45, 45))
+        self.assertEqual(sweep.next_sweep(from_angle=-10), (-45, 45))
+        self.assertEqual(sweep.next_sweep(from_angle=0), (45, -45))
+
+    def test_bin_angles(self):
+        """Bins are spread evenly across the scan angle."""
+        sweep = ServoSweep(scan_angle=90, bins=7)
+        self.assertEqual(sweep.bin_angles.tolist(), [-45, -30, -15, 0, 15, 30, 45])
+
+    def test_interpolate_angles(self):
+        """Sample angles follow the servo at constant speed, then hold."""
+        sweep = ServoSweep(scan_angle=90, bins=7, speed=450)
+        times = [0.0, sweep.duration / 2, sweep.duration, sweep.duration * 2]
+        angles = sweep.interpolate_angles(times, 0.0, 45, -45)
+        np.testing.assert_allclose(angles, [45, 0, -45, -45])
+
+    def test_bin_samples_min(self):
+        """Distances keep the closest reading in each bin."""
+        sweep = ServoSweep(scan_angle=90, bins=3)
+        binned = sweep.bin_samples([-44, -40, 1, 44], [50, 20, 30, 80], reduce='min')
+        self.assertEqual(binned.tolist(), [20, 30, 80])
+
+    def test_bin_samples_fills_gaps(self):
+        """Empty bins are interpolated from their neighbours."""
+        sweep = ServoSweep(scan_angle=90, bins=3)
+        binned = sweep.bin_samples([-45, 45], [0.2, 0.6], reduce='mean')
+        np.testing.assert_allclose(binned, [0.2, 0.4, 0.6])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import math
+import shutil
+import tempfile
+import unittest
+import numpy as np
+from ..autonomous_navigation import AutonomousRobot
+from ..simulation import SimulatedBackend
+from ..telemetry import KINDS, TELEMETRY_DTYPE, TelemetryRecorder, load, run_chunks
+
+class TestTelemetryRecorder(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_records_carry_state(self):
+        """Each record holds the new value and the last value of every other field."""
+        times = iter([1.0, 2.0, 3.0])
+        recorder = TelemetryRecorder(self.directory, clock=lambda: next(times), name='run')
+        recorder.sensor('distance', 42.5, servo=15)
+        recorder.motors(0.4, 0.3, servo=0)
+        recorder.sensor('light', None, servo=0)
+        recorder.close()
+        records = load(recorder.chunks[0])
+        self.assertEqual(records.dtype, TELEMETRY_DTYPE)
+        self.assertEqual(len(records), 3)
+        np.testing.assert_array_equal(records['time'], [1.0, 2.0, 3.0])
+        self.assertEqual(list(records['kind']), [KINDS['distance'], KINDS['motors'], KINDS['light']])
+        self.assertTrue(math.isnan(records['left'][0]))
+        self.assertEqual(records['distance'][1], 42.5)
+        self.assertEqual(records['servo'][0], 15)
+        self.assertAlmostEqual(float(records['left'][2]), 0.4, places=6)
+        self.assertTrue(math.isnan(records['light'][2]))
+
+    def test_chunk_rollover(self):
+        """Full chunks roll over to numbered files that load back in order."""
+        recorder = TelemetryRecorder(self.directory, chunk_records=4, name='run')
+        for i in range(10):
+            recorder.sensor('battery', i, servo=0, timestamp=i)
+        recorder.close()
+        self.assertEqual(len(recorder.chunks), 3)
+        self.assertEqual(run_chunks(recorder.chunks[1]), recorder.chunks)
+        chunks = [load(path) for path in run_chunks(recorder.prefix)]
+        self.assertEqual([len(chunk) for chunk in chunks], [4, 4, 2])
+        self.assertIsInstance(chunks[0], np.memmap)
+        np.testing.assert_array_equal(np.concatenate(chunks)['battery'], np.arange(10))
+
+class TestRobotTelemetry(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_robot_records_readings_and_commands(self):
+        """Sensor getters and motor commands are recorded with the servo angle."""
+        robot = AutonomousRobot(backend=SimulatedBackend(), telemetry=self.directory)
+        robot.scan_mode = 'step'
+        robot.scan_environment()
+        robot.move_motor(0.4, 0.4)
+        robot.cleanup()
+        records = np.concatenate([load(path) for path in run_chunks(robot.telemetry.prefix)])
+        distances = records[records['kind'] == KINDS['distance']]
+        self.assertEqual(len(distances), 7)
+        np.testing.assert_array_equal(distances['servo'], range(-45, 46, 15))
+        motors = records[records['kind'] == KINDS['motors']]
+        self.assertEqual(motors['left'][0], np.float32(0.4))
+        # cleanup() stops the motors last
+        self.assertEqual(motors['left'][-1], 0.0)
+        self.assertTrue(np.all(np.diff(records['time']) >= 0))
+
+    def test_disabled_by_default(self):
+        """Without a directory nothing is recorded."""
+        robot = AutonomousRobot(backend=SimulatedBackend())
+        self.assertIsNone(robot.telemetry)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+from ..autonomous_navigation import AutonomousRobot
+from ..simulation import SimulatedBackend
+from ..tuning import EpisodeCache, Tuner, episode_cost, load_profile, score, tune
+
+SPACE = {'SPEED': (0.2, 1.0), 'SCAN_INTERVAL': (0.0, 0.3)}
+
+def episode(reached, time_to_goal, collisions=0):
+    return {'reached': reached, 'time_to_goal': time_to_goal, 'collisions': collisions}
+
+class TestCost(unittest.TestCase):
+    def test_collisions_cost_as_much_as_failing(self):
+        self.assertEqual(episode_cost(episode(True, 60.0)), 60.0)
+        self.assertEqual(episode_cost(episode(True, 60.0, collisions=1), failure_time=300), 300)
+        self.assertEqual(episode_cost(episode(False, None), failure_time=300), 300)
+
+    def test_score(self):
+        result = score([episode(True, 60.0), episode(True, 80.0, collisions=2)], failure_time=300)
+        self.assertEqual(result['cost'], 180.0)
+        self.assertEqual(result['crossed'], 0.5)
+        self.assertEqual(result['collisions'], 2)
+        self.assertEqual(result['mean_time'], 60.0)
+
+class TestTuner(unittest.TestCase):
+    def test_candidates_rounded_within_bounds(self):
+        tuner = Tuner(space=SPACE)
+        parameters = tuner._parameters([1.7, 0.123])
+        self.assertEqual(parameters, {'SPEED': 1.0, 'SCAN_INTERVAL': 0.036})
+
+    def test_cache_key(self):
+        job = (3, 'reactive', 50, {'SPEED': 0.5})
+        self.assertEqual(EpisodeCache.key(job, 'v1'), EpisodeCache.key((3, 'reactive', 50, {'SPEED': 0.5}), 'v1'))
+        self.assertNotEqual(EpisodeCache.key(job, 'v1'), EpisodeCache.key((3, 'reactive', 50, {'SPEED': 0.6}), 'v1'))
+        self.assertNotEqual(EpisodeCache.key(job, 'v1'), EpisodeCache.key(job, 'v2'))
+
+    def test_repeated_run_is_cached(self):
+        with tempfile.TemporaryDirectory() as directory:
+            options = dict(space=SPACE, episodes=2, population=3, generations=2, max_cycles=5, workers=1)
+            cache_file = os.path.join(directory, 'cache.json')
+            first = Tuner(cache=EpisodeCache(cache_file), **options)
+            best, _, _ = first.run()
+            self.assertGreater(first.cache.misses, 0)
+            second = Tuner(cache=EpisodeCache(cache_file), **options)
+            self.assertEqual(second.run()[0], best)
+            self.assertEqual(second.cache.misses, 0)
+
+    def test_profile_loads_into_robot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'profile.json')
+            profile = tune(output=path, validation=1, space=SPACE, episodes=1, population=2,
+                           generations=1, max_cycles=3, workers=1)
+            parameters = load_profile(path)
+        self.assertEqual(parameters, profile['parameters'])
+        self.assertIn('validation', profile)
+        robot = AutonomousRobot(backend=SimulatedBackend())
+        robot.apply_parameters({'SPEED': 0.7, 'SCAN_INTERVAL': 0.05})
+        self.assertEqual((robot.speed, robot.scan_interval), (0.7, 0.05))
+        with self.assertRaises(ValueError):
+            robot.apply_parameters({'WARP_FACTOR': 9})
+
+if __name__ == '__main__':
+    unittest.main()
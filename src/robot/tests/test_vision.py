@@ -0,0 +1,89 @@
+import time
+import unittest
+from multiprocessing import shared_memory
+from unittest.mock import patch
+import numpy as np
+from ..vision import FramePipeline, frame_features
+
+def floor_with_box(width=160, height=120, box_columns=None):
+    """A plain floor, optionally with a bright box standing on it."""
+    frame = np.full((height, width, 3), 100, dtype=np.uint8)
+    if box_columns is not None:
+        frame[height // 3:height - 10, box_columns[0]:box_columns[1]] = 250
+    return frame
+
+class StaticCamera:
+    def __init__(self, frame):
+        self.frame = frame
+        self.reads = 0
+
+    def get_frame(self):
+        self.reads += 1
+        return self.frame
+
+class TestFrameFeatures(unittest.TestCase):
+    def test_clear_floor(self):
+        """An empty floor is free in every bin."""
+        free_space, obstacles, _ = frame_features(floor_with_box(), bins=8, downscale=2)
+        np.testing.assert_allclose(free_space, 1.0)
+        np.testing.assert_allclose(obstacles, 0.0)
+
+    def test_box_blocks_its_bins(self):
+        """A box on the right limits free space and adds clutter on that side only."""
+        frame = floor_with_box(box_columns=(100, 140))
+        free_space, obstacles, brightness = frame_features(frame, bins=8, downscale=2)
+        self.assertTrue(np.all(free_space[:4] == 1.0))
+        self.assertLess(free_space[5:7].max(), 0.2)
+        self.assertGreater(obstacles[5:7].min(), 0.0)
+        self.assertGreater(brightness[6], brightness[1])
+
+class TestFramePipeline(unittest.TestCase):
+    def test_latest_result(self):
+        """Frames go through the worker process and come back as features."""
+        camera = StaticCamera(floor_with_box(box_columns=(100, 140)))
+        pipeline = FramePipeline(camera, framerate=50, slots=3, bins=8)
+        self.assertIsNone(pipeline.latest())
+        pipeline.start()
+        try:
+            result = None
+            deadline = time.monotonic() + 20
+            while (result is None or result.seq < 5) and time.monotonic() < deadline:
+                time.sleep(0.02)
+                result = pipeline.latest()
+            self.assertIsNotNone(result)
+            self.assertGreaterEqual(result.seq, 5)
+            self.assertEqual(len(result.free_space), 8)
+            self.assertLess(result.free_space[6], 0.2)
+            self.assertGreaterEqual(result.latency, 0)
+            self.assertEqual(result.bearings.shape, (8,))
+            self.assertLess(result.bearings[0], 0)
+        finally:
+            pipeline.stop()
+        self.assertFalse(pipeline.running)
+        self.assertGreater(pipeline.stats()['processed'], 0)
+        self.assertIsNone(pipeline.latest())
+
+    def test_failed_start_releases_shared_memory(self):
+        """A worker that cannot start leaves no shared memory behind."""
+        pipeline = FramePipeline(StaticCamera(floor_with_box()), framerate=50, slots=3, bins=8)
+        created = []
+        allocate = shared_memory.SharedMemory
+
+        def recording(*args, **kwargs):
+            block = allocate(*args, **kwargs)
+            created.append(block.name)
+            return block
+
+        with patch('robot.vision.shared_memory.SharedMemory', side_effect=recording), \
+             patch('multiprocessing.context.SpawnProcess.start', side_effect=OSError("no worker")):
+            with self.assertRaises(OSError):
+                pipeline.start()
+        self.assertEqual(len(created), 2)
+        for name in created:
+            with self.assertRaises(FileNotFoundError):
+                shared_memory.SharedMemory(name=name)
+        self.assertFalse(pipeline.running)
+        pipeline.stop()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,318 @@
+"""
+Search for movement parameters on simulated episodes (`robot tune`).
+
+The movement constants in config.py (SPEED, TURN_MAX_SPEED, SAFE_DISTANCE,
+SCAN_INTERVAL, MOVE_DURATION, TARGET_LIGHT_LEVEL; see TUNE_SPACE) are
+tuned against Monte Carlo episodes on random rooms (see montecarlo.py):
+
+    cost = mean over episodes of the simulated time to reach the goal, or
+           TUNE_FAILURE_TIME for an episode that collides or never gets there
+
+so a collision costs as much as not crossing at all, and among collision-free
+crossings faster is better.
+
+The search is a cross-entropy method, a simplified CMA-ES with a diagonal
+covariance, in coordinates scaled to [0, 1] per parameter. Each generation
+samples candidates around the current mean, evaluates every (candidate, room)
+episode on a process pool, and moves the mean and spread to the best quarter.
+The mean itself is always re-evaluated, starting from the config values.
+Every candidate runs on the same rooms, so differences come from the
+parameters and not from the rooms drawn.
+
+Candidates are rounded to 1% of each range. Each episode result is cached
+under a hash of the parameters, the episode settings and the package source,
+so repeated candidates and re-runs are not recomputed, while a code change
+starts afresh. The best parameters are checked on rooms not used for
+training and written as a profile, which `robot navigate --tuned` loads.
+"""
+
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from . import config
+from .config import TUNE_FAILURE_TIME, TUNE_SPACE, TUNED_PROFILE_FILE
+from .logger import logger
+from .montecarlo import map_episodes
+
+PROFILE_VERSION = 1
+VALIDATION_SEEDS = 100000  # first seed of the held-out rooms
+QUANTUM = 0.01  # candidates are rounded to this fraction of each range
+
+
+def code_version():
+    """Hash of the package source (without tests), which episode results depend on."""
+    package = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for name in sorted(os.listdir(package)):
+        if name.endswith('.py'):
+            with open(os.path.join(package, name), 'rb') as f:
+                digest.update(name.encode() + b'\0' + f.read())
+    return digest.hexdigest()[:12]
+
+
+def episode_cost(episode, failure_time=TUNE_FAILURE_TIME):
+    """Simulated seconds to a collision-free crossing, or failure_time."""
+    if episode['reached'] and episode['collisions'] == 0:
+        return episode['time_to_goal']
+    return failure_time
+
+
+def score(episodes, failure_time=TUNE_FAILURE_TIME):
+    """
+    Cost of one candidate over its episodes.
+
+    Returns:
+        dict: {'cost', 'crossed' (fraction of collision-free crossings),
+            'collisions' (total), 'mean_time' (of those crossings, or None)}
+    """
+    costs = [episode_cost(episode, failure_time) for episode in episodes]
+    times = [e['time_to_goal'] for e in episodes if e['reached'] and e['collisions'] == 0]
+    return {
+        'cost': float(np.mean(costs)),
+        'crossed': len(times) / len(episodes),
+        'collisions': sum(episode['collisions'] for episode in episodes),
+        'mean_time': float(np.mean(times)) if times else None,
+    }
+
+
+class EpisodeCache:
+    """Episode results keyed by a hash of everything that determines them."""
+
+    def __init__(self, path=None):
+        """
+        Args:
+            path (str): JSON file to load from and save to; None keeps the
+                cache in memory only
+        """
+        self.path = path
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable tuning cache {path}: {str(e)}")
+
+    @staticmethod
+    def key(job, version):
+        seed, mode, max_cycles, parameters = job
+        text = json.dumps([version, seed, mode, max_cycles, sorted(parameters.items())])
+        return hashlib.sha256(text.encode()).hexdigest()[:24]
+
+    def get(self, key):
+        episode = self.entries.get(key)
+        if episode is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return episode
+
+    def put(self, key, episode):
+        self.entries[key] = episode
+
+    def save(self):
+        if not self.path:
+            return
+        temporary = f"{self.path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump(self.entries, f)
+        os.replace(temporary, self.path)
+
+
+class Tuner:
+    """Cross-entropy search over TUNE_SPACE on simulated episodes."""
+
+    def __init__(self, space=None, mode='reactive', max_cycles=300, episodes=20, population=10,
+                 generations=6, workers=None, cache=None, seed=0, failure_time=TUNE_FAILURE_TIME):
+        """
+        Args:
+            space (dict): Config constant -> (min, max) (default: TUNE_SPACE)
+            mode (str): Navigation loop, 'reactive' or 'planned'
+            max_cycles (int): Loop iterations per episode
+            episodes (int): Training rooms every candidate runs on
+            population (int): Candidates per generation
+            generations (int): Generations to run
+            workers (int): Worker processes (default: one per CPU)
+            cache (EpisodeCache): Episode results (default: in memory only)
+            seed (int): Seed of the candidate sampling
+            failure_time (float): Cost of a failed episode, see episode_cost()
+        """
+        self.space = dict(space or TUNE_SPACE)
+        self.names = list(self.space)
+        self.low = np.array([self.space[name][0] for name in self.names], dtype=float)
+        self.high = np.array([self.space[name][1] for name in self.names], dtype=float)
+        self.mode = mode
+        self.max_cycles = max_cycles
+        self.seeds = list(range(episodes))
+        self.population = population
+        self.generations = generations
+        self.elite = max(2, population // 4)
+        self.workers = workers
+        self.cache = cache if cache is not None else EpisodeCache()
+        self.rng = np.random.default_rng(seed)
+        self.failure_time = failure_time
+        self.version = code_version()
+        self.history = []
+
+    def defaults(self):
+        """Current config values of the searched parameters."""
+        return {name: getattr(config, name) for name in self.names}
+
+    def _parameters(self, point):
+        """Parameters at a point in [0, 1] coordinates, rounded to QUANTUM."""
+        point = np.round(np.clip(point, 0.0, 1.0) / QUANTUM) * QUANTUM
+        values = self.low + point * (self.high - self.low)
+        return {name: round(float(value), 4) for name, value in zip(self.names, values)}
+
+    def _point(self, parameters):
+        values = np.array([parameters[name] for name in self.names], dtype=float)
+        return np.clip((values - self.low) / (self.high - self.low), 0.0, 1.0)
+
+    def evaluate(self, candidates, seeds=None):
+        """
+        Score candidates on the same rooms, running uncached episodes in parallel.
+
+        Args:
+            candidates (list): Parameter dicts
+            seeds (list): Room seeds (default: the training rooms)
+
+        Returns:
+            list: score() of each candidate
+        """
+        seeds = self.seeds if seeds is None else seeds
+        jobs = [(seed, self.mode, self.max_cycles, parameters) for parameters in candidates for seed in seeds]
+        keys = [EpisodeCache.key(job, self.version) for job in jobs]
+        results = [self.cache.get(key) for key in keys]
+        missing = {}
+        for index, result in enumerate(results):
+            # Candidates repeated within a generation run once
+            if result is None:
+                missing.setdefault(keys[index], jobs[index])
+        if missing:
+            for key, episode in zip(missing, map_episodes(list(missing.values()), self.workers)):
+                self.cache.put(key, episode)
+            self.cache.save()
+            results = [self.cache.entries[key] for key in keys]
+        return [score(results[i:i + len(seeds)], self.failure_time) for i in range(0, len(results), len(seeds))]
+
+    def run(self):
+        """
+        Run the search.
+
+        Returns:
+            tuple: (best parameters, their training score, score of the defaults)
+        """
+        mean = self._point(self.defaults())
+        spread = np.full(len(self.names), 0.25)
+        best, best_score, baseline = None, None, None
+        for generation in range(self.generations):
+            started = time.perf_counter()
+            points = [mean] + [mean + spread * self.rng.standard_normal(len(mean))
+                               for _ in range(self.population - 1)]
+            candidates = [self._parameters(point) for point in points]
+            if generation == 0:
+                # The config values themselves, unrounded
+                candidates[0] = self.defaults()
+            scores = self.evaluate(candidates)
+            if generation == 0:
+                baseline = scores[0]
+            order = sorted(range(len(candidates)), key=lambda i: scores[i]['cost'])
+            if best_score is None or scores[order[0]]['cost'] < best_score['cost']:
+                best, best_score = candidates[order[0]], scores[order[0]]
+
+            elite = np.array([self._point(candidates[i]) for i in order[:self.elite]])
+            mean = elite.mean(axis=0)
+            # Smoothed so the spread does not collapse on a lucky generation
+            spread = np.maximum(0.7 * elite.std(axis=0) + 0.3 * spread, QUANTUM)
+            self.history.append({'generation': generation, 'best': best_score['cost'],
+                                 'generation_best': scores[order[0]]['cost']})
+            logger.info(
+                f"Generation {generation + 1}/{self.generations}: best cost {best_score['cost']:.1f} s "
+                f"({best_score['crossed']:.0%} clean crossings), this generation {scores[order[0]]['cost']:.1f} s, "
+                f"{time.perf_counter() - started:.1f} s, cache {self.cache.hits} hits / {self.cache.misses} misses"
+            )
+        return best, best_score, baseline
+
+
+def tune(output=TUNED_PROFILE_FILE, validation=40, **options):
+    """
+    Tune, validate on held-out rooms and write a profile.
+
+    Args:
+        output (str): Profile file to write
+        validation (int): Held-out rooms to compare the defaults and the
+            tuned parameters on; 0 to skip
+        **options: Passed to Tuner
+
+    Returns:
+        dict: The profile
+    """
+    tuner = Tuner(**options)
+    best, training, baseline = tuner.run()
+    profile = {
+        'version': PROFILE_VERSION,
+        'parameters': best,
+        'defaults': tuner.defaults(),
+        'training': {'tuned': training, 'defaults': baseline, 'episodes': len(tuner.seeds)},
+        'settings': {
+            'mode': tuner.mode,
+            'max_cycles': tuner.max_cycles,
+            'population': tuner.population,
+            'generations': tuner.generations,
+            'failure_time': tuner.failure_time,
+            'code': tuner.version,
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        },
+        'history': tuner.history,
+    }
+    if validation:
+        seeds = list(range(VALIDATION_SEEDS, VALIDATION_SEEDS + validation))
+        tuned, defaults = tuner.evaluate([best, tuner.defaults()], seeds)
+        profile['validation'] = {'tuned': tuned, 'defaults': defaults, 'episodes': validation}
+    save_profile(output, profile)
+    return profile
+
+
+def save_profile(path, profile):
+    with open(path, 'w') as f:
+        json.dump(profile, f, indent=2)
+
+
+def load_profile(path):
+    """
+    Parameters of a profile written by tune().
+
+    Returns:
+        dict: Config constant -> value, for AutonomousRobot.apply_parameters()
+    """
+    with open(path) as f:
+        profile = json.load(f)
+    if profile.get('version') != PROFILE_VERSION:
+        raise ValueError(f"{path} is not a version {PROFILE_VERSION} tuned profile")
+    return profile['parameters']
+
+
+def format_profile(profile):
+    """Parameters and training/validation scores of a profile."""
+    lines = [f"{'parameter':<20} {'default':>9} {'tuned':>9}"]
+    for name, value in profile['parameters'].items():
+        lines.append(f"{name:<20} {profile['defaults'][name]:>9.3f} {value:>9.3f}")
+    for split in ('training', 'validation'):
+        if split not in profile:
+            continue
+        results = profile[split]
+        for which in ('defaults', 'tuned'):
+            result = results[which]
+            mean_time = '-' if result['mean_time'] is None else f"{result['mean_time']:.1f} s"
+            lines.append(
+                f"{split} {which:<8} cost {result['cost']:6.1f} s, {result['crossed']:.0%} clean crossings "
+                f"of {results['episodes']}, {result['collisions']} collisions, mean crossing {mean_time}"
+            )
+    return '\n'.join(lines)
@@ -0,0 +1,361 @@
+"""
+Camera frame pipeline for the autonomous robot.
+
+A capture thread copies each camera frame into a ring of preallocated
+frames in shared memory and passes the slot index to a separate vision
+process, so the OpenCV work runs outside the control process's GIL. That
+one copy is the only one: the worker reads the frame through its own view
+of the same memory. The worker turns the newest frame into a few
+downsampled features per heading bin and writes them to a shared result
+block, which the navigator reads without blocking.
+
+Slots and the result block are guarded by sequence numbers (a seqlock):
+a slot's sequence number is cleared while it is being overwritten, so the
+worker drops any frame that changed under it instead of processing a torn
+image, and readers retry a result that was being written.
+
+Features, per bin across the camera's field of view:
+
+    free_space  fraction of the image height, from the bottom edge up to the
+                first strong edge; a clear floor ahead reads close to 1
+    obstacles   edge density in the lower half of the image
+    brightness  mean brightness (0 to 1), for light seeking
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from .config import (
+    CAMERA_FOV,
+    CAMERA_FRAMERATE,
+    VISION_BINS,
+    VISION_DOWNSCALE,
+    VISION_EDGE_THRESHOLDS,
+    VISION_SLOTS,
+)
+from .light_direction import column_brightness
+from .logger import logger
+
+# Result block layout: header fields followed by the per-bin features
+_VERSION, _SEQ, _CAPTURED, _PROCESSED, _COUNT, _SKIPPED = range(6)
+_HEADER = 6
+_FEATURES = 3
+
+
+def frame_features(frame, bins=VISION_BINS, downscale=VISION_DOWNSCALE,
+                   thresholds=VISION_EDGE_THRESHOLDS):
+    """
+    Downsampled free-space and obstacle features of one frame.
+
+    Args:
+        frame (np.ndarray): HxWx3 BGR (or HxW grayscale) uint8 image
+        bins (int): Number of heading bins across the image
+        downscale (int): Factor to shrink the image by before edge detection
+        thresholds (tuple): Canny hysteresis thresholds
+
+    Returns:
+        tuple: (free_space, obstacles, brightness) float arrays of length bins
+    """
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    height, width = gray.shape
+    small = cv2.resize(gray, (max(width // downscale, bins), max(height // downscale, 2)),
+                       interpolation=cv2.INTER_AREA)
+    brightness_columns = column_brightness(small)
+    small = cv2.GaussianBlur(small, (5, 5), 0)
+    edges = cv2.Canny(small, *thresholds) > 0
+    rows, columns = edges.shape
+
+    # Distance from the bottom row to the first edge in each column
+    from_bottom = edges[::-1]
+    first_edge = np.where(from_bottom.any(axis=0), from_bottom.argmax(axis=0), rows)
+    free_columns = first_edge / rows
+    lower_density = edges[rows // 2:].mean(axis=0)
+
+    # Conservative over each bin: the least free column, the mean clutter
+    edges_at = np.linspace(0, columns, bins + 1).astype(int)
+    free_space = np.minimum.reduceat(free_columns, edges_at[:-1])
+    obstacles = np.add.reduceat(lower_density, edges_at[:-1]) / np.diff(edges_at)
+    brightness = np.add.reduceat(brightness_columns, edges_at[:-1]) / np.diff(edges_at)
+    return free_space, obstacles, brightness
+
+
+def _attach(name, shape, dtype):
+    """Open an existing shared memory block as an array, from the worker process."""
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _vision_worker(frame_name, frame_shape, meta_name, slots, bins, indices):
+    """Vision process main loop: process the newest frame slot until told to stop."""
+    frame_shm, frames = _attach(frame_name, frame_shape, np.uint8)
+    meta_shm, meta = _attach(meta_name, (2 * slots + _HEADER + _FEATURES * bins,), np.float64)
+    slot_meta = meta[:2 * slots].reshape(slots, 2)
+    result = meta[2 * slots:]
+    try:
+        while True:
+            item = indices.get()
+            # Fell behind: skip straight to the newest frame
+            while item is not None:
+                try:
+                    newer = indices.get_nowait()
+                except queue.Empty:
+                    break
+                result[_SKIPPED] += 1
+                item = newer
+            if item is None:
+                break
+
+            slot, seq = item
+            if slot_meta[slot, 0] != seq:
+                result[_SKIPPED] += 1
+                continue
+            features = frame_features(frames[slot], bins)
+            if slot_meta[slot, 0] != seq:
+                # Overwritten while we were reading it
+                result[_SKIPPED] += 1
+                continue
+
+            result[_VERSION] += 1
+            result[_SEQ] = seq
+            result[_CAPTURED] = slot_meta[slot, 1]
+            result[_HEADER:] = np.concatenate(features)
+            result[_COUNT] += 1
+            result[_PROCESSED] = time.monotonic()
+            result[_VERSION] += 1
+    finally:
+        del frames, meta, slot_meta, result
+        frame_shm.close()
+        meta_shm.close()
+
+
+class VisionResult:
+    """Features of one processed frame."""
+
+    def __init__(self, seq, captured_at, processed_at, free_space, obstacles, brightness):
+        self.seq = seq
+        self.captured_at = captured_at
+        self.processed_at = processed_at
+        self.free_space = free_space
+        self.obstacles = obstacles
+        self.brightness = brightness
+        bins = len(free_space)
+        self.bearings = ((np.arange(bins) + 0.5) / bins - 0.5) * CAMERA_FOV
+
+    @property
+    def latency(self):
+        """Seconds from the frame being captured to its features being ready."""
+        return self.processed_at - self.captured_at
+
+    @property
+    def age(self):
+        return time.monotonic() - self.captured_at
+
+
+class FramePipeline:
+    """Capture thread, shared-memory frame ring and vision worker process."""
+
+    def __init__(self, camera, framerate=CAMERA_FRAMERATE, slots=VISION_SLOTS, bins=VISION_BINS):
+        """
+        Args:
+            camera: Device with get_frame() returning an HxWx3 uint8 array
+            framerate (float): Capture rate in Hz
+            slots (int): Frames in the shared ring
+            bins (int): Heading bins in the features
+        """
+        self.camera = camera
+        self.framerate = framerate
+        self.slots = slots
+        self.bins = bins
+        self.frames_captured = 0
+        self.capture_errors = 0
+        self.latencies = []
+        self._final_stats = {}
+        self._frame_shm = None
+        self._meta_shm = None
+        self._frames = None
+        self._slot_meta = None
+        self._result = None
+        self._indices = None
+        self._process = None
+        self._thread = None
+        self._stop_event = threading.Event()
+        self._started_at = None
+        self._last_seq = 0
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Allocate the shared ring, start the vision process and the capture thread."""
+        if self.running:
+            return
+        first = np.asarray(self.camera.get_frame(), dtype=np.uint8)
+        frame_shape = (self.slots,) + first.shape
+        try:
+            self._frame_shm = shared_memory.SharedMemory(create=True, size=int(np.prod(frame_shape)))
+            self._frames = np.ndarray(frame_shape, dtype=np.uint8, buffer=self._frame_shm.buf)
+            meta_size = 2 * self.slots + _HEADER + _FEATURES * self.bins
+            self._meta_shm = shared_memory.SharedMemory(create=True, size=meta_size * 8)
+            meta = np.ndarray((meta_size,), dtype=np.float64, buffer=self._meta_shm.buf)
+            meta[:] = 0
+            self._slot_meta = meta[:2 * self.slots].reshape(self.slots, 2)
+            self._slot_meta[:, 0] = -1
+            self._result = meta[2 * self.slots:]
+
+            # spawn rather than fork: the control process already runs threads
+            context = multiprocessing.get_context('spawn')
+            self._indices = context.Queue()
+            self._process = context.Process(
+                target=_vision_worker,
+                args=(self._frame_shm.name, frame_shape, self._meta_shm.name,
+                      self.slots, self.bins, self._indices),
+                name='vision-worker', daemon=True,
+            )
+            self._process.start()
+
+            self.frames_captured = 0
+            self.latencies = []
+            self._last_seq = 0
+            self._stop_event.clear()
+            self._started_at = time.monotonic()
+            self._thread = threading.Thread(target=self._capture, name='vision-capture', daemon=True)
+            self._thread.start()
+        except BaseException:
+            # Never leave /dev/shm blocks behind for a pipeline that is not running
+            self._thread = None
+            self._abort_start()
+            raise
+        logger.info(f"Vision pipeline started ({first.shape[1]}x{first.shape[0]} "
+                    f"@ {self.framerate} fps, {self.slots} slots)")
+
+    def stop(self, timeout=2.0):
+        """Stop capturing, shut the worker down and release the shared memory."""
+        if self._thread is None:
+            return
+        self._stop_event.set()
+        self._thread.join(timeout)
+        self._thread = None
+        self._indices.put(None)
+        self._process.join(timeout)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process = None
+        self._indices.close()
+        self._indices = None
+        self._final_stats = self.stats()
+        self.log_stats()
+        self._release_shared()
+
+    def _abort_start(self):
+        """Undo a start() that failed part way."""
+        if self._process is not None:
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+            self._process = None
+        if self._indices is not None:
+            self._indices.close()
+            self._indices = None
+        self._release_shared()
+
+    def _release_shared(self):
+        self._frames = self._slot_meta = self._result = None
+        for shm in (self._frame_shm, self._meta_shm):
+            if shm is not None:
+                shm.close()
+                shm.unlink()
+        self._frame_shm = self._meta_shm = None
+
+    def _capture(self):
+        period = 1.0 / self.framerate
+        next_time = time.monotonic()
+        seq = 0
+        while not self._stop_event.is_set():
+            try:
+                frame = self.camera.get_frame()
+            except Exception as e:
+                self.capture_errors += 1
+                logger.debug(f"Camera read failed: {str(e)}")
+            else:
+                captured_at = time.monotonic()
+                seq += 1
+                slot = seq % self.slots
+                self._slot_meta[slot, 0] = -1
+                np.copyto(self._frames[slot], frame, casting='unsafe')
+                self._slot_meta[slot, 1] = captured_at
+                self._slot_meta[slot, 0] = seq
+                self._indices.put((slot, seq))
+                self.frames_captured = seq
+
+            next_time += period
+            delay = next_time - time.monotonic()
+            if delay < 0:
+                # Fell behind; resynchronise rather than bursting to catch up
+                next_time = time.monotonic()
+            else:
+                self._stop_event.wait(delay)
+
+    def latest(self):
+        """
+        Features of the most recently processed frame, without blocking.
+
+        Returns:
+            VisionResult: Latest result, or None if nothing has been processed
+        """
+        result = self._result
+        if result is None:
+            return None
+        for _ in range(3):
+            version = result[_VERSION]
+            if version % 2:
+                # Being written; try again
+                continue
+            header = result[:_HEADER].copy()
+            features = result[_HEADER:].copy()
+            if result[_VERSION] == version:
+                break
+        else:
+            return None
+        if header[_COUNT] == 0:
+            return None
+        seq = int(header[_SEQ])
+        if seq != self._last_seq:
+            self._last_seq = seq
+            self.latencies.append(header[_PROCESSED] - header[_CAPTURED])
+        return VisionResult(seq, header[_CAPTURED], header[_PROCESSED],
+                            *features.reshape(_FEATURES, self.bins))
+
+    def stats(self):
+        """Throughput and latency since the pipeline started (or of the last run)."""
+        if self._result is None:
+            return dict(self._final_stats)
+        elapsed = max(time.monotonic() - self._started_at, 1e-9)
+        processed = int(self._result[_COUNT])
+        stats = {
+            'captured': self.frames_captured,
+            'processed': processed,
+            'skipped': int(self._result[_SKIPPED]),
+            'capture_fps': self.frames_captured / elapsed,
+            'processed_fps': processed / elapsed,
+        }
+        if self.latencies:
+            latencies = np.array(self.latencies) * 1000
+            stats['latency_p50_ms'] = float(np.percentile(latencies, 50))
+            stats['latency_p95_ms'] = float(np.percentile(latencies, 95))
+        return stats
+
+    def log_stats(self):
+        stats = self.stats()
+        if not stats:
+            return
+        logger.info(
+            f"Vision: {stats['captured']} frames captured, {stats['processed']} processed "
+            f"({stats['processed_fps']:.1f} fps), {stats['skipped']} skipped"
+        )